@@ -52,3 +52,11 @@ class CNNFeatureExtractor(nn.Module):
         x = x.view(x.size(0), -1)
         x = self.fc_layers(x)
         return x
+
+    def forward_with_map(self, x):
+        """
+        同时返回全局池化前的卷积特征图 [batch_size, 512, H/4, W/4] 和 forward 的输出 [batch_size, feature_dim]
+        """
+        feature_map = self.conv_layers[:-1](x)
+        x = self.conv_layers[-1](feature_map).flatten(1)
+        return feature_map, self.fc_layers(x)
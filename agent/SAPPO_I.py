@@ -1,10 +1,10 @@
 import torch
 import torch.nn as nn
 import torch.optim as optim
-import pickle
 import numpy as np
 import math
 import os
+from types import SimpleNamespace
 import matplotlib
 
 try:
@@ -15,7 +15,13 @@ import matplotlib.pyplot as plt
 
 from CNN import CNNFeatureExtractor
 from conj import config
+from rollout_memory import RolloutMemory
+from inference_server import InferenceServer, LocalPolicyClient, run_greedy_episodes
 from env.env_I import WarehouseEnv
+from env.action_space import ActionCatalog
+from env.order_instance import OrderInstance
+from env.subproc_vec_env import SubprocVecWarehouseEnv
+from env.profiler import NULL_PROFILER, Profiler, instrument
 
 # 添加 Visdom 导入
 try:
@@ -39,6 +45,10 @@ TRAINING_DATA_PATH = os.path.abspath(os.path.join(
 FIGURES_DIR = os.path.abspath(os.path.join(
     BASE_DIR, "..", "results", "SAPPO", "SAPPO_lambda20", "p2r6"
 ))
+# 模型检查点（含布局与车队规模，见 save_checkpoint / load_checkpoint）
+CHECKPOINT_PATH = os.path.abspath(os.path.join(
+    BASE_DIR, "..", "results", "SAPPO", "SAPPO_lambda20", "p2r6", "SAPPO_I_p2r6.pt"
+))
 
 # # 训练数据保存路径（.npz）
 # TRAINING_DATA_PATH = os.path.abspath(os.path.join(
@@ -57,13 +67,17 @@ print("[PATH] FIGURES_DIR =", FIGURES_DIR)
 # Update policy every N episodes by accumulating rollout in memory
 UPDATE_EVERY_EPISODES = 1  # update every episode (original PPO_I behavior)
 
-
-env = WarehouseEnv()
 device = config.device
-action_num = (env.N_robots + env.N_pickers) * env.N_l * env.N_w + env.N_robots
+CHECKPOINT_FORMAT = 1
+
+
+def default_action_num():
+    """默认配置（class_config 中的布局与车队规模）下的扁平动作空间大小"""
+    return ActionCatalog.for_env(WarehouseEnv()).size
+
 
 class PolicyNetwork(nn.Module):
-    def __init__(self, cfg=config):
+    def __init__(self, cfg=config, n_actions=None):
         super().__init__()
         self.device = device
 
@@ -74,7 +88,7 @@ class PolicyNetwork(nn.Module):
             nn.ReLU(),
             nn.Linear(2048, 2048),
             nn.ReLU(),
-            nn.Linear(2048, action_num)  # 输出所有动作的得分
+            nn.Linear(2048, default_action_num() if n_actions is None else n_actions)  # 输出所有动作的得分
         )
 
     def forward(self, state):
@@ -118,216 +132,489 @@ class ValueNetwork(nn.Module):
 
         return value
 
+
+def scale_grad(x, scale):
+    """前向恒等（数值不变），反向把流经 x 的梯度乘以 scale"""
+    if scale == 1.0:
+        return x
+    detached = x.detach()
+    return detached + scale * (x - detached)
+
+
+class SharedTrunkPolicyNetwork(nn.Module):
+    """共享主干：一个 CNN 特征同时供策略 MLP（本模块）和价值头（SharedValueNetwork）使用"""
+
+    def __init__(self, cfg=config, n_actions=None):
+        super().__init__()
+        self.device = device
+
+        self.cnn = CNNFeatureExtractor(4, cfg.cnn_output_dim).to(self.device)
+
+        self.mlp = nn.Sequential(
+            nn.Linear(cfg.cnn_output_dim, 2048),
+            nn.ReLU(),
+            nn.Linear(2048, 2048),
+            nn.ReLU(),
+            nn.Linear(2048, default_action_num() if n_actions is None else n_actions)  # 输出所有动作的得分
+        )
+
+    def forward(self, state):
+        if isinstance(state, np.ndarray):
+            state = torch.from_numpy(state).float().to(self.device)
+        if state.dim() == 3:
+            state = state.unsqueeze(0)
+        return self.head(state, self.cnn(state))  # [B, action_num]
+
+    def head(self, state, features, candidates=None):
+        """共享特征 -> 全部动作的 logits（扁平动作头不支持只算候选动作）"""
+        if candidates is not None:
+            raise ValueError("the flat policy head scores the whole action space")
+        return self.mlp(features)
+
+
+class SharedValueNetwork(nn.Module):
+    """
+    共享主干的价值头：参数只有 value_head（CNN 属于 SharedTrunkPolicyNetwork，由策略优化器更新），
+    价值损失回传到 CNN 的梯度乘以 cfg.value_grad_scale，以免 critic 的噪声梯度主导共享特征
+    """
+
+    def __init__(self, trunk, cfg=config):
+        super().__init__()
+        self.device = device
+        self._trunk = [trunk]  # 不注册为子模块，parameters() / state_dict() 不含 CNN
+        self.grad_scale = getattr(cfg, "value_grad_scale", 1.0)
+
+        self.value_head = nn.Sequential(
+            nn.Linear(cfg.cnn_output_dim, 1024),
+            nn.ReLU(),
+            nn.Linear(1024, 1)
+        )
+
+    def from_features(self, features):  # features: [B, cnn_output_dim]
+        return self.value_head(scale_grad(features, self.grad_scale))  # [B, 1]
+
+    def forward(self, state):
+        if isinstance(state, np.ndarray):
+            state = torch.from_numpy(state).float().to(self.device)
+        if state.dim() == 3:
+            state = state.unsqueeze(0)
+        return self.from_features(self._trunk[0].cnn(state))
+
+
+class FactorizedPolicyNetwork(nn.Module):
+    """
+    分解式（指针式）策略头：参数量与车队规模无关，按两级选择给出动作分布。
+    - 单元特征：CNN 全局池化前的特征图经 1x1 卷积、双线性上采样到网格分辨率，加上原始状态的 1x1 投影，
+      得到每个网格单元的键向量；
+    - 选智能体：每个智能体取其当前位置所在单元的键向量，加上类型嵌入（拣货员/机器人）与 CNN 全局特征，
+      经 MLP 得到选择得分和查询向量；
+    - 选目标：智能体 a -> 拣货位 j 的得分为 a 的查询向量与 j 所在单元键向量的点积，
+      机器人回 Depot 的得分为其查询向量与由全局特征给出的 Depot 键向量的点积。
+    输出为 log P(a) + log P(j | a)：P(a) 在有合法动作的智能体间按选择得分归一化，P(j | a) 在 a 的合法目标间归一化，
+    非法动作为 -1e9，因此对输出做 softmax 即为两级采样的分布。
+    扁平编号与 env/action_space.py 一致，需先用 set_action_space 设置车队规模与拣货位所在单元
+    （PPOAgent.get_catalog 在动作目录变化时自动设置）；智能体位置见 ActionCatalog.agent_cells。
+    """
+
+    def __init__(self, cfg=config, embed_dim=64):
+        super().__init__()
+        self.device = device
+        self.embed_dim = embed_dim
+
+        self.cnn = CNNFeatureExtractor(4, cfg.cnn_output_dim).to(self.device)
+        map_channels = self.cnn.fc_layers[0].in_features
+
+        self.cell_key = nn.Conv2d(map_channels, embed_dim, kernel_size=1)  # CNN 特征图上的 1x1 卷积
+        self.cell_local = nn.Conv2d(4, embed_dim, kernel_size=1)  # 原始状态逐单元投影，区分特征图同一格内的拣货位
+        self.off_grid = nn.Parameter(torch.zeros(embed_dim))  # 不在拣货位上的智能体（Depot 等）的位置特征
+        self.agent_type = nn.Embedding(2, embed_dim)  # 0 拣货员，1 机器人
+        self.agent_head = nn.Sequential(
+            nn.Linear(2 * embed_dim + cfg.cnn_output_dim, 256),
+            nn.ReLU(),
+            nn.Linear(256, embed_dim + 1),  # [查询向量, 选择得分]
+        )
+        self.depot_key = nn.Linear(cfg.cnn_output_dim, embed_dim)
+
+        self.n_pickers = self.n_robots = self.n_pick_points = 0
+        self.register_buffer("pick_cells", torch.zeros(0, dtype=torch.long), persistent=False)
+        self.register_buffer("agent_types", torch.zeros(0, dtype=torch.long), persistent=False)
+
+    def set_action_space(self, n_pickers, n_robots, cells, grid_size):
+        """
+        :param cells: 每个拣货位（pick_points_list 顺序）在展平网格 (H*W) 中的下标
+        :param grid_size: H*W（agent_cells 中等于 grid_size 的下标表示不在网格上）
+        """
+        target = self.depot_key.weight.device
+        self.n_pickers, self.n_robots, self.n_pick_points = n_pickers, n_robots, len(cells)
+        self.pick_cells = torch.as_tensor(cells, dtype=torch.long).to(target)
+        self.agent_types = torch.cat([torch.zeros(n_pickers, dtype=torch.long),
+                                      torch.ones(n_robots, dtype=torch.long)]).to(target)
+
+    def forward(self, state, agent_cells, legal_mask=None, candidates=None):
+        if isinstance(state, np.ndarray):
+            state = torch.from_numpy(state).float().to(self.device)
+        if state.dim() == 3:
+            state = state.unsqueeze(0)
+        feature_map, features = self.cnn.forward_with_map(state)
+        return self.head(state, feature_map, features, agent_cells, legal_mask, candidates)
+
+    def head(self, state, feature_map, features, agent_cells, legal_mask=None, candidates=None):
+        """
+        :param feature_map, features: CNNFeatureExtractor.forward_with_map 的输出
+        :param agent_cells: 各智能体所在单元 LongTensor [B, N_pickers+N_robots]（ActionCatalog.agent_cells）
+        :param legal_mask: 合法动作掩码 BoolTensor [B, n_actions]；None 时视全部动作为合法
+        :param candidates: 合法动作编号（去重，LongTensor [L]）：只对其中出现的智能体算选择得分，
+                           只对其中的目标算点积，返回这些列（与 legal_mask 取这些动作时全量输出的对应列相同）
+        :return: [B, n_actions] 或 [B, L]
+        """
+        keys = self._cell_keys(state, feature_map)
+        depot_key = self.depot_key(features)  # [B, d]
+        if candidates is not None:
+            return self._candidate_logits(keys, features, depot_key, agent_cells, candidates)
+
+        B, P, n_pickers = state.shape[0], self.n_pick_points, self.n_pickers
+        A = n_pickers + self.n_robots
+        all_agents = torch.arange(A, device=keys.device)
+        query, select = self._agents(keys, features, agent_cells, all_agents)  # [B, A, d], [B, A]
+
+        # 选目标：查询向量与拣货位 / Depot 键向量的点积，每个智能体一行 [B, A, P + 1]（最后一列为回 Depot）
+        depot = (query[:, n_pickers:] * depot_key[:, None, :]).sum(dim=2)  # [B, N_robots]
+        depot = torch.cat([depot.new_zeros(B, n_pickers), depot], dim=1)
+        scores = torch.cat([torch.bmm(query, keys[:, :, self.pick_cells]), depot[:, :, None]], dim=2)
+
+        if legal_mask is None:
+            legal_mask = torch.ones(B, P * A + self.n_robots, dtype=torch.bool, device=scores.device)
+        legal_mask = legal_mask.to(scores.device)
+        legal = torch.cat([legal_mask[:, :P * A].view(B, A, P),
+                           torch.cat([legal_mask.new_zeros(B, n_pickers), legal_mask[:, P * A:]], dim=1)[:, :, None]],
+                          dim=2)
+
+        # log P(a) + log P(j | a)，均只在合法动作上归一化
+        scores = scores.masked_fill(~legal, -1e9)
+        log_target = scores - torch.logsumexp(scores, dim=2, keepdim=True)
+        log_agent = torch.log_softmax(select.masked_fill(~legal.any(dim=2), -1e9), dim=1)
+        logits = (log_agent[:, :, None] + log_target).masked_fill(~legal, -1e9)
+        return torch.cat([logits[:, :, :P].flatten(1), logits[:, n_pickers:, P]], dim=1)  # 扁平编号顺序
+
+    def _cell_keys(self, state, feature_map):
+        """每个单元的键向量 [B, d, H*W + 1]（最后一列为网格外）"""
+        B, _, H, W = state.shape
+        keys = self.cell_key(feature_map)
+        keys = nn.functional.interpolate(keys, size=(H, W), mode='bilinear', align_corners=False)
+        keys = (keys + self.cell_local(state)).flatten(2)
+        return torch.cat([keys, self.off_grid[None, :, None].expand(B, self.embed_dim, 1)], dim=2)
+
+    def _agents(self, keys, features, agent_cells, agents):
+        """
+        选智能体：所在单元的特征 + 类型 + 全局特征 -> (查询向量 [B, K, d], 选择得分 [B, K])
+        :param agents: 参与计算的智能体编号 LongTensor [K]（拣货员在前，机器人编号加 N_pickers）
+        """
+        B, d = keys.shape[0], self.embed_dim
+        K = len(agents)
+        cells = agent_cells.to(keys.device)[:, agents]
+        at_agent = keys.gather(2, cells[:, None, :].expand(B, d, K)).transpose(1, 2)  # [B, K, d]
+        x = torch.cat([at_agent, self.agent_type(self.agent_types[agents]).expand(B, K, d),
+                       features[:, None, :].expand(B, K, features.shape[1])], dim=2)
+        out = self.agent_head(x)
+        return out[..., :d] / math.sqrt(d), out[..., d]
+
+    def _candidate_logits(self, keys, features, depot_key, agent_cells, candidates):
+        """只对候选动作中出现的智能体与目标计算的 log P(a) + log P(j | a) [B, L]"""
+        B, P = keys.shape[0], self.n_pick_points
+        depot_offset = (self.n_pickers + self.n_robots) * P
+        is_depot = candidates >= depot_offset
+        # 扁平编号 -> (智能体, 拣货位)：拣货员与机器人的块连续排列，智能体编号即 index // P
+        agent = torch.where(is_depot, candidates - depot_offset + self.n_pickers, candidates // P)
+        target = torch.where(is_depot, torch.zeros_like(candidates), candidates % P)
+        agents, agent_of = torch.unique(agent, return_inverse=True)  # 出现的智能体（升序）、每个候选所属的智能体
+        K = len(agents)
+        query, select = self._agents(keys, features, agent_cells, agents)
+
+        # 选目标：每个候选一个点积，目标键为拣货位所在单元的键或 Depot 键
+        target_keys = keys[:, :, self.pick_cells[target]].transpose(1, 2)  # [B, L, d]
+        target_keys = torch.where(is_depot[None, :, None], depot_key[:, None, :], target_keys)
+        scores = (query[:, agent_of] * target_keys).sum(dim=2)  # [B, L]
+
+        # 按智能体分组归一化：log P(j | a) = 得分 - 组内 logsumexp
+        group = agent_of.expand(B, -1)
+        peak = scores.new_full((B, K), -float('inf')).scatter_reduce(1, group, scores, 'amax').detach()
+        total = scores.new_zeros(B, K).scatter_add(1, group, (scores - peak[:, agent_of]).exp())
+        log_target = scores - (peak + total.log())[:, agent_of]
+        return torch.log_softmax(select, dim=1)[:, agent_of] + log_target
+
+
 class PPOAgent:
-    def __init__(self, cfg=config):
+    def __init__(self, cfg=config, n_actions=None, profiler=None):
+        """
+        :param n_actions: 扁平动作空间大小，None 时使用默认配置的动作空间大小（见 PPOAgent.for_env）
+        :param profiler: env.profiler.Profiler，不为 None 时对选动作与更新分阶段计时
+        """
         self.cfg = cfg
         self.device = cfg.device
-
-        # 策略网络（包含ATN）
-        self.policy_net = PolicyNetwork(cfg).to(self.device)
-        self.value_net = ValueNetwork(cfg).to(self.device)
+        self.n_actions = default_action_num() if n_actions is None else n_actions
+
+        # 策略网络与价值网络：默认各自一个 CNN（双塔）；cfg.shared_trunk 时共用一个 CNN，每次决策/更新只做一次卷积
+        # cfg.factorized_head 时策略头为与车队规模无关的两级分解式策略头（FactorizedPolicyNetwork），决策时只取合法动作
+        self.shared_trunk = getattr(cfg, "shared_trunk", False)
+        self.factorized_head = getattr(cfg, "factorized_head", False)
+        if self.factorized_head:
+            self.policy_net = FactorizedPolicyNetwork(cfg).to(self.device)
+        elif self.shared_trunk:
+            self.policy_net = SharedTrunkPolicyNetwork(cfg, self.n_actions).to(self.device)
+        else:
+            self.policy_net = PolicyNetwork(cfg, self.n_actions).to(self.device)
+        if self.shared_trunk:
+            self.value_net = SharedValueNetwork(self.policy_net, cfg).to(self.device)
+        else:
+            self.value_net = ValueNetwork(cfg).to(self.device)
         # 优化器
         self.policy_optimizer = optim.Adam(self.policy_net.parameters(), lr=cfg.actor_lr)
         self.value_optimizer = optim.Adam(self.value_net.parameters(), lr=cfg.critic_lr)
 
-        # 经验缓存
-        self.memory = {
-            'states': [],  # 状态张量
-            'values': [],  # 价值标量
-            'rewards': [],  # 奖励
-            'dones': [],  # 是否完成
-            'log_prob': [],
-            'selected_action_index':[],
-            'legal_action_index':[]
-        }
+        # 经验缓存（连续数组，见 rollout_memory.py）
+        self.memory = RolloutMemory(self.n_actions)
+
+        # 动作目录（闭式编号换算）与可复用的合法动作掩码，按仓库布局/车队规模缓存
+        self.catalog = None
+        self._legal_mask = None  # np.ndarray[bool] (n_actions,)
+        self._legal_mask_tensor = None  # 与 _legal_mask 共享内存的 [1, n_actions] 张量（CPU）
+        self._agent_cells = None  # 分解式策略头：当前决策点各智能体所在单元 np.ndarray[int64] (n_agents,)
+
+        # 分阶段计时器（可选，见 profiler 属性）
+        self._profiler = None
+        self.profiler = profiler
+
+    @property
+    def profiler(self):
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler):
+        # 设置时把选动作与更新换成计时版本，置 None 时恢复
+        self._profiler = profiler
+        instrument(self, {'total_action_index_pair': 'agent.act', 'update': 'agent.update'}, profiler)
+
+    @classmethod
+    def for_env(cls, env, cfg=config, profiler=None):
+        """按 env 的布局与车队规模确定动作空间大小"""
+        return cls(cfg, ActionCatalog.for_env(env).size, profiler)
 
     def clear_memory(self):
         """清空经验缓存"""
-        for key in self.memory:
-            self.memory[key] = []
+        self.memory.clear()
+
+    def save_checkpoint(self, path, env):
+        """
+        保存网络权重，连同网络结构开关、训练时的车队规模和仓库布局（load_checkpoint 据此换算到其它车队规模）；
+        不保存优化器状态与经验缓存
+        """
+        catalog = ActionCatalog.for_env(env)
+        if catalog.size != self.n_actions:
+            raise ValueError(f"env action space ({catalog.size}) does not match the policy ({self.n_actions})")
+        checkpoint = {
+            'format': CHECKPOINT_FORMAT,
+            'arch': {
+                'shared_trunk': self.shared_trunk,
+                'factorized_head': self.factorized_head,
+                'cnn_output_dim': self.cfg.cnn_output_dim,
+            },
+            'fleet': {'n_pickers': catalog.n_pickers, 'n_robots': catalog.n_robots},
+            'layout': {
+                'n_aisles': env.N_w,
+                'n_slots': env.N_l,
+                'cells': [env.pick_point_index[pp.point_id] for pp in env.pick_points_list],
+                'depots': [list(p) for p in env.depot_positions],
+            },
+            'policy': self.policy_net.state_dict(),
+            'value': self.value_net.state_dict(),
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        torch.save(checkpoint, path)
+
+    def get_catalog(self, env):
+        """当前 env 的动作目录；布局或车队规模变化时重建"""
+        if self.catalog is None or not self.catalog.matches(env):
+            catalog = ActionCatalog.for_env(env)
+            if catalog.size != self.n_actions:
+                raise ValueError(f"env action space ({catalog.size}) does not match the policy ({self.n_actions})")
+            self.catalog = catalog
+            self._legal_mask = np.zeros(catalog.size, dtype=bool)
+            self._legal_mask_tensor = torch.from_numpy(self._legal_mask).unsqueeze(0)
+            if self.factorized_head:
+                cells = [env.pick_point_index[pp.point_id] for pp in env.pick_points_list]
+                self.policy_net.set_action_space(catalog.n_pickers, catalog.n_robots, cells, env.N_w * env.N_l)
+                self._agent_cells = np.zeros(catalog.n_pickers + catalog.n_robots, dtype=np.int64)
+        return self.catalog
 
     def get_avaliable_action(self, env):
+        """合法动作的 (agent 下标, 拣货位下标) 对；-1 表示回 Depot"""
+        catalog = self.get_catalog(env)
         picker_available_action = []
         robot_available_action = []
-        # picker候选动作
-        #思路：总共picker动作空间3*10 + robot动作空间5*10
-        for pkr in env.pickers:
-            if pkr.state == 'idle':
-                p_index = env.pickers.index(pkr) # 我们以环境中picker列表的索引计算
-                for pp in env.pick_points_list:
-                    if pp.is_idle:  # 有机器人排队且无拣货员
-                        j_index = env.pick_points_list.index(pp)
-                        picker_available_action.append((p_index,j_index))
-
-        for r in env.robots:
-            r_index = env.robots.index(r)
-            if r.state == 'idle' and len(r.item_pick_order) > 0 and r.position == env.depot_object.position: # 从depot点出发的robot
-                for i in r.item_pick_order:
-                    p = i.position
-                    pp = env.pick_point_dict[p]
-                    t_index = env.pick_points_list.index(pp)
-                    robot_available_action.append((r_index,t_index))
-
-            elif r.state == 'idle' and r.order is not None and len(r.item_pick_order) > 0: # 已经在拣选路上的robot
-                for i in r.item_pick_order:
-                    p = i.position
-                    pp = env.pick_point_dict[p]
-                    t_index = env.pick_points_list.index(pp)
-                    robot_available_action.append((r_index, t_index))
-
-            elif r.state == 'idle' and r.order is not None and len(r.item_pick_order) == 0 and r.pick_point is not None: # 完成拣货将要回到depot点的robot
-                robot_available_action.append((r_index, -1))
-
-        return picker_available_action,robot_available_action
-
-    def total_action_index_pair(self,env,state):
-        picker_available_action,robot_available_action = self.get_avaliable_action(env)
-        # 获取全部robot，picker动作和mlp对应的索引，及具体动作
-        total_action = [] # 先picker，后robot,最后几项是回depot点
-        # 整体空间：
-        # picker->pick_point
-        # robot->pick_point
-        # robot->depot
-        for picker in env.pickers:
-            for pick_point in env.pick_points_list:
-                total_action.append((picker,pick_point))
-        for robot in env.robots:
-            for pick_point in env.pick_points_list:
-                total_action.append((robot, pick_point))
-        for robot in env.robots:
-            d = env.depot_object
-            total_action.append((robot,d))
-
-        action_to_index = {action: idx for idx, action in enumerate(total_action)} # 创建映射字典
-
-        legal_action_index = []
-        # picker 合法动作
-        for p_index, pp_index in picker_available_action:
-            picker = env.pickers[p_index]
-            pp = env.pick_points_list[pp_index]
-            legal_action_index.append(action_to_index[(picker, pp)])
-
-        # robot 合法动作
-        for r_index, t_index in robot_available_action:
-            robot = env.robots[r_index]
-            if t_index != -1:
-                target = env.pick_points_list[t_index]
+        for idx in catalog.legal_indices(env):
+            if idx < catalog.robot_offset:
+                picker_available_action.append(divmod(idx, catalog.n_pick_points))
+            elif idx < catalog.depot_offset:
+                robot_available_action.append(divmod(idx - catalog.robot_offset, catalog.n_pick_points))
             else:
-                target = env.depot_object
-            legal_action_index.append(action_to_index[(robot, target)])
-
-        if len(legal_action_index) == 0:
-            raise RuntimeError("No valid actions available at this step!Simulation error!")
+                robot_available_action.append((idx - catalog.depot_offset, -1))
+        return picker_available_action, robot_available_action
+
+    def _forward(self, state, with_value=True, candidates=None, agent_cells=None, legal_mask=None):
+        """
+        批量状态 [B,4,H,W] -> (logits [B, n_actions] 或 [B, L], value [B, 1] 或 None)
+        共享主干时 CNN 只前向一次，特征同时送入策略头和价值头
+        以下参数仅用于分解式策略头（扁平策略头忽略 agent_cells / legal_mask，由调用方屏蔽非法动作）：
+        :param candidates: 只计算这些扁平动作编号的 logits
+        :param agent_cells: 各智能体所在单元 [B, n_agents]（ActionCatalog.agent_cells）
+        :param legal_mask: 合法动作掩码 [B, n_actions]，两级分布在其上归一化
+        """
+        if self.factorized_head:
+            feature_map, features = self.policy_net.cnn.forward_with_map(state)
+            logits = self.policy_net.head(state, feature_map, features, agent_cells, legal_mask, candidates)
+            if not with_value:
+                return logits, None
+            return logits, (self.value_net.from_features(features) if self.shared_trunk else self.value_net(state))
+        if self.shared_trunk:
+            features = self.policy_net.cnn(state)
+            logits = self.policy_net.head(state, features, candidates)
+            return logits, (self.value_net.from_features(features) if with_value else None)
+        return self.policy_net(state), (self.value_net(state) if with_value else None)
+
+    def _masked_logits(self, env, state, with_value=False):
+        """
+        合法动作编号、状态张量、屏蔽非法动作后的 logits、状态价值（with_value=False 时为 None）与候选动作。
+        扁平策略头：logits 覆盖全部动作，掩码直接写入可复用的布尔缓冲区，候选动作为 None（下标即动作编号）；
+        分解式策略头：只计算去重排序后的合法动作（候选动作，np.ndarray），logits 的第 i 列对应候选动作 i，
+        各智能体所在单元写入 self._agent_cells
+        """
+        profiler = self.profiler or NULL_PROFILER
+        with profiler.phase('agent.legal'):
+            catalog = self.get_catalog(env)
+            legal_action_index = catalog.legal_indices(env)
+            if len(legal_action_index) == 0:
+                raise RuntimeError("No valid actions available at this step!Simulation error!")
+            if self.factorized_head:
+                candidates = np.unique(legal_action_index)
+                catalog.agent_cells(env, out=self._agent_cells)
+            else:
+                candidates = None
+                self._legal_mask.fill(False)
+                self._legal_mask[legal_action_index] = True
 
         # 处理 state
         if isinstance(state, np.ndarray):
             state_tensor = torch.from_numpy(state).float().to(self.device)
         else:
             state_tensor = state.to(self.device)
-
         if state_tensor.dim() == 3:
             state_tensor = state_tensor.unsqueeze(0)
 
+        with profiler.phase('agent.forward'):
+            if candidates is not None:
+                logits, value = self._forward(state_tensor, with_value, torch.from_numpy(candidates).to(self.device),
+                                              torch.from_numpy(self._agent_cells).unsqueeze(0))
+                return legal_action_index, state_tensor, logits, value, candidates
+            logits, value = self._forward(state_tensor, with_value)
+        legal = self._legal_mask_tensor.to(logits.device, non_blocking=True)
+        masked_logits = logits.masked_fill(~legal, -1e9)
+        return legal_action_index, state_tensor, masked_logits, value, None
+
+    def total_action_index_pair(self, env, state):
+        # 整体空间（编号规则见 env/action_space.py）：
+        # picker->pick_point
+        # robot->pick_point
+        # robot->depot
+        profiler = self.profiler or NULL_PROFILER
         with torch.no_grad():
-            value = self.value_net(state_tensor)
-            # 1. 得到动作分数
-            logits = self.policy_net(state_tensor)
-            # 2. 构造 mask
-            invalid_mask = torch.ones_like(logits, dtype=torch.bool) # 全部置true
-            invalid_mask[:,legal_action_index] = False
+            legal_action_index, state_tensor, masked_logits, value, candidates = self._masked_logits(
+                env, state, with_value=True)
 
-            if len(legal_action_index) == 0:
-                raise RuntimeError("No legal actions at this step!")
-
-            # 3. mask 无效动作
-            masked_logits = logits.masked_fill(invalid_mask, -1e9)
-
-            # 4. 建立分布 & 采样
-            probs = torch.softmax(masked_logits, dim=-1)
-            dist = torch.distributions.Categorical(probs=probs)
-            action_idx = dist.sample()
-            log_prob = dist.log_prob(action_idx)
-            selected_action = total_action[action_idx.item()]
-
-            # 判断是picker_action还是robot_action
-            if action_idx < env.N_pickers * env.N_w * env.N_l:
-                picker_action = selected_action
-                robot_action = None
-                action = (picker_action,robot_action)
-            else:
-                robot_action = selected_action
-                picker_action = None
-                action = (picker_action, robot_action)
+            # 建立分布 & 采样
+            with profiler.phase('agent.sample'):
+                probs = torch.softmax(masked_logits, dim=-1)
+                dist = torch.distributions.Categorical(probs=probs)
+                action_idx = dist.sample()
+                log_prob = dist.log_prob(action_idx)
+        action_idx = action_idx.item() if candidates is None else int(candidates[action_idx.item()])
 
-        self.memory['states'].append(state if isinstance(state, np.ndarray) else state.cpu().numpy())
-        self.memory['values'].append(value.item())
-        self.memory['log_prob'].append(log_prob.item())
-        self.memory['selected_action_index'].append(action_idx.item())
-        self.memory['legal_action_index'].append(legal_action_index)
+        # 判断是picker_action还是robot_action
+        action = self.catalog.decode(env, action_idx)
+
+        self.memory.add(state if isinstance(state, np.ndarray) else state.cpu().numpy(),
+                        value.item(), log_prob.item(), action_idx, legal_action_index,
+                        self._agent_cells if candidates is not None else None)
 
         return action
 
     def select_action_greedy(self, env, state):
         """评估用：贪心选动作（argmax），不写 memory，不采样"""
-        picker_available_action, robot_available_action = self.get_avaliable_action(env)
-
-        total_action = []
-        for picker in env.pickers:
-            for pick_point in env.pick_points_list:
-                total_action.append((picker, pick_point))
-        for robot in env.robots:
-            for pick_point in env.pick_points_list:
-                total_action.append((robot, pick_point))
-        for robot in env.robots:
-            total_action.append((robot, env.depot_object))
-
-        action_to_index = {action: idx for idx, action in enumerate(total_action)}
-
-        legal_action_index = []
-        for p_index, pp_index in picker_available_action:
-            picker = env.pickers[p_index]
-            pp = env.pick_points_list[pp_index]
-            legal_action_index.append(action_to_index[(picker, pp)])
-
-        for r_index, t_index in robot_available_action:
-            robot = env.robots[r_index]
-            target = env.pick_points_list[t_index] if t_index != -1 else env.depot_object
-            legal_action_index.append(action_to_index[(robot, target)])
-
-        if len(legal_action_index) == 0:
-            raise RuntimeError("No valid actions available at this step! (eval)")
-
-        # state -> tensor
-        if isinstance(state, np.ndarray):
-            state_tensor = torch.from_numpy(state).float().to(self.device)
-        else:
-            state_tensor = state.to(self.device)
-        if state_tensor.dim() == 3:
-            state_tensor = state_tensor.unsqueeze(0)
-
         with torch.no_grad():
-            logits = self.policy_net(state_tensor)
-
-            invalid_mask = torch.ones_like(logits, dtype=torch.bool)
-            invalid_mask[:, legal_action_index] = False
-            masked_logits = logits.masked_fill(invalid_mask, -1e9)
-
+            _, _, masked_logits, _, candidates = self._masked_logits(env, state)
             # greedy: 直接 argmax
             action_idx = torch.argmax(masked_logits, dim=1).item()
-            selected_action = total_action[action_idx]
-
-        if action_idx < env.N_pickers * env.N_w * env.N_l:
-            return (selected_action, None)
-        else:
-            return (None, selected_action)
+        if candidates is not None:
+            action_idx = int(candidates[action_idx])
+        return self.catalog.decode(env, action_idx)
+
+    def collect_vec(self, vec_env, n_steps, obs, masks, memories=None):
+        """
+        向量化采样：VecWarehouseEnv / SubprocVecWarehouseEnv 锁步推进 n_steps 步，
+        每步对整批观测 [N,4,H,W] 只做一次前向，按各行的合法掩码采样动作，轨迹写入各环境自己的 RolloutMemory；
+        结束后按环境依次追加到 self.memory（最后一步未结束的轨迹按截断处理，与 train 中 truncated 相同），
+        使 GAE 不跨环境串接；分解式策略头另按 vec_env.agent_cells() 取各环境中智能体所在单元
+        :param obs, masks: vec_env.reset() 或上一次 collect_vec 返回的观测与合法动作掩码
+        :param memories: 每个环境一个 RolloutMemory，可跨多次调用复用；None 时新建
+        :return: (obs, masks, episodes, memories)，episodes 为期间结束的回合统计（info["episode"]）
+        """
+        profiler = self.profiler or NULL_PROFILER
+        catalog = self.get_catalog(vec_env.template)
+        if catalog.size != vec_env.action_num:
+            raise ValueError(f"vec env action space ({vec_env.action_num}) does not match the policy ({self.n_actions})")
+        if memories is None:
+            memories = [RolloutMemory(self.n_actions, capacity=max(n_steps, 1)) for _ in range(vec_env.n_envs)]
+        episodes = []
+        for _ in range(n_steps):
+            cells = vec_env.agent_cells() if self.factorized_head else None
+            with torch.no_grad():
+                with profiler.phase('agent.forward'):
+                    state_tensor = torch.from_numpy(obs).float().to(self.device)
+                    legal = torch.from_numpy(masks).to(self.device)
+                    cells_tensor = None if cells is None else torch.from_numpy(cells)
+                    logits, value = self._forward(state_tensor, agent_cells=cells_tensor, legal_mask=legal)
+                with profiler.phase('agent.sample'):
+                    probs = torch.softmax(logits.masked_fill(~legal, -1e9), dim=-1)
+                    dist = torch.distributions.Categorical(probs=probs)
+                    actions = dist.sample()
+                    log_probs = dist.log_prob(actions)
+            actions = actions.cpu().numpy()
+            values = value.squeeze(-1).cpu().numpy()
+            log_probs = log_probs.cpu().numpy()
+            for i, memory in enumerate(memories):
+                memory.add(obs[i], values[i], log_probs[i], actions[i], np.flatnonzero(masks[i]),
+                           None if cells is None else cells[i])
+
+            obs, rewards, dones, infos, masks = vec_env.step(actions)
+            for i, memory in enumerate(memories):
+                memory.add_outcome(rewards[i], dones[i])
+                if dones[i]:
+                    episodes.append(infos[i]["episode"])
+
+        for memory in memories:
+            if len(memory) > 0:
+                memory.dones[memory.n_outcomes - 1] = 1.0
+                self.memory.extend(memory)
+            memory.clear()
+        return obs, masks, episodes, memories
 
     def compute_returns_and_advantages(self, last_value=0.0):
         """计算GAE和returns"""
-        rewards = self.memory['rewards']
-        values = self.memory['values']
-        dones = self.memory['dones']
+        T = len(self.memory)
+        rewards = self.memory.rewards[:T].tolist()
+        values = self.memory.values[:T].tolist()
+        dones = self.memory.dones[:T].tolist()
 
-        T = len(rewards)
         returns = [0.0] * T
         advantages = [0.0] * T
 
@@ -365,20 +652,20 @@ class PPOAgent:
         return returns, advantages.tolist()
 
     def update(self):
-        if len(self.memory['rewards']) == 0:
+        if len(self.memory) == 0:
             return 0.0, 0.0
+        profiler = self.profiler or NULL_PROFILER
 
         # ===== 1) returns & advantages =====
-        returns, advantages = self.compute_returns_and_advantages()
+        with profiler.phase('update.gae'):
+            returns, advantages = self.compute_returns_and_advantages()
         returns = torch.tensor(returns, dtype=torch.float32, device=self.device)
         advantages = torch.tensor(advantages, dtype=torch.float32, device=self.device)
 
-        # old values / old log_probs / actions
-        old_values = torch.tensor(self.memory['values'], dtype=torch.float32, device=self.device)
-
-        old_log_probs = torch.tensor(self.memory['log_prob'], dtype=torch.float32, device=self.device)
-
-        actions = torch.tensor(self.memory['selected_action_index'], dtype=torch.long, device=self.device)
+        # states / old values / old log_probs / actions / 合法动作掩码 [T, action_num]
+        states, old_values, old_log_probs, actions, legal_mask = self.memory.tensors(self.device)
+        # 分解式策略头：采样时各智能体所在单元 [T, n_agents]
+        agent_cells = self.memory.agent_cells_tensor(self.device) if self.factorized_head else None
 
         T = len(returns)
         idxs = np.arange(T)
@@ -386,6 +673,12 @@ class PPOAgent:
         PPO_EPOCHS = getattr(self.cfg, "epochs", 2)
         BATCH_SIZE = getattr(self.cfg, "batch_size", 32)
         ENTROPY_COEF = getattr(self.cfg, "entropy_coef", 0.01)
+        ratio_cap = getattr(self.cfg, "ratio_cap", 5.0)  # 建议先 5.0（更稳），或 8.0（更不保守）
+        cap = math.log(ratio_cap)  # ln(5)=1.609, ln(8)=2.079
+
+        if not bool(legal_mask.any(dim=1).all()):
+            t = int(torch.nonzero(~legal_mask.any(dim=1))[0])
+            raise RuntimeError(f"[update] legal_action_index empty at t={t}")
 
         last_policy_loss = 0.0
         last_value_loss = 0.0
@@ -399,118 +692,156 @@ class PPOAgent:
             np.random.shuffle(idxs)
 
             for start in range(0, T, BATCH_SIZE):
-                mb = idxs[start:start + BATCH_SIZE]
-
-                policy_losses = []
-                value_losses = []
-                entropies = []
-
-                for t in mb:
-                    state = torch.from_numpy(self.memory['states'][t]).float().to(self.device)
-                    if state.dim() == 3:
-                        state = state.unsqueeze(0)  # [1,4,H,W]
-
-                    # ===== 2) 重新算 logits，并做 mask（必须重建 mask）=====
-                    # 这里要用当前状态下的合法动作集合
-                    # 先不管该动作是否合法，对所有动作评分，再mask非法动作
-                    # 所以必须在采样时把 legal_action_index 也存下来，否则 update 无法重建 mask。
-
-                    logits = self.policy_net(state)  # [1, 1445] 之类
-
-                    # 1) 先查 logits 是否 NaN/Inf（定位根因）
-                    if torch.isnan(logits).any() or torch.isinf(logits).any():
-                        raise RuntimeError(f"[update] logits has NaN/Inf at step t={t}")
-
-                    legal_action_index = self.memory['legal_action_index'][t]
-                    if len(legal_action_index) == 0:
-                        raise RuntimeError(f"[update] legal_action_index empty at t={t}")
-
-                    invalid_mask = torch.ones_like(logits, dtype=torch.bool)
-                    invalid_mask[:, legal_action_index] = False
-                    masked_logits = logits.masked_fill(invalid_mask, -1e9)
-
-                    # 2) 再查 masked_logits
-                    if torch.isnan(masked_logits).any() or torch.isinf(masked_logits).any():
-                        raise RuntimeError(f"[update] masked_logits has NaN/Inf at step t={t}")
-
-                    dist = torch.distributions.Categorical(logits=masked_logits)
-
-                    new_log_prob = dist.log_prob(actions[t])  # 标量tensor
-                    entropy = dist.entropy()
-
-                    # ratio = torch.exp(new_log_prob - old_log_probs[t])
-                    ratio_cap = getattr(self.cfg, "ratio_cap", 5.0)  # 建议先 5.0（更稳），或 8.0（更不保守）
-                    cap = math.log(ratio_cap)  # ln(5)=1.609, ln(8)=2.079
-
-                    log_ratio = new_log_prob - old_log_probs[t]
-                    log_ratio = torch.clamp(log_ratio, -cap, cap)  # 真正“限幅”
-                    ratio = torch.exp(log_ratio)
-                    # approx KL（旧策略 vs 新策略）
-                    kl_list.append((old_log_probs[t] - new_log_prob).detach())
-
-                    # clip fraction
-                    # clipped = (torch.abs(ratio - 1.0) > self.cfg.ppo_clip).float()
-                    clipped = ((ratio < 1.0 - self.cfg.ppo_clip) | (ratio > 1.0 + self.cfg.ppo_clip)).float()
-
-                    clipfrac_list.append(clipped.detach())
-
-                    entropy_list.append(entropy.detach())
-                    ratio_list.append(ratio.detach())
-
-                    surr1 = ratio * advantages[t]
-                    surr2 = torch.clamp(
-                        ratio,
-                        1.0 - self.cfg.ppo_clip,
-                        1.0 + self.cfg.ppo_clip
-                    ) * advantages[t]
-                    policy_losses.append(-torch.min(surr1, surr2))
-                    entropies.append(entropy)
-
-                    # ===== 3) value + value clip（更稳）=====
-                    value_pred = self.value_net(state).squeeze()
-                    v_pred_clipped = old_values[t] + torch.clamp(
-                        value_pred - old_values[t],
-                        -self.cfg.ppo_clip,
-                        self.cfg.ppo_clip
-                    )
-                    v_loss1 = (value_pred - returns[t]).pow(2)
-                    v_loss2 = (v_pred_clipped - returns[t]).pow(2)
-                    value_losses.append(torch.max(v_loss1, v_loss2))
-
-                policy_loss = torch.mean(torch.stack(policy_losses))
-                value_loss = torch.mean(torch.stack(value_losses))
+                mb = torch.as_tensor(idxs[start:start + BATCH_SIZE], device=self.device)
+                state = states[mb]  # [B,4,H,W]
+
+                # ===== 2) 整批重新算 logits，用采样时存下的合法动作掩码屏蔽非法动作 =====
+                with profiler.phase('update.forward'):
+                    logits, value_pred = self._forward(state, agent_cells=None if agent_cells is None else agent_cells[mb],
+                                                       legal_mask=legal_mask[mb])  # [B, action_num], [B, 1]
+
+                # 1) 先查 logits 是否 NaN/Inf（定位根因）
+                bad = ~torch.isfinite(logits).all(dim=1)
+                if bad.any():
+                    raise RuntimeError(f"[update] logits has NaN/Inf at step t={int(mb[bad][0])}")
+
+                masked_logits = logits.masked_fill(~legal_mask[mb], -1e9)
+
+                dist = torch.distributions.Categorical(logits=masked_logits)
+
+                new_log_prob = dist.log_prob(actions[mb])  # [B]
+                entropy = dist.entropy()
+
+                log_ratio = new_log_prob - old_log_probs[mb]
+                log_ratio = torch.clamp(log_ratio, -cap, cap)  # 真正“限幅”
+                ratio = torch.exp(log_ratio)
+                # approx KL（旧策略 vs 新策略）
+                kl_list.append((old_log_probs[mb] - new_log_prob).detach())
+
+                # clip fraction
+                clipped = ((ratio < 1.0 - self.cfg.ppo_clip) | (ratio > 1.0 + self.cfg.ppo_clip)).float()
+                clipfrac_list.append(clipped.detach())
+
+                entropy_list.append(entropy.detach())
+                ratio_list.append(ratio.detach())
+
+                adv = advantages[mb]
+                surr1 = ratio * adv
+                surr2 = torch.clamp(
+                    ratio,
+                    1.0 - self.cfg.ppo_clip,
+                    1.0 + self.cfg.ppo_clip
+                ) * adv
+                policy_loss = torch.mean(-torch.min(surr1, surr2))
+
+                # ===== 3) value + value clip（更稳）=====
+                value_pred = value_pred.squeeze(-1)  # [B]
+                v_old = old_values[mb]
+                v_pred_clipped = v_old + torch.clamp(
+                    value_pred - v_old,
+                    -self.cfg.ppo_clip,
+                    self.cfg.ppo_clip
+                )
+                v_loss1 = (value_pred - returns[mb]).pow(2)
+                v_loss2 = (v_pred_clipped - returns[mb]).pow(2)
+                value_loss = torch.mean(torch.max(v_loss1, v_loss2))
                 value_loss = torch.clamp(value_loss, max=1e6)
 
-                entropy_mean = torch.mean(torch.stack(entropies))
+                entropy_mean = torch.mean(entropy)
 
                 total_loss = policy_loss + self.cfg.value_coef * value_loss - ENTROPY_COEF * entropy_mean
 
-                self.policy_optimizer.zero_grad()
-                self.value_optimizer.zero_grad()
-                total_loss.backward()
+                with profiler.phase('update.backward'):
+                    self.policy_optimizer.zero_grad()
+                    self.value_optimizer.zero_grad()
+                    total_loss.backward()
 
-                torch.nn.utils.clip_grad_norm_(self.policy_net.parameters(), self.cfg.max_grad_norm)
-                torch.nn.utils.clip_grad_norm_(self.value_net.parameters(), self.cfg.max_grad_norm)
+                    torch.nn.utils.clip_grad_norm_(self.policy_net.parameters(), self.cfg.max_grad_norm)
+                    torch.nn.utils.clip_grad_norm_(self.value_net.parameters(), self.cfg.max_grad_norm)
 
-                self.policy_optimizer.step()
-                self.value_optimizer.step()
+                with profiler.phase('update.step'):
+                    self.policy_optimizer.step()
+                    self.value_optimizer.step()
 
                 last_policy_loss = policy_loss.item()
                 last_value_loss = value_loss.item()
 
         if len(kl_list) > 0:
-            kl = torch.mean(torch.stack(kl_list)).item()
-            clipfrac = torch.mean(torch.stack(clipfrac_list)).item()
-            ent = torch.mean(torch.stack(entropy_list)).item()
-            r_mean = torch.mean(torch.stack(ratio_list)).item()
-            r_min = torch.min(torch.stack(ratio_list)).item()
-            r_max = torch.max(torch.stack(ratio_list)).item()
+            kl = torch.mean(torch.cat(kl_list)).item()
+            clipfrac = torch.mean(torch.cat(clipfrac_list)).item()
+            ent = torch.mean(torch.cat(entropy_list)).item()
+            r_mean = torch.mean(torch.cat(ratio_list)).item()
+            r_min = torch.min(torch.cat(ratio_list)).item()
+            r_max = torch.max(torch.cat(ratio_list)).item()
             print(
                 f"[PPO] approx_kl={kl:.6f} clip_frac={clipfrac:.3f} entropy={ent:.3f} ratio(mean/min/max)={r_mean:.3f}/{r_min:.3f}/{r_max:.3f}")
 
         self.clear_memory()
         return last_policy_loss, last_value_loss
 
+def resize_blocks(blocks, n, fill="mean"):
+    """
+    按智能体分块的张量 [n_old, ...] -> [n, ...]：前 min(n, n_old) 块原样保留；
+    多出的智能体取已有各块的均值（fill="mean"），或按编号循环复用已有的块（fill="cycle"）
+    """
+    n_old = len(blocks)
+    if n <= n_old:
+        return blocks[:n]
+    if fill == "cycle":
+        extra = blocks[torch.arange(n_old, n) % n_old]
+    elif fill == "mean":
+        extra = blocks.mean(dim=0, keepdim=True).expand(n - n_old, *blocks.shape[1:])
+    else:
+        raise ValueError(f"unknown fill mode {fill!r}")
+    return torch.cat([blocks, extra])
+
+
+def resize_action_rows(rows, old, new, fill="mean"):
+    """
+    扁平动作空间上的行（输出层的 weight [size, in] 或 bias [size]）从动作目录 old 换算到 new：
+    拣货员块、机器人块、回 Depot 行分别按智能体数调整（见 resize_blocks），要求拣货位数相同
+    """
+    if old.n_pick_points != new.n_pick_points:
+        raise ValueError(f"pick point count differs ({old.n_pick_points} vs {new.n_pick_points})")
+    P = old.n_pick_points
+    rest = rows.shape[1:]
+    picker = rows[:old.robot_offset].reshape(old.n_pickers, P, *rest)
+    robot = rows[old.robot_offset:old.depot_offset].reshape(old.n_robots, P, *rest)
+    depot = rows[old.depot_offset:]
+    return torch.cat([resize_blocks(picker, new.n_pickers, fill).reshape(-1, *rest),
+                      resize_blocks(robot, new.n_robots, fill).reshape(-1, *rest),
+                      resize_blocks(depot, new.n_robots, fill)])
+
+
+def load_checkpoint(path, env, cfg=config, fill="mean", profiler=None):
+    """
+    载入 save_checkpoint 保存的检查点，返回适配 env 车队规模的 PPOAgent（优化器重新初始化）。
+    分解式策略头与车队规模、布局无关，权重原样载入；扁平策略头要求布局相同，
+    输出层按智能体分块换算：已有的智能体沿用原来的块，新增的智能体按 fill 由已有块生成（见 resize_blocks）
+    """
+    checkpoint = torch.load(path, map_location=cfg.device, weights_only=True)
+    if checkpoint.get('format') != CHECKPOINT_FORMAT:
+        raise ValueError(f"unsupported checkpoint format {checkpoint.get('format')!r}")
+    agent = PPOAgent.for_env(env, SimpleNamespace(**{**vars(cfg), **checkpoint['arch']}), profiler)
+
+    policy_state = dict(checkpoint['policy'])
+    if not agent.factorized_head:
+        layout = checkpoint['layout']
+        cells = [env.pick_point_index[pp.point_id] for pp in env.pick_points_list]
+        if (layout['n_aisles'], layout['n_slots'], layout['cells']) != (env.N_w, env.N_l, cells):
+            raise ValueError("a flat policy head can only be loaded into the layout it was trained on "
+                             "(train with factorized_head=True to change layouts)")
+        old = ActionCatalog(checkpoint['fleet']['n_pickers'], checkpoint['fleet']['n_robots'], len(cells))
+        new = ActionCatalog.for_env(env)
+        last = f"mlp.{len(agent.policy_net.mlp) - 1}"
+        for name in (f"{last}.weight", f"{last}.bias"):
+            policy_state[name] = resize_action_rows(policy_state[name], old, new, fill)
+    agent.policy_net.load_state_dict(policy_state)
+    agent.value_net.load_state_dict(checkpoint['value'])
+    agent.get_catalog(env)
+    return agent
+
+
 def episode_flow_time(env):
     """计算本 episode 的订单流经时间(Flow time)统计量（只统计已完成订单）。
 
@@ -534,37 +865,55 @@ def episode_flow_time(env):
     return float(arr.mean()), n_completed, n_total
 
 
-def evaluate_greedy(agent, n_eval_episodes=3, max_steps=5000, orders_path="../data/data/instances/orders_20.pkl"):
-    """评估：greedy policy，不采样；返回每个episode的完成订单 mean flow time 列表"""
+def evaluate_greedy(agent, n_eval_episodes=3, max_steps=5000, orders_path="../data/data/instances/orders_20.pkl",
+                    batched=False, max_delay=0.002):
+    """
+    评估：greedy policy，不采样；返回每个episode的完成订单 mean flow time 列表
+    :param batched: True 时各 episode 在各自的线程中并发运行，决策经 InferenceServer 合批前向
+    :param max_delay: 合批的最长等待时间（秒）
+    """
     eval_env = WarehouseEnv()
     agent.policy_net.eval()
     agent.value_net.eval()
 
-    order_processing_times = []
-    with torch.no_grad():
-        for _ in range(n_eval_episodes):
-            with open(orders_path, "rb") as f:
-                orders = pickle.load(f)
+    # 列式算例只加载一次，每个 episode 由 reset 构造新的订单对象
+    instance = OrderInstance.open(orders_path)
 
-            state = eval_env.reset(orders)
+    order_processing_times = []
+    if batched:
+        envs = [eval_env] + [WarehouseEnv() for _ in range(n_eval_episodes - 1)]
+        with InferenceServer(agent, eval_env, max_delay=max_delay) as server:
+            run_greedy_episodes([LocalPolicyClient(server) for _ in envs], envs, [instance] * len(envs), max_steps)
+        order_processing_times = [episode_flow_time(env)[0] for env in envs]
+    else:
+        with torch.no_grad():
+            for _ in range(n_eval_episodes):
+                state = eval_env.reset(instance)
 
-            for t in range(max_steps):
-                action = agent.select_action_greedy(eval_env, state)
-                next_state, reward, done, truncated, info = eval_env.step(action)
-                state = next_state
-                if done or truncated:
-                    break
+                for t in range(max_steps):
+                    action = agent.select_action_greedy(eval_env, state)
+                    next_state, reward, done, truncated, info = eval_env.step(action)
+                    state = next_state
+                    if done or truncated:
+                        break
 
-            m_done, n_c, n_tot = episode_flow_time(eval_env)
-            order_processing_times.append(m_done)
+                m_done, n_c, n_tot = episode_flow_time(eval_env)
+                order_processing_times.append(m_done)
 
     agent.policy_net.train()
     agent.value_net.train()
 
     return order_processing_times
 
-def train(agent, env, n_episodes=2000, max_steps=5000):
-    """训练函数（记录并保存论文用数据与PNG图）。"""
+def train(agent, env, n_episodes=2000, max_steps=5000, profiler=None):
+    """训练函数（记录并保存论文用数据与PNG图）。
+
+    profiler: env.profiler.Profiler，不为 None 时对环境与 agent 分阶段计时，每个 episode 打印一次统计，
+              训练结束后写出 Chrome trace（若设置了 trace_path）
+    """
+    if profiler is not None:
+        agent.profiler = profiler
+        env.profiler = profiler
 
     # 初始化Visdom
     viz = None
@@ -603,13 +952,13 @@ def train(agent, env, n_episodes=2000, max_steps=5000):
 
     interrupted = False  # set True if Ctrl+C
 
+    # 列式算例只加载一次（优先读取同名列式目录），每个 episode 由 reset 构造新的订单对象
+    instance = OrderInstance.open("../data/data/instances/orders_20.pkl") # 改
+
     for ep in range(n_episodes):
         try:
-            with open("../data/data/instances/orders_20.pkl", "rb") as f: # 改
-                orders = pickle.load(f)
-
             total_step = -1
-            state = env.reset(orders)
+            state = env.reset(instance)
             ep_reward = 0.0
             legal_cnts = []
             r_pick_list = []
@@ -627,8 +976,8 @@ def train(agent, env, n_episodes=2000, max_steps=5000):
                 action = agent.total_action_index_pair(env, state)
                 # 2. 执行动作
                 next_state, reward, done, truncated, info = env.step(action)
-                # 统计本步合法动作数（total_action_index_pair 已经把 legal_action_index 存到 memory 末尾）
-                legal_cnts.append(len(agent.memory["legal_action_index"][-1]))
+                # 统计本步合法动作数（total_action_index_pair 已经把合法动作写入 memory 末尾）
+                legal_cnts.append(int(agent.memory.legal_counts[agent.memory.size - 1]))
                 rp = info.get("reward_parts", {})
                 r_pick_list.append(rp.get("r_pick", 0.0))
                 r_complete_list.append(rp.get("r_complete", 0.0))
@@ -638,8 +987,7 @@ def train(agent, env, n_episodes=2000, max_steps=5000):
                 real_done = done or truncated
 
                 # 3. 存 reward / done
-                agent.memory['rewards'].append(reward)
-                agent.memory['dones'].append(real_done)
+                agent.memory.add_outcome(reward, real_done)
 
                 ep_reward += reward
                 state = next_state
@@ -737,6 +1085,8 @@ def train(agent, env, n_episodes=2000, max_steps=5000):
                 f"makespan:{makespan:.3f} | min_makespan:{running_min_makespan[-1]:.3f} | "
                 f"avg_dt:{avg_decision_time:.4f} | mean_flow_done:{m_done:.2f}"
             )
+            if profiler is not None:
+                profiler.end_episode()
 
             # 使用Visdom绘制图表
             if viz is not None:
@@ -816,6 +1166,17 @@ def train(agent, env, n_episodes=2000, max_steps=5000):
             print("\n[INTERRUPT] Caught Ctrl+C. Saving training data/figures/checkpoints...\n")
             interrupted = True
             break
+    try:
+        agent.save_checkpoint(CHECKPOINT_PATH, env)
+        print(f"Checkpoint saved to '{CHECKPOINT_PATH}'")
+    except Exception:
+        import traceback
+        traceback.print_exc()
+
+    if profiler is not None and profiler.trace_path is not None:
+        n_events = profiler.write_chrome_trace()
+        print(f"[PROFILE] {n_events} trace events saved to '{profiler.trace_path}'")
+
     # 训练结束后保存训练曲线数据
     if episode_rewards:
         print(f"\nTraining completed!")
@@ -856,6 +1217,52 @@ def train(agent, env, n_episodes=2000, max_steps=5000):
             traceback.print_exc()
 
 
+TRAIN_ORDERS_PATH = "../data/data/instances/orders_20.pkl"
+_train_instance = None
+
+
+def train_orders(env_index):
+    """多进程采样池的订单源（模块级函数，可 pickle）：每个环境每回合都用训练算例"""
+    global _train_instance
+    if _train_instance is None:
+        _train_instance = OrderInstance.open(TRAIN_ORDERS_PATH)
+    return _train_instance
+
+
+def train_vec(agent, vec_env, n_updates=500, n_steps=None):
+    """
+    多进程/向量化训练：每次更新前用 agent.collect_vec 在 vec_env 的全部环境上各采样 n_steps 步
+    （每步一次批量前向），再做一次 PPO 更新
+    :param vec_env: SubprocVecWarehouseEnv 或 VecWarehouseEnv，布局与车队规模须与 agent 的动作空间一致
+    :param n_steps: 每个环境每次更新前的采样步数，None 时取 config.rollout_steps
+    :return: 结束回合的统计列表（info["episode"]）
+    """
+    n_steps = n_steps or getattr(agent.cfg, "rollout_steps", 128)
+    episodes = []
+    obs, masks = vec_env.reset()
+    memories = None
+    for u in range(n_updates):
+        try:
+            obs, masks, finished, memories = agent.collect_vec(vec_env, n_steps, obs, masks, memories)
+            policy_loss, value_loss = agent.update()
+            episodes.extend(finished)
+            for episode in finished:
+                print(f"[EP{len(episodes)}] steps={episode['length']} makespan={episode['makespan']:.2f} "
+                      f"reward={episode['reward']:.2f} flow={episode['flow_time']:.2f}")
+            print(f"[UPDATE{u + 1}] samples={n_steps * vec_env.n_envs} policy_loss={policy_loss:.4f} "
+                  f"value_loss={value_loss:.4f}")
+        except KeyboardInterrupt:
+            print("\n[INTERRUPT] Caught Ctrl+C. Saving checkpoint...\n")
+            break
+    try:
+        agent.save_checkpoint(CHECKPOINT_PATH, vec_env.template)
+        print(f"Checkpoint saved to '{CHECKPOINT_PATH}'")
+    except Exception:
+        import traceback
+        traceback.print_exc()
+    return episodes
+
+
 def plot_training_curves(training_data, out_dir=FIGURES_DIR):
     """用 matplotlib 画论文要用的图，并保存为 PNG。"""
     # 图像保存目录：out_dir（默认 FIGURES_DIR）
@@ -964,5 +1371,11 @@ def plot_training_curves(training_data, out_dir=FIGURES_DIR):
 
 if __name__ == '__main__':
     env = WarehouseEnv()
-    agent = PPOAgent()
-    train(agent, env)
\ No newline at end of file
+    agent = PPOAgent.for_env(env)
+    profiler = Profiler(config.profile_trace_path) if config.profile else None
+    if config.rollout_workers > 0:
+        agent.profiler = profiler
+        with SubprocVecWarehouseEnv(config.rollout_workers, config.envs_per_worker, train_orders) as vec_env:
+            train_vec(agent, vec_env)
+    else:
+        train(agent, env, profiler=profiler)
\ No newline at end of file
@@ -18,5 +18,13 @@ config = SimpleNamespace(
     batch_size=64,
     dt_scale = 10.0,
     a3c_num_workers = 2,
+    shared_trunk=False,  # True 时策略与价值共用一个 CNN 主干（SAPPO_I），每次决策/更新只做一次卷积
+    value_grad_scale=0.5,  # 共享主干时价值损失回传到 CNN 的梯度缩放
+    factorized_head=False,  # True 时 SAPPO_I 用与车队规模无关的分解式策略头（每个拣货位一个得分）代替扁平输出层
+    rollout_workers=0,  # >0 时 SAPPO_I 用多进程采样池（env/subproc_vec_env.py）训练，每个子进程 envs_per_worker 个环境
+    envs_per_worker=4,
+    rollout_steps=128,  # 多进程训练时每次更新前每个环境的采样步数
+    profile=False,  # 分阶段计时（env/profiler.py），每个 episode 打印各阶段耗时统计
+    profile_trace_path=None,  # profile=True 时 Chrome trace JSON 的输出路径（None 不输出）
     device='cuda' if torch.cuda.is_available() else 'cpu',
 )
\ No newline at end of file
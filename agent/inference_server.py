@@ -0,0 +1,263 @@
+"""
+批量推理服务：多个仿真（线程或进程）同时请求贪心决策时，把待决策的状态攒成微批次，
+每批只做一次策略网络前向，分摊逐条前向的 Python 与算子启动开销。
+
+InferenceServer 在后台线程中从队列取请求：从最早一条请求提交起最多等待 max_delay 秒
+（或攒满 max_batch 条），把状态堆叠为 [B,4,H,W]、合法动作写入 [B, n_actions] 掩码，
+前向一次后逐行 argmax，通过 Future 返回动作编号。
+- 进程内：LocalPolicyClient(server).select_action_greedy(env, state)，接口与 PPOAgent.select_action_greedy 一致；
+- 本地 socket：server.listen() 在 multiprocessing.connection 监听器上接收请求，
+  RemotePolicyClient(address) 在其它线程/进程中使用（每个客户端一个连接、同步收发）。
+合法动作（分解式策略头另需各智能体所在单元）在客户端按 ActionCatalog 计算，服务端只接触状态张量和动作编号。
+服务期间不要在其它线程更新同一组网络参数。
+"""
+import queue
+import threading
+import traceback
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+from time import perf_counter
+
+import numpy as np
+import torch
+
+from env.action_space import ActionCatalog
+
+
+class InferenceError(RuntimeError):
+    """服务端前向失败或连接中断"""
+
+
+class _Request:
+    __slots__ = ('state', 'legal', 'cells', 'future', 'submitted')
+
+    def __init__(self, state, legal, cells):
+        self.state = state
+        self.legal = legal
+        self.cells = cells
+        self.future = Future()
+        self.submitted = perf_counter()
+
+
+class InferenceServer:
+    def __init__(self, agent, env, max_batch=64, max_delay=0.002):
+        """
+        :param agent: PPOAgent（扁平或分解式策略头、双塔或共享主干均可）
+        :param env: 确定布局与车队规模（即动作空间）的环境，所有客户端的环境须与之一致
+        :param max_batch: 每批最多请求数
+        :param max_delay: 最早一条请求的最长等待时间（秒），0 表示只合并已在队列中的请求
+        """
+        self.agent = agent
+        self.catalog = agent.get_catalog(env)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batch_sizes = []  # 每批的请求数
+        self._queue = queue.SimpleQueue()
+        self._mask = torch.zeros(max_batch, self.catalog.size, dtype=torch.bool)
+        self._listener = None
+        self.closed = False
+        self._thread = threading.Thread(target=self._serve, name="inference-server", daemon=True)
+        self._thread.start()
+
+    def submit(self, state, legal, cells=None):
+        """
+        提交一条决策请求
+        :param state: 状态 [4,H,W]（np.ndarray）
+        :param legal: 合法动作编号（ActionCatalog.legal_indices 的结果，非空）
+        :param cells: 各智能体所在单元（ActionCatalog.agent_cells 的结果），分解式策略头必需
+        :return: concurrent.futures.Future，结果为贪心动作编号
+        """
+        if self.closed:
+            raise InferenceError("inference server closed")
+        if len(legal) == 0:
+            raise RuntimeError("No valid actions available at this step!Simulation error!")
+        if cells is None and self.agent.factorized_head:
+            raise ValueError("the factorized policy head needs the agents' cells")
+        request = _Request(state, legal, cells)
+        self._queue.put(request)
+        return request.future
+
+    # --- 服务线程 ---
+
+    def _collect(self, first):
+        """从 first 开始攒一批请求；遇到关闭信号时返回 (batch, True)"""
+        batch = [first]
+        deadline = first.submitted + self.max_delay
+        while len(batch) < self.max_batch:
+            timeout = deadline - perf_counter()
+            try:
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _serve(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            try:
+                actions = self._infer(batch)
+            except BaseException as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            for request, action in zip(batch, actions):
+                request.future.set_result(action)
+        while True:  # 关闭后仍在队列中的请求
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request.future.set_exception(InferenceError("inference server closed"))
+
+    def _infer(self, batch):
+        B = len(batch)
+        agent = self.agent
+        states = torch.from_numpy(np.stack([request.state for request in batch])).float().to(agent.device)
+        mask = self._mask[:B]
+        mask.fill_(False)
+        for i, request in enumerate(batch):
+            mask[i, request.legal] = True
+        cells = torch.from_numpy(np.stack([request.cells for request in batch])) if agent.factorized_head else None
+        with torch.no_grad():
+            logits, _ = agent._forward(states, with_value=False, agent_cells=cells, legal_mask=mask)
+            logits = logits.masked_fill(~mask.to(logits.device), -1e9)
+            actions = torch.argmax(logits, dim=1).tolist()
+        self.batch_sizes.append(B)
+        return actions
+
+    # --- 本地 socket ---
+
+    def listen(self, address=None, family=None, authkey=None):
+        """
+        在本地 socket 上接收 RemotePolicyClient 的请求（每个连接一个处理线程）
+        :param address: 监听地址，None 时由系统分配本机地址
+        :return: 实际监听地址，供 RemotePolicyClient 连接
+        """
+        if self._listener is not None:
+            raise RuntimeError("already listening")
+        self._listener = Listener(address, family, authkey=authkey)
+        threading.Thread(target=self._accept, args=(self._listener,), name="inference-listener", daemon=True).start()
+        return self._listener.address
+
+    def _accept(self, listener):
+        while True:
+            try:
+                conn = listener.accept()
+            except OSError:  # 监听器已关闭
+                break
+            threading.Thread(target=self._handle, args=(conn,), name="inference-connection", daemon=True).start()
+
+    def _handle(self, conn):
+        try:
+            while True:
+                state, legal, cells = conn.recv()
+                try:
+                    conn.send(('ok', self.submit(state, legal, cells).result()))
+                except Exception:
+                    conn.send(('error', traceback.format_exc()))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def close(self):
+        self.closed = True
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class LocalPolicyClient:
+    """进程内客户端：阻塞等待服务端返回动作"""
+
+    def __init__(self, server):
+        self.server = server
+        self.catalog = server.catalog
+
+    def select_action_greedy(self, env, state):
+        """与 PPOAgent.select_action_greedy 相同：返回 env.step 接受的动作"""
+        cells = self.catalog.agent_cells(env) if self.server.agent.factorized_head else None
+        action_idx = self.server.submit(state, self.catalog.legal_indices(env), cells).result()
+        return self.catalog.decode(env, action_idx)
+
+
+class RemotePolicyClient:
+    """通过本地 socket 访问 InferenceServer 的客户端（可在其它进程中使用，不需要 torch 网络）"""
+
+    def __init__(self, address, family=None, authkey=None):
+        self.conn = Client(address, family, authkey=authkey)
+        self.catalog = None
+
+    def select_action_greedy(self, env, state):
+        if self.catalog is None or not self.catalog.matches(env):
+            self.catalog = ActionCatalog.for_env(env)
+        legal = self.catalog.legal_indices(env)
+        if len(legal) == 0:
+            raise RuntimeError("No valid actions available at this step!Simulation error!")
+        try:
+            self.conn.send((state, legal, self.catalog.agent_cells(env)))
+            status, result = self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise InferenceError("connection to the inference server lost") from e
+        if status != 'ok':
+            raise InferenceError(result)
+        return self.catalog.decode(env, result)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def run_greedy_episodes(clients, envs, orders, max_steps=None):
+    """
+    每个环境一个线程，用对应的客户端贪心决策，并发跑完一个 episode
+    :param clients: 与 envs 一一对应的客户端（LocalPolicyClient / RemotePolicyClient / PPOAgent）
+    :param orders: 与 envs 一一对应的订单（列表或 OrderInstance）
+    :return: 各环境的决策步数
+    """
+    steps = [0] * len(envs)
+    errors = []
+
+    def run(i):
+        try:
+            env, client = envs[i], clients[i]
+            state = env.reset(orders[i])
+            done = truncated = False
+            while not (done or truncated) and (max_steps is None or steps[i] < max_steps):
+                state, reward, done, truncated, info = env.step(client.select_action_greedy(env, state))
+                steps[i] += 1
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,), daemon=True) for i in range(len(envs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return steps
@@ -0,0 +1,208 @@
+"""
+策略导出与 CPU 推理：把训练好的 SAPPO 策略网络（CNN + MLP + 非法动作掩码）导出为 TorchScript / ONNX，
+部署端用 ExportedPolicy 载入后做贪心决策，不需要训练代码与网络定义。
+
+导出模型的输入为 state [B,4,H,W] float32 与 legal_mask [B, n_actions] bool，输出屏蔽后的 logits [B, n_actions]
+（与 PPOAgent 相同，非法动作填 -1e9），batch 维可变。TorchScript 版本经 trace + freeze（常量折叠、算子融合）；
+channels_last=True 时卷积按 NHWC 内存布局导出（大批量时卷积更快，batch 1 时略慢），ExportedPolicy 的输入缓冲区随之分配；
+ONNX 导出需要安装 onnx，ONNX 推理需要 onnxruntime。分解式策略头按导出时 env 的车队规模输出完整扁平动作空间，
+另有输入 agent_cells [B, n_agents] int64（各智能体所在单元，见 ActionCatalog.agent_cells）。
+同名 .json 记录动作空间与布局，供 ExportedPolicy 构造 ActionCatalog 和输入缓冲区。
+
+导出：python agent/policy_export.py [--checkpoint PATH] [--out PREFIX] [--formats torchscript onnx] [--fleet 2x6]
+                                    [--channels-last]
+"""
+import argparse
+import copy
+import json
+import os
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from env.action_space import ActionCatalog
+
+EXPORT_FORMATS = {'torchscript': '.pt', 'onnx': '.onnx'}
+
+
+class MaskedPolicy(nn.Module):
+    """策略网络 + 掩码：(state, legal_mask[, agent_cells]) -> 屏蔽非法动作后的 logits"""
+
+    def __init__(self, policy_net):
+        super().__init__()
+        self.policy_net = policy_net
+
+    def forward(self, state, legal_mask, agent_cells=None):
+        if agent_cells is None:
+            return self.policy_net(state).masked_fill(~legal_mask, -1e9)
+        return self.policy_net(state, agent_cells, legal_mask).masked_fill(~legal_mask, -1e9)
+
+
+def metadata_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def export_policy(agent, env, prefix, formats=('torchscript', 'onnx'), channels_last=False):
+    """
+    导出 agent 的策略网络
+    :param env: 确定布局与车队规模的环境（即导出模型的动作空间）
+    :param prefix: 输出路径前缀，按格式追加 .pt / .onnx，另写 prefix.json
+    :param channels_last: TorchScript 版本的卷积使用 NHWC 内存布局（ONNX 不受影响）
+    :return: {格式: 文件路径}
+    """
+    catalog = agent.get_catalog(env)
+    policy = MaskedPolicy(copy.deepcopy(agent.policy_net).cpu()).eval()
+    example = (torch.zeros(2, 4, env.N_w, env.N_l), torch.ones(2, catalog.size, dtype=torch.bool))
+    if agent.factorized_head:
+        example += (torch.from_numpy(np.stack([catalog.agent_cells(env)] * 2)),)
+    input_names = ['state', 'legal_mask', 'agent_cells'][:len(example)]
+    memory_format = torch.channels_last if channels_last else torch.contiguous_format
+
+    directory = os.path.dirname(os.path.abspath(prefix))
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for fmt in formats:
+        path = prefix + EXPORT_FORMATS[fmt]
+        if fmt == 'torchscript':
+            scripted = copy.deepcopy(policy).to(memory_format=memory_format)
+            with torch.no_grad():
+                module = torch.jit.freeze(torch.jit.trace(
+                    scripted, (example[0].contiguous(memory_format=memory_format),) + example[1:]))
+            module.save(path)
+        else:
+            try:
+                import onnx  # noqa: F401  torch.onnx.export 依赖
+            except ImportError:
+                raise ImportError("ONNX export needs the onnx package: pip install onnx") from None
+            with torch.no_grad():
+                torch.onnx.export(policy, example, path, dynamo=False,
+                                  input_names=input_names, output_names=['logits'],
+                                  dynamic_axes={name: {0: 'batch'} for name in input_names + ['logits']})
+        paths[fmt] = path
+
+    metadata = {
+        'n_actions': catalog.size,
+        'state_shape': [4, env.N_w, env.N_l],
+        'fleet': {'n_pickers': catalog.n_pickers, 'n_robots': catalog.n_robots},
+        'n_pick_points': catalog.n_pick_points,
+        'channels_last': channels_last,
+        'agent_cells': agent.factorized_head,
+    }
+    with open(metadata_path(prefix), 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return paths
+
+
+class ExportedPolicy:
+    """
+    载入导出的策略做 CPU 推理：固定线程数、torch.inference_mode、预分配的状态与掩码输入缓冲区
+    （批大小超过 max_batch 时扩容）；select_action_greedy 与 PPOAgent.select_action_greedy 接口一致
+    """
+
+    def __init__(self, path, n_threads=1, max_batch=64):
+        """
+        :param path: 导出的 .pt（TorchScript）或 .onnx 文件
+        :param n_threads: 推理线程数；TorchScript 通过 torch.set_num_threads 设置（进程级）
+        :param max_batch: 输入缓冲区的初始批大小
+        """
+        with open(metadata_path(path)) as f:
+            self.metadata = json.load(f)
+        self.catalog = ActionCatalog(self.metadata['fleet']['n_pickers'], self.metadata['fleet']['n_robots'],
+                                     self.metadata['n_pick_points'])
+        self.state_shape = tuple(self.metadata['state_shape'])
+        self.n_threads = n_threads
+        self.session = self.module = None
+        if path.endswith(EXPORT_FORMATS['onnx']):
+            try:
+                import onnxruntime
+            except ImportError:
+                raise ImportError("ONNX inference needs onnxruntime: pip install onnxruntime") from None
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = n_threads
+            options.inter_op_num_threads = 1
+            self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        else:
+            torch.set_num_threads(n_threads)
+            self.module = torch.jit.load(path, map_location='cpu').eval()
+        self._allocate(max_batch)
+
+    def _allocate(self, max_batch):
+        self.max_batch = max_batch
+        self._states = torch.zeros((max_batch,) + self.state_shape)
+        if self.module is not None and self.metadata['channels_last']:
+            self._states = self._states.contiguous(memory_format=torch.channels_last)
+        self._masks = torch.zeros(max_batch, self.catalog.size, dtype=torch.bool)
+        self._states_np = self._states.numpy()  # 共享内存的 ndarray 视图（保留步长），拷入状态不另分配
+        self._masks_np = self._masks.numpy()
+        self._cells = None
+        if self.metadata.get('agent_cells', False):
+            self._cells = torch.zeros(max_batch, self.catalog.n_pickers + self.catalog.n_robots, dtype=torch.long)
+
+    def logits(self, states, legal, cells=None):
+        """
+        :param states: [B,4,H,W] 状态（np.ndarray）
+        :param legal: 长度为 B 的合法动作编号列表
+        :param cells: [B, n_agents] 各智能体所在单元（分解式策略头导出的模型必需）
+        :return: 屏蔽后的 logits [B, n_actions]（torch.Tensor，下一次调用前有效）
+        """
+        B = len(states)
+        if B > self.max_batch:
+            self._allocate(max(B, 2 * self.max_batch))
+        np.copyto(self._states_np[:B], states)
+        masks = self._masks_np[:B]
+        masks.fill(False)
+        for i, indices in enumerate(legal):
+            masks[i, indices] = True
+        inputs = (self._states[:B], self._masks[:B])
+        if self._cells is not None:
+            if cells is None:
+                raise ValueError("this policy was exported with a factorized head and needs the agents' cells")
+            self._cells[:B] = torch.as_tensor(np.asarray(cells))
+            inputs += (self._cells[:B],)
+        if self.session is not None:
+            feeds = dict(zip(('state', 'legal_mask', 'agent_cells'), (x.numpy() for x in inputs)))
+            outputs = self.session.run(None, feeds)
+            return torch.from_numpy(outputs[0])
+        with torch.inference_mode():
+            return self.module(*inputs)
+
+    def select_action_greedy(self, env, state):
+        legal = self.catalog.legal_indices(env)
+        if len(legal) == 0:
+            raise RuntimeError("No valid actions available at this step!Simulation error!")
+        cells = self.catalog.agent_cells(env)[None] if self._cells is not None else None
+        action_idx = int(torch.argmax(self.logits(state[None], [legal], cells)[0]))
+        return self.catalog.decode(env, action_idx)
+
+
+def main():
+    from SAPPO_I import CHECKPOINT_PATH, load_checkpoint
+    from env.env_I import WarehouseEnv
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="PPOAgent.save_checkpoint 保存的检查点")
+    parser.add_argument("--out", default=None, help="输出路径前缀，默认为检查点路径去掉扩展名加 _policy")
+    parser.add_argument("--formats", nargs="+", default=list(EXPORT_FORMATS), choices=list(EXPORT_FORMATS))
+    parser.add_argument("--fleet", default=None, help="导出的车队规模 拣货员数x机器人数，默认为配置中的规模")
+    parser.add_argument("--channels-last", action="store_true", help="TorchScript 卷积使用 NHWC 内存布局（适合大批量）")
+    args = parser.parse_args()
+
+    if args.fleet is None:
+        env = WarehouseEnv()
+    else:
+        pickers, robots = map(int, args.fleet.split("x"))
+        env = WarehouseEnv(robots, pickers)
+    agent = load_checkpoint(args.checkpoint, env)
+    prefix = os.path.splitext(args.checkpoint)[0] + "_policy" if args.out is None else args.out
+    for fmt in args.formats:
+        try:
+            path = export_policy(agent, env, prefix, [fmt], args.channels_last)[fmt]
+        except ImportError as e:
+            print(f"Warning: {fmt} export skipped ({e})")
+            continue
+        print(f"{fmt}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+PPO 经验池：按时间步连续存放的数组（状态 [T,4,H,W]、价值、旧 log 概率、动作、合法动作掩码 [T, action_num]、奖励、done，
+分解式策略头另有各智能体所在单元 [T, n_agents]），
+update 时一次性转换为张量，按 minibatch 下标直接切片，无需逐样本重建 mask。
+"""
+import numpy as np
+import torch
+
+
+class RolloutMemory:
+    def __init__(self, action_num, capacity=2048):
+        """
+        :param action_num: 扁平动作空间大小（掩码列数）
+        :param capacity: 初始容量，不够时按 2 倍扩容
+        """
+        self.action_num = action_num
+        self.capacity = capacity
+        self.size = 0  # 已写入的决策步数
+        self.n_outcomes = 0  # 已写入的 reward/done 数
+        self.states = None  # 首次写入时按状态形状分配
+        self.agent_cells = None  # 首次写入智能体位置时分配
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.log_probs = np.zeros(capacity, dtype=np.float64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.legal_mask = np.zeros((capacity, action_num), dtype=bool)
+        self.legal_counts = np.zeros(capacity, dtype=np.int64)  # 合法动作个数（含重复，用于日志）
+        self.rewards = np.zeros(capacity, dtype=np.float64)
+        self.dones = np.zeros(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return self.n_outcomes
+
+    def clear(self):
+        self.size = 0
+        self.n_outcomes = 0
+        self.legal_mask.fill(False)
+
+    def _grow(self):
+        new_capacity = self.capacity * 2
+        for name in ('states', 'agent_cells', 'values', 'log_probs', 'actions', 'legal_mask', 'legal_counts', 'rewards',
+                     'dones'):
+            old = getattr(self, name)
+            if old is None:
+                continue
+            new = np.zeros((new_capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.capacity] = old
+            setattr(self, name, new)
+        self.capacity = new_capacity
+
+    def add(self, state, value, log_prob, action, legal_action_index, agent_cells=None):
+        """
+        记录一次决策：状态、价值、旧 log 概率、所选动作编号和合法动作编号列表
+        :param agent_cells: 各智能体所在单元（分解式策略头，见 ActionCatalog.agent_cells）
+        """
+        if self.states is None:
+            self.states = np.zeros((self.capacity,) + tuple(np.shape(state)), dtype=np.float32)
+        if agent_cells is not None and self.agent_cells is None:
+            self.agent_cells = np.zeros((self.capacity, len(agent_cells)), dtype=np.int64)
+        if self.size == self.capacity:
+            self._grow()
+        t = self.size
+        self.states[t] = state
+        if agent_cells is not None:
+            self.agent_cells[t] = agent_cells
+        self.values[t] = value
+        self.log_probs[t] = log_prob
+        self.actions[t] = action
+        self.legal_mask[t, legal_action_index] = True
+        self.legal_counts[t] = len(legal_action_index)
+        self.size += 1
+
+    def add_outcome(self, reward, done):
+        """记录上一决策对应的奖励和 done"""
+        self.rewards[self.n_outcomes] = reward
+        self.dones[self.n_outcomes] = float(done)
+        self.n_outcomes += 1
+
+    def extend(self, other):
+        """把另一个经验池（如向量化采样中单个环境的轨迹）的全部决策步追加到末尾"""
+        n = other.n_outcomes
+        if n == 0:
+            return
+        if self.states is None:
+            self.states = np.zeros((self.capacity,) + other.states.shape[1:], dtype=np.float32)
+        if other.agent_cells is not None and self.agent_cells is None:
+            self.agent_cells = np.zeros((self.capacity,) + other.agent_cells.shape[1:], dtype=np.int64)
+        while self.size + n > self.capacity:
+            self._grow()
+        t = self.size
+        for name in ('states', 'values', 'log_probs', 'actions', 'legal_mask', 'legal_counts', 'rewards', 'dones'):
+            getattr(self, name)[t:t + n] = getattr(other, name)[:n]
+        if other.agent_cells is not None:
+            self.agent_cells[t:t + n] = other.agent_cells[:n]
+        self.size += n
+        self.n_outcomes += n
+
+    def tensors(self, device):
+        """前 T 步数据的张量：states, old_values, old_log_probs, actions, legal_mask"""
+        T = self.n_outcomes
+        to = lambda a, dtype: torch.as_tensor(a[:T], dtype=dtype, device=device)
+        return (to(self.states, torch.float32), to(self.values, torch.float32), to(self.log_probs, torch.float32),
+                to(self.actions, torch.long), to(self.legal_mask, torch.bool))
+
+    def agent_cells_tensor(self, device):
+        """前 T 步各智能体所在单元 [T, n_agents]（LongTensor）"""
+        if self.agent_cells is None:
+            raise RuntimeError("agent positions were not recorded (factorized policy head)")
+        return torch.as_tensor(self.agent_cells[:self.n_outcomes], dtype=torch.long, device=device)
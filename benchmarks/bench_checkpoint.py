@@ -0,0 +1,78 @@
+"""
+车队规模无关的检查点：在 2 拣货员 / 6 机器人上保存 SAPPO 检查点（PPOAgent.save_checkpoint），
+再用 load_checkpoint 载入到更大的车队并完整跑一个 episode，报告检查点大小、载入耗时与 episode 耗时。
+往返与换算的正确性校验见 environment/test_checkpoint.py。
+
+用法：python benchmarks/bench_checkpoint.py [--fleet 4x10] [--orders 20]
+"""
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import torch
+
+from common import INSTANCES_DIR, ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+from env.action_space import ActionCatalog  # noqa: E402
+from env.env_I import WarehouseEnv  # noqa: E402
+
+
+def make_agent(env, **overrides):
+    cfg = SimpleNamespace(**{**vars(SAPPO_I.config), **overrides})
+    torch.manual_seed(0)
+    agent = SAPPO_I.PPOAgent.for_env(env, cfg)
+    agent.get_catalog(env)
+    return agent
+
+
+def run_episode(agent, env, orders_bytes):
+    state = env.reset(pickle.loads(orders_bytes))
+    steps, done = 0, False
+    t0 = time.perf_counter()
+    while not done:
+        action = agent.total_action_index_pair(env, state)
+        state, reward, done, truncated, _ = env.step(action)
+        agent.memory.add_outcome(reward, done)
+        steps += 1
+    agent.clear_memory()
+    return steps, time.perf_counter() - t0, env.current_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fleet", default="4x10", help="载入时的拣货员数x机器人数")
+    parser.add_argument("--orders", type=int, default=20, choices=[20, 40, 60])
+    args = parser.parse_args()
+    pickers, robots = map(int, args.fleet.split("x"))
+    with open(os.path.join(INSTANCES_DIR, f"orders_{args.orders}.pkl"), "rb") as f:
+        orders_bytes = f.read()
+
+    small = WarehouseEnv(6, 2)
+    big = WarehouseEnv(robots, pickers)
+    old, new = ActionCatalog.for_env(small), ActionCatalog.for_env(big)
+    print(f"saved on 2x6 ({old.size} actions), loaded into {pickers}x{robots} ({new.size} actions)")
+    print(f"\n{'head':>10} {'fill':>6} {'size MB':>8} {'load s':>7} {'steps':>6} {'episode s':>10} {'makespan':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "agent.pt")
+        for factorized, fill in ((False, "mean"), (False, "cycle"), (True, "mean")):
+            agent = make_agent(small, factorized_head=factorized)
+            agent.save_checkpoint(path, small)
+
+            t0 = time.perf_counter()
+            loaded = SAPPO_I.load_checkpoint(path, big, fill=fill)
+            t_load = time.perf_counter() - t0
+
+            torch.manual_seed(0)
+            steps, seconds, makespan = run_episode(loaded, big, orders_bytes)
+            print(f"{'factorized' if factorized else 'flat':>10} {fill:>6} {os.path.getsize(path) / 2 ** 20:>8.1f} "
+                  f"{t_load:>7.2f} {steps:>6} {seconds:>10.2f} {makespan:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+距离查询微基准：逐次用 Python 公式计算 vs 预计算距离矩阵查表 vs 向量化“一点到全部候选点”
+
+用法：python benchmarks/bench_distance.py [--calls 200000]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from common import ROOT  # noqa: F401  (把仓库根目录加入 sys.path)
+from env.env_I import WarehouseEnv
+from env.routing import aisle_distance
+
+
+def legacy_shortest_path(env, point1, point2):
+    """原 WarehouseEnv.shortest_path_between_pick_points 的逐次公式实现"""
+    x1, y1 = point1.position
+    x2, y2 = point2.position
+    if x1 == x2:
+        return abs(y1 - y2)
+    path1 = abs(y1 - env.S_b / 2) + abs(y2 - env.S_b / 2) + abs(x1 - x2)
+    path2 = (abs(y1 - (env.S_b * 1.5 + env.N_l * env.S_l)) + abs(y2 - (env.S_b * 1.5 + env.N_l * env.S_l))
+             + abs(x1 - x2))
+    return min(path1, path2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    env = WarehouseEnv()
+    table = env.distance_table
+    bottom_y, top_y = table.bottom_y, table.top_y
+    nodes = [pp for pp in env.pick_points_list] + [env.depot_object]
+    rng = random.Random(0)
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(args.calls)]
+
+    # 校验：查表结果与公式逐位一致
+    for a, b in pairs[:10000]:
+        assert env.shortest_path_between_pick_points(a, b) == legacy_shortest_path(env, a, b)
+
+    t0 = time.perf_counter()
+    for a, b in pairs:
+        legacy_shortest_path(env, a, b)
+    t_formula = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for a, b in pairs:
+        env.shortest_path_between_pick_points(a, b)
+    t_lookup = time.perf_counter() - t0
+
+    # 一点到全部拣货位：逐个公式 vs 一次向量化查表
+    sources = [rng.choice(nodes) for _ in range(2000)]
+    n_pp = len(env.pick_points_list)
+    t0 = time.perf_counter()
+    for src in sources:
+        [aisle_distance(src.position, pp.position, bottom_y, top_y) for pp in env.pick_points_list]
+    t_row_formula = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for src in sources:
+        env.distances_to_pick_points(src)
+    t_row_lookup = time.perf_counter() - t0
+    assert np.array_equal(env.distances_to_pick_points(sources[0]),
+                          [aisle_distance(sources[0].position, pp.position, bottom_y, top_y)
+                           for pp in env.pick_points_list])
+
+    print(f"matrix: {table.matrix.shape}, {table.matrix.nbytes / 1024:.0f} KiB")
+    print(f"single pair  : formula {t_formula / args.calls * 1e9:7.0f} ns/call | "
+          f"matrix {t_lookup / args.calls * 1e9:7.0f} ns/call")
+    print(f"1 -> {n_pp} points: formula {t_row_formula / len(sources) * 1e6:7.1f} us | "
+          f"vectorized {t_row_lookup / len(sources) * 1e6:7.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+实体存储基准：对象模式（每次 reset 重新创建 Robot/Picker）vs 数组化 EntityStore 的 reset 耗时与内存，
+以及启发式 episode 的单步耗时（两种模式背靠背交替运行，比值取中位数）
+
+用法：python benchmarks/bench_entity_store.py [--robots 6 600] [--orders 2000]
+"""
+import argparse
+import pickle
+import random
+import statistics
+import time
+import tracemalloc
+
+from common import heuristic_action, make_orders
+from env.env_I import WarehouseEnv
+
+
+def measure(env, repeats):
+    """返回 (单次 reset 耗时 us, 单次 reset 新分配峰值 KiB, 实体常驻内存 KiB)"""
+    env.reset([])  # 预热：存储模式首次 reset 时创建数组与视图
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        env.reset([])
+    per_reset = (time.perf_counter() - t0) / repeats
+
+    tracemalloc.start()
+    env.reset([])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # 实体常驻内存：丢弃现有实体后重新构建一次所保留的字节数
+    env.robots, env.pickers, env.robot_dict, env.picker_dict = [], [], {}, {}
+    store, env.entity_store = env.entity_store, None
+    tracemalloc.start()
+    env.adjust_resources()
+    resident, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    env.entity_store = store or env.entity_store
+    return per_reset * 1e6, peak / 1024, resident / 1024
+
+
+def step_time(env, orders):
+    """启发式跑一个 episode，返回单步耗时（微秒）"""
+    rng = random.Random(0)
+    env.reset(pickle.loads(orders))
+    steps = 0
+    t0 = time.perf_counter()
+    while not env.done:
+        env.step(heuristic_action(env, rng))
+        steps += 1
+    return (time.perf_counter() - t0) / steps * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--robots", type=int, nargs="+", default=[6, 600])
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=2000, help="单步耗时所用合成算例的订单数")
+    parser.add_argument("--episodes", type=int, default=5, help="单步耗时每种模式的 episode 数")
+    args = parser.parse_args()
+
+    print(f"{'robots':>7} {'pickers':>7} {'mode':>8} {'reset us':>10} {'alloc KiB':>10} {'entities KiB':>13} "
+          f"{'step us':>8} {'step ratio':>10}")
+    for n_robots in args.robots:
+        n_pickers = max(2, n_robots // 3)
+        envs = [WarehouseEnv(robot_num=n_robots, picker_num=n_pickers, entity_store=use_store)
+                for use_store in (False, True)]
+        orders = pickle.dumps(make_orders(envs[0], args.orders, mean_interval=100.0 * 6 / n_robots))
+        steps = [[], []]
+        for _ in range(args.episodes):
+            for env, times in zip(envs, steps):
+                times.append(step_time(env, orders))
+        ratio = statistics.median(store / objects for objects, store in zip(*steps))
+        for use_store, env in enumerate(envs):
+            us, alloc, resident = measure(env, args.repeats)
+            mode = "store" if use_store else "objects"
+            print(f"{n_robots:>7} {n_pickers:>7} {mode:>8} {us:>10.0f} {alloc:>10.1f} {resident:>13.1f} "
+                  f"{statistics.median(steps[use_store]):>8.1f} {ratio if use_store else 1.0:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+事件日历基准：不同机器人规模下 WarehouseEnv 的事件吞吐（events/s）与决策吞吐（decisions/s）
+
+用法：python benchmarks/bench_event_calendar.py [--orders 2000]
+"""
+import argparse
+
+from common import make_orders, run_episode
+from env.env_I import WarehouseEnv
+
+
+def count_events(env):
+    """包装 env.calendar.pop_at，统计实际出堆处理的事件数"""
+    counter = [0]
+    pop_at = env.calendar.pop_at
+
+    def counted(time):
+        due = pop_at(time)
+        counter[0] += len(due)
+        return due
+
+    env.calendar.pop_at = counted
+    return counter
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--robots", type=int, nargs="+", default=[6, 60, 600])
+    args = parser.parse_args()
+
+    print(f"{'robots':>7} {'pickers':>7} {'decisions':>9} {'events':>8} {'sec':>8} {'events/s':>10} {'dec/s':>9}")
+    for n_robots in args.robots:
+        # 拣货员与订单到达率随机器人规模等比放大，保持系统负载相近
+        n_pickers = max(2, n_robots // 3)
+        env = WarehouseEnv(robot_num=n_robots, picker_num=n_pickers)
+        orders = make_orders(env, args.orders, mean_interval=100.0 * 6 / n_robots)
+        counter = count_events(env)
+        steps, sec = run_episode(env, orders)
+        print(f"{n_robots:>7} {n_pickers:>7} {steps:>9} {counter[0]:>8} {sec:>8.2f} "
+              f"{counter[0] / sec:>10.0f} {steps / sec:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+分解式策略头基准：扁平输出层 nn.Linear(2048, action_num) 与 FactorizedPolicyNetwork（config.factorized_head=True）
+在 6 / 60 个机器人时的参数量、前向延迟（全部动作 / 只取合法动作，另列不含 CNN 的策略头本身）与内存（参数 + batch 32 的 logits）。
+先校验：候选路径（只对有合法动作的智能体和候选目标计算）的 logits 与全量路径的对应列一致（容差内），
+合法动作上的采样分布与全量掩码 softmax 一致
+（且为归一化的两级分布）；位置不同的两个拣货员对同一拣货位的 logits 不同、位置相同时相同；
+同一组权重可直接载入另一车队规模的 agent，并在 60 个机器人的环境上完成决策与一次 PPO 更新。
+
+用法：python benchmarks/bench_factorized_head.py [--fleets 2x6 20x60] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+from common import ROOT, heuristic_action, make_orders
+
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+from env.action_space import ActionCatalog  # noqa: E402
+from env.env_I import WarehouseEnv  # noqa: E402
+
+
+def make_agent(env, factorized):
+    cfg = SimpleNamespace(**{**vars(SAPPO_I.config), 'factorized_head': factorized})
+    torch.manual_seed(0)
+    agent = SAPPO_I.PPOAgent(cfg, n_actions=ActionCatalog.for_env(env).size)
+    agent.get_catalog(env)
+    return agent
+
+
+def busy_env(pickers, robots, n_steps=60):
+    """合成订单较密集的环境，用启发式策略推进 n_steps 个决策点"""
+    env = WarehouseEnv(robots, pickers)
+    rng = random.Random(0)
+    env.reset(make_orders(env, 30 * robots, mean_interval=10.0))
+    for _ in range(n_steps):
+        env.step(heuristic_action(env, rng))
+    return env
+
+
+def check(pickers, robots, n_steps=200):
+    env = busy_env(pickers, robots, n_steps=0)
+    agent = make_agent(env, True)
+    rng = random.Random(0)
+    max_candidates = 0
+    max_err = 0.0
+    for _ in range(n_steps):  # 逐个决策点比较
+        state = torch.from_numpy(env.state_extractor()).unsqueeze(0)
+        legal, _, logits, _, candidates = agent._masked_logits(env, state)
+        cells = torch.from_numpy(agent.catalog.agent_cells(env)).unsqueeze(0)
+        mask = torch.zeros(1, agent.n_actions, dtype=torch.bool)
+        mask[0, legal] = True
+        with torch.no_grad():
+            full = agent.policy_net(state, cells, mask)
+        index = torch.from_numpy(candidates)
+        err = (logits - full[:, index]).abs().max().item()
+        assert err < 1e-5, f"candidate path differs from the full head by {err}"
+        max_err = max(max_err, err)
+        p_full = torch.softmax(full.masked_fill(~mask, -1e9), dim=-1)[0, index]
+        assert torch.allclose(torch.softmax(logits, dim=-1)[0], p_full, atol=1e-6), "sampling distribution differs"
+        assert abs(logits.exp().sum().item() - 1.0) < 1e-4, "log P(agent) + log P(target | agent) is not normalized"
+        max_candidates = max(max_candidates, len(candidates))
+        env.step(heuristic_action(env, rng))
+    check_positions(agent, env)
+
+    # 同一组权重用于另一车队规模：决策 + 一次更新
+    big = busy_env(pickers * 10, robots * 10, n_steps=0)
+    big_agent = make_agent(big, True)
+    big_agent.policy_net.load_state_dict(agent.policy_net.state_dict())
+    state = big.state_extractor()
+    for _ in range(40):
+        action = big_agent.total_action_index_pair(big, state)
+        state, reward, done, _, _ = big.step(action)
+        big_agent.memory.add_outcome(reward, done)
+    big_agent.update()
+    print(f"check: candidate path == full head (max |error| {max_err:.1e}) at {n_steps} decision points "
+          f"(up to {max_candidates} legal actions); "
+          f"same weights drive a {robots * 10}-robot fleet ({ActionCatalog.for_env(big).size} actions)")
+
+
+def check_positions(agent, env):
+    """两个拣货员对同一拣货位的 logits 随各自位置变化：位置不同时不同，位置相同时相同"""
+    catalog = agent.get_catalog(env)
+    P = catalog.n_pick_points
+    state = torch.from_numpy(env.state_extractor()).unsqueeze(0)
+    pick_cells = [env.pick_point_index[pp.point_id] for pp in env.pick_points_list]
+    cells = torch.from_numpy(catalog.agent_cells(env)).unsqueeze(0)
+    j = P // 2
+    with torch.no_grad():
+        cells[0, 0], cells[0, 1] = pick_cells[0], pick_cells[-1]
+        apart = agent.policy_net(state, cells)[0]
+        cells[0, 1] = pick_cells[0]
+        together = agent.policy_net(state, cells)[0]
+    gap = (apart[j] - apart[P + j]).abs().item()
+    assert gap > 1e-4, "pickers at different cells get the same logit for a pick point"
+    assert torch.equal(together[j], together[P + j]), "pickers at the same cell get different logits"
+    # 去掉选智能体的部分后，目标分布 P(j | 拣货员) 同样依赖于拣货员所在位置
+    target_apart = torch.log_softmax(apart[:P], 0) - torch.log_softmax(apart[P:2 * P], 0)
+    assert target_apart.abs().max().item() > 1e-4, "target scores are not conditioned on the picker"
+    print(f"check: pickers at different cells -> |logit gap| {gap:.3g} for pick point {j}; same cell -> identical")
+
+
+def best_of(fn, repeat, number):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fleets", nargs="+", default=["2x6", "20x60"], help="拣货员数x机器人数")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    fleets = [tuple(map(int, f.split("x"))) for f in args.fleets]
+
+    check(*fleets[0])
+
+    print(f"\n{'fleet':>7} {'head':>10} {'actions':>8} {'params M':>9} {'head params':>12} {'param MB':>9} "
+          f"{'logits MB@32':>13} {'b1 full ms':>11} {'b1 legal ms':>12} {'b32 full ms':>12} "
+          f"{'head full ms':>13} {'head legal ms':>14}")
+    for pickers, robots in fleets:
+        env = busy_env(pickers, robots)
+        catalog = ActionCatalog.for_env(env)
+        state = torch.from_numpy(env.state_extractor()).unsqueeze(0)
+        batch = state.repeat(32, 1, 1, 1)
+        cells = torch.from_numpy(catalog.agent_cells(env)).unsqueeze(0)
+        batch_cells = cells.repeat(32, 1)
+        for factorized in (False, True):
+            agent = make_agent(env, factorized)
+            net = agent.policy_net.eval()
+            params = sum(p.numel() for p in net.parameters())
+            head = params - sum(p.numel() for p in net.cnn.parameters())
+            args_1, args_32 = ((cells,), (batch_cells,)) if factorized else ((), ())
+            with torch.no_grad():
+                net(state, *args_1)
+                t_full = best_of(lambda: net(state, *args_1), args.repeat, 5)
+                t_b32 = best_of(lambda: net(batch, *args_32), args.repeat, 1)
+                if factorized:
+                    candidates = torch.from_numpy(np.unique(catalog.legal_indices(env)))
+                    t_legal = best_of(lambda: net(state, cells, candidates=candidates), args.repeat, 5)
+                    # 只计策略头（卷积特征已算好）：全量路径 vs 候选路径
+                    feature_map, features = net.cnn.forward_with_map(state)
+                    t_head = best_of(lambda: net.head(state, feature_map, features, cells), args.repeat, 20)
+                    t_head_legal = best_of(lambda: net.head(state, feature_map, features, cells, candidates=candidates),
+                                           args.repeat, 20)
+            legal = f"{t_legal * 1e3:>12.2f}" if factorized else f"{'-':>12}"
+            heads = f"{t_head * 1e3:>13.2f} {t_head_legal * 1e3:>14.2f}" if factorized else f"{'-':>13} {'-':>14}"
+            print(f"{f'{pickers}x{robots}':>7} {'factorized' if factorized else 'flat':>10} {catalog.size:>8} "
+                  f"{params / 1e6:>9.2f} {head / 1e6:>11.2f}M {params * 4 / 2 ** 20:>9.1f} "
+                  f"{32 * catalog.size * 4 / 2 ** 20:>13.2f} {t_full * 1e3:>11.2f} {legal} {t_b32 * 1e3:>12.1f} {heads}")
+            del agent, net
+
+
+if __name__ == "__main__":
+    main()
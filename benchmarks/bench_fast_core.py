@@ -0,0 +1,143 @@
+"""
+编译内核基准：WarehouseEnv(fast_core=True) 与纯 Python 实现的差分校验与单步耗时对比。
+校验：用随机启发式、均匀随机合法动作、以及计划外目标策略（机器人以一定概率去任一拣货位，
+包括已拣完的拣货位，只拣其上尚未拣选的订单行），在 Python 环境（对象模式与 EntityStore 模式）上按多个种子录制动作编号序列（ActionCatalog 编号），
+在 fast_core 环境上重放，逐步比较状态张量、奖励、仿真时间、done 与合法动作编号。
+未安装 numba 时内核按普通 Python 执行，只能用于校验，计时没有意义。
+
+用法：python benchmarks/bench_fast_core.py [--orders 2000] [--robots 6] [--pickers 2] [--seeds 3] [--random-steps 3000]
+"""
+import argparse
+import os
+import pickle
+import random
+import time
+
+import numpy as np
+
+from common import INSTANCES_DIR, heuristic_action, make_orders, random_action
+from env.action_space import ActionCatalog
+from env.env_I import WarehouseEnv
+from env.fast_core import NUMBA_AVAILABLE
+
+
+def fresh(orders):
+    """订单对象的副本：Python 环境在拣选过程中会修改订单的商品列表"""
+    return pickle.loads(orders)
+
+
+def encode(catalog, env, action):
+    """env.step 的动作 -> ActionCatalog 编号（空动作为 None）"""
+    picker_act, robot_act = action
+    if picker_act is not None:
+        return catalog.picker_action(picker_act[0].picker_id, picker_act[1].index)
+    if robot_act is not None:
+        robot, target = robot_act
+        if target is env.depot_object:
+            return catalog.depot_action(robot.robot_id)
+        return catalog.robot_action(robot.robot_id, target.index)
+    return None
+
+
+def off_plan_action(env, rng, p_off_plan=0.3):
+    """随机启发式，但给机器人规划时以 p_off_plan 的概率改去任一拣货位（计划外目标，可能重复到访）"""
+    picker_act, robot_act = heuristic_action(env, rng)
+    if robot_act is not None and rng.random() < p_off_plan:
+        robot_act = (robot_act[0], rng.choice(env.pick_points_list))
+    return picker_act, robot_act
+
+
+def record(env, orders, seed, policy="heuristic", max_steps=None):
+    """
+    在 Python 环境上跑一个 episode，返回 [(动作编号, 合法动作, 状态, 奖励, 时间, done)]
+    :param policy: "heuristic" 为随机启发式；"random" 为均匀随机合法动作；"off_plan" 见 off_plan_action
+                   （后两者不保证结束，需配合 max_steps）
+    """
+    catalog = ActionCatalog.for_env(env)
+    rng = random.Random(seed)
+    env.reset(fresh(orders))
+    trace = []
+    while not env.done and (max_steps is None or len(trace) < max_steps):
+        legal = catalog.legal_indices(env)
+        if policy == "random":
+            index = encode(catalog, env, random_action(env, catalog, rng))
+        elif policy == "off_plan":
+            index = encode(catalog, env, off_plan_action(env, rng))
+        else:
+            index = encode(catalog, env, heuristic_action(env, rng))
+        state, reward, done, _, _ = env.step((None, None) if index is None else catalog.decode(env, index))
+        trace.append((index, legal, state.copy(), reward, env.current_time, done))
+    return trace
+
+
+def replay(env, orders, trace):
+    """在 fast_core 环境上重放动作编号序列，逐步与录制结果比较（录制被截断时只比较已录制的前缀）"""
+    catalog = ActionCatalog.for_env(env)
+    env.reset(fresh(orders))
+    for step, (index, legal, state, reward, current_time, done) in enumerate(trace):
+        assert catalog.legal_indices(env) == legal, f"legal actions differ at step {step}"
+        got_state, got_reward, got_done, _, _ = env.step((None, None) if index is None else catalog.decode(env, index))
+        assert np.array_equal(got_state, state), f"state differs at step {step}"
+        assert got_reward == reward, f"reward differs at step {step}: {got_reward} != {reward}"
+        assert env.current_time == current_time, f"time differs at step {step}"
+        assert got_done == done, f"done differs at step {step}"
+    assert env.done == trace[-1][5]
+
+
+def timed_episode(env, orders, trace):
+    """按录制的动作编号跑一个 episode，返回每步耗时（微秒）"""
+    catalog = ActionCatalog.for_env(env)
+    actions = [index for index, *_ in trace]
+    env.reset(fresh(orders))
+    t0 = time.perf_counter()
+    for index in actions:
+        env.step((None, None) if index is None else catalog.decode(env, index))
+    return (time.perf_counter() - t0) / len(actions) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=2000, help="合成算例的订单数")
+    parser.add_argument("--robots", type=int, default=6)
+    parser.add_argument("--pickers", type=int, default=2)
+    parser.add_argument("--seeds", type=int, default=3, help="每个算例、每种策略录制的动作序列数")
+    parser.add_argument("--random-steps", type=int, default=3000, help="随机合法动作/计划外目标策略每条序列的最大步数")
+    args = parser.parse_args()
+
+    if not NUMBA_AVAILABLE:
+        print("numba not installed: fast_core runs as plain Python (differential check only, timings not meaningful)")
+
+    instances = []
+    for name in ("orders_20", "orders_100"):
+        with open(os.path.join(INSTANCES_DIR, f"{name}.pkl"), "rb") as f:
+            instances.append((name, f.read()))
+    probe = WarehouseEnv(args.robots, args.pickers)
+    instances.append((f"synthetic_{args.orders}",
+                      pickle.dumps(make_orders(probe, args.orders, mean_interval=100.0 * 6 / args.robots))))
+
+    fast = WarehouseEnv(args.robots, args.pickers, fast_core=True)
+    for entity_store in (False, True):
+        env = WarehouseEnv(args.robots, args.pickers, entity_store=entity_store)
+        for name, orders in instances:
+            for policy, max_steps in (("heuristic", None), ("random", args.random_steps),
+                                      ("off_plan", args.random_steps)):
+                n_steps = 0
+                for seed in range(args.seeds):
+                    trace = record(env, orders, seed, policy, max_steps)
+                    replay(fast, orders, trace)
+                    n_steps += len(trace)
+                print(f"entity_store={entity_store} {name} {policy}: {args.seeds} recorded sequences, "
+                      f"{n_steps} steps replay identically on fast_core")
+
+    print(f"\n{'instance':>16} {'python us/step':>15} {'store us/step':>14} {'fast us/step':>13}")
+    python_env = WarehouseEnv(args.robots, args.pickers)
+    store_env = WarehouseEnv(args.robots, args.pickers, entity_store=True)
+    timed_episode(fast, instances[0][1], record(python_env, instances[0][1], 0))  # 预热（numba 编译）
+    for name, orders in instances:
+        trace = record(python_env, orders, 0)
+        print(f"{name:>16} {timed_episode(python_env, orders, trace):>15.1f} "
+              f"{timed_episode(store_env, orders, trace):>14.1f} {timed_episode(fast, orders, trace):>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+批量推理服务基准：N 个仿真并发做贪心决策，逐条前向（PPOAgent.select_action_greedy，各环境依次运行）
+与 InferenceServer 合批前向（进程内 / 本地 socket）在不同合批等待时间下的单次决策延迟 p50/p99、
+决策吞吐（含环境推进）与平均批大小。
+先校验：经服务端（进程内与 socket）决策的每个 episode 与逐条贪心决策的动作序列完全相同。
+
+用法：python benchmarks/bench_inference_server.py [--envs 16] [--steps 200] [--delays 0 0.5 2 10] [--factorized]
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+from common import INSTANCES_DIR, ROOT, make_orders
+
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+from inference_server import InferenceServer, LocalPolicyClient, RemotePolicyClient, run_greedy_episodes  # noqa: E402
+from env.env_I import WarehouseEnv  # noqa: E402
+
+
+class Recorder:
+    """包装客户端：记录每次决策的动作与延迟"""
+
+    def __init__(self, client):
+        self.client = client
+        self.actions = []
+        self.latencies = []
+
+    def select_action_greedy(self, env, state):
+        t0 = time.perf_counter()
+        action = self.client.select_action_greedy(env, state)
+        self.latencies.append(time.perf_counter() - t0)
+        self.actions.append(action_key(action))
+        return action
+
+    def close(self):
+        if hasattr(self.client, 'close'):
+            self.client.close()
+
+
+def action_key(action):
+    picker_action, robot_action = action
+    if picker_action is not None:
+        return 'p', picker_action[0].picker_id, picker_action[1].point_id
+    return 'r', robot_action[0].robot_id, getattr(robot_action[1], 'point_id', 'depot')
+
+
+def make_agent(factorized):
+    cfg = SimpleNamespace(**{**vars(SAPPO_I.config), 'factorized_head': factorized})
+    torch.manual_seed(0)
+    agent = SAPPO_I.PPOAgent.for_env(WarehouseEnv(), cfg)
+    agent.policy_net.eval()
+    return agent
+
+
+def check(agent, orders_bytes, n_envs=4, max_steps=300):
+    envs = [WarehouseEnv() for _ in range(n_envs)]
+    reference = Recorder(agent)
+    run_greedy_episodes([reference], envs[:1], [pickle.loads(orders_bytes)], max_steps)
+    with InferenceServer(agent, envs[0], max_delay=0.002) as server:
+        address = server.listen()
+        clients = [Recorder(LocalPolicyClient(server)) for _ in range(n_envs // 2)]
+        clients += [Recorder(RemotePolicyClient(address)) for _ in range(n_envs - len(clients))]
+        run_greedy_episodes(clients, envs, [pickle.loads(orders_bytes) for _ in envs], max_steps)
+        for client in clients:
+            client.close()
+            assert client.actions == reference.actions, "batched decisions differ from per-state greedy decisions"
+        mean_batch = np.mean(server.batch_sizes)
+    print(f"check: {n_envs} concurrent episodes ({n_envs // 2} in-process, {n_envs - n_envs // 2} socket) "
+          f"reproduce the per-state greedy actions ({len(reference.actions)} decisions, mean batch {mean_batch:.1f})")
+
+
+def measure(agent, orders, steps, mode, delay=None):
+    envs = [WarehouseEnv() for _ in orders]
+    server = None
+    if mode == "serial":
+        clients = [Recorder(agent) for _ in envs]
+        t0 = time.perf_counter()
+        for client, env, o in zip(clients, envs, orders):  # 逐个环境依次运行
+            run_greedy_episodes([client], [env], [pickle.loads(o)], steps)
+    else:
+        server = InferenceServer(agent, envs[0], max_batch=len(envs), max_delay=delay)
+        if mode == "socket":
+            address = server.listen()
+            clients = [Recorder(RemotePolicyClient(address)) for _ in envs]
+        else:
+            clients = [Recorder(LocalPolicyClient(server)) for _ in envs]
+        t0 = time.perf_counter()
+        run_greedy_episodes(clients, envs, [pickle.loads(o) for o in orders], steps)
+    wall = time.perf_counter() - t0
+    for client in clients:
+        client.close()
+    mean_batch = 1.0
+    if server is not None:
+        server.close()
+        mean_batch = np.mean(server.batch_sizes)
+    latencies = np.concatenate([c.latencies for c in clients])
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return len(latencies), wall, p50, p99, mean_batch
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--envs", type=int, default=16)
+    parser.add_argument("--steps", type=int, default=200, help="每个环境的决策步数上限")
+    parser.add_argument("--orders", type=int, default=40, help="每个环境的合成订单数")
+    parser.add_argument("--delays", type=float, nargs="+", default=[0, 0.5, 2, 10], help="合批最长等待（ms）")
+    parser.add_argument("--factorized", action="store_true", help="使用分解式策略头（默认扁平）")
+    args = parser.parse_args()
+    torch.set_grad_enabled(False)
+
+    agent = make_agent(args.factorized)
+    with open(os.path.join(INSTANCES_DIR, "orders_20.pkl"), "rb") as f:
+        check(agent, f.read())
+
+    probe = WarehouseEnv()
+    orders = [pickle.dumps(make_orders(probe, args.orders, mean_interval=20.0, seed=i)) for i in range(args.envs)]
+    socket_delay = args.delays[-2] if len(args.delays) > 1 else args.delays[0]
+    runs = [("serial", None)] + [("local", d) for d in args.delays] + [("socket", socket_delay)]
+    print(f"\n{args.envs} envs, {'factorized' if args.factorized else 'flat'} head, torch threads {torch.get_num_threads()}")
+    print(f"{'mode':>7} {'delay ms':>9} {'decisions':>10} {'wall s':>7} {'decisions/s':>12} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'mean batch':>11}")
+    for mode, delay in runs:
+        n, wall, p50, p99, mean_batch = measure(agent, orders, args.steps, mode,
+                                                None if delay is None else delay / 1e3)
+        print(f"{mode:>7} {'-' if delay is None else f'{delay:g}':>9} {n:>10} {wall:>7.2f} {n / wall:>12.0f} "
+              f"{p50 * 1e3:>7.2f} {p99 * 1e3:>7.2f} {mean_batch:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
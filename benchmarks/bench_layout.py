@@ -0,0 +1,123 @@
+"""
+多区块布局基准：布局与距离表的构建耗时、距离表内存（紧凑表 vs 稠密矩阵）、距离查询耗时，
+以及 1 万以上拣货位的布局上 WarehouseEnv 的单步耗时。
+先校验：小型多区块、多 Depot 布局上距离表与“每个拣货位都作为节点”的完整巷道图 Dijkstra 结果一致，紧凑表与稠密矩阵逐位相同。
+
+用法：python benchmarks/bench_layout.py [--orders 300] [--robots 6] [--pickers 2]
+"""
+import argparse
+import pickle
+import random
+import time
+
+import numpy as np
+
+from common import make_orders, run_episode
+from env.env_I import WarehouseEnv
+from env.layout import WarehouseLayout, dijkstra
+
+# (每区块巷道数, 每区块每巷道拣货位数, 区块行数, 区块列数)
+SIZES = [(9, 30, 1, 1), (20, 40, 2, 2), (25, 100, 2, 2), (50, 100, 4, 2), (50, 200, 4, 4)]
+
+
+def full_graph_distances(layout, positions):
+    """把拣货位和 Depot 都作为节点的完整巷道图，逐点 Dijkstra（校验用）"""
+    nodes = {}
+    adjacency = []
+
+    def node(p):
+        if p not in nodes:
+            nodes[p] = len(adjacency)
+            adjacency.append([])
+        return nodes[p]
+
+    def link(p, q, w):
+        u, v = node(p), node(q)
+        adjacency[u].append((v, w))
+        adjacency[v].append((u, w))
+
+    ys = sorted(set(layout.slot_y) | set(layout.cross_y))
+    for x in layout.aisle_x:
+        for y1, y2 in zip(ys, ys[1:]):
+            link((x, y1), (x, y2), y2 - y1)
+    for y in layout.cross_y:
+        for x1, x2 in zip(layout.aisle_x, layout.aisle_x[1:]):
+            link((x1, y), (x2, y), x2 - x1)
+    n_cross = len(layout.cross_y)
+    for depot in layout.depots:
+        for junction, w in layout._depot_links(depot):
+            k, c = divmod(junction, n_cross)
+            link(depot, (layout.aisle_x[k], layout.cross_y[c]), w)
+    return np.array([[dijkstra(adjacency, nodes[p])[nodes[q]] for q in positions] for p in positions])
+
+
+def check():
+    layout = WarehouseLayout(4, 6, block_rows=3, block_cols=2, depots=[(18, 0), (40, 0), (3, 50)])
+    dense = layout.distance_table()
+    compact = layout.distance_table(dense_limit=0)
+    assert dense.dense and not compact.dense
+    expected = full_graph_distances(layout, dense.positions)
+    assert np.allclose(dense.matrix, expected), "graph distance table differs from full-graph Dijkstra"
+    assert np.array_equal(compact.matrix, dense.matrix), "compact table differs from the dense matrix"
+    rng = random.Random(0)
+    for _ in range(1000):
+        a, b = rng.choice(dense.positions), rng.choice(dense.positions)
+        assert compact.distance(a, b) == dense.distance(a, b)
+    print(f"check: {len(dense)} nodes ({layout.block_rows}x{layout.block_cols} blocks, {len(layout.depots)} depots) "
+          f"match full-graph Dijkstra; compact == dense")
+
+
+def query_cost(table, n_calls, rng):
+    positions = table.positions
+    pairs = [(rng.choice(positions), rng.choice(positions)) for _ in range(n_calls)]
+    t0 = time.perf_counter()
+    for a, b in pairs:
+        table.distance(a, b)
+    scalar = (time.perf_counter() - t0) / n_calls
+    targets = np.arange(min(len(positions), 1000))
+    t0 = time.perf_counter()
+    for a, _ in pairs[:200]:
+        table.distances_from(a, targets)
+    vector = (time.perf_counter() - t0) / 200
+    return scalar * 1e9, vector * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=300)
+    parser.add_argument("--robots", type=int, default=6)
+    parser.add_argument("--pickers", type=int, default=2)
+    args = parser.parse_args()
+
+    check()
+    rng = random.Random(0)
+
+    print(f"\n{'layout':>16} {'pick pts':>9} {'junctions':>9} {'layout ms':>10} {'env ms':>8} {'table KiB':>10} "
+          f"{'dense MiB':>10} {'pair ns':>8} {'1->1k us':>9} {'us/step':>8} {'store us/step':>13}")
+    for aisles, slots, rows, cols in SIZES:
+        width = cols * aisles * 4 + 4
+        depots = [(width * (d + 1) / 3, 0) for d in range(2)] if rows * cols > 1 else [(18, 0)]
+        t0 = time.perf_counter()
+        layout = WarehouseLayout(aisles, slots, block_rows=rows, block_cols=cols, depots=depots)
+        table = layout.distance_table()
+        t_layout = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        env = WarehouseEnv(args.robots, args.pickers, layout=layout)
+        t_env = time.perf_counter() - t0
+        pair_ns, vector_us = query_cost(env.distance_table, 20000, rng)
+
+        orders = pickle.dumps(make_orders(env, args.orders, mean_interval=100.0 * 6 / args.robots))
+        steps, seconds = run_episode(env, pickle.loads(orders))
+        store_env = WarehouseEnv(args.robots, args.pickers, layout=layout, entity_store=True)
+        store_steps, store_seconds = run_episode(store_env, pickle.loads(orders))
+        assert store_steps == steps and store_env.current_time == env.current_time
+
+        n = len(table)
+        print(f"{f'{rows}x{cols} {aisles}x{slots}':>16} {len(layout):>9} {layout.n_junctions:>9} "
+              f"{t_layout * 1e3:>10.1f} {t_env * 1e3:>8.0f} {table.nbytes() / 1024:>10.1f} "
+              f"{8 * n * n / 2 ** 20:>10.1f} {pair_ns:>8.0f} {vector_us:>9.1f} {seconds / steps * 1e6:>8.1f} "
+              f"{store_seconds / store_steps * 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
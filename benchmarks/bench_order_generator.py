@@ -0,0 +1,81 @@
+"""
+订单生成基准：GenerateData.generate_orders（逐订单 Python 循环，写 CSV + pickle）
+与 BulkOrderGenerator（NumPy 批量抽样，分块写列式目录 + CSV）在 10^4 / 10^6 订单下的耗时；
+另测高偏斜热度（zipf s=3、每单最多 20 件）下的无放回抽样，并校验每个订单内商品互不相同
+
+用法：python benchmarks/bench_order_generator.py [--sizes 10000 1000000] [--legacy-max 1000000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from common import ROOT  # noqa: F401  (把仓库根目录加入 sys.path)
+from data.generat_order_data import BulkOrderGenerator, GenerateData
+from env.env_I import WarehouseEnv
+from env.order_instance import OrderInstance
+from environment.class_config import Config
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    env = WarehouseEnv()
+    order_n_arrival = Config().parameters["order"]["order_n_arrival"]
+    print(f"{'orders':>9} {'generator':>22} {'seconds':>9} {'orders/s':>11} {'output MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)  # GenerateData 写到相对路径 data/instances
+        try:
+            for n in args.sizes:
+                if n <= args.legacy_max:
+                    random.seed(0)
+                    t0 = time.perf_counter()
+                    GenerateData(env, n, 100, max_items_per_order=5).generate_orders()
+                    elapsed = time.perf_counter() - t0
+                    size = sum(os.path.getsize(os.path.join("data/instances", f)) for f in os.listdir("data/instances"))
+                    print(f"{n:>9} {'GenerateData':>22} {elapsed:>9.2f} {n / elapsed:>11.0f} {size / 1e6:>10.1f}")
+                    for f in os.listdir("data/instances"):
+                        os.remove(os.path.join("data/instances", f))
+
+                for popularity, batches in (("uniform", None), ("zipf", None), ("abc", order_n_arrival)):
+                    path = os.path.join(tmp, f"bulk_{n}_{popularity}")
+                    generator = BulkOrderGenerator(env, n, 100, max_items_per_order=5, seed=0,
+                                                   popularity=popularity, order_n_arrival=batches)
+                    t0 = time.perf_counter()
+                    generator.write(path, path + ".csv")
+                    elapsed = time.perf_counter() - t0
+                    size = dir_size(path) + os.path.getsize(path + ".csv")
+                    label = f"Bulk {popularity}" + (" batched" if batches else "")
+                    print(f"{n:>9} {label:>22} {elapsed:>9.2f} {n / elapsed:>11.0f} {size / 1e6:>10.1f}")
+
+                    instance = OrderInstance.load(path)
+                    assert len(instance) == n and np.all(np.diff(instance.arrive_time) >= 0)
+
+            # 高偏斜热度：有放回抽样 + 整行重抽的方式在这里几乎每行都要重抽，Gumbel-top-k 不受影响
+            n = min(args.sizes)
+            path = os.path.join(tmp, "bulk_skewed")
+            generator = BulkOrderGenerator(env, n, 100, max_items_per_order=20, seed=0, popularity="zipf", zipf_s=3.0)
+            t0 = time.perf_counter()
+            generator.write(path)
+            elapsed = time.perf_counter() - t0
+            print(f"{n:>9} {'Bulk zipf s=3 x20':>22} {elapsed:>9.2f} {n / elapsed:>11.0f} {dir_size(path) / 1e6:>10.1f}")
+            instance = OrderInstance.load(path)
+            for lo, hi in zip(instance.order_offsets[:-1], instance.order_offsets[1:]):
+                assert len(np.unique(instance.item_index[lo:hi])) == hi - lo, "repeated SKU within an order"
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+订单算例加载基准：pickle 的 Order 对象图 vs 列式目录（np.load mmap），
+统计 load（读入）与 reset（构造订单并初始化环境）耗时，订单规模 100 / 10k / 1M。
+1M 订单的 pickle 体积和耗时过大，默认只测列式格式（--pickle-max 可调整）。
+
+用法：python benchmarks/bench_order_instance.py [--sizes 100 10000 1000000] [--pickle-max 10000]
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+
+from common import INSTANCES_DIR
+from env.env_I import WarehouseEnv
+from env.order_instance import OrderInstance
+
+
+def synthetic_instance(env, n_orders, mean_interval=100.0, max_items=5, seed=0):
+    """与 make_orders 分布相同的合成算例，直接生成列式数组"""
+    rng = np.random.default_rng(seed)
+    item_ids = list(env.items)
+    n_items = rng.integers(1, max_items + 1, size=n_orders)
+    offsets = np.zeros(n_orders + 1, dtype=np.int64)
+    np.cumsum(n_items, out=offsets[1:])
+    # 订单内不重复：有重复商品的订单整行重抽
+    keys = rng.integers(0, len(item_ids), size=(n_orders, max_items))
+    while True:
+        s = np.sort(keys, axis=1)
+        dup = (s[:, 1:] == s[:, :-1]).any(axis=1)
+        if not dup.any():
+            break
+        keys[dup] = rng.integers(0, len(item_ids), size=(int(dup.sum()), max_items))
+    mask = np.arange(max_items)[None, :] < n_items[:, None]
+    item_index = keys[mask].astype(np.int32)
+    arrive_time = np.cumsum(np.floor(rng.exponential(mean_interval, size=n_orders)))
+    pick_point_ids = list(dict.fromkeys(env.items[i].pick_point_id for i in item_ids))
+    pp_of_item = np.array([pick_point_ids.index(env.items[i].pick_point_id) for i in item_ids], dtype=np.int32)
+    return OrderInstance(np.arange(1, n_orders + 1, dtype=np.int64), arrive_time, offsets, item_index, item_ids,
+                         pp_of_item[item_index], pick_point_ids)
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 1_000_000])
+    parser.add_argument("--pickle-max", type=int, default=10_000)
+    args = parser.parse_args()
+
+    env = WarehouseEnv()
+
+    # 转换结果与原 pickle 一致
+    for name in ("orders_20", "orders_100"):
+        with open(os.path.join(INSTANCES_DIR, f"{name}.pkl"), "rb") as f:
+            orders = pickle.load(f)
+        built = OrderInstance.open(os.path.join(INSTANCES_DIR, name)).build_orders(env)
+        assert [(o.order_id, o.arrive_time, [i.item_id for i in o.items]) for o in sorted(orders, key=lambda o: o.arrive_time)] \
+            == [(o.order_id, o.arrive_time, [i.item_id for i in o.items]) for o in built], name
+    print("columnar instances match the pickled orders")
+
+    print(f"{'orders':>9} {'format':>8} {'size MB':>8} {'load s':>8} {'reset s':>8} {'total s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            instance = synthetic_instance(env, n)
+            path = os.path.join(tmp, f"orders_{n}")
+            instance.save(path)
+
+            loaded, t_load = timed(lambda: OrderInstance.load(path))
+            _, t_reset = timed(lambda: env.reset(loaded))
+            print(f"{n:>9} {'columnar':>8} {dir_size(path) / 1e6:>8.2f} {t_load:>8.4f} {t_reset:>8.4f} "
+                  f"{t_load + t_reset:>8.4f}")
+
+            if n <= args.pickle_max:
+                pkl_path = path + ".pkl"
+                with open(pkl_path, "wb") as f:
+                    pickle.dump(instance.build_orders(env), f)
+
+                def load_pickle():
+                    with open(pkl_path, "rb") as f:
+                        return pickle.load(f)
+                orders, t_load = timed(load_pickle)
+                _, t_reset = timed(lambda: env.reset(orders))
+                print(f"{n:>9} {'pickle':>8} {os.path.getsize(pkl_path) / 1e6:>8.2f} {t_load:>8.4f} {t_reset:>8.4f} "
+                      f"{t_load + t_reset:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+流式订单源基准：用 GenerateData.iter_orders（或 CSV 逐行读取）作为 WarehouseEnv 的订单源，
+keep_history=False 跑长时程仿真，定期记录 RSS，验证内存不随订单数增长。
+开始前先校验流式订单源与订单列表给出完全相同的轨迹。
+
+用法：python benchmarks/bench_order_stream.py [--orders 1000000] [--source generate|csv] [--interval 150]
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from common import heuristic_action
+from data.generat_order_data import GenerateData
+from env.env_I import WarehouseEnv
+from env.order_stream import iter_csv_orders
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def run(env, orders, seed=0, keep_history=True):
+    rng = random.Random(seed)
+    env.reset(orders, keep_history=keep_history)
+    rewards = []
+    while not env.done:
+        rewards.append(env.step(heuristic_action(env, rng))[1])
+    return env.current_time, rewards
+
+
+def check_equivalence(env, n_orders, interval):
+    random.seed(1)
+    orders = list(GenerateData(env, n_orders, interval, max_items_per_order=5).iter_orders())
+    random.seed(1)
+    stream = GenerateData(env, n_orders, interval, max_items_per_order=5).iter_orders()
+    assert run(env, orders) == run(env, stream, keep_history=False), "stream and list runs differ"
+
+
+def write_csv(path, env, n_orders, interval):
+    """以流式方式把 GenerateData 的订单写成 CSV（不在内存中保留订单）"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["order_id", "arrival_time", "item_id", "pick_point_id"])
+        for order in GenerateData(env, n_orders, interval, max_items_per_order=5).iter_orders():
+            writer.writerows((order.order_id, order.arrive_time, i.item_id, i.pick_point_id) for i in order.items)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--source", choices=["generate", "csv"], default="generate")
+    parser.add_argument("--interval", type=float, default=150.0, help="平均到达间隔（秒）")
+    parser.add_argument("--report", type=int, default=10, help="报告次数")
+    args = parser.parse_args()
+
+    env = WarehouseEnv()
+    check_equivalence(env, 500, args.interval)
+    print("streamed and materialized orders give identical trajectories")
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.source == "csv":
+            path = os.path.join(tmp, "orders.csv")
+            write_csv(path, env, args.orders, args.interval)
+            print(f"csv: {os.path.getsize(path) / 1e6:.1f} MB")
+            source = iter_csv_orders(path, env)
+        else:
+            source = GenerateData(env, args.orders, args.interval, max_items_per_order=5).iter_orders()
+
+        rng = random.Random(0)
+        env.reset(source, keep_history=False)
+        every = max(1, args.orders // args.report)
+        next_report = every
+        steps = 0
+        t0 = time.perf_counter()
+        print(f"{'arrived':>9} {'completed':>9} {'open':>6} {'sim time':>11} {'steps':>9} {'RSS MB':>8} {'wall s':>8}")
+        while not env.done:
+            env.step(heuristic_action(env, rng))
+            steps += 1
+            arrived = env.orders_not_arrived.n_emitted
+            if arrived >= next_report or env.done:
+                print(f"{arrived:>9} {env.n_completed_orders:>9} {env.n_open_orders:>6} {env.current_time:>11.0f} "
+                      f"{steps:>9} {rss_mb():>8.1f} {time.perf_counter() - t0:>8.1f}")
+                next_report += every
+
+
+if __name__ == "__main__":
+    main()
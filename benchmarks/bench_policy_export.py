@@ -0,0 +1,146 @@
+"""
+策略导出基准：eager PolicyNetwork（与 PPOAgent 相同，no_grad + 掩码）与导出后的 TorchScript / ONNX
+（policy_export.ExportedPolicy：固定线程数、inference_mode、预分配输入缓冲区）在 batch 1 与 64 时的 CPU 前向延迟；
+TorchScript 另测卷积按 NHWC 内存布局导出的版本（torchscript-cl）。
+先校验：真实决策点上导出模型的合法动作 logits 与 eager 一致（容差内）、argmax 相同，
+且用 ExportedPolicy 贪心跑的 episode 与 PPOAgent.select_action_greedy 的动作序列相同。
+未安装 onnx / onnxruntime 时跳过 ONNX。
+
+用法：python benchmarks/bench_policy_export.py [--threads 1] [--batches 1 64] [--repeat 20] [--factorized]
+"""
+import argparse
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+from common import INSTANCES_DIR, ROOT, heuristic_action, make_orders
+
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+from inference_server import run_greedy_episodes  # noqa: E402
+from policy_export import ExportedPolicy, export_policy  # noqa: E402
+from env.env_I import WarehouseEnv  # noqa: E402
+
+
+def decision_points(env, catalog, n):
+    """启发式策略推进，收集 n 个决策点的 (状态, 合法动作, 各智能体所在单元)"""
+    rng = random.Random(0)
+    state = env.reset(make_orders(env, 200, mean_interval=20.0))
+    states, legal, cells = [], [], []
+    while len(states) < n and not env.done:
+        indices = catalog.legal_indices(env)
+        if indices:
+            states.append(state)
+            legal.append(indices)
+            cells.append(catalog.agent_cells(env))
+        state, _, _, _, _ = env.step(heuristic_action(env, rng))
+    return np.stack(states), legal, np.stack(cells)
+
+
+def eager_logits(agent, states, legal, cells):
+    """与 PPOAgent._masked_logits 相同的 eager 路径"""
+    mask = torch.zeros(len(states), agent.n_actions, dtype=torch.bool)
+    for i, indices in enumerate(legal):
+        mask[i, indices] = True
+    with torch.no_grad():
+        logits, _ = agent._forward(torch.from_numpy(states).float(), False, agent_cells=torch.from_numpy(cells),
+                                   legal_mask=mask)
+        return logits.masked_fill(~mask, -1e9)
+
+
+def check(agent, policies, states, legal, cells, orders_bytes):
+    expected = eager_logits(agent, states, legal, cells)
+    legal_mask = expected > -1e8
+    scale = expected[legal_mask].abs().max().item()
+    for fmt, policy in policies.items():
+        got = policy.logits(states, legal, cells)
+        err = (got - expected)[legal_mask].abs().max().item()
+        assert err <= 1e-4 * max(scale, 1.0), f"{fmt} logits differ from eager by {err}"
+        assert torch.equal(got.argmax(dim=1), expected.argmax(dim=1)), f"{fmt} greedy actions differ"
+        assert torch.equal(got[~legal_mask], expected[~legal_mask]), f"{fmt} masking differs"
+
+        keys = {}
+        for name, client in (("eager", agent), (fmt, policy)):
+            recorder = Recorder(client)
+            run_greedy_episodes([recorder], [WarehouseEnv()], [pickle.loads(orders_bytes)], 300)
+            keys[name] = recorder.actions
+        assert keys[fmt] == keys["eager"], f"{fmt} episode differs from eager greedy"
+        print(f"check {fmt}: max |logit error| {err:.2e} on {len(states)} decision points; "
+              f"{len(keys[fmt])}-step greedy episode identical")
+
+
+class Recorder:
+    def __init__(self, client):
+        self.client = client
+        self.actions = []
+
+    def select_action_greedy(self, env, state):
+        action = self.client.select_action_greedy(env, state)
+        picker_action, robot_action = action
+        if picker_action is not None:
+            self.actions.append(('p', picker_action[0].picker_id, picker_action[1].point_id))
+        else:
+            self.actions.append(('r', robot_action[0].robot_id, getattr(robot_action[1], 'point_id', 'depot')))
+        return action
+
+
+def latency(fn, repeat):
+    fn()  # 预热
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return np.median(times), np.percentile(times, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 64])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--factorized", action="store_true", help="使用分解式策略头（默认扁平）")
+    args = parser.parse_args()
+    torch.set_num_threads(args.threads)
+
+    env = WarehouseEnv()
+    cfg = SimpleNamespace(**{**vars(SAPPO_I.config), 'factorized_head': args.factorized})
+    torch.manual_seed(0)
+    agent = SAPPO_I.PPOAgent.for_env(env, cfg)
+    agent.policy_net.eval()
+    catalog = agent.get_catalog(env)
+    states, legal, cells = decision_points(WarehouseEnv(), catalog, max(args.batches))
+    with open(os.path.join(INSTANCES_DIR, "orders_20.pkl"), "rb") as f:
+        orders_bytes = f.read()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        policies = {}
+        for name, fmt, channels_last in (('torchscript', 'torchscript', False), ('torchscript-cl', 'torchscript', True),
+                                         ('onnx', 'onnx', False)):
+            try:
+                path = export_policy(agent, env, os.path.join(tmp, name), [fmt], channels_last)[fmt]
+                policies[name] = ExportedPolicy(path, n_threads=args.threads, max_batch=max(args.batches))
+            except ImportError as e:
+                print(f"{name} skipped: {e}")
+        check(agent, policies, states, legal, cells, orders_bytes)
+
+        print(f"\n{'head':>10} {'runtime':>15} {'batch':>6} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8}")
+        head = 'factorized' if args.factorized else 'flat'
+        for batch in args.batches:
+            x, idx, c = states[:batch], legal[:batch], cells[:batch]
+            base, p95 = latency(lambda: eager_logits(agent, x, idx, c), args.repeat)
+            print(f"{head:>10} {'eager':>15} {batch:>6} {base * 1e3:>8.2f} {p95 * 1e3:>8.2f} {1.0:>7.2f}x")
+            for fmt, policy in policies.items():
+                p50, p95 = latency(lambda: policy.logits(x, idx, c), args.repeat)
+                print(f"{head:>10} {fmt:>15} {batch:>6} {p50 * 1e3:>8.2f} {p95 * 1e3:>8.2f} {base / p50:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+PPO 更新基准：PPOAgent.update（整批前向/反向）与原逐样本实现的每 1k 条经验耗时对比，
+并校验两者在相同权重、相同经验上得到一致的损失和梯度。
+
+用法：python benchmarks/bench_ppo_update.py [--transitions 1000] [--orders 20]
+"""
+import argparse
+import copy
+import math
+import os
+import pickle
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+from common import ROOT, INSTANCES_DIR
+
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+
+
+def legacy_update(agent, memory):
+    """原 PPOAgent.update 的逐样本实现（memory 为各字段的列表），返回最后一个 minibatch 的损失"""
+    returns, advantages = agent.compute_returns_and_advantages()
+    returns = torch.tensor(returns, dtype=torch.float32, device=agent.device)
+    advantages = torch.tensor(advantages, dtype=torch.float32, device=agent.device)
+    old_values = torch.tensor(memory['values'], dtype=torch.float32, device=agent.device)
+    old_log_probs = torch.tensor(memory['log_prob'], dtype=torch.float32, device=agent.device)
+    actions = torch.tensor(memory['selected_action_index'], dtype=torch.long, device=agent.device)
+    cfg = agent.cfg
+    T = len(returns)
+    idxs = np.arange(T)
+    last = (0.0, 0.0)
+    for _ in range(cfg.epochs):
+        np.random.shuffle(idxs)
+        for start in range(0, T, cfg.batch_size):
+            policy_losses, value_losses, entropies = [], [], []
+            for t in idxs[start:start + cfg.batch_size]:
+                state = torch.from_numpy(memory['states'][t]).float().unsqueeze(0)
+                logits = agent.policy_net(state)
+                invalid_mask = torch.ones_like(logits, dtype=torch.bool)
+                invalid_mask[:, memory['legal_action_index'][t]] = False
+                dist = torch.distributions.Categorical(logits=logits.masked_fill(invalid_mask, -1e9))
+                new_log_prob = dist.log_prob(actions[t])
+                cap = math.log(getattr(cfg, "ratio_cap", 5.0))
+                ratio = torch.exp(torch.clamp(new_log_prob - old_log_probs[t], -cap, cap))
+                surr1 = ratio * advantages[t]
+                surr2 = torch.clamp(ratio, 1.0 - cfg.ppo_clip, 1.0 + cfg.ppo_clip) * advantages[t]
+                policy_losses.append(-torch.min(surr1, surr2))
+                entropies.append(dist.entropy())
+                value_pred = agent.value_net(state).squeeze()
+                v_pred_clipped = old_values[t] + torch.clamp(value_pred - old_values[t], -cfg.ppo_clip, cfg.ppo_clip)
+                value_losses.append(torch.max((value_pred - returns[t]).pow(2), (v_pred_clipped - returns[t]).pow(2)))
+            policy_loss = torch.mean(torch.stack(policy_losses))
+            value_loss = torch.clamp(torch.mean(torch.stack(value_losses)), max=1e6)
+            total_loss = policy_loss + cfg.value_coef * value_loss - cfg.entropy_coef * torch.mean(torch.stack(entropies))
+            agent.policy_optimizer.zero_grad()
+            agent.value_optimizer.zero_grad()
+            total_loss.backward()
+            torch.nn.utils.clip_grad_norm_(agent.policy_net.parameters(), cfg.max_grad_norm)
+            torch.nn.utils.clip_grad_norm_(agent.value_net.parameters(), cfg.max_grad_norm)
+            agent.policy_optimizer.step()
+            agent.value_optimizer.step()
+            last = (policy_loss.item(), value_loss.item())
+    agent.clear_memory()
+    return last
+
+
+def collect(agent, env, n_transitions, orders_path):
+    """用当前策略采样 n_transitions 条经验（回合结束则重新载入订单）"""
+    state = None
+    while len(agent.memory) < n_transitions:
+        if state is None:
+            with open(orders_path, "rb") as f:
+                state = env.reset(pickle.load(f))
+        action = agent.total_action_index_pair(env, state)
+        state, reward, done, truncated, _ = env.step(action)
+        agent.memory.add_outcome(reward, done or truncated)
+        if done or truncated:
+            state = None
+
+
+def memory_as_lists(memory):
+    T = len(memory)
+    return {
+        'states': list(memory.states[:T]),
+        'values': memory.values[:T].tolist(),
+        'log_prob': memory.log_probs[:T].tolist(),
+        'selected_action_index': memory.actions[:T].tolist(),
+        'legal_action_index': [np.flatnonzero(row).tolist() for row in memory.legal_mask[:T]],
+    }
+
+
+def max_grad_diff(a, b):
+    return max((pa.grad - pb.grad).abs().max().item() for pa, pb in zip(a.parameters(), b.parameters()))
+
+
+def check_gradients(agent, T):
+    """单 epoch、单 minibatch（整批 T 条）：两种实现的损失和裁剪后梯度应一致（Adam 多步后会放大浮点误差，故只比较一步）"""
+    cfg = SimpleNamespace(**vars(agent.cfg))
+    cfg.epochs, cfg.batch_size = 1, T
+    batched = copy.deepcopy(agent)
+    legacy = copy.deepcopy(agent)
+    legacy_memory = memory_as_lists(agent.memory)
+    for a in (batched, legacy):
+        a.cfg = cfg
+        for opt in (a.policy_optimizer, a.value_optimizer):
+            for group in opt.param_groups:
+                group['lr'] = 0.0  # 只比较梯度，不更新参数
+    loss_batched = batched.update()
+    loss_legacy = legacy_update(legacy, legacy_memory)
+    d_policy = max_grad_diff(batched.policy_net, legacy.policy_net)
+    d_value = max_grad_diff(batched.value_net, legacy.value_net)
+    print(f"loss batched={loss_batched} per-sample={loss_legacy}")
+    print(f"max |grad diff| policy={d_policy:.2e} value={d_value:.2e}")
+    assert np.allclose(loss_batched, loss_legacy, rtol=1e-4, atol=1e-5), "losses differ"
+    assert d_policy < 1e-5 and d_value < 1e-5, "gradients differ"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transitions", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=20, choices=[20, 40, 60])
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    agent = SAPPO_I.PPOAgent()
+    env = SAPPO_I.WarehouseEnv()
+    collect(agent, env, args.transitions, os.path.join(INSTANCES_DIR, f"orders_{args.orders}.pkl"))
+    T = len(agent.memory)
+    check_gradients(agent, T)
+
+    legacy_memory = memory_as_lists(agent.memory)
+    legacy_agent = copy.deepcopy(agent)
+
+    np.random.seed(0)
+    t0 = time.perf_counter()
+    agent.update()
+    t_batched = time.perf_counter() - t0
+
+    np.random.seed(0)
+    t0 = time.perf_counter()
+    legacy_update(legacy_agent, legacy_memory)
+    t_legacy = time.perf_counter() - t0
+
+    print(f"transitions={T} epochs={agent.cfg.epochs} batch_size={agent.cfg.batch_size}")
+    print(f"{'':>10} {'s / 1k transitions':>20}")
+    print(f"{'per-sample':>10} {t_legacy / T * 1000:>20.2f}")
+    print(f"{'batched':>10} {t_batched / T * 1000:>20.2f}")
+    print(f"speedup: {t_legacy / t_batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
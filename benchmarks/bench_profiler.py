@@ -0,0 +1,116 @@
+"""
+分阶段计时基准：
+    overhead: 启发式策略下 WarehouseEnv 单步耗时，profiler 关闭 / 开启（仅汇总）/ 开启并保留 Chrome trace 事件
+    episode:  SAPPO 训练的一个 episode（选动作 + 一次 PPO 更新）的分阶段报告，并写出 Chrome trace JSON
+先校验：开启计时不改变轨迹；env.step 的计数等于步数，trace 文件可解析且事件数与汇总计数一致。
+
+用法：python benchmarks/bench_profiler.py [--orders 2000] [--robots 6] [--pickers 2] [--repeat 5] [--trace trace.json]
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+from common import ROOT, heuristic_action, make_orders, run_episode
+
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+from env.action_space import ActionCatalog  # noqa: E402
+from env.env_I import WarehouseEnv  # noqa: E402
+from env.profiler import Profiler  # noqa: E402
+
+
+def trajectory(env, orders, seed=0):
+    rng = random.Random(seed)
+    states = [env.reset(orders).tobytes()]
+    while not env.done:
+        state, _, _, _, _ = env.step(heuristic_action(env, rng))
+        states.append(state.tobytes())
+    return states
+
+
+def check(args, orders_bytes):
+    reference = trajectory(WarehouseEnv(args.robots, args.pickers), pickle.loads(orders_bytes))
+    profiler = Profiler(trace_path="unused")
+    env = WarehouseEnv(args.robots, args.pickers, profiler=profiler)
+    assert trajectory(env, pickle.loads(orders_bytes)) == reference, "profiling changed the trajectory"
+    report = profiler.end_episode(verbose=False)
+    phases = report['phases']
+    assert phases['env.step']['count'] == len(reference) - 1
+    assert phases['env.state']['count'] == len(reference)  # reset 也返回一次状态
+    assert phases['env.step']['total_ms'] >= phases['env.advance']['total_ms']
+    assert len(profiler._events) == sum(s['count'] for s in phases.values())
+    print(f"check: {len(reference) - 1} steps, trajectory unchanged, counts match")
+
+
+def overhead(args, orders_bytes):
+    modes = {
+        "off": lambda: None,
+        "summary": lambda: Profiler(),
+        "trace": lambda: Profiler(trace_path="unused"),
+    }
+    best = {mode: float('inf') for mode in modes}
+    for _ in range(args.repeat):  # 各模式交替运行，取最短耗时
+        for mode, make in modes.items():
+            env = WarehouseEnv(args.robots, args.pickers, profiler=make())
+            steps, seconds = run_episode(env, pickle.loads(orders_bytes))
+            best[mode] = min(best[mode], seconds / steps * 1e6)
+    print(f"\n{'profiler':>9} {'us/step':>8} {'overhead':>9}")
+    for mode in modes:
+        print(f"{mode:>9} {best[mode]:>8.1f} {best[mode] / best['off'] - 1:>8.1%}")
+
+
+def sappo_episode(args, trace_path):
+    torch = SAPPO_I.torch
+    torch.manual_seed(0)
+    np.random.seed(0)
+    profiler = Profiler(trace_path)
+    env = WarehouseEnv(args.robots, args.pickers, profiler=profiler)
+    agent = SAPPO_I.PPOAgent(n_actions=ActionCatalog.for_env(env).size, profiler=profiler)
+    state = env.reset(make_orders(env, args.sappo_orders, mean_interval=100.0 * 6 / args.robots))
+    steps = 0
+    while not env.done and steps < args.sappo_steps:
+        action = agent.total_action_index_pair(env, state)
+        state, reward, done, truncated, _ = env.step(action)
+        agent.memory.add_outcome(reward, done or truncated)
+        steps += 1
+    agent.update()
+    print()
+    report = profiler.end_episode()
+    n_events = profiler.write_chrome_trace()
+    with open(trace_path) as f:
+        events = json.load(f)['traceEvents']
+    assert len(events) == n_events == sum(s['count'] for s in report['phases'].values())
+    assert report['phases']['agent.act']['count'] == steps
+    print(f"\n{n_events} trace events written to {trace_path} ({os.path.getsize(trace_path) / 1024:.0f} KiB)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--robots", type=int, default=6)
+    parser.add_argument("--pickers", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sappo-orders", type=int, default=30)
+    parser.add_argument("--sappo-steps", type=int, default=300)
+    parser.add_argument("--trace", default=None, help="Chrome trace 输出路径（默认写到临时目录）")
+    args = parser.parse_args()
+
+    probe = WarehouseEnv(args.robots, args.pickers)
+    orders_bytes = pickle.dumps(make_orders(probe, args.orders, mean_interval=100.0 * 6 / args.robots))
+    check(args, orders_bytes)
+    overhead(args, orders_bytes)
+    if args.trace is not None:
+        sappo_episode(args, args.trace)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            sappo_episode(args, os.path.join(tmp, "trace.json"))
+
+
+if __name__ == "__main__":
+    main()
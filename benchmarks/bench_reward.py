@@ -0,0 +1,66 @@
+"""
+奖励计算基准：累计量形式的 compute_reward vs 遍历订单列表的原始公式
+
+在同一条启发式轨迹上比较两者的单次计算耗时（两者逐步一致的校验见 environment/test_reward.py）。
+用法：python benchmarks/bench_reward.py [--orders 3000]
+"""
+import argparse
+import os
+import pickle
+import random
+import time
+
+from common import INSTANCES_DIR, heuristic_action, make_orders
+from env.env_I import WarehouseEnv
+
+
+def reference_average_flow_time(env):
+    """原始实现：遍历已完成与未完成订单求平均流经时间"""
+    total = sum((o.complete_time - o.arrive_time) for o in env.orders_completed)
+    total += sum((env.current_time - o.arrive_time) for o in env.orders_uncompleted)
+    return total / max(1, len(env.orders_completed) + len(env.orders_uncompleted))
+
+
+def time_episode(env, orders, seed=0):
+    """逐步回放，返回 (步数, 累计量耗时, 原始公式耗时)"""
+    rng = random.Random(seed)
+    env.reset(orders)
+    t_fast = t_ref = 0.0
+    steps = 0
+    while not env.done:
+        env.step(heuristic_action(env, rng))
+
+        t0 = time.perf_counter()
+        reference_average_flow_time(env)
+        t1 = time.perf_counter()
+        t_ref += t1 - t0
+
+        # 复算一次累计量形式的平均流经时间，只计时、不改变 env 的奖励状态
+        t0 = time.perf_counter()
+        (env.completed_flow_sum + env.n_open_orders * env.current_time - env.open_arrive_sum) / max(
+            1, len(env.orders_completed) + env.n_open_orders)
+        t1 = time.perf_counter()
+        t_fast += t1 - t0
+        steps += 1
+    return steps, t_fast, t_ref
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=3000)
+    args = parser.parse_args()
+
+    env = WarehouseEnv()
+    with open(os.path.join(INSTANCES_DIR, "orders_100.pkl"), "rb") as f:
+        recorded = pickle.load(f)
+    cases = [("orders_100.pkl", recorded),
+             (f"synthetic x{args.orders}", make_orders(env, args.orders, mean_interval=60.0))]
+    for name, orders in cases:
+        steps, t_fast, t_ref = time_episode(env, orders)
+        print(f"{name}: {steps} steps")
+        print(f"  running aggregates : {t_fast / steps * 1e6:9.2f} us/step")
+        print(f"  list scan          : {t_ref / steps * 1e6:9.2f} us/step")
+
+
+if __name__ == "__main__":
+    main()
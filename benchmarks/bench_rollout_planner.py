@@ -0,0 +1,126 @@
+"""
+滚动前瞻规划基准（orders_100）：SAPPO 贪心策略、最近优先启发式与 RolloutPlanner（串行 / 进程池 / 墙钟预算，
+启发式或 SAPPO 策略作为 rollout 策略）的决策速度（decisions/s）与平均订单流经时间。
+仓库中没有训练好的 SAPPO 权重，--checkpoint 未给出时使用固定种子初始化的网络，仅作为对照。
+先校验：模拟恰好停在 起点 + horizon 时刻；进程池与串行规划器在前若干个决策上选出相同的动作。
+
+用法：python benchmarks/bench_rollout_planner.py [--checkpoint policy.pt] [--workers 2] [--budget 0.05]
+"""
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+from common import INSTANCES_DIR, ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+from env.env_I import WarehouseEnv  # noqa: E402
+from env.order_instance import OrderInstance  # noqa: E402
+from env.rollout_planner import RolloutPlanner, nearest_action, simulate  # noqa: E402
+
+
+class GreedyPolicy:
+    """SAPPO 贪心策略的 policy(env, rng) 包装，可作为 rollout 策略"""
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    def __call__(self, env, rng=None):
+        with torch.no_grad():
+            return self.agent.select_action_greedy(env, env.state_extractor())
+
+
+def run(env, instance, choose):
+    """用 choose(env) 跑完一个 episode，返回 (决策数, 耗时秒, 平均流经时间, makespan)"""
+    env.reset(instance)
+    steps = 0
+    t0 = time.perf_counter()
+    while not env.done:
+        env.step(choose(env))
+        steps += 1
+    elapsed = time.perf_counter() - t0
+    return steps, elapsed, env.completed_flow_sum / max(1, env.n_completed_orders), env.current_time
+
+
+def check(env, instance, args, n_decisions=30):
+    env.reset(instance)
+    for _ in range(5):
+        env.step(nearest_action(env))
+    snap = env.snapshot(history=False)
+    scratch = WarehouseEnv()
+    serial = RolloutPlanner(args.top_k, horizon=args.horizon)
+    serial._prepare(env)
+    index = serial.candidates(env)[0]
+    simulate(scratch, serial.catalog, nearest_action, snap, index, 0, args.horizon, 10 ** 6)
+    assert scratch.done or scratch.current_time == env.current_time + args.horizon, "rollout overran the horizon"
+
+    chosen = {}
+    for label, planner in (("serial", serial), ("pool", RolloutPlanner(args.top_k, horizon=args.horizon,
+                                                                      n_workers=args.workers))):
+        with planner:
+            env.reset(instance)
+            chosen[label] = []
+            for _ in range(n_decisions):
+                chosen[label].append(planner.select(env))
+                env.step(planner.catalog.decode(env, chosen[label][-1]))
+    assert chosen["serial"] == chosen["pool"], "pooled planner chose differently from the serial planner"
+    print(f"check: rollouts stop at start + horizon; {args.workers}-worker pool matches serial on "
+          f"{n_decisions} decisions")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", default="orders_100")
+    parser.add_argument("--checkpoint", default=None, help="PolicyNetwork 的 state_dict（torch.save）")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--horizon", type=float, default=600.0, help="rollout 仿真时长（秒）")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--budget", type=float, default=0.05, help="预算模式下每个决策的墙钟预算（秒）")
+    parser.add_argument("--sappo-rollouts", action="store_true", help="额外测 SAPPO 策略作为 rollout 策略（较慢）")
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    torch.set_num_threads(1)
+    agent = SAPPO_I.PPOAgent()
+    if args.checkpoint:
+        agent.policy_net.load_state_dict(torch.load(args.checkpoint, map_location=agent.device))
+    agent.policy_net.eval()
+    greedy = GreedyPolicy(agent)
+
+    env = WarehouseEnv()
+    instance = OrderInstance.open(os.path.join(INSTANCES_DIR, f"{args.orders}.pkl"))
+    check(env, instance, args)
+
+    variants = [
+        ("SAPPO greedy", lambda: (greedy, None)),
+        ("nearest heuristic", lambda: (nearest_action, None)),
+        ("planner serial", lambda: (None, RolloutPlanner(args.top_k, horizon=args.horizon))),
+        (f"planner {args.workers} workers", lambda: (None, RolloutPlanner(args.top_k, horizon=args.horizon,
+                                                                            n_workers=args.workers))),
+        (f"planner budget {args.budget * 1e3:.0f}ms", lambda: (None, RolloutPlanner(
+            args.top_k, horizon=args.horizon, budget=args.budget))),
+    ]
+    if args.sappo_rollouts:
+        variants.append(("planner SAPPO rollouts", lambda: (None, RolloutPlanner(
+            args.top_k, horizon=args.horizon, rollout_policy=greedy))))
+
+    print(f"{'policy':>26} {'decisions':>9} {'dec/s':>8} {'mean flow':>10} {'makespan':>9} "
+          f"{'rollouts':>9} {'expired':>8}")
+    for label, make in variants:
+        policy, planner = make()
+        if planner is None:
+            steps, elapsed, flow, makespan = run(env, instance, policy)
+            rollouts = expired = "-"
+        else:
+            with planner:
+                steps, elapsed, flow, makespan = run(env, instance, planner.select_action)
+            rollouts, expired = planner.stats['rollouts'], planner.stats['expired']
+        print(f"{label:>26} {steps:>9} {steps / elapsed:>8.1f} {flow:>10.1f} {makespan:>9.0f} "
+              f"{rollouts:>9} {expired:>8}")
+
+
+if __name__ == "__main__":
+    main()
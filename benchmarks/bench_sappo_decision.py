@@ -0,0 +1,152 @@
+"""
+SAPPO 单步决策延迟剖析：原实现（每步重建 total_action 列表/映射字典、列表 .index 线性查找）
+与缓存的 ActionCatalog + 可复用掩码的对比，布局 9×30 与 20×60。
+    action-space: 只统计合法动作集合与掩码的构造（不含网络前向）
+    decision:     PPOAgent.total_action_index_pair 完整一步（含策略/价值网络前向与采样）
+同时逐步校验两种实现给出相同的合法动作编号，并在相同随机种子下采样到相同动作。
+
+用法：python benchmarks/bench_sappo_decision.py [--layouts 9x30 20x60] [--steps 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+
+from common import ROOT, make_orders
+
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+from env.action_space import ActionCatalog  # noqa: E402
+from env.env_I import WarehouseEnv  # noqa: E402
+
+
+def legacy_available_action(env):
+    """原 PPOAgent.get_avaliable_action"""
+    picker_available_action = []
+    robot_available_action = []
+    idle_pick_points = env.idle_pick_points
+    for pkr in env.idle_pickers:
+        p_index = env.pickers.index(pkr)
+        for pp in idle_pick_points:
+            picker_available_action.append((p_index, env.pick_points_list.index(pp)))
+    for r in env.robots:
+        r_index = env.robots.index(r)
+        if r.state == 'idle' and len(r.item_pick_order) > 0 and r.position == env.depot_object.position:
+            for i in r.item_pick_order:
+                robot_available_action.append((r_index, env.pick_points_list.index(env.pick_point_dict[i.position])))
+        elif r.state == 'idle' and r.order is not None and len(r.item_pick_order) > 0:
+            for i in r.item_pick_order:
+                robot_available_action.append((r_index, env.pick_points_list.index(env.pick_point_dict[i.position])))
+        elif r.state == 'idle' and r.order is not None and len(r.item_pick_order) == 0 and r.pick_point is not None:
+            robot_available_action.append((r_index, -1))
+    return picker_available_action, robot_available_action
+
+
+def legacy_action_space(env):
+    """原 total_action_index_pair 中网络前向之前的部分：返回 (total_action, legal_action_index)"""
+    picker_available_action, robot_available_action = legacy_available_action(env)
+    total_action = []
+    for picker in env.pickers:
+        for pick_point in env.pick_points_list:
+            total_action.append((picker, pick_point))
+    for robot in env.robots:
+        for pick_point in env.pick_points_list:
+            total_action.append((robot, pick_point))
+    for robot in env.robots:
+        total_action.append((robot, env.depot_object))
+    action_to_index = {action: idx for idx, action in enumerate(total_action)}
+    legal_action_index = []
+    for p_index, pp_index in picker_available_action:
+        legal_action_index.append(action_to_index[(env.pickers[p_index], env.pick_points_list[pp_index])])
+    for r_index, t_index in robot_available_action:
+        target = env.pick_points_list[t_index] if t_index != -1 else env.depot_object
+        legal_action_index.append(action_to_index[(env.robots[r_index], target)])
+    return total_action, legal_action_index
+
+
+def legacy_decision(agent, env, state):
+    """原 total_action_index_pair（不写 memory）"""
+    total_action, legal_action_index = legacy_action_space(env)
+    state_tensor = torch.from_numpy(state).float().to(agent.device).unsqueeze(0)
+    with torch.no_grad():
+        agent.value_net(state_tensor)
+        logits = agent.policy_net(state_tensor)
+        invalid_mask = torch.ones_like(logits, dtype=torch.bool)
+        invalid_mask[:, legal_action_index] = False
+        probs = torch.softmax(logits.masked_fill(invalid_mask, -1e9), dim=-1)
+        action_idx = torch.distributions.Categorical(probs=probs).sample()
+        selected_action = total_action[action_idx.item()]
+    if action_idx < env.N_pickers * env.N_w * env.N_l:
+        return selected_action, None
+    return None, selected_action
+
+
+def catalog_action_space(agent, env):
+    catalog = agent.get_catalog(env)
+    legal = catalog.legal_indices(env)
+    agent._legal_mask.fill(False)
+    agent._legal_mask[legal] = True
+    return legal
+
+
+def profile_layout(n_w, n_l, n_steps):
+    torch.manual_seed(0)
+    env = WarehouseEnv(aisle_num=n_w, shelf_capacity=n_l)
+    n_actions = ActionCatalog.for_env(env).size
+    agent = SAPPO_I.PPOAgent(n_actions=n_actions)
+    agent.policy_net.eval()
+    agent.value_net.eval()
+    state = env.reset(make_orders(env, 400, mean_interval=40.0))
+
+    t_space = {'legacy': 0.0, 'catalog': 0.0}
+    t_decision = {'legacy': 0.0, 'catalog': 0.0}
+    steps = 0
+    while steps < n_steps and not env.done:
+        t0 = time.perf_counter()
+        _, legacy_legal = legacy_action_space(env)
+        t1 = time.perf_counter()
+        legal = catalog_action_space(agent, env)
+        t2 = time.perf_counter()
+        assert legal == legacy_legal, f"step {steps}: legal actions differ"
+        t_space['legacy'] += t1 - t0
+        t_space['catalog'] += t2 - t1
+
+        torch.manual_seed(steps)
+        t0 = time.perf_counter()
+        legacy_action = legacy_decision(agent, env, state)
+        t1 = time.perf_counter()
+        torch.manual_seed(steps)
+        action = agent.total_action_index_pair(env, state)
+        t2 = time.perf_counter()
+        assert action == legacy_action, f"step {steps}: sampled actions differ"
+        t_decision['legacy'] += t1 - t0
+        t_decision['catalog'] += t2 - t1
+
+        state, _, _, _, _ = env.step(action)
+        agent.memory.add_outcome(0.0, env.done)
+        steps += 1
+
+    us = lambda t: t / steps * 1e6
+    print(f"{n_w}x{n_l:<4} {n_actions:>7} {steps:>6} "
+          f"{us(t_space['legacy']):>12.1f} {us(t_space['catalog']):>12.1f} "
+          f"{us(t_decision['legacy']):>12.1f} {us(t_decision['catalog']):>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--layouts", nargs="+", default=["9x30", "20x60"])
+    parser.add_argument("--steps", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'layout':<7} {'actions':>7} {'steps':>6} {'space us':>12} {'':>12} {'decision us':>12}")
+    print(f"{'':<7} {'':>7} {'':>6} {'legacy':>12} {'catalog':>12} {'legacy':>12} {'catalog':>12}")
+    for layout in args.layouts:
+        n_w, n_l = (int(v) for v in layout.split("x"))
+        profile_layout(n_w, n_l, args.steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+共享主干 actor-critic 基准：双塔（策略、价值各一个 CNN）与共享 CNN（config.shared_trunk=True）的
+每步决策延迟（PPOAgent.total_action_index_pair）和每 1k 条经验的 PPO 更新耗时。
+先校验：共享主干单次前向与分别调用 policy_net / value_net 结果逐位相同；
+价值损失回传到 CNN 的梯度恰为 value_grad_scale 倍，且不影响价值头自身的梯度。
+
+用法：python benchmarks/bench_shared_trunk.py [--decisions 200] [--transitions 256] [--orders 20]
+"""
+import argparse
+import os
+import pickle
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+from common import INSTANCES_DIR, ROOT
+from bench_ppo_update import collect
+
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+
+
+def make_agent(shared, **overrides):
+    cfg = SimpleNamespace(**{**vars(SAPPO_I.config), 'shared_trunk': shared, **overrides})
+    torch.manual_seed(0)
+    return SAPPO_I.PPOAgent(cfg)
+
+
+def n_params(agent):
+    return sum(p.numel() for net in (agent.policy_net, agent.value_net) for p in net.parameters())
+
+
+def check():
+    agent = make_agent(True)
+    env = SAPPO_I.WarehouseEnv()
+    x = torch.rand(8, 4, env.N_w, env.N_l, device=agent.device)
+    with torch.no_grad():
+        logits, value = agent._forward(x)
+        assert torch.equal(logits, agent.policy_net(x)) and torch.equal(value, agent.value_net(x))
+
+    grads = {}
+    for scale in (1.0, agent.cfg.value_grad_scale):
+        a = make_agent(True, value_grad_scale=scale)
+        _, value = a._forward(x)
+        value.pow(2).mean().backward()
+        grads[scale] = ([p.grad.clone() for p in a.policy_net.cnn.parameters()],
+                        [p.grad.clone() for p in a.value_net.parameters()])
+        assert all(p.grad is None for p in a.policy_net.mlp.parameters())
+    scale = agent.cfg.value_grad_scale
+    for g1, gs in zip(grads[1.0][0], grads[scale][0]):
+        assert torch.allclose(gs, scale * g1, rtol=1e-4, atol=1e-7), "trunk gradient is not scaled"
+    for g1, gs in zip(grads[1.0][1], grads[scale][1]):
+        assert torch.equal(g1, gs), "value head gradient changed"
+    print(f"check: single-pass forward == separate calls; critic gradient into the trunk scaled by {scale}")
+
+
+def decision_latency(agent, env, orders_path, n_decisions):
+    with open(orders_path, "rb") as f:
+        state = env.reset(pickle.load(f))
+    times = []
+    for _ in range(n_decisions):
+        t0 = time.perf_counter()
+        action = agent.total_action_index_pair(env, state)
+        times.append(time.perf_counter() - t0)
+        state, reward, done, truncated, _ = env.step(action)
+        agent.memory.add_outcome(reward, done)
+        if done:
+            break
+    agent.clear_memory()
+    return np.median(times), np.percentile(times, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--decisions", type=int, default=200)
+    parser.add_argument("--transitions", type=int, default=256)
+    parser.add_argument("--orders", type=int, default=20, choices=[20, 40, 60])
+    args = parser.parse_args()
+
+    check()
+    orders_path = os.path.join(INSTANCES_DIR, f"orders_{args.orders}.pkl")
+    rows = []
+    for shared in (False, True):
+        agent = make_agent(shared)
+        env = SAPPO_I.WarehouseEnv()
+        random.seed(0)
+        p50, p95 = decision_latency(agent, env, orders_path, args.decisions)
+        np.random.seed(0)
+        collect(agent, env, args.transitions, orders_path)
+        T = len(agent.memory)
+        t0 = time.perf_counter()
+        agent.update()
+        t_update = time.perf_counter() - t0
+        rows.append(("shared" if shared else "two-tower", n_params(agent), p50, p95, t_update / T * 1000))
+
+    print(f"\n{'':>10} {'params M':>9} {'decision p50 ms':>16} {'p95 ms':>8} {'update s / 1k':>14}")
+    for name, params, p50, p95, update in rows:
+        print(f"{name:>10} {params / 1e6:>9.2f} {p50 * 1e3:>16.2f} {p95 * 1e3:>8.2f} {update:>14.2f}")
+    print(f"speedup: decision {rows[0][2] / rows[1][2]:.2f}x, update {rows[0][4] / rows[1][4]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
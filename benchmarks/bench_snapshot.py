@@ -0,0 +1,113 @@
+"""
+快照基准：WarehouseEnv.snapshot / restore / clone 与 copy.deepcopy(env) 的耗时对比，
+并校验从快照恢复（原环境 restore、clone、pickle 后恢复到新环境）后重放得到与原轨迹逐位相同的结果。
+
+用法：python benchmarks/bench_snapshot.py [--orders 2000] [--robots 6] [--pickers 2] [--every 100]
+"""
+import argparse
+import copy
+import os
+import pickle
+import random
+import time
+
+from common import INSTANCES_DIR, heuristic_action, make_orders
+from env.env_I import WarehouseEnv
+
+
+def trajectory_tail(env, rng):
+    """从当前决策点跑到结束，返回 [(时间, 奖励, 状态字节)]"""
+    tail = []
+    while not env.done:
+        state, reward, _, _, _ = env.step(heuristic_action(env, rng))
+        tail.append((env.current_time, reward, state.tobytes()))
+    return tail
+
+
+def check_replay(make_env, orders, every, seed=0):
+    """
+    参考轨迹上每隔 every 个决策点记录快照、clone 和策略随机数状态；
+    之后分别在原环境 restore、在 clone 上、在 pickle 往返后的新环境上重放，与参考轨迹的后半段比较
+    """
+    env = make_env()
+    rng = random.Random(seed)
+    env.reset(orders)
+    checkpoints = []
+    reference = []
+    while not env.done:
+        if len(reference) % every == 0:
+            checkpoints.append((len(reference), env.snapshot(), env.clone(), rng.getstate()))
+        state, reward, _, _, _ = env.step(heuristic_action(env, rng))
+        reference.append((env.current_time, reward, state.tobytes()))
+
+    for offset, snap, clone, rng_state in checkpoints:
+        expected = reference[offset:]
+        env.restore(snap)
+        assert trajectory_tail(env, _rng(rng_state)) == expected, f"restore diverged at step {offset}"
+        assert trajectory_tail(clone, _rng(rng_state)) == expected, f"clone diverged at step {offset}"
+        fresh = make_env()
+        fresh.restore(pickle.loads(pickle.dumps(snap)))
+        assert trajectory_tail(fresh, _rng(rng_state)) == expected, f"unpickled snapshot diverged at step {offset}"
+    return len(checkpoints), len(reference)
+
+
+def _rng(state):
+    rng = random.Random()
+    rng.setstate(state)
+    return rng
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - t0) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--robots", type=int, default=6)
+    parser.add_argument("--pickers", type=int, default=2)
+    parser.add_argument("--every", type=int, default=100, help="校验时每隔多少个决策点取一个快照")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for entity_store in (False, True):
+        def make_env():
+            return WarehouseEnv(args.robots, args.pickers, entity_store=entity_store)
+
+        for name in ("orders_20", "orders_100"):
+            with open(os.path.join(INSTANCES_DIR, f"{name}.pkl"), "rb") as f:
+                orders = pickle.load(f)
+            n_checks, n_steps = check_replay(make_env, orders, args.every)
+            print(f"entity_store={entity_store} {name}: {n_checks} checkpoints over {n_steps} steps replay identically")
+
+    env = WarehouseEnv(args.robots, args.pickers)
+    orders = make_orders(env, args.orders, mean_interval=100.0 * 6 / args.robots)
+    rng = random.Random(0)
+    env.reset(orders)
+    steps = 0
+    while not env.done and env.n_completed_orders < args.orders // 2:
+        env.step(heuristic_action(env, rng))
+        steps += 1
+    env.snapshot()  # 首次快照时把未到达订单转成列式副本，不计入下面的计时
+    print(f"\nmid-episode state: step {steps}, {env.n_open_orders} open orders, "
+          f"{env.orders_not_arrived.n_remaining} not arrived, {env.n_completed_orders} completed")
+
+    # deepcopy 与 pickle(env) 须在 restore 之前：恢复后的订单源是按块构造订单的生成器，不能深拷贝
+    _, t_deepcopy = timed(lambda: copy.deepcopy(env), max(1, args.repeat // 10))
+    env_bytes = len(pickle.dumps(env))
+    snap, t_snapshot = timed(env.snapshot, args.repeat)
+    _, t_clone = timed(env.clone, args.repeat)
+    _, t_restore = timed(lambda: env.restore(snap), args.repeat)
+    print(f"{'operation':>16} {'ms':>9}")
+    for label, seconds in (("snapshot", t_snapshot), ("restore", t_restore), ("clone", t_clone),
+                           ("copy.deepcopy", t_deepcopy)):
+        print(f"{label:>16} {seconds * 1e3:>9.3f}")
+    print(f"snapshot pickle size: {len(pickle.dumps(snap)) / 1e3:.1f} kB "
+          f"(pickled env: {env_bytes / 1e3:.1f} kB)")
+
+
+if __name__ == "__main__":
+    main()
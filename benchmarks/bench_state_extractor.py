@@ -0,0 +1,51 @@
+"""
+状态提取基准：增量维护的状态张量 vs 从头重建（rebuild_state）
+
+在同一条启发式轨迹的每个决策点上比较单次调用耗时（两者逐步一致的校验见 environment/test_state.py）。
+用法：python benchmarks/bench_state_extractor.py [--instance orders_100.pkl]
+"""
+import argparse
+import os
+import pickle
+import random
+import time
+
+from common import INSTANCES_DIR, heuristic_action
+from env.env_I import WarehouseEnv
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instance", default="orders_100.pkl")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(os.path.join(INSTANCES_DIR, args.instance), "rb") as f:
+        orders = pickle.load(f)
+
+    env = WarehouseEnv()
+    rng = random.Random(args.seed)
+    env.reset(orders)
+    t_incremental = t_rebuild = 0.0
+    steps = 0
+    while True:
+        t0 = time.perf_counter()
+        env.state_extractor()
+        t1 = time.perf_counter()
+        env.rebuild_state()
+        t2 = time.perf_counter()
+        t_incremental += t1 - t0
+        t_rebuild += t2 - t1
+        if env.done:
+            break
+        env.step(heuristic_action(env, rng))
+        steps += 1
+
+    n = steps + 1
+    print(f"{args.instance}: {n} states")
+    print(f"  state_extractor : {t_incremental / n * 1e6:9.1f} us/call")
+    print(f"  rebuild_state   : {t_rebuild / n * 1e6:9.1f} us/call  ({t_rebuild / max(t_incremental, 1e-12):.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
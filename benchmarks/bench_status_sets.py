@@ -0,0 +1,59 @@
+"""
+状态索引集合基准：idle_* 属性（索引集合）vs 原先的全表扫描
+
+用法：python benchmarks/bench_status_sets.py [--robots 6 60 600]
+"""
+import argparse
+import random
+import time
+
+from common import heuristic_action, make_orders
+from env.env_I import WarehouseEnv
+
+
+def scan_properties(env):
+    """原实现：每次全表扫描"""
+    return (
+        [r for r in env.robots if r.state == 'idle' and r.order is None],
+        [p for p in env.pickers if p.state == 'idle'],
+        [pp for pp in env.pick_points_list if pp.is_idle],
+        [r for r in env.robots if r.state == 'idle' and r.order is not None],
+    )
+
+
+def indexed_properties(env):
+    return env.idle_robots, env.idle_pickers, env.idle_pick_points, env.robots_needing_planning
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--robots", type=int, nargs="+", default=[6, 60, 600])
+    parser.add_argument("--orders", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'robots':>7} {'steps':>6} {'indexed us':>11} {'scan us':>9} {'episode s':>10}")
+    for n_robots in args.robots:
+        env = WarehouseEnv(robot_num=n_robots, picker_num=max(2, n_robots // 3))
+        orders = make_orders(env, args.orders, mean_interval=100.0 * 6 / n_robots)
+        rng = random.Random(0)
+        t_start = time.perf_counter()
+        env.reset(orders)
+        t_indexed = t_scan = 0.0
+        steps = 0
+        while not env.done:
+            t0 = time.perf_counter()
+            fast = indexed_properties(env)
+            t1 = time.perf_counter()
+            slow = scan_properties(env)
+            t2 = time.perf_counter()
+            assert fast == slow, f"step {steps}: indexed sets disagree with full scan"
+            t_indexed += t1 - t0
+            t_scan += t2 - t1
+            env.step(heuristic_action(env, rng))
+            steps += 1
+        elapsed = time.perf_counter() - t_start
+        print(f"{n_robots:>7} {steps:>6} {t_indexed / steps * 1e6:>11.1f} {t_scan / steps * 1e6:>9.1f} {elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
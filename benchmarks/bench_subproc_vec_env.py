@@ -0,0 +1,121 @@
+"""
+多进程采样池基准：SubprocVecWarehouseEnv 在 1/2/4/8 个子进程下的决策吞吐，
+并与单进程 VecWarehouseEnv（同样的环境总数）对比；
+再用 PPOAgent.collect_vec 在两种向量化环境上采样（每步一次批量前向）并做一次 update，
+校验同一随机种子下两者写入经验池的轨迹完全相同；最后检查子进程异常能在主进程中以 WorkerError 抛出。
+子进程数超过 CPU 核数的配置只反映进程间通信开销，不能说明扩展性（表中以 * 标出）。
+
+用法：python benchmarks/bench_subproc_vec_env.py [--workers 1 2 4 8] [--envs-per-worker 4] [--steps 200] [--ppo-steps 64]
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+from common import ROOT, make_orders
+from env.env_I import WarehouseEnv
+from env.vec_env import VecWarehouseEnv
+from env.subproc_vec_env import SubprocVecWarehouseEnv, WorkerError
+
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+
+_TEMPLATE = WarehouseEnv()
+N_ORDERS = 200
+
+
+def order_fn(env_index):
+    # 模块级函数，spawn 启动方式下也可 pickle
+    return make_orders(_TEMPLATE, N_ORDERS, seed=env_index)
+
+
+def broken_order_fn(env_index):
+    if env_index == 1:
+        raise RuntimeError("order source failed")
+    return order_fn(env_index)
+
+
+def random_actions(masks, rng):
+    scores = rng.random(masks.shape)
+    scores[~masks] = -1.0
+    return scores.argmax(axis=1)
+
+
+def throughput(vec, n_steps):
+    rng = np.random.default_rng(0)
+    _, masks = vec.reset()
+    t0 = time.perf_counter()
+    for _ in range(n_steps):
+        _, _, _, _, masks = vec.step(random_actions(masks, rng))
+    return n_steps * vec.n_envs / (time.perf_counter() - t0)
+
+
+def ppo_rollout(vec, n_steps, factorized=False):
+    """PPOAgent 在 vec 上采样 n_steps 步并更新一次，返回 (采样决策/秒, 更新秒数, 经验池轨迹)"""
+    cfg = SimpleNamespace(**{**vars(SAPPO_I.config), 'factorized_head': factorized})
+    torch.manual_seed(0)
+    agent = SAPPO_I.PPOAgent.for_env(vec.template, cfg)
+    obs, masks = vec.reset()
+    t0 = time.perf_counter()
+    agent.collect_vec(vec, n_steps, obs, masks)
+    t_collect = time.perf_counter() - t0
+    T = len(agent.memory)
+    assert T == n_steps * vec.n_envs
+    names = ('actions', 'rewards', 'dones', 'log_probs') + (('agent_cells',) if factorized else ())
+    trace = {name: getattr(agent.memory, name)[:T].copy() for name in names}
+    t0 = time.perf_counter()
+    agent.update()
+    return T / t_collect, time.perf_counter() - t0, trace
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--envs-per-worker", type=int, default=4)
+    parser.add_argument("--steps", type=int, default=200, help="每个配置的锁步步数")
+    parser.add_argument("--ppo-steps", type=int, default=64, help="PPO 采样时每个环境的步数")
+    args = parser.parse_args()
+
+    print(f"cpu cores: {os.cpu_count()}")
+    print(f"{'workers':>7} {'envs':>5} {'in-proc dec/s':>14} {'subproc dec/s':>14} {'speedup':>8}")
+    for n_workers in args.workers:
+        n_envs = n_workers * args.envs_per_worker
+        in_proc = throughput(VecWarehouseEnv(n_envs, order_fn, copy=False), args.steps)
+        with SubprocVecWarehouseEnv(n_workers, args.envs_per_worker, order_fn, copy=False) as pool:
+            sub = throughput(pool, args.steps)
+        oversubscribed = " *" if n_workers > (os.cpu_count() or 1) else ""
+        print(f"{n_workers:>7} {n_envs:>5} {in_proc:>14.0f} {sub:>14.0f} {sub / in_proc:>8.2f}{oversubscribed}")
+    if max(args.workers) > (os.cpu_count() or 1):
+        print(f"* more workers than cpu cores ({os.cpu_count()}): scaling not measured for these rows")
+
+    # PPO 采样：批量前向 + 按环境写入经验池；两种向量化环境的轨迹应完全相同
+    n_workers = args.workers[-1]
+    n_envs = n_workers * args.envs_per_worker
+    for factorized in (False, True):
+        in_proc, t_update, expected = ppo_rollout(VecWarehouseEnv(n_envs, order_fn, copy=False), args.ppo_steps,
+                                                  factorized)
+        with SubprocVecWarehouseEnv(n_workers, args.envs_per_worker, order_fn, copy=False) as pool:
+            sub, _, got = ppo_rollout(pool, args.ppo_steps, factorized)
+        for name in expected:
+            assert np.array_equal(expected[name], got[name]), f"subproc rollout differs from in-process ({name})"
+        print(f"\nPPO collect_vec ({'factorized' if factorized else 'flat'} head), {n_envs} envs x {args.ppo_steps} "
+              f"steps: in-proc {in_proc:.0f} dec/s, subproc {sub:.0f} dec/s ({sub / in_proc:.2f}x); "
+              f"update {t_update:.2f}s; trajectories identical")
+
+    # 子进程异常：主进程应收到带子进程 traceback 的 WorkerError，且池被关闭
+    pool = SubprocVecWarehouseEnv(2, 1, broken_order_fn)
+    try:
+        pool.reset()
+    except WorkerError as e:
+        assert "order source failed" in str(e) and pool.closed
+        print("worker error surfaced:", str(e).splitlines()[-1])
+    else:
+        raise AssertionError("worker error was not raised")
+
+
+if __name__ == "__main__":
+    main()
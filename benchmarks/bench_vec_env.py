@@ -0,0 +1,108 @@
+"""
+向量化环境基准：VecWarehouseEnv 在 N = 1, 8, 32 时的决策吞吐（决策/秒）
+
+用法：python benchmarks/bench_vec_env.py [--envs 1 8 32] [--steps 2000] [--policy random|cnn]
+    random: 按合法掩码均匀采样动作
+    cnn:    agent/CNN.py 的 CNNFeatureExtractor + 线性头，对整批状态做一次前向后掩码采样
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from common import ROOT, make_orders
+from env.env_I import WarehouseEnv
+from env.vec_env import VecWarehouseEnv
+
+
+def legacy_legal_indices(env, catalog):
+    """PPOAgent.get_avaliable_action + total_action_index_pair 的原始规则（用于一致性校验）"""
+    legal = []
+    for pkr in env.idle_pickers:
+        for pp in env.idle_pick_points:
+            legal.append(catalog.picker_action(env.pickers.index(pkr), env.pick_points_list.index(pp)))
+    for r_index, r in enumerate(env.robots):
+        if r.state == 'idle' and len(r.item_pick_order) > 0 and r.position == env.depot_object.position:
+            for i in r.item_pick_order:
+                legal.append(catalog.robot_action(r_index, env.pick_points_list.index(env.pick_point_dict[i.position])))
+        elif r.state == 'idle' and r.order is not None and len(r.item_pick_order) > 0:
+            for i in r.item_pick_order:
+                legal.append(catalog.robot_action(r_index, env.pick_points_list.index(env.pick_point_dict[i.position])))
+        elif r.state == 'idle' and r.order is not None and len(r.item_pick_order) == 0 and r.pick_point is not None:
+            legal.append(catalog.depot_action(r_index))
+    return legal
+
+
+def check_catalog(n_orders=200, seed=0):
+    """随机策略跑一个回合，逐步比较 ActionCatalog.legal_indices 与原始规则"""
+    vec = VecWarehouseEnv(1, lambda i: make_orders(WarehouseEnv(), n_orders, seed=seed))
+    env = vec.envs[0]
+    rng = np.random.default_rng(seed)
+    _, masks = vec.reset()
+    steps = 0
+    while vec.episode_count[0] == 0:
+        assert vec.catalog.legal_indices(env) == legacy_legal_indices(env, vec.catalog), f"step {steps}"
+        _, _, _, _, masks = vec.step([rng.choice(np.flatnonzero(masks[0]))])
+        steps += 1
+    return steps
+
+
+def make_cnn_policy(vec):
+    sys.path.insert(0, os.path.join(ROOT, "agent"))
+    import torch
+    import torch.nn as nn
+    from CNN import CNNFeatureExtractor
+
+    net = nn.Sequential(CNNFeatureExtractor(4, 256), nn.Linear(256, vec.action_num)).eval()
+
+    def policy(obs, masks, rng):
+        with torch.no_grad():
+            logits = net(torch.from_numpy(obs))
+            logits = logits.masked_fill(~torch.from_numpy(masks), float('-inf'))
+            return torch.distributions.Categorical(logits=logits).sample().numpy()
+    return policy
+
+
+def random_policy(obs, masks, rng):
+    # 每行在合法动作中均匀采样
+    scores = rng.random(masks.shape)
+    scores[~masks] = -1.0
+    return scores.argmax(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--envs", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--steps", type=int, default=2000, help="每个 N 的总决策数")
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--policy", choices=["random", "cnn"], default="random")
+    args = parser.parse_args()
+
+    print(f"legal-action catalog matches legacy rules over {check_catalog()} steps")
+
+    template = WarehouseEnv()
+    print(f"{'N':>4} {'decisions':>10} {'episodes':>9} {'decisions/s':>12}")
+    for n_envs in args.envs:
+        episode_seeds = [0] * n_envs
+
+        def order_fn(i):
+            episode_seeds[i] += 1
+            return make_orders(template, args.orders, seed=1000 * i + episode_seeds[i])
+
+        vec = VecWarehouseEnv(n_envs, order_fn, copy=False)
+        policy = make_cnn_policy(vec) if args.policy == "cnn" else random_policy
+        rng = np.random.default_rng(0)
+        obs, masks = vec.reset()
+        n_steps = max(1, args.steps // n_envs)
+        t0 = time.perf_counter()
+        for _ in range(n_steps):
+            obs, rewards, dones, infos, masks = vec.step(policy(obs, masks, rng))
+        elapsed = time.perf_counter() - t0
+        decisions = n_steps * n_envs
+        print(f"{n_envs:>4} {decisions:>10} {int(vec.episode_count.sum()):>9} {decisions / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+基准测试公共工具：合成订单、启发式策略与计时
+"""
+import os
+import sys
+import random
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from env.env_I import Order  # noqa: E402
+
+INSTANCES_DIR = os.path.join(ROOT, "data", "data", "instances")
+
+
+def make_orders(env, n_orders, mean_interval=100.0, max_items=5, seed=0):
+    """按泊松过程在 env 的商品目录上生成合成订单（到达时间取整，与 generat_order_data.py 一致）"""
+    rng = random.Random(seed)
+    all_items = list(env.items.values())
+    orders = []
+    arrival_time = 0
+    for order_id in range(1, n_orders + 1):
+        arrival_time += int(rng.expovariate(1.0 / mean_interval))
+        items = rng.sample(all_items, rng.randint(1, min(max_items, len(all_items))))
+        orders.append(Order(order_id, items, arrival_time))
+    return orders
+
+
+def heuristic_action(env, rng):
+    """随机启发式：优先给空闲拣货员分配拣货位，否则为一个待规划机器人随机选下一个拣货位/回 Depot"""
+    idle_pickers = env.idle_pickers
+    if idle_pickers:
+        idle_pick_points = env.idle_pick_points
+        if idle_pick_points:
+            return (rng.choice(idle_pickers), rng.choice(idle_pick_points)), None
+    robots = env.robots_needing_planning
+    if robots:
+        r = rng.choice(robots)
+        if r.item_pick_order:
+            target = env.pick_points[rng.choice(r.item_pick_order).pick_point_id]
+        else:
+            target = env.depot_object
+        return None, (r, target)
+    return None, None
+
+
+def random_action(env, catalog, rng):
+    """均匀随机策略：在全部合法动作编号（见 env/action_space.py）中随机选一个"""
+    legal = catalog.legal_indices(env)
+    if not legal:
+        return None, None
+    return catalog.decode(env, rng.choice(legal))
+
+
+def run_episode(env, orders, seed=0, max_steps=None):
+    """用启发式策略跑完一个 episode，返回 (决策步数, 耗时秒)"""
+    rng = random.Random(seed)
+    t0 = time.perf_counter()
+    env.reset(orders)
+    steps = 0
+    while not env.done and (max_steps is None or steps < max_steps):
+        env.step(heuristic_action(env, rng))
+        steps += 1
+    return steps, time.perf_counter() - t0
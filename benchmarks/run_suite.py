@@ -0,0 +1,306 @@
+"""
+基准套件：一次跑完仿真器与训练吞吐的各项指标，结果连同机器信息写成 JSON，便于在不同提交之间比较回归。
+
+    env_throughput: 随机 / 启发式策略下每秒决策数（车队规模 × 算例规模）
+    state:          状态提取（增量张量副本 / 只读视图 / 从头重建）的单次耗时
+    legal_actions:  合法动作编号与掩码的构造耗时（两种布局，按一整个 episode 的决策点平均）
+    cnn_forward:    策略网络 / 价值网络在 CPU 上 batch 1/32/256 的前向延迟
+    ppo_update:     PPOAgent.update 每 1k 条经验的耗时
+    order_load:     订单算例载入（pickle / 列式目录）与 reset 耗时
+
+各项取 --repeat 次中的最短耗时；随机数种子固定，同一机器上结果可复现到计时噪声以内。
+
+用法：python benchmarks/run_suite.py [--quick] [--cases env_throughput state ...] [--out results.json]
+                                     [--compare baseline.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import pickle
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from common import INSTANCES_DIR, ROOT, heuristic_action, make_orders, random_action
+
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+from bench_order_instance import synthetic_instance  # noqa: E402
+from bench_ppo_update import collect  # noqa: E402
+from env.action_space import ActionCatalog  # noqa: E402
+from env.env_I import WarehouseEnv  # noqa: E402
+from env.fast_core import NUMBA_AVAILABLE  # noqa: E402
+from env.order_instance import OrderInstance  # noqa: E402
+
+CASES = ("env_throughput", "state", "legal_actions", "cnn_forward", "ppo_update", "order_load")
+FLEETS = [(2, 6), (4, 12), (8, 24)]  # (拣货员数, 机器人数)
+
+
+def machine_info():
+    def git(*cmd):
+        try:
+            return subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'cuda_available': torch.cuda.is_available(),
+        'numba_available': NUMBA_AVAILABLE,
+        'git_commit': git("rev-parse", "HEAD"),
+        'git_dirty': None if status is None else bool(status),
+    }
+
+
+def best_of(fn, repeat, number=1):
+    """fn 连续调用 number 次为一轮，返回 repeat 轮中最短的单次耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
+
+
+def seed_all(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def load_instances(args):
+    """[(名称, pickle 字节)]；每次使用都重新反序列化，避免订单对象在 episode 间被修改"""
+    probe = WarehouseEnv()
+    instances = []
+    for name in ("orders_20", "orders_100"):
+        with open(os.path.join(INSTANCES_DIR, f"{name}.pkl"), "rb") as f:
+            instances.append((name, f.read()))
+    n = args.synthetic_orders
+    instances.append((f"synthetic_{n}", pickle.dumps(make_orders(probe, n, seed=args.seed))))
+    return instances
+
+
+def play(env, orders, policy, seed):
+    """跑完一个 episode，返回 (决策步数, 耗时秒)"""
+    rng = random.Random(seed)
+    catalog = ActionCatalog.for_env(env)
+    t0 = time.perf_counter()
+    env.reset(orders)
+    steps = 0
+    while not env.done:
+        action = heuristic_action(env, rng) if policy == "heuristic" else random_action(env, catalog, rng)
+        env.step(action)
+        steps += 1
+    return steps, time.perf_counter() - t0
+
+
+def mid_episode_env(orders, n_steps, seed, **env_kwargs):
+    env = WarehouseEnv(**env_kwargs)
+    rng = random.Random(seed)
+    env.reset(orders)
+    for _ in range(n_steps):
+        if env.done:
+            break
+        env.step(heuristic_action(env, rng))
+    return env
+
+
+# ==========================================
+# 各项基准：yield (params, metrics)
+# ==========================================
+
+def bench_env_throughput(args, instances):
+    for name, orders_bytes in instances:
+        for pickers, robots in FLEETS:
+            for policy in ("random", "heuristic"):
+                best = None
+                for _ in range(args.repeat):
+                    env = WarehouseEnv(robots, pickers)
+                    steps, seconds = play(env, pickle.loads(orders_bytes), policy, args.seed)
+                    if best is None or seconds < best[1]:
+                        best = (steps, seconds)
+                steps, seconds = best
+                yield ({'instance': name, 'pickers': pickers, 'robots': robots, 'policy': policy},
+                       {'decisions': steps, 'decisions_per_s': steps / seconds, 'us_per_decision': seconds / steps * 1e6,
+                        'makespan': env.current_time})
+
+
+def bench_state(args, instances):
+    name, orders_bytes = instances[1]
+    env = mid_episode_env(pickle.loads(orders_bytes), 200, args.seed)
+    yield ({'instance': name, 'step': 200, 'shape': list(env.state_buffer.shape)}, {
+        'copy_us': best_of(env.state_extractor, args.repeat, 2000) * 1e6,
+        'view_us': best_of(lambda: env.state_extractor(copy=False), args.repeat, 2000) * 1e6,
+        'rebuild_us': best_of(env.rebuild_state, args.repeat, 20) * 1e6,
+    })
+
+
+def bench_legal_actions(args, instances):
+    for aisles, slots in ((None, None), (20, 60)):
+        env = WarehouseEnv(6, 2, aisle_num=aisles, shelf_capacity=slots)
+        catalog = ActionCatalog.for_env(env)
+        mask = np.zeros(catalog.size, dtype=bool)
+        rng = random.Random(args.seed)
+        env.reset(make_orders(env, args.synthetic_orders // 4, mean_interval=100.0, seed=args.seed))
+        t_indices = t_mask = 0.0
+        n = n_legal = 0
+        while not env.done:
+            t0 = time.perf_counter()
+            legal = catalog.legal_indices(env)
+            t1 = time.perf_counter()
+            catalog.legal_mask(env, out=mask)
+            t2 = time.perf_counter()
+            t_indices += t1 - t0
+            t_mask += t2 - t1
+            n += 1
+            n_legal += len(legal)
+            env.step(heuristic_action(env, rng))
+        yield ({'layout': f"{env.N_w}x{env.N_l}", 'action_space': catalog.size},
+               {'decision_points': n, 'mean_legal': n_legal / n,
+                'legal_indices_us': t_indices / n * 1e6, 'legal_mask_us': t_mask / n * 1e6})
+
+
+def bench_cnn_forward(args, instances):
+    env = WarehouseEnv()
+    n_actions = ActionCatalog.for_env(env).size
+    seed_all(args.seed)
+    policy = SAPPO_I.PolicyNetwork(SAPPO_I.config, n_actions).to("cpu").eval()
+    value = SAPPO_I.ValueNetwork(SAPPO_I.config).to("cpu").eval()
+    for batch in args.batches:
+        x = torch.rand(batch, 4, env.N_w, env.N_l)
+        number = max(1, 32 // batch)
+        with torch.no_grad():
+            policy(x), value(x)  # 预热
+            t_policy = best_of(lambda: policy(x), args.repeat, number)
+            t_value = best_of(lambda: value(x), args.repeat, number)
+        yield ({'batch': batch, 'input': [4, env.N_w, env.N_l], 'n_actions': n_actions, 'device': 'cpu'},
+               {'policy_ms': t_policy * 1e3, 'value_ms': t_value * 1e3,
+                'policy_us_per_sample': t_policy / batch * 1e6, 'value_us_per_sample': t_value / batch * 1e6})
+
+
+def bench_ppo_update(args, instances):
+    seed_all(args.seed)
+    agent = SAPPO_I.PPOAgent()
+    env = SAPPO_I.WarehouseEnv()
+    collect(agent, env, args.transitions, os.path.join(INSTANCES_DIR, "orders_20.pkl"))
+    T = len(agent.memory)
+    t0 = time.perf_counter()
+    agent.update()
+    seconds = time.perf_counter() - t0
+    yield ({'transitions': T, 'epochs': agent.cfg.epochs, 'batch_size': agent.cfg.batch_size,
+            'device': str(agent.device)},
+           {'update_s': seconds, 's_per_1k_transitions': seconds / T * 1000})
+
+
+def bench_order_load(args, instances):
+    env = WarehouseEnv()
+    for name in ("orders_20", "orders_100"):
+        pkl = os.path.join(INSTANCES_DIR, f"{name}.pkl")
+
+        def load_pickle():
+            with open(pkl, "rb") as f:
+                return pickle.load(f)
+        columnar = os.path.join(INSTANCES_DIR, name)
+        yield ({'instance': name}, {
+            'pickle_load_ms': best_of(load_pickle, args.repeat, 10) * 1e3,
+            'columnar_open_ms': best_of(lambda: OrderInstance.open(columnar), args.repeat, 10) * 1e3,
+            'reset_ms': best_of(lambda: env.reset(OrderInstance.open(columnar)), args.repeat, 10) * 1e3,
+        })
+    with tempfile.TemporaryDirectory() as tmp:
+        n = args.load_orders
+        path = os.path.join(tmp, f"orders_{n}")
+        synthetic_instance(env, n, seed=args.seed).save(path)
+        yield ({'instance': f"synthetic_{n}"}, {
+            'columnar_open_ms': best_of(lambda: OrderInstance.open(path), args.repeat) * 1e3,
+            'reset_ms': best_of(lambda: env.reset(OrderInstance.open(path)), args.repeat) * 1e3,
+        })
+
+
+BENCHES = {
+    "env_throughput": bench_env_throughput,
+    "state": bench_state,
+    "legal_actions": bench_legal_actions,
+    "cnn_forward": bench_cnn_forward,
+    "ppo_update": bench_ppo_update,
+    "order_load": bench_order_load,
+}
+
+
+def _key(result):
+    return result['case'], json.dumps(result['params'], sort_keys=True)
+
+
+def compare(results, baseline_path):
+    """与基线 JSON 逐项比较：打印 新值 / 基线值"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {_key(r): r['metrics'] for r in baseline['results']}
+    print(f"\ncompared with {baseline_path} (commit {baseline['machine'].get('git_commit')}): new / baseline")
+    for result in results:
+        metrics = old.get(_key(result))
+        if metrics is None:
+            continue
+        ratios = [f"{name} {value / metrics[name]:.2f}x" for name, value in result['metrics'].items()
+                  if isinstance(metrics.get(name), (int, float)) and metrics[name]]
+        print(f"  {result['case']:<15} {json.dumps(result['params'], sort_keys=True)}  {'  '.join(ratios)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--quick", action="store_true", help="缩小规模（冒烟测试用）")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--synthetic-orders", type=int, default=2000)
+    parser.add_argument("--transitions", type=int, default=1000)
+    parser.add_argument("--load-orders", type=int, default=100_000)
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 32, 256])
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", default=None, help="基线结果 JSON")
+    args = parser.parse_args()
+    if args.quick:
+        args.repeat, args.synthetic_orders, args.transitions, args.load_orders = 1, 200, 128, 10_000
+        args.batches = [1, 32]
+
+    instances = load_instances(args)
+    results = []
+    t_start = time.perf_counter()
+    for case in args.cases:
+        for params, metrics in BENCHES[case](args, instances):
+            results.append({'case': case, 'params': params, 'metrics': metrics})
+            shown = "  ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in metrics.items())
+            print(f"{case:<15} {json.dumps(params, sort_keys=True)}  {shown}", flush=True)
+
+    report = {
+        'schema': 1,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'machine': machine_info(),
+        'config': vars(args),
+        'elapsed_s': time.perf_counter() - t_start,
+        'results': results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"\n{len(results)} results written to {args.out} ({report['elapsed_s']:.0f} s)")
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+将 data/data/instances 下的 .pkl / .csv 订单算例转换为列式目录（见 env/order_instance.py）
+
+用法：python data/convert_instances.py [算例文件 ...] [--out 输出目录]
+    不给算例文件时转换 data/data/instances 下全部 .pkl（没有同名 .pkl 的 .csv 也会转换）；
+    输出目录默认与算例同目录、同名（去掉扩展名）。
+"""
+import argparse
+import glob
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)  # pickle 中的 Order/Item 类需要 env / environment 包可导入
+
+from env.order_instance import OrderInstance  # noqa: E402
+
+INSTANCES_DIR = os.path.join(ROOT, "data", "data", "instances")
+
+
+def default_sources():
+    pkls = sorted(glob.glob(os.path.join(INSTANCES_DIR, "*.pkl")))
+    csvs = [p for p in sorted(glob.glob(os.path.join(INSTANCES_DIR, "*.csv")))
+            if not os.path.exists(os.path.splitext(p)[0] + ".pkl")]
+    return pkls + csvs
+
+
+def convert(source, out_dir=None):
+    name = os.path.splitext(os.path.basename(source))[0]
+    target = os.path.join(out_dir or os.path.dirname(source), name)
+    if source.endswith(".pkl"):
+        instance = OrderInstance.from_pickle(source)
+    else:
+        instance = OrderInstance.from_csv(source)
+    instance.save(target)
+    return target, instance
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sources", nargs="*")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    for source in args.sources or default_sources():
+        target, instance = convert(source, args.out)
+        print(f"{source} -> {target} ({len(instance)} orders, {instance.n_lines} lines)")
+
+
+if __name__ == "__main__":
+    main()
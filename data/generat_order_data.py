@@ -6,8 +6,10 @@ import csv
 import pickle
 import os
 import copy
+import numpy as np
 from environment.class_object import Order
 from environment.warehouse import WarehouseEnv
+from env.order_instance import OrderInstanceWriter
 
 
 class GenerateData:
@@ -31,19 +33,55 @@ class GenerateData:
         # 注意：这里假设订单引用的是仓库中的商品信息，不需要深拷贝整个库存
         self.all_items = list(self.warehouse.items.values())
 
-        # 确保数据目录存在
+        # 数据目录（generate_orders 写文件时才创建）
         self.data_dir = 'data/instances'
-        if not os.path.exists(self.data_dir):
-            os.makedirs(self.data_dir)
 
-    def generate_orders(self):
-        orders = []  # 订单对象列表
+    def iter_orders(self, total_orders=None):
+        """
+        逐个生成订单（泊松到达过程，到达时间非降序），不在内存中保留已生成的订单，
+        可直接作为 WarehouseEnv.reset 的流式订单源
+        :param total_orders: 生成的订单数，None 时使用 self.total_orders
+        """
+        total_orders = self.total_orders if total_orders is None else total_orders
         order_id = 0
         arrival_time = 0
 
         # 仓库总商品数
         total_inventory_size = len(self.all_items)
 
+        for _ in range(total_orders):
+            order_id += 1
+
+            # 1. 生成到达时间
+            # random.expovariate(lambd): lambd是频率 (1/平均间隔)。
+            # 如果 poisson_parameter 代表平均间隔时间，则参数应为 1/poisson_parameter
+            interval = int(random.expovariate(1.0 / self.poisson_parameter))
+            arrival_time += interval
+
+            # 2. 确定该订单的商品数量 (限制最大数量，符合实际逻辑)
+            # 如果仓库商品少于最大限制，则以仓库总数为上限
+            current_max = min(self.max_items_per_order, total_inventory_size)
+            order_n_items = random.randint(1, current_max)
+
+            # 3. 随机选择商品
+            # 使用 random.sample 进行无放回抽样（一个订单不包含重复的商品ID，视具体业务需求而定）
+            selected_items = random.sample(self.all_items, order_n_items)
+
+            # 如果需要模拟每个订单的商品是独立的实体（不影响仓库库存对象），可以使用浅拷贝
+            # items_for_order = [copy.copy(item) for item in selected_items]
+            # 这里暂时直接使用引用
+
+            # 4. 创建订单对象 (假设Order类支持 due_time，通常会设置一个截至时间)
+            # 这里为了兼容原始代码，只传参 order_id, items, arrival_time
+            yield Order(order_id, selected_items, arrival_time)
+
+    def generate_orders(self):
+        # 确保数据目录存在
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+
+        orders = []  # 订单对象列表
+
         # 确定CSV文件路径
         csv_path = os.path.join(self.data_dir, f'orders_{self.poisson_parameter}.csv')
         pkl_path = os.path.join(self.data_dir, f'orders_{self.poisson_parameter}.pkl')
@@ -55,38 +93,14 @@ class GenerateData:
             writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
             writer.writeheader()
 
-            for _ in range(self.total_orders):
-                order_id += 1
-
-                # 1. 生成到达时间
-                # random.expovariate(lambd): lambd是频率 (1/平均间隔)。
-                # 如果 poisson_parameter 代表平均间隔时间，则参数应为 1/poisson_parameter
-                interval = int(random.expovariate(1.0 / self.poisson_parameter))
-                arrival_time += interval
-
-                # 2. 确定该订单的商品数量 (限制最大数量，符合实际逻辑)
-                # 如果仓库商品少于最大限制，则以仓库总数为上限
-                current_max = min(self.max_items_per_order, total_inventory_size)
-                order_n_items = random.randint(1, current_max)
-
-                # 3. 随机选择商品
-                # 使用 random.sample 进行无放回抽样（一个订单不包含重复的商品ID，视具体业务需求而定）
-                selected_items = random.sample(self.all_items, order_n_items)
-
-                # 如果需要模拟每个订单的商品是独立的实体（不影响仓库库存对象），可以使用浅拷贝
-                # items_for_order = [copy.copy(item) for item in selected_items]
-                # 这里暂时直接使用引用
-
-                # 4. 创建订单对象 (假设Order类支持 due_time，通常会设置一个截至时间)
-                # 这里为了兼容原始代码，只传参 order_id, items, arrival_time
-                order = Order(order_id, selected_items, arrival_time)
+            for order in self.iter_orders():
                 orders.append(order)
 
                 # 5. 写入CSV
-                for item in selected_items:
+                for item in order.items:
                     writer.writerow({
-                        'order_id': order_id,
-                        'arrival_time': arrival_time,
+                        'order_id': order.order_id,
+                        'arrival_time': order.arrive_time,
                         'item_id': item.item_id,
                         'pick_point_id': item.pick_point_id
                     })
@@ -99,6 +113,168 @@ class GenerateData:
         print(f"Saved to: {pkl_path}")
 
 
+class BulkOrderGenerator:
+    """
+    NumPy 批量生成仿真订单：到达间隔、每批订单数、订单商品数和商品下标一次性按块抽取，
+    使用显式种子的 np.random.Generator，可复现；结果直接分块写入列式算例目录和 CSV。
+    - 到达过程：批次间隔服从指数分布（均值 poisson_parameter，取整），每批到达 order_n_arrival 范围内的订单数
+    - 商品热度：uniform（均匀）、zipf（按随机排名 1/r^s）、abc（A/B/C 三类 SKU 分别占需求的给定份额）
+    - 订单内商品不重复（每行用 Gumbel-top-k 按热度做无放回抽样）；订单商品数不超过热度为正的 SKU 数
+    """
+
+    def __init__(self, warehouse, total_orders, poisson_parameter, max_items_per_order=10, seed=None,
+                 popularity='uniform', zipf_s=1.0, abc_classes=((0.2, 0.8), (0.3, 0.15), (0.5, 0.05)),
+                 order_n_arrival=None, chunk_size=100_000):
+        """
+        :param warehouse: 仓库环境对象（使用其 items）
+        :param total_orders: 订单总数
+        :param poisson_parameter: 平均到达间隔（秒/批）
+        :param max_items_per_order: 每个订单的最大商品数
+        :param seed: 随机种子
+        :param popularity: 'uniform' / 'zipf' / 'abc'
+        :param zipf_s: zipf 指数
+        :param abc_classes: ABC 分类 ((SKU 占比, 需求占比), ...)，按 A/B/C 顺序
+        :param order_n_arrival: 每批到达订单数范围 (最少, 最多)，如 Config 中 order["order_n_arrival"]；None 表示每次到达 1 个订单
+        :param chunk_size: 每块订单数
+        """
+        self.total_orders = total_orders
+        self.poisson_parameter = poisson_parameter
+        self.max_items_per_order = max_items_per_order
+        self.order_n_arrival = order_n_arrival
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+
+        items = list(warehouse.items.values())
+        self.item_ids = [item.item_id for item in items]
+        self.pick_point_ids = list(dict.fromkeys(item.pick_point_id for item in items))
+        pp_index = {pp: i for i, pp in enumerate(self.pick_point_ids)}
+        self.item_pick_point = np.array([pp_index[item.pick_point_id] for item in items], dtype=np.int32)
+        weights = self._popularity_weights(len(items), popularity, zipf_s, abc_classes)
+        if weights is None:
+            self.inv_weights = np.ones(len(items), dtype=np.float32)
+        else:
+            with np.errstate(divide='ignore'):
+                self.inv_weights = (1.0 / np.asarray(weights, dtype=np.float64)).astype(np.float32)  # 热度为 0 的 SKU 为 inf，永远不会被抽中
+        self.n_positive = int(np.isfinite(self.inv_weights).sum())
+        if self.n_positive == 0:
+            raise ValueError("no SKU has positive popularity weight")
+
+    def _popularity_weights(self, n, popularity, zipf_s, abc_classes):
+        if popularity == 'uniform':
+            return None
+        rank = self.rng.permutation(n)  # 每个 SKU 的热度排名（随机分布在库位上）
+        if popularity == 'zipf':
+            return 1.0 / np.power(rank + 1.0, zipf_s)
+        if popularity == 'abc':
+            weights = np.empty(n)
+            start = 0
+            for k, (sku_share, demand_share) in enumerate(abc_classes):
+                stop = n if k == len(abc_classes) - 1 else start + max(1, int(round(sku_share * n)))
+                members = (rank >= start) & (rank < stop)
+                weights[members] = demand_share / max(1, members.sum())
+                start = stop
+            return weights
+        raise ValueError(f"unknown popularity model: {popularity}")
+
+    def _arrival_times(self, n_orders, last_time):
+        """至少 n_orders 个订单的到达时间（按整批生成，同一批次的订单到达时间相同）"""
+        if self.order_n_arrival is None:
+            intervals = np.floor(self.rng.exponential(self.poisson_parameter, size=n_orders))
+            return last_time + np.cumsum(intervals)
+        lo, hi = self.order_n_arrival
+        # 批次数上界：每批至少 lo 个订单
+        batch_sizes = self.rng.integers(lo, hi + 1, size=n_orders // max(1, lo) + 1)
+        n_batches = int(np.searchsorted(np.cumsum(batch_sizes), n_orders)) + 1
+        batch_times = last_time + np.cumsum(np.floor(self.rng.exponential(self.poisson_parameter, size=n_batches)))
+        return np.repeat(batch_times, batch_sizes[:n_batches])
+
+    def _sample_items(self, n_items, block_elements=1 << 22):
+        """
+        按热度无放回抽取每个订单的商品（Gumbel-top-k）：每行按 argsort(log(w) - log(-log(U))) 取前 k_max 个，
+        再保留每行前 n_items 个。-log(U) 即标准指数变量 E，该排序与 E / w 从小到大的排序相同，
+        因此直接用 float32 指数变量计算键值（不取对数）；按行分块，每块最多约 block_elements 个键值。
+        逐次取最小值时已选 SKU 的键值置 inf，热度为 0 的 SKU 键值本身为 inf，k_max <= n_positive 保证不会选到
+        :param n_items: 每个订单的商品数，须不超过 n_positive
+        """
+        n, k_max = len(n_items), int(n_items.max())
+        if k_max > self.n_positive:
+            raise ValueError(f"orders of {k_max} distinct items need at least {k_max} SKUs with positive weight, "
+                             f"got {self.n_positive}")
+        n_sku = len(self.inv_weights)
+        draws = np.empty((n, k_max), dtype=np.int64)
+        rows_per_block = max(1, block_elements // n_sku)
+        for lo in range(0, n, rows_per_block):
+            hi = min(n, lo + rows_per_block)
+            keys = self.rng.standard_exponential((hi - lo, n_sku), dtype=np.float32)
+            keys *= self.inv_weights
+            if k_max <= 16:
+                # 每行商品数较少时逐次取最小键值（结果已按键值排序），比 argpartition + 排序快
+                rows = np.arange(hi - lo)
+                for j in range(k_max):
+                    chosen = keys.argmin(axis=1)
+                    draws[lo:hi, j] = chosen
+                    keys[rows, chosen] = np.inf
+            else:
+                top = np.argpartition(keys, k_max - 1, axis=1)[:, :k_max] if k_max < n_sku else \
+                    np.broadcast_to(np.arange(n_sku), (hi - lo, n_sku))
+                order = np.argsort(np.take_along_axis(keys, top, axis=1), axis=1)
+                draws[lo:hi] = np.take_along_axis(top, order, axis=1)
+        valid = np.arange(k_max)[None, :] < n_items[:, None]
+        return draws[valid].astype(np.int32)
+
+    def iter_chunks(self):
+        """
+        逐块生成订单
+        :return: 生成器，每块为 (order_id, arrive_time, n_items, item_index)
+        """
+        current_max = min(self.max_items_per_order, self.n_positive)
+        step = self.chunk_size
+        last_time = 0.0  # 已生成的最后一个批次的到达时间
+        carry = np.empty(0)  # 跨块的批次中留给下一块的订单到达时间
+        for start in range(0, self.total_orders, step):
+            n = min(step, self.total_orders - start)
+            if len(carry) < n:
+                extra = self._arrival_times(n - len(carry), last_time)
+                last_time = extra[-1]
+                times = np.concatenate([carry, extra])
+            else:
+                times = carry
+            arrive_time, carry = times[:n], times[n:]
+            n_items = self.rng.integers(1, current_max + 1, size=n)
+            order_id = np.arange(start + 1, start + n + 1, dtype=np.int64)
+            yield order_id, arrive_time, n_items, self._sample_items(n_items)
+
+    def write(self, instance_path=None, csv_path=None):
+        """
+        分块写出列式算例目录和/或 CSV（order_id, arrival_time, item_id, pick_point_id）
+        :return: 生成的订单数
+        """
+        writer = OrderInstanceWriter(instance_path, self.item_ids, self.pick_point_ids) if instance_path else None
+        csv_file = open(csv_path, 'w', newline='', encoding='utf-8') if csv_path else None
+        item_ids = np.array(self.item_ids, dtype=object)
+        pick_point_ids = np.array(self.pick_point_ids, dtype=object)
+        n_orders = 0
+        try:
+            if csv_file:
+                csv_file.write('order_id,arrival_time,item_id,pick_point_id\n')
+            for order_id, arrive_time, n_items, item_index in self.iter_chunks():
+                pick_point_index = self.item_pick_point[item_index]
+                if writer:
+                    writer.append(order_id, arrive_time, n_items, item_index, pick_point_index)
+                if csv_file:
+                    line_order = np.repeat(order_id, n_items).tolist()
+                    line_time = np.repeat(arrive_time.astype(np.int64), n_items).tolist()
+                    csv_file.write(''.join(f"{o},{t},{i},{p}\n" for o, t, i, p in zip(
+                        line_order, line_time, item_ids[item_index], pick_point_ids[pick_point_index])))
+                n_orders += len(order_id)
+        finally:
+            if writer:
+                writer.close()
+            if csv_file:
+                csv_file.close()
+        return n_orders
+
+
 if __name__ == '__main__':
     # 1. 实例化仓库环境
     warehouse = WarehouseEnv()
@@ -0,0 +1,108 @@
+"""
+SAPPO 扁平动作空间：动作编号与 (智能体, 目标) 之间的闭式换算，以及合法动作的构造
+
+动作排列（P 为拣货位数量，与 PPOAgent.total_action_index_pair 中 total_action 的顺序一致）：
+    [0, N_pickers*P)                       拣货员 p -> 拣货位 j      : p*P + j
+    [N_pickers*P, (N_pickers+N_robots)*P)  机器人 r -> 拣货位 j      : N_pickers*P + r*P + j
+    [(N_pickers+N_robots)*P, size)         机器人 r -> Depot         : (N_pickers+N_robots)*P + r
+"""
+import numpy as np
+
+
+class ActionCatalog:
+    def __init__(self, n_pickers, n_robots, n_pick_points):
+        self.n_pickers = n_pickers
+        self.n_robots = n_robots
+        self.n_pick_points = n_pick_points
+        self.robot_offset = n_pickers * n_pick_points
+        self.depot_offset = (n_pickers + n_robots) * n_pick_points
+        self.size = self.depot_offset + n_robots  # 即 action_num
+
+    @classmethod
+    def for_env(cls, env):
+        return cls(env.N_pickers, env.N_robots, len(env.pick_points_list))
+
+    def matches(self, env):
+        """env 的规模是否与本目录一致"""
+        return (env.N_pickers, env.N_robots, len(env.pick_points_list)) == (
+            self.n_pickers, self.n_robots, self.n_pick_points)
+
+    # --- 编号换算 ---
+
+    def picker_action(self, picker_index, pick_point_index):
+        return picker_index * self.n_pick_points + pick_point_index
+
+    def robot_action(self, robot_index, pick_point_index):
+        return self.robot_offset + robot_index * self.n_pick_points + pick_point_index
+
+    def depot_action(self, robot_index):
+        return self.depot_offset + robot_index
+
+    def is_picker_action(self, index):
+        return index < self.robot_offset
+
+    def decode(self, env, index):
+        """动作编号 -> env.step 接受的 (picker_action, robot_action)"""
+        index = int(index)
+        if index < self.robot_offset:
+            p, j = divmod(index, self.n_pick_points)
+            return (env.pickers[p], env.pick_points_list[j]), None
+        if index < self.depot_offset:
+            r, j = divmod(index - self.robot_offset, self.n_pick_points)
+            return None, (env.robots[r], env.pick_points_list[j])
+        if index < self.size:
+            return None, (env.robots[index - self.depot_offset], env.depot_object)
+        raise IndexError(f"action index {index} out of range [0, {self.size})")
+
+    # --- 合法动作 ---
+
+    def legal_indices(self, env):
+        """
+        当前决策点的合法动作编号列表（与 PPOAgent.get_avaliable_action 的规则和顺序一致，可能含重复）
+        1. 空闲拣货员 × 有机器人排队且无拣货员的拣货位
+        2. 空闲机器人：还有待拣商品时可去任一待拣商品所在拣货位；已拣完且不在 Depot 时可回 Depot
+        """
+        legal = []
+        idle_pick_points = env.idle_pick_points
+        if idle_pick_points:
+            for picker in env.idle_pickers:
+                base = picker.picker_id * self.n_pick_points
+                legal.extend(base + pp.index for pp in idle_pick_points)
+
+        robots = env.idle_robots + env.robots_needing_planning
+        robots.sort(key=lambda r: r.robot_id)
+        pick_point_dict = env.pick_point_dict
+        for r in robots:
+            if r.item_pick_order and (r.order is not None or r.position == r.depot_position):
+                base = self.robot_offset + r.robot_id * self.n_pick_points
+                legal.extend(base + pick_point_dict[item.position].index for item in r.item_pick_order)
+            elif r.order is not None and not r.item_pick_order and r.pick_point is not None:
+                legal.append(self.depot_offset + r.robot_id)
+        return legal
+
+    def legal_mask(self, env, out=None):
+        """合法动作布尔掩码 (size,)；out 为可复用的输出数组"""
+        if out is None:
+            out = np.zeros(self.size, dtype=bool)
+        else:
+            out.fill(False)
+        legal = self.legal_indices(env)
+        if legal:
+            out[legal] = True
+        return out
+
+    # --- 智能体位置 ---
+
+    def agent_cells(self, env, out=None):
+        """
+        各智能体当前位置在展平网格 (H*W) 中的下标，顺序为 [拣货员 0..N_pickers-1, 机器人 0..N_robots-1]；
+        不在拣货位上的智能体（如在 Depot 的机器人）记为 H*W。out 为可复用的输出数组
+        """
+        if out is None:
+            out = np.empty(self.n_pickers + self.n_robots, dtype=np.int64)
+        off_grid = env.N_w * env.N_l
+        pick_point_dict, pick_point_index = env.pick_point_dict, env.pick_point_index
+        for k, agent in enumerate(env.pickers + env.robots):
+            pp = pick_point_dict.get(agent.position)
+            out[k] = off_grid if pp is None else pick_point_index[pp.point_id]
+        return out
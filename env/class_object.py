@@ -134,6 +134,8 @@ class Robot(Config):
         self.S_b = self.parameters["warehouse"]["aisle_width"]  # 底部通道的宽度
         self.S_l = self.parameters["warehouse"]["shelf_length"]  # 储货位的长度
         self.N_l = self.parameters["warehouse"]["shelf_capacity"]  # 单个货架中储货位的数量
+        # 预计算的拣货位距离表（env.routing.DistanceTable），由仓库环境设置；为 None 时按公式计算
+        self.distance_table = None
         # 拣货位选择规则标识符
         # 1：选择x坐标值最小的拣货位；2：选择距离最近的拣货位；3：选择排队机器人数量最少的拣货位；
         # 4：选择排队机器人数量最多的拣货位；5：选择待拣选商品最少的拣货位；6：选择待拣选商品最多的拣货位；
@@ -165,9 +167,14 @@ class Robot(Config):
                                                                           pick_points[x].position[1]))
             next_pick_point_id = pick_point_ids_sorted[0]
         elif self.pick_point_selection_rule == 2:  # 选择距离机器人最近的拣货位
-            distances = {point_id: self.distance_between_pick_points(self.position, pick_points[point_id].position)
-                         for point_id in pick_point_ids}
-            next_pick_point_id = min(distances, key=distances.get)
+            if self.distance_table is not None:  # 查表，一次向量化取出到全部候选拣货位的距离
+                nodes = self.distance_table.nodes_of([pick_points[point_id].position for point_id in pick_point_ids])
+                distances = self.distance_table.distances_from(self.position, nodes)
+                next_pick_point_id = pick_point_ids[int(np.argmin(distances))]
+            else:
+                distances = {point_id: self.distance_between_pick_points(self.position, pick_points[point_id].position)
+                             for point_id in pick_point_ids}
+                next_pick_point_id = min(distances, key=distances.get)
         elif self.pick_point_selection_rule == 3:  # 选择排队机器人数量最少的拣货位
             queue_lengths = {point_id: len(pick_points[point_id].robot_queue) for point_id in pick_point_ids}
             next_pick_point_id = min(queue_lengths, key=queue_lengths.get)
@@ -188,6 +195,8 @@ class Robot(Config):
 
     def distance_between_pick_points(self, position1, position2):
         """两个拣货位之间的最短路径长度（若不在一个巷道，则需要从上部或下部绕过储货位）"""
+        if self.distance_table is not None:
+            return self.distance_table.distance(position1, position2)
         x1, y1 = position1
         x2, y2 = position2
         # 如果两个拣货位在同一巷道，则返回两个拣货位之间的直线路径长度
@@ -250,6 +259,8 @@ class Picker(Config):
         self.S_b = self.parameters["warehouse"]["aisle_width"]  # 底部通道的宽度
         self.S_l = self.parameters["warehouse"]["shelf_length"]  # 储货位的长度
         self.N_l = self.parameters["warehouse"]["shelf_capacity"]  # 单个货架中储货位的数量
+        # 预计算的拣货位距离表（env.routing.DistanceTable），由仓库环境设置；为 None 时按公式计算
+        self.distance_table = None
         # 拣货位选择规则标识符
         # 1：选择x坐标值最小的拣货位；2：选择距离最近的拣货位；3：选择排队机器人数量最少的拣货位；
         # 4：选择排队机器人数量最多的拣货位；5：选择待拣选商品最少的拣货位；6：选择待拣选商品最多的拣货位；
@@ -279,9 +290,14 @@ class Picker(Config):
             next_pick_point = pick_point_ids_sorted[0]
             next_pick_point_id = next_pick_point.point_id
         elif self.pick_point_selection_rule == 2:  # 选择距离拣货员最近的拣货位
-            distances = {point.point_id: self.distance_between_pick_points(self.position, point.position)
-                         for point in idle_pick_points_in_area}
-            next_pick_point_id = min(distances, key=distances.get)
+            if self.distance_table is not None:  # 查表，一次向量化取出到全部候选拣货位的距离
+                nodes = self.distance_table.nodes_of([point.position for point in idle_pick_points_in_area])
+                distances = self.distance_table.distances_from(self.position, nodes)
+                next_pick_point_id = idle_pick_points_in_area[int(np.argmin(distances))].point_id
+            else:
+                distances = {point.point_id: self.distance_between_pick_points(self.position, point.position)
+                             for point in idle_pick_points_in_area}
+                next_pick_point_id = min(distances, key=distances.get)
         elif self.pick_point_selection_rule == 3: # 选择排队机器人数量最少的拣货位
             queue_lengths = {point.point_id: len(point.robot_queue) for point in idle_pick_points_in_area}
             next_pick_point_id = min(queue_lengths, key=queue_lengths.get)
@@ -305,6 +321,8 @@ class Picker(Config):
 
     def distance_between_pick_points(self, position1, position2):
         """两个拣货位之间的最短路径长度（若不在一个巷道，则需要从上部或下部绕过储货位）"""
+        if self.distance_table is not None:
+            return self.distance_table.distance(position1, position2)
         x1, y1 = position1
         x2, y2 = position2
         # 如果两个拣货位在同一巷道，则返回两个拣货位之间的直线路径长度
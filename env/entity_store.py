@@ -0,0 +1,237 @@
+"""
+紧凑的实体存储（struct-of-arrays）：机器人与拣货员的位置、状态、事件时刻和拣货位分配
+以整数下标存放在 NumPy 数组中；RobotView / PickerView 是带 __slots__ 的轻量视图，
+对外保持与 env_I.Robot / env_I.Picker 相同的属性接口（robot.state、picker.pick_point 等）。
+"""
+import numpy as np
+
+INF = float('inf')
+
+# 状态编码
+IDLE = 0
+BUSY = 1
+STATE_NAMES = ('idle', 'busy')
+STATE_CODES = {'idle': IDLE, 'busy': BUSY}
+
+# 机器人事件时刻列
+R_MOVE_TO_PICK_POINT = 0
+R_PICK_POINT_COMPLETE = 1
+R_MOVE_TO_DEPOT = 2
+# 拣货员事件时刻列
+P_PICK_START = 0
+P_PICK_END = 1
+
+
+class EntityStore:
+    """
+    机器人/拣货员的数组化存储
+    位置以距离表节点编号表示（0..N_pp-1 为拣货位，其后为 Depot），
+    拣货位分配以 pick_points_list 下标表示（-1 表示无）。
+    """
+
+    def __init__(self, n_robots, n_pickers, pick_points_list, distance_table, depot_index,
+                 robot_speed, picker_speed):
+        """
+        :param depot_index: Depot 的节点编号；多 Depot 时为每个机器人所属 Depot 的节点编号列表
+        """
+        self.pick_points_list = pick_points_list
+        self.distance_table = distance_table
+        self.node_positions = distance_table.positions  # 节点编号 -> (x, y)
+
+        # 机器人
+        self.robot_depot = np.zeros(n_robots, dtype=np.int32)
+        self.robot_depot[:] = depot_index
+        self.depot_index = int(self.robot_depot[0]) if n_robots else int(np.min(depot_index))
+        self.robot_node = self.robot_depot.copy()
+        self.robot_state = np.zeros(n_robots, dtype=np.int8)
+        self.robot_pick_point = np.full(n_robots, -1, dtype=np.int32)
+        self.robot_time = np.full((n_robots, 3), INF, dtype=np.float64)
+        self.robot_speed = np.full(n_robots, robot_speed, dtype=np.float64)
+        # 拣货员
+        self.picker_node = np.full(n_pickers, self.depot_index, dtype=np.int32)
+        self.picker_state = np.zeros(n_pickers, dtype=np.int8)
+        self.picker_pick_point = np.full(n_pickers, -1, dtype=np.int32)
+        self.picker_time = np.full((n_pickers, 2), INF, dtype=np.float64)
+        self.picker_speed = np.full(n_pickers, picker_speed, dtype=np.float64)
+
+        # 视图对象只创建一次，reset 时复用
+        self.robots = [RobotView(self, i) for i in range(n_robots)]
+        self.pickers = [PickerView(self, i) for i in range(n_pickers)]
+
+    def reset(self, picker_start_points):
+        """
+        重置全部实体：机器人回到所属 Depot 且空闲，拣货员位于各自的初始拣货位
+        :param picker_start_points: 每个拣货员初始拣货位在 pick_points_list 中的下标
+        """
+        self.robot_node[:] = self.robot_depot
+        self.robot_state.fill(IDLE)
+        self.robot_pick_point.fill(-1)
+        self.robot_time.fill(INF)
+        self.picker_node[:] = picker_start_points
+        self.picker_state.fill(IDLE)
+        self.picker_pick_point[:] = picker_start_points
+        self.picker_time.fill(INF)
+        for r in self.robots:
+            r.order = None
+            r.item_pick_order = []
+
+    def node_of(self, position):
+        """坐标 -> 节点编号"""
+        node = self.distance_table.index.get(position)
+        if node is None:
+            raise ValueError(f"position {position} is not a pick point or the depot")
+        return node
+
+    # --- 环境热点路径直接在数组上查询（不经视图属性与坐标换算） ---
+
+    def robots_at_depot(self):
+        """每个机器人是否位于所属 Depot（布尔数组）"""
+        return self.robot_node == self.robot_depot
+
+    def nbytes(self):
+        """数组部分占用的字节数"""
+        return sum(a.nbytes for a in (self.robot_depot, self.robot_node, self.robot_state, self.robot_pick_point, self.robot_time,
+                                      self.robot_speed, self.picker_node, self.picker_state,
+                                      self.picker_pick_point, self.picker_time, self.picker_speed))
+
+
+class RobotView:
+    """机器人视图：数值状态读写 EntityStore 的数组，订单等对象引用存放在槽位中"""
+    __slots__ = ('_store', 'robot_id', 'order', 'item_pick_order')
+
+    def __init__(self, store, robot_id):
+        self._store = store
+        self.robot_id = robot_id
+        self.order = None
+        self.item_pick_order = []  # 当前订单中剩余未规划的商品
+
+    def assign_order(self, order):
+        self.order = order
+        self.item_pick_order = list(order.items)
+
+    @property
+    def items(self):
+        # 返回当前所在拣货位尚未拣选的商品
+        pick_point = self.pick_point
+        if self.order and pick_point:
+            return [item for item in self.order.unpicked_items if item.pick_point_id == pick_point.point_id]
+        return []
+
+    @property
+    def speed(self):
+        return self._store.robot_speed.item(self.robot_id)
+
+    @property
+    def state(self):
+        return STATE_NAMES[self._store.robot_state[self.robot_id]]
+
+    @state.setter
+    def state(self, value):
+        self._store.robot_state[self.robot_id] = STATE_CODES[value]
+
+    @property
+    def node(self):
+        return self._store.robot_node.item(self.robot_id)
+
+    @property
+    def position(self):
+        return self._store.node_positions[self._store.robot_node[self.robot_id]]
+
+    @position.setter
+    def position(self, value):
+        self._store.robot_node[self.robot_id] = self._store.node_of(value)
+
+    @property
+    def depot_position(self):
+        return self._store.node_positions[self._store.robot_depot[self.robot_id]]
+
+    @property
+    def pick_point(self):
+        index = self._store.robot_pick_point[self.robot_id]
+        return None if index < 0 else self._store.pick_points_list[index]
+
+    @pick_point.setter
+    def pick_point(self, value):
+        self._store.robot_pick_point[self.robot_id] = -1 if value is None else value.index
+
+    @property
+    def move_to_pick_point_time(self):
+        return self._store.robot_time.item(self.robot_id, R_MOVE_TO_PICK_POINT)
+
+    @move_to_pick_point_time.setter
+    def move_to_pick_point_time(self, value):
+        self._store.robot_time[self.robot_id, R_MOVE_TO_PICK_POINT] = value
+
+    @property
+    def pick_point_complete_time(self):
+        return self._store.robot_time.item(self.robot_id, R_PICK_POINT_COMPLETE)
+
+    @pick_point_complete_time.setter
+    def pick_point_complete_time(self, value):
+        self._store.robot_time[self.robot_id, R_PICK_POINT_COMPLETE] = value
+
+    @property
+    def move_to_depot_time(self):
+        return self._store.robot_time.item(self.robot_id, R_MOVE_TO_DEPOT)
+
+    @move_to_depot_time.setter
+    def move_to_depot_time(self, value):
+        self._store.robot_time[self.robot_id, R_MOVE_TO_DEPOT] = value
+
+
+class PickerView:
+    """拣货员视图"""
+    __slots__ = ('_store', 'picker_id')
+
+    def __init__(self, store, picker_id):
+        self._store = store
+        self.picker_id = picker_id
+
+    @property
+    def speed(self):
+        return self._store.picker_speed.item(self.picker_id)
+
+    @property
+    def state(self):
+        return STATE_NAMES[self._store.picker_state[self.picker_id]]
+
+    @state.setter
+    def state(self, value):
+        self._store.picker_state[self.picker_id] = STATE_CODES[value]
+
+    @property
+    def node(self):
+        return self._store.picker_node.item(self.picker_id)
+
+    @property
+    def position(self):
+        return self._store.node_positions[self._store.picker_node[self.picker_id]]
+
+    @position.setter
+    def position(self, value):
+        self._store.picker_node[self.picker_id] = self._store.node_of(value)
+
+    @property
+    def pick_point(self):
+        index = self._store.picker_pick_point[self.picker_id]
+        return None if index < 0 else self._store.pick_points_list[index]
+
+    @pick_point.setter
+    def pick_point(self, value):
+        self._store.picker_pick_point[self.picker_id] = -1 if value is None else value.index
+
+    @property
+    def pick_start_time(self):
+        return self._store.picker_time.item(self.picker_id, P_PICK_START)
+
+    @pick_start_time.setter
+    def pick_start_time(self, value):
+        self._store.picker_time[self.picker_id, P_PICK_START] = value
+
+    @property
+    def pick_end_time(self):
+        return self._store.picker_time.item(self.picker_id, P_PICK_END)
+
+    @pick_end_time.setter
+    def pick_end_time(self, value):
+        self._store.picker_time[self.picker_id, P_PICK_END] = value
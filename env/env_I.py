@@ -1,8 +1,34 @@
+import copy
 import numpy as np
 import random
 import pickle
 import gymnasium as gym
 
+from env.layout import WarehouseLayout
+from env.entity_store import (EntityStore, INF, IDLE, BUSY, R_MOVE_TO_PICK_POINT, R_PICK_POINT_COMPLETE,
+                              R_MOVE_TO_DEPOT, P_PICK_START, P_PICK_END)
+from env.order_instance import OrderInstance
+from env.order_stream import OrderStream
+from env.snapshot import take_snapshot, restore_snapshot
+from env.fast_core import FastCore, NUMBA_AVAILABLE
+from env.profiler import instrument
+from env.trace import REC_RESET, REC_ORDER_ASSIGN, REC_PICKER_ACTION, REC_ROBOT_ACTION, REC_PICK_START, DEPOT, INVALID
+from env.event_calendar import (EventCalendar, ORDER_ARRIVAL, ROBOT_ARRIVE, PICKER_ARRIVE,
+                                ROBOT_PICK_DONE, PICKER_PICK_DONE, ROBOT_AT_DEPOT)
+
+# 状态张量 (4, N_w, N_l) 的通道
+CH_QUEUE = 0  # 拣货位排队机器人数
+CH_PICKER = 1  # 拣货位是否有拣货员
+CH_UNPICKED = 2  # 未完成订单中待拣商品数
+CH_UNASSIGNED = 3  # 未分配订单中待拣商品数
+
+# 设置 profiler 后计时的方法 -> 阶段名
+PROFILED_METHODS = {
+    'step': 'env.step',
+    'time_to_next_decision_point': 'env.advance',
+    'state_extractor': 'env.state',
+}
+
 
 # ==========================================
 # 1. 配置与基础类定义
@@ -22,7 +48,13 @@ class Config:
                 "shelf_width": 1.0,
                 "aisle_width": 2.0,
                 "entrance_width": 2.0,
-                "depot_position": (18, 0)
+                "depot_position": (18, 0),
+                # 多区块布局：沿巷道方向的区块数、并排的区块列数、中间横向通道宽度（None 同 aisle_width）
+                "block_rows": 1,
+                "block_cols": 1,
+                "cross_aisle_width": None,
+                # 多个 Depot 的坐标列表，None 时只有 depot_position
+                "depot_positions": None
             },
             "robot": {
                 "robot_speed": 3.0,
@@ -82,8 +114,9 @@ class Order:
 
 
 class PickPoint:
-    def __init__(self, point_id, position, item_ids, storage_bin_ids):
+    def __init__(self, point_id, position, item_ids, storage_bin_ids, index=None):
         self.point_id = point_id
+        self.index = index  # 在 pick_points_list 中的下标
         self.position = position
         self.item_ids = item_ids
         self.storage_bin_ids = storage_bin_ids
@@ -104,6 +137,7 @@ class Robot(Config):
         self.param = self.parameters["robot"]
         self.robot_id = robot_id
         self.position = position
+        self.depot_position = position  # 所属 Depot（初始位置），订单在此领取与完成
         self.speed = self.param["robot_speed"]
         self.state = 'idle'  # idle, busy
 
@@ -122,9 +156,10 @@ class Robot(Config):
 
     @property
     def items(self):
-        # 返回当前所在拣货位需要拣选的商品
+        # 返回当前所在拣货位尚未拣选的商品（已拣过的行不再计入拣选时间；
+        # env.class_object.Order 的 items 与 unpicked_items 是同一个列表，两者在此一致）
         if self.order and self.pick_point:
-            return [item for item in self.order.items if item.pick_point_id == self.pick_point.point_id]
+            return [item for item in self.order.unpicked_items if item.pick_point_id == self.pick_point.point_id]
         return []
 
 
@@ -147,42 +182,76 @@ class Picker(Config):
 # ==========================================
 
 class WarehouseEnv(gym.Env, Config):
-    def __init__(self):
+    def __init__(self, robot_num=None, picker_num=None, entity_store=False, aisle_num=None, shelf_capacity=None,
+                 fast_core=False, layout=None, recorder=None, profiler=None):
+        """
+        :param robot_num: 机器人数量，None 时使用配置值
+        :param picker_num: 拣货员数量，None 时使用配置值
+        :param aisle_num: 每个区块的巷道数，None 时使用配置值
+        :param shelf_capacity: 每个区块中每条巷道的拣货位数，None 时使用配置值
+        :param layout: env.layout.WarehouseLayout，None 时按配置（及 aisle_num / shelf_capacity）生成；
+                       状态张量为 (4, N_w, N_l)，N_w 为全部巷道数、N_l 为沿巷道方向的全部拣货位数
+        :param entity_store: True 时机器人/拣货员由数组化的 EntityStore 存放（robots/pickers 为轻量视图），
+                             reset 时只重填数组而不重新创建对象；step 与事件推进直接按下标读写数组，
+                             单步耗时与对象模式相当（见 benchmarks/bench_entity_store.py），收益在 reset 与内存
+        :param fast_core: True 时事件推进与动作执行由编译内核（env/fast_core.py，Numba）在数组状态上完成，
+                          reset/step/idle_* 接口不变；该模式不维护订单对象列表，不支持 snapshot/clone
+        :param recorder: env.trace.TraceRecorder，不为 None 时记录每个事件与动作（也可之后设置 env.recorder）：
+                         事件推进中每处理一个事件追加一条记录，每个 step 的动作记录在 step 末尾一次写入
+        :param profiler: env.profiler.Profiler，不为 None 时对 step / time_to_next_decision_point / state_extractor
+                         分阶段计时（env.step / env.advance / env.state）
+        """
         super().__init__()
         self.wh_param = self.parameters["warehouse"]
+        if layout is None:
+            layout = WarehouseLayout.from_config(self.wh_param, aisle_num, shelf_capacity)
+        elif aisle_num is not None or shelf_capacity is not None:
+            raise ValueError("aisle_num/shelf_capacity cannot be combined with an explicit layout")
+        self.layout = layout
 
         # 尺寸参数
-        self.N_l = self.wh_param["shelf_capacity"]
-        self.N_w = self.wh_param["aisle_num"]
-        self.S_l = self.wh_param["shelf_length"]
-        self.S_w = self.wh_param["shelf_width"]
-        self.S_b = self.wh_param["aisle_width"]
-        self.S_d = self.wh_param["entrance_width"]
-        self.S_a = self.wh_param["aisle_width"]
-        self.depot_position = self.wh_param["depot_position"]
+        self.N_l = layout.n_slots
+        self.N_w = layout.n_aisles
+        self.S_l = layout.S_l
+        self.S_w = layout.S_w
+        self.S_b = layout.S_b
+        self.S_d = layout.S_d
+        self.S_a = layout.S_a
+        self.depot_positions = list(layout.depots)
+        self.depot_position = self.depot_positions[0]
         self.pack_time = self.parameters["order"]["pack_time"]
 
-        self.N_robots = self.parameters["robot"]["robot_num"]
-        self.N_pickers = self.parameters["picker"]["picker_num"]
+        self.N_robots = self.parameters["robot"]["robot_num"] if robot_num is None else robot_num
+        self.N_pickers = self.parameters["picker"]["picker_num"] if picker_num is None else picker_num
 
         # 核心容器
         self.pick_points = {}
         self.pick_points_list = []
         self.pick_point_dict = {}  # (x, y) -> PickPoint
+        self.pick_point_index = {}  # point_id -> 状态张量展平后的网格下标
         self.storage_bins = {}
         self.items = {}
-        self.depot_object = Depot(self.depot_position)
+        self.depot_objects = [Depot(position) for position in self.depot_positions]
+        self.depot_object = self.depot_objects[0]  # 机器人动作的 Depot 目标，表示回到机器人所属的 Depot
 
         # 构建地图
         self.create_warehouse_graph()
 
+        # 预分配的状态张量，在各状态变化处增量更新，state_extractor 直接返回它
+        self.state_buffer = np.zeros((4, self.N_w, self.N_l), dtype=np.float32)
+        self._state_flat = self.state_buffer.reshape(4, -1)  # 共享内存的 (4, N_w*N_l) 视图
+
         # 状态变量
+        self.use_entity_store = entity_store
+        self.entity_store = None
         self.robots = []
         self.robot_dict = {}
         self.pickers = []
         self.picker_dict = {}
         self.orders = []
-        self.orders_not_arrived = []
+        self.orders_not_arrived = OrderStream([])  # 尚未到达的订单（按到达时间逐个取出）
+        self.keep_history = True  # 是否在 orders_completed 中保留已完成订单
+        self.n_completed_orders = 0
         self.orders_unassigned = []
         self.orders_uncompleted = []
         self.orders_completed = []
@@ -191,72 +260,171 @@ class WarehouseEnv(gym.Env, Config):
         self.last_decision_time = 0.0
         self.order_handle_time = 0.0
         self.done = False
+        # 事件推进的时间上限：下一个事件晚于它时把时钟停在该时刻并返回（rollout 按固定仿真时刻截止，见 rollout_planner）
+        self.stop_time = float('inf')
+
+        # 订单流经时间的累计量（订单到达/完成时更新，compute_reward 据此 O(1) 求平均流经时间）
+        self.completed_flow_sum = 0.0  # 已完成订单的 (完工时间 - 到达时间) 之和
+        self.n_open_orders = 0  # 已到达未完成的订单数
+        self.open_arrive_sum = 0.0  # 已到达未完成订单的到达时间之和
+
+        # 离散事件日历（订单到达、机器人/拣货员的各类完成时刻）
+        self.calendar = EventCalendar()
+
+        # 状态索引集合（存下标），在状态变化处维护，供 idle_* 等属性按需取出而不必全表扫描
+        self._idle_robot_ids = set()  # Idle 且无订单（在 Depot 等待订单）的机器人
+        self._planning_robot_ids = set()  # Idle 且有订单（等待路径规划）的机器人
+        self._idle_picker_ids = set()  # Idle 的拣货员
+        self._idle_pick_point_ids = set()  # 有机器人排队且无拣货员的拣货位
 
         # 统计订单数
         self.order_counter = 0
 
+        # 事件轨迹记录器（可选）
+        self.recorder = recorder
+        # 分阶段计时器（可选，见 profiler 属性）
+        self._profiler = None
+        self.profiler = profiler
+
+        # 编译内核（可选）
+        self.fast_core = None
+        if fast_core:
+            if recorder is not None:
+                raise ValueError("the event recorder is not supported with fast_core=True")
+            if not NUMBA_AVAILABLE:
+                print("Warning: numba not installed, fast_core kernels run as plain Python. Install with: pip install numba")
+            self.fast_core = FastCore(self)
+
+    @property
+    def profiler(self):
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler):
+        # 设置时把 PROFILED_METHODS 换成计时版本，置 None 时恢复
+        self._profiler = profiler
+        instrument(self, PROFILED_METHODS, profiler)
+
     def create_warehouse_graph(self):
-        for nw in range(1, self.N_w + 1):
-            for nl in range(1, self.N_l + 1):
-                x = self.S_d + (2 * nw - 1) * self.S_w + (2 * nw - 1) / 2 * self.S_a
-                y = self.S_b + (2 * nl - 1) / 2 * self.S_l
-                position = (x, y)
-                point_id = f"{nw}-{nl}"
-                items_ids = []
-                bin_ids = []
-                for side in ['left', 'right']:
-                    bin_id = f"{point_id}-{side}"
-                    item_id = f"{bin_id}-item"
-                    self.storage_bins[bin_id] = StorageBin(bin_id, position, item_id, point_id)
-                    item = Item(item_id, bin_id, position, point_id)
-                    item.pick_time = self.parameters["item"]["pick_time"]
-                    self.items[item_id] = item
-                    items_ids.append(item_id)
-                    bin_ids.append(bin_id)
-
-                pick_point = PickPoint(point_id, position, items_ids, bin_ids)
-                self.pick_points[point_id] = pick_point
-                self.pick_points_list.append(pick_point)
-                self.pick_point_dict[position] = pick_point
+        # 拣货位按 (全局巷道号, 沿巷道的全局序号) 编号，多区块时各区块映射到 (N_w, N_l) 网格中的一个矩形
+        for k, s, position in self.layout.pick_points():
+            nw, nl = k + 1, s + 1
+            point_id = f"{nw}-{nl}"
+            items_ids = []
+            bin_ids = []
+            for side in ['left', 'right']:
+                bin_id = f"{point_id}-{side}"
+                item_id = f"{bin_id}-item"
+                self.storage_bins[bin_id] = StorageBin(bin_id, position, item_id, point_id)
+                item = Item(item_id, bin_id, position, point_id)
+                item.pick_time = self.parameters["item"]["pick_time"]
+                self.items[item_id] = item
+                items_ids.append(item_id)
+                bin_ids.append(bin_id)
+
+            pick_point = PickPoint(point_id, position, items_ids, bin_ids, index=len(self.pick_points_list))
+            self.pick_point_index[point_id] = (nw - 1) * self.N_l + (nl - 1)
+            self.pick_points[point_id] = pick_point
+            self.pick_points_list.append(pick_point)
+            self.pick_point_dict[position] = pick_point
+
+        # 全部拣货位 + Depot 的距离表（巷道图最短路径）：节点 i < depot_index 对应 pick_points_list[i]，
+        # depot_index 起依次为各 Depot
+        self.depot_index = len(self.pick_points_list)
+        self.distance_table = self.layout.distance_table()
+        # 稠密矩阵 (N_pp + N_depot, N_pp + N_depot)；大布局不展开
+        self.distance_matrix = self.distance_table.matrix if self.distance_table.dense else None
 
     def shortest_path_between_pick_points(self, point1, point2):
-        x1, y1 = point1.position
-        x2, y2 = point2.position
-        # 如果两个拣货位在同一巷道，则返回两个拣货位之间的直线路径长度
-        if x1 == x2:
-            return abs(y1 - y2)
-        # 计算从上部绕过和从下部绕过的路径，选择最短路径，并返回路径长度
-        else:
-            path1 = abs(y1 - self.S_b / 2) + abs(y2 - self.S_b / 2) + abs(x1 - x2)
-            path2 = (abs(y1 - (self.S_b * 1.5 + self.N_l * self.S_l)) + abs(y2 - (self.S_b * 1.5 + self.N_l * self.S_l))
-                     + abs(x1 - x2))
-            return min(path1, path2)
+        # 查表；若不在一个巷道，则需要从上部或下部绕过储货位
+        return self.distance_table.distance(point1.position, point2.position)
+
+    def distances_to_pick_points(self, obj, pick_point_indices=None):
+        """
+        从 obj（机器人/拣货员/拣货位/Depot）当前位置到一批拣货位的距离（向量化查表）
+        :param pick_point_indices: 拣货位下标（pick_points_list 中的位置），None 表示全部拣货位
+        """
+        if pick_point_indices is None:
+            pick_point_indices = np.arange(self.depot_index)
+        return self.distance_table.distances_from(obj.position, pick_point_indices)
+
+    def robot_depot_nodes(self):
+        """每个机器人所属 Depot 的距离表节点编号（机器人按编号轮流归属各 Depot）"""
+        return [self.depot_index + i % len(self.depot_positions) for i in range(self.N_robots)]
 
     def adjust_resources(self):
-        self.robots = [Robot(i, self.depot_position) for i in range(self.N_robots)]
+        if self.use_entity_store:
+            if self.entity_store is None:
+                self.entity_store = EntityStore(self.N_robots, self.N_pickers, self.pick_points_list,
+                                                self.distance_table, self.robot_depot_nodes(),
+                                                self.parameters["robot"]["robot_speed"],
+                                                self.parameters["picker"]["picker_speed"])
+            # 初始位置均匀分布（与对象模式相同）
+            self.entity_store.reset([(i * 5) % len(self.pick_points_list) for i in range(self.N_pickers)])
+            self.robots = list(self.entity_store.robots)
+            self.pickers = list(self.entity_store.pickers)
+            self.robot_dict = {r.robot_id: r for r in self.robots}
+            self.picker_dict = {p.picker_id: p for p in self.pickers}
+            # 事件有效性检查直接读时间戳数组（实例属性遮蔽类上的对象模式实现）
+            store = self.entity_store
+            self._event_columns = {
+                ROBOT_ARRIVE: (store.robot_time, R_MOVE_TO_PICK_POINT),
+                PICKER_ARRIVE: (store.picker_time, P_PICK_START),
+                ROBOT_PICK_DONE: (store.robot_time, R_PICK_POINT_COMPLETE),
+                PICKER_PICK_DONE: (store.picker_time, P_PICK_END),
+                ROBOT_AT_DEPOT: (store.robot_time, R_MOVE_TO_DEPOT),
+            }
+            self._event_is_valid = self._event_is_valid_store
+            return
+
+        self.robots = [Robot(i, self.depot_positions[i % len(self.depot_positions)]) for i in range(self.N_robots)]
         for robot in self.robots:
             self.robot_dict[robot.robot_id] = robot
 
         self.pickers = []
         for i in range(self.N_pickers):
             p = Picker(i)
-            # 初始位置均匀分布
-            p.position = self.pick_points_list[i * 5].position if i * 5 < len(
-                self.pick_points_list) else self.depot_position
-            p.pick_point = self.pick_points_list[i * 5]
+            # 初始位置均匀分布（拣货员较多时循环取拣货位）
+            start_point = self.pick_points_list[(i * 5) % len(self.pick_points_list)]
+            p.position = start_point.position
+            p.pick_point = start_point
             self.pickers.append(p)
             self.picker_dict[p.picker_id] = p
             # print(f"picker{p.picker_id}位于{p.pick_point.item_ids}")
 
-    def reset(self, orders):
+    def reset(self, orders, keep_history=True):
+        """
+        :param orders: 订单来源，可以是
+                       - Order 列表（按到达时间排序后使用）；
+                       - OrderInstance（列式算例，按块构造新的轻量订单）；
+                       - 按到达时间升序的订单迭代器/生成器（流式读取，只预取下一个订单）
+        :param keep_history: False 时不在 orders_completed 中保留已完成订单，
+                             配合流式订单源时内存与仿真时长无关（完成数和流经时间仍由累计量统计）
+        """
+        if self.fast_core is not None:
+            return self._reset_fast(orders, keep_history)
+
+        if isinstance(orders, OrderInstance):
+            self.orders = None
+            self.orders_not_arrived = OrderStream.from_instance(orders, self)
+        elif isinstance(orders, (list, tuple)):
+            self.orders = orders
+            self.orders_not_arrived = OrderStream.from_list(orders)
+        else:
+            self.orders = None
+            self.orders_not_arrived = OrderStream(orders)
+        self.keep_history = keep_history
+        self.n_completed_orders = 0
+
         self.current_time = 0
         self.last_decision_time = 0
         self.order_handle_time = 0
         self.done = False
+        self.completed_flow_sum = 0.0
+        self.n_open_orders = 0
+        self.open_arrive_sum = 0.0
         self.adjust_resources()
 
-        self.orders = orders
-        self.orders_not_arrived = sorted(orders, key=lambda x: x.arrive_time)
         self.orders_unassigned = []
         self.orders_uncompleted = []
         self.orders_completed = []
@@ -264,6 +432,22 @@ class WarehouseEnv(gym.Env, Config):
         for pp in self.pick_points.values():
             pp.robot_queue = []
             pp.picker = None
+        self.state_buffer.fill(0)
+
+        self._idle_robot_ids = set()
+        self._planning_robot_ids = set()
+        self._idle_picker_ids = set()
+        self._idle_pick_point_ids = set()
+        for r in self.robots:
+            self._refresh_robot(r)
+        for p in self.pickers:
+            self._refresh_picker(p)
+
+        self.calendar.clear()
+        if self.orders_not_arrived:
+            self.calendar.push(self.orders_not_arrived.peek().arrive_time, ORDER_ARRIVAL)
+        if self.recorder is not None:
+            self.recorder.append(0.0, REC_RESET, self.N_robots, self.N_pickers, len(self.pick_points_list))
 
         self.time_to_next_decision_point()
 
@@ -271,10 +455,98 @@ class WarehouseEnv(gym.Env, Config):
         # 统计当前剩余未拣货 item 数（orders_uncompleted 里未完成订单）
         self.prev_total_unpicked = sum(len(o.unpicked_items) for o in self.orders_uncompleted)
         # 已完成订单数
-        self.prev_completed_orders = len(self.orders_completed)
+        self.prev_completed_orders = self.n_completed_orders
 
         return self.state_extractor()
 
+    def _reset_fast(self, orders, keep_history):
+        """fast_core 模式的 reset：订单载入内核数组，机器人/拣货员为内核数组上的视图"""
+        core = self.fast_core
+        self.orders = orders if isinstance(orders, (list, tuple)) else None
+        self.orders_not_arrived = OrderStream([])
+        self.orders_unassigned = []
+        self.orders_uncompleted = []
+        self.orders_completed = []
+        self.keep_history = keep_history
+        self.robots = core.robots
+        self.pickers = core.pickers
+        self.robot_dict = {r.robot_id: r for r in self.robots}
+        self.picker_dict = {p.picker_id: p for p in self.pickers}
+        self.last_decision_time = 0
+        self.order_handle_time = 0
+        core.reset(orders)
+        self._sync_fast_core()
+        self.prev_total_unpicked = int(self._state_flat[CH_UNPICKED].sum())
+        self.prev_completed_orders = self.n_completed_orders
+        return self.state_extractor()
+
+    def _step_fast(self, picker_act, robot_act):
+        """fast_core 模式：动作中的对象换成下标后交给编译内核"""
+        picker = picker_target = robot = robot_target = -1
+        if picker_act is not None:
+            picker, picker_target = picker_act[0].picker_id, picker_act[1].index
+        if robot_act is not None:
+            robot, target = robot_act[0].robot_id, robot_act[1]
+            if isinstance(target, Depot):
+                robot_target = -1
+            elif isinstance(target, PickPoint):
+                robot_target = target.index
+            else:
+                robot_target = -2  # 异常或空动作
+        self.fast_core.step(picker, picker_target, robot, robot_target)
+        self._sync_fast_core()
+
+    def _sync_fast_core(self):
+        """把内核的时钟与累计量同步到环境属性（compute_reward 等直接读取）"""
+        core = self.fast_core
+        self.current_time = core.current_time
+        self.completed_flow_sum = core.floats.item(1)
+        self.open_arrive_sum = core.floats.item(2)
+        self.n_completed_orders = core.n_completed
+        self.n_open_orders = core.n_open
+        if core.done and not self.done and core.stuck:
+            print("Warning: Simulation stuck. Breaking.")
+            print(core.not_arrived_count(), core.unassigned_count(), self.n_open_orders, self.current_time)
+        self.done = core.done
+
+    def snapshot(self, history=True):
+        """
+        记录当前决策点的全部动态状态（可 pickle 的 EnvSnapshot），之后可用 restore 回到这一时刻；
+        要求订单来源为订单列表或 OrderInstance（普通迭代器无法重放）
+        :param history: False 时不保存 orders_completed（向前模拟用，快照更小）
+        """
+        if self.fast_core is not None:
+            raise ValueError("snapshot is not supported with fast_core=True")
+        return take_snapshot(self, history)
+
+    def restore(self, snap):
+        """恢复到 snapshot() 记录的时刻，之后给出相同的动作将得到完全相同的轨迹"""
+        restore_snapshot(self, snap)
+
+    def clone(self):
+        """
+        复制当前环境：布局数据（商品、储货位、距离表、配置）与原环境共享，
+        拣货位、机器人、拣货员和订单等可变对象通过快照重新构造，两个环境此后互不影响
+        """
+        if self.fast_core is not None:
+            raise ValueError("clone is not supported with fast_core=True")
+        env = copy.copy(self)
+        env.pick_points_list = [PickPoint(pp.point_id, pp.position, pp.item_ids, pp.storage_bin_ids, pp.index)
+                                for pp in self.pick_points_list]
+        env.pick_points = {pp.point_id: pp for pp in env.pick_points_list}
+        env.pick_point_dict = {pp.position: pp for pp in env.pick_points_list}
+        env.state_buffer = np.zeros_like(self.state_buffer)
+        env._state_flat = env.state_buffer.reshape(4, -1)
+        env.calendar = EventCalendar()
+        env.entity_store = None
+        env.recorder = None
+        env.profiler = None
+        env.robot_dict = {}
+        env.picker_dict = {}
+        env.adjust_resources()
+        env.restore(self.snapshot())
+        return env
+
     def time_to_next_decision_point(self):
         """
         事件推进逻辑：
@@ -282,22 +554,33 @@ class WarehouseEnv(gym.Env, Config):
         1. 存在空闲Picker 且有需要服务的PickPoint（任务分配决策点）
         2. 存在空闲Robot（路径规划决策点：Robot在Depot分到了订单，或者Robot在货架拣完货要去下一站）
         """
+        recorder = self.recorder
+        store = self.entity_store
         while not self.done:
             # --- 检查是否满足决策点条件 ---
             # 检查是否有机器人需要订单分配 (在Depot)
-            robots_needing_order = [r for r in self.robots if
-                                    r.state == 'idle' and r.order is None and r.position == self.depot_position]  # 改
-
-            if len(robots_needing_order) > 0 and len(self.orders_unassigned) > 0:
-                for r in self.robots:
-                    if r.order is None and self.orders_unassigned:
-                        # 默认取第一个订单 (或者 RL 可以指定 Order，这里简化处理)
-                        order = self.orders_unassigned.pop(0)
-                        r.assign_order(order)
-                        # print(f"robot{r.robot_id}接到订单{order.order_id}")
+            if self._idle_robot_ids and self.orders_unassigned:
+                at_depot = None if store is None else store.robots_at_depot()
+                for i in sorted(self._idle_robot_ids):
+                    r = self.robots[i]
+                    if at_depot is None:
+                        if r.position != r.depot_position:  # 改
+                            continue
+                    elif not at_depot[i]:
+                        continue
+                    if not self.orders_unassigned:
+                        break
+                    # 默认取第一个订单 (或者 RL 可以指定 Order，这里简化处理)
+                    order = self.orders_unassigned.pop(0)
+                    self._count_order_items(order, CH_UNASSIGNED, -1)
+                    r.assign_order(order)
+                    self._refresh_robot(r)
+                    if recorder is not None:
+                        recorder.append(self.current_time, REC_ORDER_ASSIGN, r.robot_id, -1, order.order_id)
+                    # print(f"robot{r.robot_id}接到订单{order.order_id}")
 
             # 1. 任务分配决策点
-            if len(self.idle_pickers) > 0 and len(self.idle_pick_points) > 0:
+            if self._idle_picker_ids and self._idle_pick_point_ids:
                 # print(f"{self.current_time},有picker需要行动")
                 return
 
@@ -307,85 +590,85 @@ class WarehouseEnv(gym.Env, Config):
             # b. 在PickPoint拣货完成，且订单未完成 (需要决定去下一个哪个点)
 
             # 检查是否有机器人需要路径决策
-            robots_needing_path = [
-                r for r in self.robots
-                if r.state == 'idle'
-                   and r.order is not None
-            ]
-            if len(robots_needing_path) > 0:
+            if self._planning_robot_ids:
                 # print(f"{self.current_time},有robot需要行动")
                 return
 
-            # --- 如果不需要决策，推进时间 ---
-
-            future_events = []
-            # 1. 订单到达
-            if self.orders_not_arrived:
-                future_events.append(self.orders_not_arrived[0].arrive_time)
-
-            # 2. 机器人事件
-            for r in self.robots:
-                if r.move_to_pick_point_time > self.current_time:
-                    future_events.append(r.move_to_pick_point_time)
-                if r.pick_point_complete_time > self.current_time:
-                    future_events.append(r.pick_point_complete_time)
-                if r.move_to_depot_time > self.current_time:
-                    future_events.append(r.move_to_depot_time)
-
-            # 3. 拣货员事件
-            for p in self.pickers:
-                if p.pick_start_time > self.current_time:
-                    future_events.append(p.pick_start_time)
-                if p.pick_end_time > self.current_time:
-                    future_events.append(p.pick_end_time)
-
-            valid_events = [t for t in future_events if t != float('inf')]
+            # --- 如果不需要决策，推进时间：从事件日历取出最早的有效事件 ---
+            next_time = self.calendar.next_time(self._event_is_valid)
 
-            if not valid_events:
+            if next_time is None:
                 if not self.orders_not_arrived and not self.orders_unassigned and not self.orders_uncompleted:
                     self.done = True
                     return
                 else:
                     print("Warning: Simulation stuck. Breaking.")
-                    print(len(self.orders_not_arrived), len(self.orders_unassigned), len(self.orders_uncompleted),
-                          self.current_time)
+                    print(self.orders_not_arrived.n_remaining, len(self.orders_unassigned),
+                          len(self.orders_uncompleted), self.current_time)
                     self.done = True
                     return
+            if next_time > self.stop_time:
+                self.current_time = self.stop_time
+                return
 
-            next_time = min(valid_events)
             self.current_time = next_time
 
-            # --- 处理事件 ---
-
-            # A. 订单到达
-            while self.orders_not_arrived and self.current_time >= self.orders_not_arrived[0].arrive_time:
-                order = self.orders_not_arrived.pop(0)
-                self.orders_unassigned.append(order)
-                self.orders_uncompleted.append(order)
-                # 新订单到达，可能有闲置机器人在Depot等待，循环会再次检查决策条件
+            # --- 处理事件（同一时刻的事件按 A→E、再按实体下标的顺序处理） ---
+            # 每个分支给出该事件记录的 target / value（见 env/trace.py 的 KIND_FIELDS），处理完后追加一条记录
+            for kind, index in self.calendar.pop_at(next_time):
+                if not self._event_is_valid(next_time, kind, index):
+                    continue
 
-            # B. 机器人到达拣货位
-            for r in self.robots:
-                if self.current_time == r.move_to_pick_point_time:
+                # A. 订单到达
+                if kind == ORDER_ARRIVAL:
+                    pending = self.orders_not_arrived
+                    target, value = -1, 0
+                    while pending and self.current_time >= pending.peek().arrive_time:
+                        order = pending.pop()
+                        self.orders_unassigned.append(order)
+                        self.orders_uncompleted.append(order)
+                        self._count_order_items(order, CH_UNPICKED, 1)
+                        self._count_order_items(order, CH_UNASSIGNED, 1)
+                        self.n_open_orders += 1
+                        self.open_arrive_sum += order.arrive_time
+                        value += 1
+                        # 新订单到达，可能有闲置机器人在Depot等待，循环会再次检查决策条件
+                    if pending:
+                        self.calendar.push(pending.peek().arrive_time, ORDER_ARRIVAL)
+
+                # B~E. EntityStore 模式：直接读写实体数组
+                elif store is not None:
+                    target, value = self._store_event(kind, index, next_time)
+
+                # B. 机器人到达拣货位
+                elif kind == ROBOT_ARRIVE:
+                    r = self.robots[index]
                     pp = r.pick_point
                     pp.robot_queue.append(r)
+                    self._state_flat[CH_QUEUE, self.pick_point_index[pp.point_id]] += 1
+                    self._refresh_pick_point(pp)
                     r.position = pp.position
                     r.move_to_pick_point_time = float('inf')
+                    target, value = pp.index, len(pp.robot_queue)
                     # 进入排队状态，等待Picker来处理（Picker逻辑在Step中）
 
-            # C. 拣货员到达位置 (开始拣货)
-            for p in self.pickers:
-                if self.current_time == p.pick_start_time:
+                # C. 拣货员到达位置 (开始拣货)
+                elif kind == PICKER_ARRIVE:
+                    p = self.pickers[index]
                     p.pick_start_time = float('inf')
+                    target, value = p.pick_point.index, 0
                     # 此时Picker到位，等待pick_end_time结束
 
-            # D. 拣货完成
-            # D1. 机器人完成部分
-            for r in self.robots:
-                if self.current_time == r.pick_point_complete_time:
+                # D1. 拣货完成：机器人完成部分
+                elif kind == ROBOT_PICK_DONE:
+                    r = self.robots[index]
                     r.pick_point_complete_time = float('inf')
                     pp = r.pick_point
-                    if r in pp.robot_queue: pp.robot_queue.remove(r)
+                    cell = self.pick_point_index[pp.point_id]
+                    if r in pp.robot_queue:
+                        pp.robot_queue.remove(r)
+                        self._state_flat[CH_QUEUE, cell] -= 1
+                        self._refresh_pick_point(pp)
 
                     # 结算物品
                     items_picked = [i for i in r.items]  # 当前拣货位的物品
@@ -396,35 +679,198 @@ class WarehouseEnv(gym.Env, Config):
                             r.item_pick_order.remove(item)
                         if item in r.order.unpicked_items:
                             r.order.unpicked_items.remove(item)
+                            if item:
+                                self._state_flat[CH_UNPICKED, self.pick_point_index[item.pick_point_id]] -= 1
 
                     # 状态置为 Idle，等待 RL 给出下一个去向 (Next Pick Point or Depot)
                     r.state = 'idle'
+                    self._refresh_robot(r)
+                    target, value = pp.index, len(pp.robot_queue)
                     # 循环将在下一次迭代通过 robots_needing_path 捕获此状态
 
-            # D2. 拣货员完成部分
-            for p in self.pickers:
-                if self.current_time == p.pick_end_time:
+                # D2. 拣货完成：拣货员完成部分
+                elif kind == PICKER_PICK_DONE:
+                    p = self.pickers[index]
                     p.pick_end_time = float('inf')
                     p.state = 'idle'
+                    self._refresh_picker(p)
+                    target, value = -1 if p.pick_point is None else p.pick_point.index, 0
                     if p.pick_point:
                         p.pick_point.picker = None
+                        self._state_flat[CH_PICKER, self.pick_point_index[p.pick_point.point_id]] = 0
+                        self._refresh_pick_point(p.pick_point)
                         p.pick_point = None
                     # 状态置为 Idle，等待 RL 分配下一个 PickPoint
 
-            # E. 机器人回到 Depot (完成订单)
-            for r in self.robots:
-                if self.current_time == r.move_to_depot_time:
+                # E. 机器人回到 Depot (完成订单)
+                elif kind == ROBOT_AT_DEPOT:
+                    r = self.robots[index]
                     r.move_to_depot_time = float('inf')
                     r.state = 'idle'
-                    r.position = self.depot_position
+                    r.position = r.depot_position
+                    target, value = DEPOT, float('nan') if r.order is None else next_time - r.order.arrive_time
                     if r.order is not None:
                         r.order.complete_time = self.current_time
                         if r.order in self.orders_uncompleted:
                             self.orders_uncompleted.remove(r.order)
-                            self.orders_completed.append(r.order)
+                            if self.keep_history:
+                                self.orders_completed.append(r.order)
+                            self.n_completed_orders += 1
+                            self.n_open_orders -= 1
+                            self.open_arrive_sum -= r.order.arrive_time
+                            self.completed_flow_sum += r.order.complete_time - r.order.arrive_time
+                            # 提前回 Depot 时订单可能仍有未拣商品，一并从状态中扣除
+                            self._count_order_items(r.order, CH_UNPICKED, -1)
                         r.order = None
                         r.pick_point = None
                         # 状态置为 Idle，等待 RL 分配新订单
+                    self._refresh_robot(r)
+
+                if recorder is not None:
+                    recorder.append(next_time, kind, index, target, value)
+
+    def _store_event(self, kind, index, time):
+        """
+        EntityStore 模式下处理机器人/拣货员事件（与 time_to_next_decision_point 中 B~E 分支一致），
+        位置、状态、时间戳直接按下标读写 store 的数组
+        :return: 该事件记录的 (target, value)
+        """
+        store = self.entity_store
+        state_flat = self._state_flat
+        if kind == ROBOT_ARRIVE:
+            j = store.robot_pick_point.item(index)
+            pp = self.pick_points_list[j]
+            pp.robot_queue.append(self.robots[index])
+            state_flat[CH_QUEUE, self.pick_point_index[pp.point_id]] += 1
+            self._refresh_pick_point(pp)
+            store.robot_node[index] = j
+            store.robot_time[index, R_MOVE_TO_PICK_POINT] = INF
+            return j, len(pp.robot_queue)
+
+        if kind == PICKER_ARRIVE:
+            store.picker_time[index, P_PICK_START] = INF
+            return store.picker_pick_point.item(index), 0
+
+        if kind == ROBOT_PICK_DONE:
+            r = self.robots[index]
+            store.robot_time[index, R_PICK_POINT_COMPLETE] = INF
+            j = store.robot_pick_point.item(index)
+            pp = self.pick_points_list[j]
+            if r in pp.robot_queue:
+                pp.robot_queue.remove(r)
+                state_flat[CH_QUEUE, self.pick_point_index[pp.point_id]] -= 1
+                self._refresh_pick_point(pp)
+
+            # 结算当前拣货位上尚未拣选的商品
+            order = r.order
+            if order:
+                point_id = pp.point_id
+                item_pick_order = r.item_pick_order
+                unpicked = order.unpicked_items
+                for item in [i for i in unpicked if i.pick_point_id == point_id]:
+                    order.picked_items.append(item)
+                    if item in item_pick_order:
+                        item_pick_order.remove(item)
+                    if item in unpicked:
+                        unpicked.remove(item)
+                        state_flat[CH_UNPICKED, self.pick_point_index[point_id]] -= 1
+
+            store.robot_state[index] = IDLE
+            (self._idle_robot_ids if order is None else self._planning_robot_ids).add(index)
+            return j, len(pp.robot_queue)
+
+        if kind == PICKER_PICK_DONE:
+            store.picker_time[index, P_PICK_END] = INF
+            store.picker_state[index] = IDLE
+            self._idle_picker_ids.add(index)
+            j = store.picker_pick_point.item(index)
+            if j >= 0:
+                pp = self.pick_points_list[j]
+                pp.picker = None
+                state_flat[CH_PICKER, self.pick_point_index[pp.point_id]] = 0
+                self._refresh_pick_point(pp)
+                store.picker_pick_point[index] = -1
+            return j, 0
+
+        # ROBOT_AT_DEPOT
+        r = self.robots[index]
+        store.robot_time[index, R_MOVE_TO_DEPOT] = INF
+        store.robot_state[index] = IDLE
+        store.robot_node[index] = store.robot_depot[index]
+        order = r.order
+        value = float('nan') if order is None else time - order.arrive_time
+        if order is not None:
+            order.complete_time = self.current_time
+            if order in self.orders_uncompleted:
+                self.orders_uncompleted.remove(order)
+                if self.keep_history:
+                    self.orders_completed.append(order)
+                self.n_completed_orders += 1
+                self.n_open_orders -= 1
+                self.open_arrive_sum -= order.arrive_time
+                self.completed_flow_sum += order.complete_time - order.arrive_time
+                self._count_order_items(order, CH_UNPICKED, -1)
+            r.order = None
+            store.robot_pick_point[index] = -1
+        self._planning_robot_ids.discard(index)
+        self._idle_robot_ids.add(index)
+        return DEPOT, value
+
+    def _refresh_robot(self, r):
+        """机器人状态/订单变化后更新其所属的索引集合"""
+        self._idle_robot_ids.discard(r.robot_id)
+        self._planning_robot_ids.discard(r.robot_id)
+        if r.state == 'idle':
+            if r.order is None:
+                self._idle_robot_ids.add(r.robot_id)
+            else:
+                self._planning_robot_ids.add(r.robot_id)
+
+    def _refresh_picker(self, p):
+        """拣货员状态变化后更新空闲拣货员集合"""
+        if p.state == 'idle':
+            self._idle_picker_ids.add(p.picker_id)
+        else:
+            self._idle_picker_ids.discard(p.picker_id)
+
+    def _refresh_pick_point(self, pp):
+        """拣货位排队/拣货员变化后更新待分配拣货位集合"""
+        if pp.is_idle:
+            self._idle_pick_point_ids.add(pp.index)
+        else:
+            self._idle_pick_point_ids.discard(pp.index)
+
+    def _count_order_items(self, order, channel, delta):
+        """把订单中未拣商品按所属拣货位累加到状态张量的指定通道"""
+        flat = self._state_flat[channel]
+        for item in order.unpicked_items:
+            if item:
+                flat[self.pick_point_index[item.pick_point_id]] += delta
+
+    def _event_is_valid(self, time, kind, index):
+        """惰性失效：事件时间与实体当前记录的时间戳一致时才有效（被 step 重新调度的旧事件自动作废）"""
+        if kind == ORDER_ARRIVAL:
+            pending = self.orders_not_arrived.peek()
+            return pending is not None and pending.arrive_time == time
+        if kind == ROBOT_ARRIVE:
+            return self.robots[index].move_to_pick_point_time == time
+        if kind == PICKER_ARRIVE:
+            return self.pickers[index].pick_start_time == time
+        if kind == ROBOT_PICK_DONE:
+            return self.robots[index].pick_point_complete_time == time
+        if kind == PICKER_PICK_DONE:
+            return self.pickers[index].pick_end_time == time
+        if kind == ROBOT_AT_DEPOT:
+            return self.robots[index].move_to_depot_time == time
+        return False
+
+    def _event_is_valid_store(self, time, kind, index):
+        """EntityStore 模式下的 _event_is_valid：直接读取时间戳数组"""
+        if kind == ORDER_ARRIVAL:
+            pending = self.orders_not_arrived.peek()
+            return pending is not None and pending.arrive_time == time
+        times, column = self._event_columns[kind]
+        return times.item(index, column) == time
 
     def step(self, action):
         """
@@ -436,7 +882,22 @@ class WarehouseEnv(gym.Env, Config):
         """
 
         picker_act, robot_act = action
+        if self.fast_core is not None:
+            self._step_fast(picker_act, robot_act)
+            return self._step_result()
+
+        if self.entity_store is not None:
+            self._apply_action_store(picker_act, robot_act)
+        else:
+            self._apply_action(picker_act, robot_act)
+        if self.recorder is not None:
+            self._record_decision(picker_act, robot_act)
+        # 3. 推进环境
+        self.time_to_next_decision_point()
+        return self._step_result()
 
+    def _apply_action(self, picker_act, robot_act):
+        """执行拣货员动作与机器人动作（对象模式）"""
         # --- 1. 执行拣货员动作 (任务分配) ---
         if picker_act is not None:
             picker, pick_point = picker_act
@@ -445,12 +906,16 @@ class WarehouseEnv(gym.Env, Config):
             picker.state = 'busy'
             picker.pick_point = pick_point
             pick_point.picker = picker
+            self._state_flat[CH_PICKER, self.pick_point_index[pick_point.point_id]] = 1
+            self._refresh_picker(picker)
+            self._refresh_pick_point(pick_point)
 
             # 计算移动
             dist = self.shortest_path_between_pick_points(picker, pick_point)
             travel_time = dist / picker.speed
             picker.pick_start_time = self.current_time + travel_time
             picker.position = pick_point.position
+            self.calendar.schedule(self.current_time, picker.pick_start_time, PICKER_ARRIVE, picker.picker_id)
 
             # 计算叠加拣选时间 (Requirement 1)
             cumulative_pick_time = 0
@@ -460,8 +925,10 @@ class WarehouseEnv(gym.Env, Config):
                 cumulative_pick_time += job_time
                 # 同步机器人完成时间
                 robot.pick_point_complete_time = picker.pick_start_time + cumulative_pick_time
+                self.calendar.schedule(self.current_time, robot.pick_point_complete_time, ROBOT_PICK_DONE, robot.robot_id)
 
             picker.pick_end_time = picker.pick_start_time + cumulative_pick_time
+            self.calendar.schedule(self.current_time, picker.pick_end_time, PICKER_PICK_DONE, picker.picker_id)
             # print(f"picker{picker.picker_id}前往{pick_point.item_ids}")
 
         # --- 2. 执行机器人动作 (路径规划/订单获取) ---
@@ -475,25 +942,112 @@ class WarehouseEnv(gym.Env, Config):
             if robot.order is not None:
                 # 情况 B: 机器人已有 Order，Target 是下一个 PickPoint (或者 Depot)
                 robot.state = 'busy'
+                self._refresh_robot(robot)
 
                 if isinstance(target, Depot):
                     # 去 Depot
-                    dist = self.shortest_path_between_pick_points(robot, target)
+                    dist = self.distance_table.distance(robot.position, robot.depot_position)
                     robot.move_to_depot_time = self.current_time + dist / robot.speed + self.pack_time
                     robot.pick_point = None
+                    self.calendar.schedule(self.current_time, robot.move_to_depot_time, ROBOT_AT_DEPOT, robot.robot_id)
                     # print(f"robot{robot.robot_id}回到depot点")
                 elif isinstance(target, PickPoint):
                     # 去 PickPoint
                     robot.pick_point = target
                     dist = self.shortest_path_between_pick_points(robot, target)
                     robot.move_to_pick_point_time = self.current_time + dist / robot.speed
+                    self.calendar.schedule(self.current_time, robot.move_to_pick_point_time, ROBOT_ARRIVE, robot.robot_id)
                     # print(f"robot{robot.robot_id}前往{target.item_ids}")
                 else:
                     # 异常或空动作
                     pass
-        # 3. 推进环境
-        self.time_to_next_decision_point()
 
+    def _apply_action_store(self, picker_act, robot_act):
+        """
+        EntityStore 模式的 _apply_action：位置、状态、时间戳直接按下标读写 store 的数组，
+        不经 RobotView / PickerView 的属性（拣货位节点编号即其在 pick_points_list 中的下标）
+        """
+        store = self.entity_store
+        node_distance = self.distance_table.node_distance
+        now = self.current_time
+        if picker_act is not None:
+            picker, pick_point = picker_act
+            p, j = picker.picker_id, pick_point.index
+
+            store.picker_state[p] = BUSY
+            store.picker_pick_point[p] = j
+            pick_point.picker = picker
+            self._state_flat[CH_PICKER, self.pick_point_index[pick_point.point_id]] = 1
+            self._idle_picker_ids.discard(p)
+            self._refresh_pick_point(pick_point)
+
+            start = now + node_distance(store.picker_node.item(p), j) / store.picker_speed.item(p)
+            picker_time = store.picker_time
+            picker_time[p, P_PICK_START] = start
+            store.picker_node[p] = j
+            self.calendar.schedule(now, start, PICKER_ARRIVE, p)
+
+            # 排队机器人依次拣选当前拣货位上尚未拣选的商品
+            robot_time = store.robot_time
+            point_id = pick_point.point_id
+            cumulative_pick_time = 0
+            for robot in pick_point.robot_queue:
+                order = robot.order
+                if order:
+                    cumulative_pick_time += sum(item.pick_time for item in order.unpicked_items
+                                                if item.pick_point_id == point_id)
+                robot_time[robot.robot_id, R_PICK_POINT_COMPLETE] = start + cumulative_pick_time
+                self.calendar.schedule(now, start + cumulative_pick_time, ROBOT_PICK_DONE, robot.robot_id)
+
+            picker_time[p, P_PICK_END] = start + cumulative_pick_time
+            self.calendar.schedule(now, start + cumulative_pick_time, PICKER_PICK_DONE, p)
+
+        if robot_act is not None:
+            robot, target = robot_act
+            if robot.order is not None:
+                i = robot.robot_id
+                store.robot_state[i] = BUSY
+                self._idle_robot_ids.discard(i)
+                self._planning_robot_ids.discard(i)
+                if isinstance(target, Depot):
+                    dist = node_distance(store.robot_node.item(i), store.robot_depot.item(i))
+                    arrive = now + dist / store.robot_speed.item(i) + self.pack_time
+                    store.robot_time[i, R_MOVE_TO_DEPOT] = arrive
+                    store.robot_pick_point[i] = -1
+                    self.calendar.schedule(now, arrive, ROBOT_AT_DEPOT, i)
+                elif isinstance(target, PickPoint):
+                    j = target.index
+                    store.robot_pick_point[i] = j
+                    arrive = now + node_distance(store.robot_node.item(i), j) / store.robot_speed.item(i)
+                    store.robot_time[i, R_MOVE_TO_PICK_POINT] = arrive
+                    self.calendar.schedule(now, arrive, ROBOT_ARRIVE, i)
+
+    def _record_decision(self, picker_act, robot_act):
+        """写入一个 step 的动作记录：拣货员动作及各排队机器人的拣选开始时刻，或机器人动作"""
+        append = self.recorder.append
+        if picker_act is not None:
+            picker, pick_point = picker_act
+            append(self.current_time, REC_PICKER_ACTION, picker.picker_id, pick_point.index, picker.pick_start_time)
+            # 排队机器人依次被拣选：每个机器人从前一个机器人拣完的时刻开始
+            start = picker.pick_start_time
+            for robot in pick_point.robot_queue:
+                append(self.current_time, REC_PICK_START, robot.robot_id, pick_point.index, start)
+                start = robot.pick_point_complete_time
+        if robot_act is not None:
+            robot, target = robot_act
+            # value 为预计到达时刻，动作被忽略（机器人无订单或目标无效）时为 inf
+            if isinstance(target, Depot):
+                target_index, arrive = DEPOT, robot.move_to_depot_time
+            elif isinstance(target, PickPoint):
+                target_index, arrive = target.index, robot.move_to_pick_point_time
+            else:
+                target_index, arrive = INVALID, float('inf')
+            if robot.order is None:
+                arrive = float('inf')
+            append(self.current_time, REC_ROBOT_ACTION, robot.robot_id, target_index, arrive)
+
+    def _step_result(self):
+        """决策点推进完成后的 (state, reward, done, truncated, info)"""
         # time_to_next_decision_point 会推进 current_time；dt 表示两个决策点之间经过的真实时间
         dt = self.current_time - self.last_decision_time
 
@@ -511,7 +1065,20 @@ class WarehouseEnv(gym.Env, Config):
 
         return state, reward, done, False, info
 
-    def state_extractor(self):
+    def state_extractor(self, copy=True):
+        """
+        返回当前状态张量 (4, N_w, N_l)：[排队机器人数, 是否有拣货员, 未完成订单待拣商品数, 未分配订单待拣商品数]
+        状态张量在各状态变化处增量维护，这里不再重新遍历拣货位和订单。
+        :param copy: True 返回独立副本（可安全存入经验池）；False 返回只读视图，随环境推进而变化
+        """
+        if copy:
+            return self.state_buffer.copy()
+        view = self.state_buffer.view()
+        view.flags.writeable = False
+        return view
+
+    def rebuild_state(self):
+        """从头遍历拣货位与订单重建状态张量（原 state_extractor 的实现），用于校验增量维护的结果"""
 
         H = self.N_w
         W = self.N_l
@@ -555,18 +1122,13 @@ class WarehouseEnv(gym.Env, Config):
         计算奖励：reward = 上一时刻所有订单的总流经时间 - 当前时刻所有订单的总流经时间
         已完成订单的流经时间 = 完工时间 - 到达时间
         未完成订单的流经时间 = 当前时间 - 到达时间
+        两部分均由订单到达/完成时维护的累计量得到，不再遍历订单列表
         """
         # 计算当前时刻所有订单的流经时间
-        current_total_time = sum(
-            (o.complete_time - o.arrive_time)
-            for o in self.orders_completed
-        )
-        current_total_time += sum(
-            (self.current_time - o.arrive_time)  # 未完成订单的流经时间
-            for o in self.orders_uncompleted
-        )
-
-        num_orders = len(self.orders_completed) + len(self.orders_uncompleted)
+        current_total_time = self.completed_flow_sum
+        current_total_time += self.n_open_orders * self.current_time - self.open_arrive_sum  # 未完成订单的流经时间
+
+        num_orders = self.n_completed_orders + self.n_open_orders
         average_order_handle_time = current_total_time / max(1, num_orders)
 
         # 奖励为总流经时间的差
@@ -577,47 +1139,45 @@ class WarehouseEnv(gym.Env, Config):
 
         return reward
 
-    # --- 辅助属性 ---
+    # --- 辅助属性（由索引集合取出，按下标升序返回，代价与匹配的实体数成正比） ---
 
     @property
     def idle_robots(self):
         # 返回在 Depot 等待订单的机器人
-        return [r for r in self.robots if r.state == 'idle' and r.order is None]
+        if self.fast_core is not None:
+            return self.fast_core.idle_robots()
+        return [self.robots[i] for i in sorted(self._idle_robot_ids)]
 
     @property
     def idle_pickers(self):
-        return [p for p in self.pickers if p.state == 'idle']
+        if self.fast_core is not None:
+            return self.fast_core.idle_pickers()
+        return [self.pickers[i] for i in sorted(self._idle_picker_ids)]
 
     @property
     def idle_pick_points(self):
-        return [pp for pp in self.pick_points_list if pp.is_idle]
+        if self.fast_core is not None:
+            return self.fast_core.idle_pick_points()
+        return [self.pick_points_list[i] for i in sorted(self._idle_pick_point_ids)]
 
     @property
     def robots_needing_planning(self):
         # 返回需要规划下一个点的机器人 (已有订单且Idle)
-        return [r for r in self.robots if r.state == 'idle' and r.order is not None]
+        if self.fast_core is not None:
+            return self.fast_core.robots_needing_planning()
+        return [self.robots[i] for i in sorted(self._planning_robot_ids)]
 
     @property
     def unpicked_count(self):
-        count = {pp.point_id: 0 for pp in self.pick_points_list}
-        for order in self.orders_uncompleted:
-            for item in order.unpicked_items:
-                if item is None:
-                    continue
-                pid = item.pick_point_id
-                count[pid] += 1
-        return count
+        # 直接读取状态张量中增量维护的计数
+        counts = self._state_flat[CH_UNPICKED]
+        return {pp.point_id: int(counts[self.pick_point_index[pp.point_id]]) for pp in self.pick_points_list}
 
     @property
     def unassigned_count(self):
-        count = {pp.point_id: 0 for pp in self.pick_points_list}
-        for order in self.orders_unassigned:
-            for item in order.unpicked_items:
-                if item is None:
-                    continue
-                pid = item.pick_point_id
-                count[pid] += 1
-        return count
+        counts = self._state_flat[CH_UNASSIGNED]
+        return {pp.point_id: int(counts[self.pick_point_index[pp.point_id]]) for pp in self.pick_points_list}
+
 # ==========================================
 # 3. 测试入口
 # ==========================================
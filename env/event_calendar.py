@@ -0,0 +1,81 @@
+"""
+离散事件日历：按时间排序的最小堆，事件采用惰性失效
+"""
+import heapq
+
+# 事件类型：数值同时决定同一时刻内的处理顺序（与原先逐类扫描的 A→E 顺序一致）
+ORDER_ARRIVAL = 0  # A. 订单到达
+ROBOT_ARRIVE = 1  # B. 机器人到达拣货位
+PICKER_ARRIVE = 2  # C. 拣货员到达拣货位（开始拣货）
+ROBOT_PICK_DONE = 3  # D1. 机器人在拣货位拣货完成
+PICKER_PICK_DONE = 4  # D2. 拣货员拣货完成
+ROBOT_AT_DEPOT = 5  # E. 机器人回到 Depot
+
+EVENT_NAMES = {
+    ORDER_ARRIVAL: "order_arrival",
+    ROBOT_ARRIVE: "robot_arrive",
+    PICKER_ARRIVE: "picker_arrive",
+    ROBOT_PICK_DONE: "robot_pick_done",
+    PICKER_PICK_DONE: "picker_pick_done",
+    ROBOT_AT_DEPOT: "robot_at_depot",
+}
+
+
+class EventCalendar:
+    """
+    事件日历
+    堆中元素为 (time, kind, index)；index 为机器人/拣货员在环境列表中的下标（订单到达事件为 0）。
+    重新调度某个实体时不删除旧事件，而是在出堆时由调用方提供的 is_valid(time, kind, index)
+    判断该事件是否仍与实体当前的时间戳一致（惰性失效），因此入堆/出堆均为 O(log n)。
+    """
+
+    def __init__(self):
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def clear(self):
+        self._heap = []
+
+    def entries(self):
+        """当前堆中的全部事件（按堆的存储顺序），用于快照"""
+        return tuple(self._heap)
+
+    def load(self, entries):
+        """以 entries() 的结果恢复日历"""
+        self._heap = list(entries)
+
+    def push(self, time, kind, index=0):
+        """登记一个事件；time 为 inf 表示无事件，直接忽略"""
+        if time != float('inf'):
+            heapq.heappush(self._heap, (time, kind, index))
+
+    def schedule(self, now, time, kind, index):
+        """
+        登记机器人/拣货员的计时器事件。原实现每轮只扫描时间戳严格大于 current_time 的计时器，
+        因此在 step 中被设为恰好等于当前时刻的计时器（如零距离移动、零时长拣选）永远不会触发；
+        这里保持同样的语义：不晚于 now 的时间戳直接忽略
+        """
+        if now < time != float('inf'):
+            heapq.heappush(self._heap, (time, kind, index))
+
+    def next_time(self, is_valid):
+        """丢弃堆顶已失效的事件，返回最早有效事件的时间；日历为空时返回 None"""
+        heap = self._heap
+        while heap and not is_valid(*heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_at(self, time):
+        """
+        弹出时间等于 time 的全部事件
+        :return: [(kind, index), ...]，按 (kind, index) 升序且已去重
+        """
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] == time:
+            _, kind, index = heapq.heappop(heap)
+            if not due or due[-1] != (kind, index):
+                due.append((kind, index))
+        return due
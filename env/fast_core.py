@@ -0,0 +1,604 @@
+"""
+编译加速的仿真内核（WarehouseEnv(fast_core=True)）：事件推进与动作执行由 Numba 编译的函数在纯数组状态上完成，
+语义与 env_I.WarehouseEnv 的 Python 实现逐事件一致（订单到达、机器人到达排队、拣货员绑定与累计拣选时间、
+拣货完成、回 Depot 完成订单），对外仍通过 reset / step / idle_* 和机器人/拣货员视图访问。
+
+数组状态：
+    机器人/拣货员     EntityStore 的数组（位置节点、状态、拣货位、事件时刻），另加 robot_order（订单下标，-1 为无）
+    拣货位            queue (N_pp, N_robots) + queue_len 为排队机器人，pp_picker 为绑定的拣货员（-1 为无）
+    订单              列式算例：到达时间、订单偏移、每行的拣货位下标/拣选时间、是否未拣(line_unpicked)/是否待规划(line_unplanned)
+    事件日历          (time, kind, index) 三个数组构成的二叉堆，惰性失效规则与 EventCalendar 相同
+    标量              ints / floats 数组（下标见下方常量）
+
+未安装 numba 时这些函数按普通 Python 执行（结果相同，但比对象实现慢），仅用于校验。
+订单对象（orders_unassigned 等列表）在该模式下不维护，完成数与流经时间由累计量给出；不支持 snapshot/clone。
+"""
+import numpy as np
+
+from env.entity_store import EntityStore, RobotView, IDLE, BUSY
+from env.order_instance import OrderInstance
+from env.event_calendar import (ORDER_ARRIVAL, ROBOT_ARRIVE, PICKER_ARRIVE, ROBOT_PICK_DONE, PICKER_PICK_DONE,
+                                ROBOT_AT_DEPOT)
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+INF = np.inf
+
+# 状态张量通道（与 env_I 一致）
+CH_QUEUE = 0
+CH_PICKER = 1
+CH_UNPICKED = 2
+CH_UNASSIGNED = 3
+
+# ints 数组下标
+ARRIVE_PTR = 0  # 下一个未到达订单
+ASSIGN_PTR = 1  # 下一个未分配订单（未分配订单为 [ASSIGN_PTR, ARRIVE_PTR)）
+HEAP_SIZE = 2
+DONE = 3
+STUCK = 4  # 日历为空但仍有未完成订单
+N_IDLE_ROBOTS = 5  # 空闲且无订单的机器人数
+N_PLANNING = 6  # 空闲且有订单的机器人数
+N_IDLE_PICKERS = 7
+N_IDLE_PP = 8  # 有机器人排队且无拣货员的拣货位数
+N_COMPLETED = 9
+N_OPEN = 10
+N_INTS = 11
+# floats 数组下标
+CURRENT_TIME = 0
+FLOW_SUM = 1  # 已完成订单的流经时间之和
+ARRIVE_SUM = 2  # 已到达未完成订单的到达时间之和
+N_FLOATS = 3
+
+# 机器人类别（对应 env_I 的 _idle_robot_ids / _planning_robot_ids）
+CAT_BUSY = 0
+CAT_IDLE = 1
+CAT_PLANNING = 2
+
+
+# ==========================================
+# 事件堆
+# ==========================================
+
+@njit(cache=True)
+def _less(t1, k1, i1, t2, k2, i2):
+    if t1 != t2:
+        return t1 < t2
+    if k1 != k2:
+        return k1 < k2
+    return i1 < i2
+
+
+@njit(cache=True)
+def heap_push(ints, h_time, h_kind, h_index, t, k, i):
+    """登记事件；t 为 inf 时忽略"""
+    if t == INF:
+        return
+    n = ints[HEAP_SIZE]
+    ints[HEAP_SIZE] = n + 1
+    while n > 0:
+        parent = (n - 1) >> 1
+        if _less(t, k, i, h_time[parent], h_kind[parent], h_index[parent]):
+            h_time[n] = h_time[parent]
+            h_kind[n] = h_kind[parent]
+            h_index[n] = h_index[parent]
+            n = parent
+        else:
+            break
+    h_time[n] = t
+    h_kind[n] = k
+    h_index[n] = i
+
+
+@njit(cache=True)
+def _schedule(ints, h_time, h_kind, h_index, now, t, k, i):
+    """登记计时器事件：与 EventCalendar.schedule 一致，不晚于 now 的时间戳不会触发，直接忽略"""
+    if t > now:
+        heap_push(ints, h_time, h_kind, h_index, t, k, i)
+
+
+@njit(cache=True)
+def _heap_pop(ints, h_time, h_kind, h_index):
+    """删除堆顶"""
+    n = ints[HEAP_SIZE] - 1
+    ints[HEAP_SIZE] = n
+    if n == 0:
+        return
+    t, k, i = h_time[n], h_kind[n], h_index[n]
+    pos = 0
+    while True:
+        child = 2 * pos + 1
+        if child >= n:
+            break
+        if child + 1 < n and _less(h_time[child + 1], h_kind[child + 1], h_index[child + 1],
+                                   h_time[child], h_kind[child], h_index[child]):
+            child += 1
+        if _less(h_time[child], h_kind[child], h_index[child], t, k, i):
+            h_time[pos] = h_time[child]
+            h_kind[pos] = h_kind[child]
+            h_index[pos] = h_index[child]
+            pos = child
+        else:
+            break
+    h_time[pos] = t
+    h_kind[pos] = k
+    h_index[pos] = i
+
+
+# ==========================================
+# 状态维护
+# ==========================================
+
+@njit(cache=True)
+def _refresh_robot(ints, r, robot_state, robot_order, robot_cat):
+    old = robot_cat[r]
+    if robot_state[r] == IDLE:
+        new = CAT_IDLE if robot_order[r] < 0 else CAT_PLANNING
+    else:
+        new = CAT_BUSY
+    if old == new:
+        return
+    if old == CAT_IDLE:
+        ints[N_IDLE_ROBOTS] -= 1
+    elif old == CAT_PLANNING:
+        ints[N_PLANNING] -= 1
+    if new == CAT_IDLE:
+        ints[N_IDLE_ROBOTS] += 1
+    elif new == CAT_PLANNING:
+        ints[N_PLANNING] += 1
+    robot_cat[r] = new
+
+
+@njit(cache=True)
+def _refresh_picker(ints, p, picker_state, picker_idle):
+    idle = picker_state[p] == IDLE
+    if idle != picker_idle[p]:
+        ints[N_IDLE_PICKERS] += 1 if idle else -1
+        picker_idle[p] = idle
+
+
+@njit(cache=True)
+def _refresh_pick_point(ints, j, queue_len, pp_picker, pp_idle):
+    idle = queue_len[j] > 0 and pp_picker[j] < 0
+    if idle != pp_idle[j]:
+        ints[N_IDLE_PP] += 1 if idle else -1
+        pp_idle[j] = idle
+
+
+@njit(cache=True)
+def _count_order_items(state, cell, o, offsets, line_pp, line_unpicked, channel, delta):
+    for k in range(offsets[o], offsets[o + 1]):
+        if line_unpicked[k]:
+            state[channel, cell[line_pp[k]]] += delta
+
+
+@njit(cache=True)
+def _event_is_valid(t, kind, index, ints, arrive, robot_time, picker_time):
+    if kind == ORDER_ARRIVAL:
+        ptr = ints[ARRIVE_PTR]
+        return ptr < len(arrive) and arrive[ptr] == t
+    if kind == ROBOT_ARRIVE:
+        return robot_time[index, 0] == t
+    if kind == PICKER_ARRIVE:
+        return picker_time[index, 0] == t
+    if kind == ROBOT_PICK_DONE:
+        return robot_time[index, 1] == t
+    if kind == PICKER_PICK_DONE:
+        return picker_time[index, 1] == t
+    if kind == ROBOT_AT_DEPOT:
+        return robot_time[index, 2] == t
+    return False
+
+
+# ==========================================
+# 事件推进（对应 WarehouseEnv.time_to_next_decision_point）
+# ==========================================
+
+@njit(cache=True)
+def advance(ints, floats, state, cell, robot_depot, distance, pack_time,
+            robot_node, robot_state, robot_pp, robot_time, robot_speed, robot_order, robot_cat,
+            picker_node, picker_state, picker_pp, picker_time, picker_speed, picker_idle,
+            queue, queue_len, pp_picker, pp_idle,
+            arrive, offsets, line_pp, line_pick_time, line_unpicked, line_unplanned, order_done, complete_time,
+            h_time, h_kind, h_index, due_kind, due_index):
+    n_robots = len(robot_node)
+    n_orders = len(arrive)
+    while ints[DONE] == 0:
+        # 在所属 Depot 等待的空闲机器人按编号领取未分配订单
+        if ints[N_IDLE_ROBOTS] > 0 and ints[ASSIGN_PTR] < ints[ARRIVE_PTR]:
+            for r in range(n_robots):
+                if robot_cat[r] != CAT_IDLE or robot_node[r] != robot_depot[r]:
+                    continue
+                if ints[ASSIGN_PTR] >= ints[ARRIVE_PTR]:
+                    break
+                o = ints[ASSIGN_PTR]
+                ints[ASSIGN_PTR] = o + 1
+                _count_order_items(state, cell, o, offsets, line_pp, line_unpicked, CH_UNASSIGNED, -1)
+                robot_order[r] = o
+                for k in range(offsets[o], offsets[o + 1]):
+                    line_unplanned[k] = True
+                _refresh_robot(ints, r, robot_state, robot_order, robot_cat)
+
+        # 决策点
+        if ints[N_IDLE_PICKERS] > 0 and ints[N_IDLE_PP] > 0:
+            return
+        if ints[N_PLANNING] > 0:
+            return
+
+        # 取最早的有效事件
+        while ints[HEAP_SIZE] > 0 and not _event_is_valid(h_time[0], h_kind[0], h_index[0], ints, arrive,
+                                                           robot_time, picker_time):
+            _heap_pop(ints, h_time, h_kind, h_index)
+        if ints[HEAP_SIZE] == 0:
+            if ints[ARRIVE_PTR] < n_orders or ints[N_OPEN] > 0:
+                ints[STUCK] = 1
+            ints[DONE] = 1
+            return
+        now = h_time[0]
+        floats[CURRENT_TIME] = now
+
+        # 弹出该时刻的全部事件，按 (kind, index) 升序去重
+        n_due = 0
+        while ints[HEAP_SIZE] > 0 and h_time[0] == now:
+            kind, index = h_kind[0], h_index[0]
+            _heap_pop(ints, h_time, h_kind, h_index)
+            if n_due == 0 or due_kind[n_due - 1] != kind or due_index[n_due - 1] != index:
+                due_kind[n_due] = kind
+                due_index[n_due] = index
+                n_due += 1
+
+        for d in range(n_due):
+            kind, index = due_kind[d], due_index[d]
+            if not _event_is_valid(now, kind, index, ints, arrive, robot_time, picker_time):
+                continue
+
+            if kind == ORDER_ARRIVAL:
+                while ints[ARRIVE_PTR] < n_orders and now >= arrive[ints[ARRIVE_PTR]]:
+                    o = ints[ARRIVE_PTR]
+                    ints[ARRIVE_PTR] = o + 1
+                    _count_order_items(state, cell, o, offsets, line_pp, line_unpicked, CH_UNPICKED, 1)
+                    _count_order_items(state, cell, o, offsets, line_pp, line_unpicked, CH_UNASSIGNED, 1)
+                    ints[N_OPEN] += 1
+                    floats[ARRIVE_SUM] += arrive[o]
+                if ints[ARRIVE_PTR] < n_orders:
+                    heap_push(ints, h_time, h_kind, h_index, arrive[ints[ARRIVE_PTR]], ORDER_ARRIVAL, 0)
+
+            elif kind == ROBOT_ARRIVE:
+                r = index
+                j = robot_pp[r]
+                queue[j, queue_len[j]] = r
+                queue_len[j] += 1
+                state[CH_QUEUE, cell[j]] += 1
+                _refresh_pick_point(ints, j, queue_len, pp_picker, pp_idle)
+                robot_node[r] = j
+                robot_time[r, 0] = INF
+
+            elif kind == PICKER_ARRIVE:
+                picker_time[index, 0] = INF
+
+            elif kind == ROBOT_PICK_DONE:
+                r = index
+                robot_time[r, 1] = INF
+                j = robot_pp[r]
+                n = queue_len[j] if j >= 0 else 0
+                for q in range(n):
+                    if queue[j, q] == r:
+                        for s in range(q, n - 1):
+                            queue[j, s] = queue[j, s + 1]
+                        queue_len[j] = n - 1
+                        state[CH_QUEUE, cell[j]] -= 1
+                        _refresh_pick_point(ints, j, queue_len, pp_picker, pp_idle)
+                        break
+                # 结算当前拣货位上的商品
+                o = robot_order[r]
+                if o >= 0 and j >= 0:
+                    for k in range(offsets[o], offsets[o + 1]):
+                        if line_pp[k] == j:
+                            line_unplanned[k] = False
+                            if line_unpicked[k]:
+                                line_unpicked[k] = False
+                                state[CH_UNPICKED, cell[j]] -= 1
+                robot_state[r] = IDLE
+                _refresh_robot(ints, r, robot_state, robot_order, robot_cat)
+
+            elif kind == PICKER_PICK_DONE:
+                p = index
+                picker_time[p, 1] = INF
+                picker_state[p] = IDLE
+                _refresh_picker(ints, p, picker_state, picker_idle)
+                j = picker_pp[p]
+                if j >= 0:
+                    pp_picker[j] = -1
+                    state[CH_PICKER, cell[j]] = 0
+                    _refresh_pick_point(ints, j, queue_len, pp_picker, pp_idle)
+                    picker_pp[p] = -1
+
+            elif kind == ROBOT_AT_DEPOT:
+                r = index
+                robot_time[r, 2] = INF
+                robot_state[r] = IDLE
+                robot_node[r] = robot_depot[r]
+                o = robot_order[r]
+                if o >= 0:
+                    complete_time[o] = now
+                    if not order_done[o]:
+                        order_done[o] = True
+                        ints[N_COMPLETED] += 1
+                        ints[N_OPEN] -= 1
+                        floats[ARRIVE_SUM] -= arrive[o]
+                        floats[FLOW_SUM] += now - arrive[o]
+                        _count_order_items(state, cell, o, offsets, line_pp, line_unpicked, CH_UNPICKED, -1)
+                    robot_order[r] = -1
+                    robot_pp[r] = -1
+                _refresh_robot(ints, r, robot_state, robot_order, robot_cat)
+
+
+# ==========================================
+# 动作执行（对应 WarehouseEnv.step 的第 1、2 部分）
+# ==========================================
+
+@njit(cache=True)
+def apply_action(ints, floats, state, cell, robot_depot, distance, pack_time,
+                 robot_node, robot_state, robot_pp, robot_time, robot_speed, robot_order, robot_cat,
+                 picker_node, picker_state, picker_pp, picker_time, picker_speed, picker_idle,
+                 queue, queue_len, pp_picker, pp_idle,
+                 arrive, offsets, line_pp, line_pick_time, line_unpicked, line_unplanned, order_done, complete_time,
+                 h_time, h_kind, h_index, due_kind, due_index,
+                 picker, picker_target, robot, robot_target):
+    """
+    :param picker, picker_target: 拣货员下标与目标拣货位下标，picker < 0 表示无拣货员动作
+    :param robot, robot_target: 机器人下标与目标（拣货位下标；-1 为 Depot；-2 为无效目标），robot < 0 表示无机器人动作
+    """
+    now = floats[CURRENT_TIME]
+    if picker >= 0:
+        p, j = picker, picker_target
+        picker_state[p] = BUSY
+        picker_pp[p] = j
+        pp_picker[j] = p
+        state[CH_PICKER, cell[j]] = 1
+        _refresh_picker(ints, p, picker_state, picker_idle)
+        _refresh_pick_point(ints, j, queue_len, pp_picker, pp_idle)
+
+        start = now + distance[picker_node[p], j] / picker_speed[p]
+        picker_time[p, 0] = start
+        picker_node[p] = j
+        _schedule(ints, h_time, h_kind, h_index, now, start, PICKER_ARRIVE, p)
+
+        # 排队机器人依次拣选，完成时刻为累计拣选时间（只计该拣货位上尚未拣选的订单行）
+        cumulative = 0.0
+        for q in range(queue_len[j]):
+            r = queue[j, q]
+            o = robot_order[r]
+            job = 0.0
+            if o >= 0:
+                for k in range(offsets[o], offsets[o + 1]):
+                    if line_pp[k] == j and line_unpicked[k]:
+                        job += line_pick_time[k]
+            cumulative += job
+            robot_time[r, 1] = start + cumulative
+            _schedule(ints, h_time, h_kind, h_index, now, robot_time[r, 1], ROBOT_PICK_DONE, r)
+        picker_time[p, 1] = start + cumulative
+        _schedule(ints, h_time, h_kind, h_index, now, picker_time[p, 1], PICKER_PICK_DONE, p)
+
+    if robot >= 0 and robot_order[robot] >= 0:
+        r = robot
+        robot_state[r] = BUSY
+        _refresh_robot(ints, r, robot_state, robot_order, robot_cat)
+        if robot_target == -1:
+            robot_time[r, 2] = now + distance[robot_node[r], robot_depot[r]] / robot_speed[r] + pack_time
+            robot_pp[r] = -1
+            _schedule(ints, h_time, h_kind, h_index, now, robot_time[r, 2], ROBOT_AT_DEPOT, r)
+        elif robot_target >= 0:
+            robot_pp[r] = robot_target
+            robot_time[r, 0] = now + distance[robot_node[r], robot_target] / robot_speed[r]
+            _schedule(ints, h_time, h_kind, h_index, now, robot_time[r, 0], ROBOT_ARRIVE, r)
+
+
+# ==========================================
+# Python 侧：视图与内核调度
+# ==========================================
+
+class CoreRobotView(RobotView):
+    """机器人视图：order 为订单在算例中的下标（无订单为 None），item_pick_order 由订单行的待规划标记给出"""
+    __slots__ = ('_core',)
+
+    def __init__(self, store, robot_id, core):
+        # order / item_pick_order 由内核数组给出，不调用 RobotView.__init__ 写入槽位
+        self._store = store
+        self.robot_id = robot_id
+        self._core = core
+
+    @property
+    def order(self):
+        o = self._core.robot_order.item(self.robot_id)
+        return None if o < 0 else o
+
+    @property
+    def item_pick_order(self):
+        core = self._core
+        o = core.robot_order.item(self.robot_id)
+        if o < 0:
+            return []
+        lo, hi = core.offsets[o], core.offsets[o + 1]
+        items = core.items
+        return [items[i] for i in core.line_item[lo:hi][core.line_unplanned[lo:hi]].tolist()]
+
+    @property
+    def items(self):
+        core = self._core
+        o = core.robot_order.item(self.robot_id)
+        j = core.store.robot_pick_point.item(self.robot_id)
+        if o < 0 or j < 0:
+            return []
+        lo, hi = core.offsets[o], core.offsets[o + 1]
+        items = core.items
+        remaining = (core.line_pp[lo:hi] == j) & core.line_unpicked[lo:hi]
+        return [items[i] for i in core.line_item[lo:hi][remaining].tolist()]
+
+
+class FastCore:
+    """WarehouseEnv 的数组化仿真内核"""
+
+    HEAP_MARGIN = 8
+
+    def __init__(self, env):
+        self.env = env
+        n_robots, n_pickers = env.N_robots, env.N_pickers
+        pick_points = env.pick_points_list
+        n_pp = len(pick_points)
+        self.store = EntityStore(n_robots, n_pickers, pick_points, env.distance_table, env.robot_depot_nodes(),
+                                 env.parameters["robot"]["robot_speed"], env.parameters["picker"]["picker_speed"])
+        self.robots = [CoreRobotView(self.store, i, self) for i in range(n_robots)]
+        self.pickers = list(self.store.pickers)
+
+        self.robot_order = np.full(n_robots, -1, dtype=np.int64)
+        self.robot_cat = np.zeros(n_robots, dtype=np.int8)
+        self.picker_idle = np.zeros(n_pickers, dtype=np.bool_)
+        self.queue = np.zeros((n_pp, max(1, n_robots)), dtype=np.int64)
+        self.queue_len = np.zeros(n_pp, dtype=np.int64)
+        self.pp_picker = np.full(n_pp, -1, dtype=np.int64)
+        self.pp_idle = np.zeros(n_pp, dtype=np.bool_)
+        self.cell = np.array([env.pick_point_index[pp.point_id] for pp in pick_points], dtype=np.int64)
+        # 内核按稠密矩阵查距离，大布局的紧凑距离表在此展开
+        self.distance = np.ascontiguousarray(env.distance_table.matrix, dtype=np.float64)
+        self.pack_time = float(env.pack_time)
+        self.state = env._state_flat  # 直接写入环境的状态张量
+
+        self.ints = np.zeros(N_INTS, dtype=np.int64)
+        self.floats = np.zeros(N_FLOATS, dtype=np.float64)
+        self.h_time = None
+        self._alloc_heap(256)
+        self._load_orders(OrderInstance.from_lines([], [], []), [])
+
+    def _alloc_heap(self, capacity):
+        """分配（或扩容并保留现有事件）事件堆及 pop_at 的临时缓冲区"""
+        n = self.ints[HEAP_SIZE]
+        for name, dtype in (('h_time', np.float64), ('h_kind', np.int64), ('h_index', np.int64),
+                            ('due_kind', np.int64), ('due_index', np.int64)):
+            array = np.empty(capacity, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:n] = old[:n]
+            setattr(self, name, array)
+
+    def _ensure_heap(self):
+        """一次 step 最多登记 N_robots + 3 个事件，容量不足时扩容"""
+        if self.ints[HEAP_SIZE] + len(self.robots) + self.HEAP_MARGIN > len(self.h_time):
+            self._alloc_heap(2 * len(self.h_time) + len(self.robots))
+
+    def _load_orders(self, instance, items):
+        """订单算例 -> 行数组"""
+        env = self.env
+        self.items = items
+        self.arrive = np.ascontiguousarray(instance.arrive_time, dtype=np.float64)
+        self.offsets = np.ascontiguousarray(instance.order_offsets, dtype=np.int64)
+        self.line_item = np.ascontiguousarray(instance.item_index, dtype=np.int64)
+        item_pp = np.array([env.pick_points[item.pick_point_id].index for item in items], dtype=np.int64)
+        item_time = np.array([item.pick_time for item in items], dtype=np.float64)
+        self.line_pp = item_pp[self.line_item] if len(items) else np.zeros(0, dtype=np.int64)
+        self.line_pick_time = item_time[self.line_item] if len(items) else np.zeros(0, dtype=np.float64)
+        self.line_unpicked = np.ones(len(self.line_item), dtype=np.bool_)
+        self.line_unplanned = np.ones(len(self.line_item), dtype=np.bool_)
+        self.order_done = np.zeros(len(self.arrive), dtype=np.bool_)
+        self.complete_time = np.full(len(self.arrive), INF)
+
+    def _args(self):
+        store = self.store
+        return (self.ints, self.floats, self.state, self.cell, store.robot_depot, self.distance, self.pack_time,
+                store.robot_node, store.robot_state, store.robot_pick_point, store.robot_time, store.robot_speed,
+                self.robot_order, self.robot_cat,
+                store.picker_node, store.picker_state, store.picker_pick_point, store.picker_time,
+                store.picker_speed, self.picker_idle,
+                self.queue, self.queue_len, self.pp_picker, self.pp_idle,
+                self.arrive, self.offsets, self.line_pp, self.line_pick_time, self.line_unpicked,
+                self.line_unplanned, self.order_done, self.complete_time,
+                self.h_time, self.h_kind, self.h_index, self.due_kind, self.due_index)
+
+    def reset(self, orders):
+        """
+        :param orders: Order 列表（按到达时间稳定排序）或 OrderInstance
+        """
+        env = self.env
+        if isinstance(orders, OrderInstance):
+            instance = orders
+        elif isinstance(orders, (list, tuple)):
+            instance = OrderInstance.from_orders(orders)
+        else:
+            raise TypeError("fast_core accepts a list of orders or an OrderInstance, not a streaming source")
+        self._load_orders(instance, instance.items_for(env) if len(instance) else [])
+
+        n_pp = len(env.pick_points_list)
+        self.store.reset([(i * 5) % n_pp for i in range(len(self.pickers))])
+        self.robot_order.fill(-1)
+        self.robot_cat.fill(CAT_IDLE)
+        self.picker_idle.fill(True)
+        self.queue_len.fill(0)
+        self.pp_picker.fill(-1)
+        self.pp_idle.fill(False)
+        self.state.fill(0)
+        self.ints.fill(0)
+        self.floats.fill(0.0)
+        self.ints[N_IDLE_ROBOTS] = len(self.robots)
+        self.ints[N_IDLE_PICKERS] = len(self.pickers)
+        if len(self.arrive):
+            heap_push(self.ints, self.h_time, self.h_kind, self.h_index, self.arrive[0], ORDER_ARRIVAL, 0)
+        advance(*self._args())
+
+    def step(self, picker=-1, picker_target=-1, robot=-1, robot_target=-1):
+        """
+        执行动作并推进到下一个决策点
+        :param picker, picker_target: 拣货员下标与目标拣货位下标，-1 表示无拣货员动作
+        :param robot, robot_target: 机器人下标与目标（拣货位下标；-1 为 Depot；-2 为无效目标），robot 为 -1 表示无机器人动作
+        """
+        self._ensure_heap()
+        apply_action(*self._args(), picker, picker_target, robot, robot_target)
+        advance(*self._args())
+
+    # --- 状态查询 ---
+
+    @property
+    def current_time(self):
+        return self.floats.item(CURRENT_TIME)
+
+    @property
+    def done(self):
+        return bool(self.ints[DONE])
+
+    @property
+    def n_completed(self):
+        return int(self.ints[N_COMPLETED])
+
+    @property
+    def n_open(self):
+        return int(self.ints[N_OPEN])
+
+    @property
+    def stuck(self):
+        return bool(self.ints[STUCK])
+
+    def idle_robots(self):
+        return [self.robots[i] for i in np.flatnonzero(self.robot_cat == CAT_IDLE).tolist()]
+
+    def robots_needing_planning(self):
+        return [self.robots[i] for i in np.flatnonzero(self.robot_cat == CAT_PLANNING).tolist()]
+
+    def idle_pickers(self):
+        return [self.pickers[i] for i in np.flatnonzero(self.picker_idle).tolist()]
+
+    def idle_pick_points(self):
+        pick_points = self.env.pick_points_list
+        return [pick_points[i] for i in np.flatnonzero(self.pp_idle).tolist()]
+
+    def unassigned_count(self):
+        return int(self.ints[ARRIVE_PTR] - self.ints[ASSIGN_PTR])
+
+    def not_arrived_count(self):
+        return len(self.arrive) - int(self.ints[ARRIVE_PTR])
@@ -0,0 +1,327 @@
+"""
+仓库布局：由配置生成的矩形多区块布局、巷道图上的精确最短路径与紧凑的拣货位距离表。
+
+布局由 block_cols 列 × block_rows 行区块组成：每个区块有 aisle_num 条平行巷道、每条巷道 shelf_capacity 个拣货位，
+同一行区块的巷道首尾相接，区块行之间以及整个仓库的上下两端为横向通道，区块列之间留一条纵向主通道的间距。
+单区块（block_rows = block_cols = 1）时坐标与原 create_warehouse_graph / routing 的公式一致：
+    巷道的 x      = S_d + 区块列号 * (区块宽 + S_c) + (2a+1) * S_w + (2a+1)/2 * S_a    （a 为区块内巷道号）
+    拣货位的 y    = S_b + b * (N_l * S_l + S_c) + (2l+1)/2 * S_l                      （b 为区块行号，l 为区块内序号）
+    横向通道的 y  = 最下为 S_b/2，区块行 b 与 b+1 之间为 S_b + (b+1) * (N_l * S_l + S_c) - S_c/2，
+                    最上为最后一行区块的上沿 + S_b/2
+
+巷道图的节点为巷道与横向通道的交叉口以及 Depot（挂在最近的横向通道上），边为相邻节点之间的通道段，
+节点之间的最短路径由 Dijkstra 一次算出。每个位置只记录所在巷道段两端的出口节点及到出口的距离，
+两个位置之间的距离 = 同一巷道段时为纵向距离，否则为 min(到出口 + 出口间最短路 + 出口到目标)，
+因此距离表的内存为 O(拣货位数 + 节点数^2)，拣货位较少时再展开为稠密矩阵以加快标量查询。
+"""
+import heapq
+
+import numpy as np
+
+# 节点数不超过该值时距离表展开为稠密矩阵
+DENSE_LIMIT = 1024
+
+
+class WarehouseLayout:
+    def __init__(self, aisle_num, shelf_capacity, block_rows=1, block_cols=1, shelf_length=1.0, shelf_width=1.0,
+                 aisle_width=2.0, entrance_width=2.0, cross_aisle_width=None, depots=((18, 0),)):
+        """
+        :param aisle_num: 每个区块的巷道数
+        :param shelf_capacity: 每个区块中每条巷道的拣货位数
+        :param block_rows: 沿巷道方向的区块数（区块之间为中间横向通道）
+        :param block_cols: 并排的区块列数
+        :param cross_aisle_width: 中间横向通道与区块列间主通道的宽度，None 时与 aisle_width 相同
+        :param depots: Depot 坐标列表，机器人按编号轮流归属各 Depot
+        """
+        if aisle_num < 1 or shelf_capacity < 1 or block_rows < 1 or block_cols < 1:
+            raise ValueError("aisle_num, shelf_capacity, block_rows and block_cols must be positive")
+        if not depots:
+            raise ValueError("a layout needs at least one depot")
+        self.aisle_num = aisle_num
+        self.shelf_capacity = shelf_capacity
+        self.block_rows = block_rows
+        self.block_cols = block_cols
+        self.S_l = shelf_length
+        self.S_w = shelf_width
+        self.S_a = aisle_width
+        self.S_b = aisle_width
+        self.S_d = entrance_width
+        self.S_c = aisle_width if cross_aisle_width is None else cross_aisle_width
+        self.depots = [tuple(p) for p in depots]
+
+        # 状态张量的网格：行为全局巷道号，列为沿巷道方向的全局拣货位序号
+        self.n_aisles = block_cols * aisle_num  # H (N_w)
+        self.n_slots = block_rows * shelf_capacity  # W (N_l)
+
+        block_width = aisle_num * (2 * self.S_w + self.S_a)
+        block_length = shelf_capacity * self.S_l + self.S_c
+        self.aisle_x = [self.S_d + c * (block_width + self.S_c) + (2 * a + 1) * self.S_w + (2 * a + 1) / 2 * self.S_a
+                        for c in range(block_cols) for a in range(aisle_num)]
+        self.slot_y = [self.S_b + b * block_length + (2 * l + 1) / 2 * self.S_l
+                       for b in range(block_rows) for l in range(shelf_capacity)]
+        # 上下两端的横向通道宽 S_b，中间横向通道宽 S_c
+        self.cross_y = ([self.S_b / 2] + [self.S_b + c * block_length - self.S_c / 2 for c in range(1, block_rows)]
+                        + [self.S_b + (block_rows - 1) * block_length + shelf_capacity * self.S_l + self.S_b / 2])
+
+        self._junction_distances = None
+
+    @classmethod
+    def from_config(cls, wh_param, aisle_num=None, shelf_capacity=None):
+        """由配置的 warehouse 参数构造；aisle_num / shelf_capacity 不为 None 时覆盖配置值"""
+        depots = wh_param.get("depot_positions") or [wh_param["depot_position"]]
+        return cls(wh_param["aisle_num"] if aisle_num is None else aisle_num,
+                   wh_param["shelf_capacity"] if shelf_capacity is None else shelf_capacity,
+                   block_rows=wh_param.get("block_rows", 1), block_cols=wh_param.get("block_cols", 1),
+                   shelf_length=wh_param["shelf_length"], shelf_width=wh_param["shelf_width"],
+                   aisle_width=wh_param["aisle_width"], entrance_width=wh_param["entrance_width"],
+                   cross_aisle_width=wh_param.get("cross_aisle_width"), depots=depots)
+
+    # --- 拣货位与网格 ---
+
+    def __len__(self):
+        return self.n_aisles * self.n_slots
+
+    def pick_points(self):
+        """按 (巷道, 序号) 逐行遍历全部拣货位：[(巷道号, 序号, (x, y))]，下标即网格展平下标"""
+        return [(k, s, (x, y)) for k, x in enumerate(self.aisle_x) for s, y in enumerate(self.slot_y)]
+
+    def block_of(self, aisle, slot):
+        """拣货位所在的区块 (区块行, 区块列)"""
+        return slot // self.shelf_capacity, aisle // self.aisle_num
+
+    def block_slices(self, block_row, block_col):
+        """区块在 (N_w, N_l) 状态网格中的 (行切片, 列切片)"""
+        return (slice(block_col * self.aisle_num, (block_col + 1) * self.aisle_num),
+                slice(block_row * self.shelf_capacity, (block_row + 1) * self.shelf_capacity))
+
+    # --- 巷道图 ---
+
+    def _depot_links(self, position):
+        """Depot（或任意不在巷道内的位置）挂到最近的横向通道：[(交叉口编号, 距离)]"""
+        x, y = position
+        c = min(range(len(self.cross_y)), key=lambda i: abs(y - self.cross_y[i]))
+        dy = abs(y - self.cross_y[c])
+        aisle_x = self.aisle_x
+        k = int(np.searchsorted(aisle_x, x))  # aisle_x[k-1] < x <= aisle_x[k]
+        neighbours = {min(max(k - 1, 0), len(aisle_x) - 1), min(k, len(aisle_x) - 1)}
+        return [(self.junction(a, c), dy + abs(x - aisle_x[a])) for a in sorted(neighbours)]
+
+    def junction(self, aisle, cross):
+        """巷道 aisle 与横向通道 cross 的交叉口编号"""
+        return aisle * len(self.cross_y) + cross
+
+    @property
+    def n_junctions(self):
+        return self.n_aisles * len(self.cross_y)
+
+    def graph(self):
+        """巷道图的邻接表：节点 0..n_junctions-1 为交叉口，其后依次为各 Depot"""
+        n_cross = len(self.cross_y)
+        adjacency = [[] for _ in range(self.n_junctions + len(self.depots))]
+
+        def link(u, v, w):
+            adjacency[u].append((v, w))
+            adjacency[v].append((u, w))
+
+        for k in range(self.n_aisles):
+            for c in range(n_cross):
+                u = self.junction(k, c)
+                if c + 1 < n_cross:  # 沿巷道
+                    link(u, u + 1, self.cross_y[c + 1] - self.cross_y[c])
+                if k + 1 < self.n_aisles:  # 沿横向通道
+                    link(u, self.junction(k + 1, c), self.aisle_x[k + 1] - self.aisle_x[k])
+        for d, position in enumerate(self.depots):
+            for u, w in self._depot_links(position):
+                link(self.n_junctions + d, u, w)
+        return adjacency
+
+    def junction_distances(self):
+        """巷道图全部节点两两之间的最短路径长度（每个节点一次 Dijkstra，结果缓存）"""
+        if self._junction_distances is None:
+            adjacency = self.graph()
+            n = len(adjacency)
+            matrix = np.empty((n, n), dtype=np.float64)
+            for source in range(n):
+                matrix[source] = dijkstra(adjacency, source)
+            self._junction_distances = matrix
+        return self._junction_distances
+
+    def locate(self, position):
+        """
+        位置 -> (出口节点 (a, b), 到出口的距离 (da, db), 巷道段编号)
+        巷道内的位置以所在巷道段两端的交叉口为出口；其他位置（Depot 等）挂到最近的横向通道，巷道段编号为 -1
+        """
+        x, y = position
+        aisle_x = self.aisle_x
+        k = int(np.searchsorted(aisle_x, x))
+        if k < len(aisle_x) and aisle_x[k] == x:
+            b = int(np.searchsorted(self.cross_y, y)) - 1
+            if 0 <= b < len(self.cross_y) - 1 and self.cross_y[b] < y < self.cross_y[b + 1]:
+                return ((self.junction(k, b), self.junction(k, b + 1)),
+                        (y - self.cross_y[b], self.cross_y[b + 1] - y), k * (len(self.cross_y) - 1) + b)
+        links = self._depot_links(position)
+        (a, da), (b, db) = links[0], links[-1]
+        return (a, b), (da, db), -1
+
+    def distance_table(self, dense_limit=DENSE_LIMIT):
+        """全部拣货位（按 pick_points 顺序）+ 各 Depot 的距离表"""
+        return GraphDistanceTable(self, dense_limit)
+
+
+def dijkstra(adjacency, source):
+    """单源最短路径长度（邻接表 [[(v, w), ...], ...]）"""
+    dist = np.full(len(adjacency), np.inf)
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for v, w in adjacency[u]:
+            nd = d + w
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+class GraphDistanceTable:
+    """
+    基于巷道图的距离表，接口与 routing.DistanceTable 相同
+    节点 0..N_pp-1 为拣货位，N_pp.. 为各 Depot；每个节点存两个出口节点及到出口的距离，
+    节点数不超过 dense_limit 时另外展开 matrix 供标量查询和批量索引，否则 matrix 在首次访问时才展开
+    """
+
+    def __init__(self, layout, dense_limit=DENSE_LIMIT):
+        self.layout = layout
+        self.positions = [position for _, _, position in layout.pick_points()] + list(layout.depots)
+        self.index = {}  # (x, y) -> 节点编号（坐标重复时取第一个）
+        for i, position in enumerate(self.positions):
+            self.index.setdefault(position, i)
+        self.xy = np.asarray(self.positions, dtype=np.float64).reshape(-1, 2)
+        # 与 routing.DistanceTable 兼容：最下、最上两条横向通道的 y
+        self.bottom_y = layout.cross_y[0]
+        self.top_y = layout.cross_y[-1]
+
+        self.junctions = layout.junction_distances()
+        n_pp = len(layout)
+        n_cross = len(layout.cross_y)
+        aisle, slot = np.divmod(np.arange(n_pp), layout.n_slots)
+        block = slot // layout.shelf_capacity
+        below = np.asarray(layout.cross_y)[block]
+        above = np.asarray(layout.cross_y)[block + 1]
+        y = self.xy[:n_pp, 1]
+        depot_nodes = layout.n_junctions + np.arange(len(layout.depots))
+        self.exit_node = np.concatenate([
+            np.stack([aisle * n_cross + block, aisle * n_cross + block + 1], axis=1),
+            np.repeat(depot_nodes[:, None], 2, axis=1)]).astype(np.intp)
+        self.exit_cost = np.concatenate([np.stack([y - below, above - y], axis=1),
+                                         np.zeros((len(layout.depots), 2))])
+        self.segment = np.concatenate([aisle * (n_cross - 1) + block,
+                                       np.full(len(layout.depots), -1)]).astype(np.intp)
+
+        self.dense = len(self.positions) <= dense_limit
+        self._matrix = None
+        self._rows = None
+        if self.dense:
+            self._rows = self.matrix.tolist()  # 标量查询用的嵌套列表
+        else:
+            # 紧凑表标量查询用的 Python 列表，避免逐次构造 numpy 小数组
+            self._exits = [tuple(zip(n, c)) for n, c in zip(self.exit_node.tolist(), self.exit_cost.tolist())]
+            self._segments = self.segment.tolist()
+            self._ys = self.xy[:, 1].tolist()
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def matrix(self):
+        """稠密距离矩阵 (N, N)，大布局下占用 8 * N^2 字节，首次访问时展开"""
+        if self._matrix is None:
+            n = len(self.positions)
+            matrix = np.empty((n, n), dtype=np.float64)
+            nodes = np.arange(n)
+            step = max(1, (1 << 22) // max(n, 1))  # 分块展开，限制临时数组的大小
+            for lo in range(0, n, step):
+                matrix[lo:lo + step] = self.pair_distances(nodes[lo:lo + step, None], nodes[None, :])
+            self._matrix = matrix
+        return self._matrix
+
+    def nbytes(self):
+        """距离表常驻内存（字节），不含按需展开的稠密矩阵"""
+        return self.junctions.nbytes + self.exit_node.nbytes + self.exit_cost.nbytes + self.segment.nbytes
+
+    def pair_distances(self, src, dst):
+        """节点编号数组之间的距离（src、dst 可广播）"""
+        src = np.asarray(src, dtype=np.intp)
+        dst = np.asarray(dst, dtype=np.intp)
+        if self._matrix is not None:
+            return self._matrix[src, dst]
+        return self._combine(self.exit_node[src], self.exit_cost[src], self.segment[src], self.xy[src, 1],
+                             self.exit_node[dst], self.exit_cost[dst], self.segment[dst], self.xy[dst, 1])
+
+    def _combine(self, s_node, s_cost, s_seg, s_y, t_node, t_cost, t_seg, t_y):
+        junctions = self.junctions
+        best = None
+        for a in (0, 1):
+            for b in (0, 1):
+                d = s_cost[..., a] + junctions[s_node[..., a], t_node[..., b]] + t_cost[..., b]
+                best = d if best is None else np.minimum(best, d)
+        same = (s_seg == t_seg) & (s_seg >= 0)
+        return np.where(same, np.abs(s_y - t_y), best)
+
+    def _endpoint(self, position):
+        """位置 -> (出口节点, 出口距离, 巷道段, y)"""
+        i = self.index.get(position)
+        if i is not None:
+            return self.exit_node[i], self.exit_cost[i], self.segment[i], self.xy[i, 1]
+        nodes, costs, segment = self.layout.locate(position)
+        return np.array(nodes, dtype=np.intp), np.array(costs, dtype=np.float64), segment, position[1]
+
+    def distance(self, position1, position2):
+        """两个位置之间的距离；不在表中的位置（如拣货员的任意初始坐标）按所在巷道段或最近横向通道计算"""
+        index = self.index
+        i = index.get(position1)
+        j = index.get(position2)
+        if i is not None and j is not None:
+            if self._rows is not None:
+                return self._rows[i][j]
+            return self._node_distance(i, j)
+        return float(self._combine(*self._endpoint(position1), *self._endpoint(position2)))
+
+    def node_distance(self, i, j):
+        """两个节点编号之间的距离（标量）"""
+        if self._rows is not None:
+            return self._rows[i][j]
+        return self._node_distance(i, j)
+
+    def _node_distance(self, i, j):
+        """紧凑表上两个节点之间的距离（标量），与 _combine 的运算顺序一致"""
+        segment = self._segments[i]
+        if segment >= 0 and segment == self._segments[j]:
+            return abs(self._ys[i] - self._ys[j])
+        (a0, c0), (a1, c1) = self._exits[i]
+        (b0, d0), (b1, d1) = self._exits[j]
+        junction = self.junctions.item
+        return min(c0 + junction(a0, b0) + d0, c0 + junction(a0, b1) + d1,
+                   c1 + junction(a1, b0) + d0, c1 + junction(a1, b1) + d1)
+
+    def distances_from(self, position, targets):
+        """
+        从一个位置到一批目标节点的距离（向量化）
+        :param position: 出发位置 (x, y)
+        :param targets: 目标节点编号数组/列表
+        :return: np.ndarray，与 targets 一一对应
+        """
+        targets = np.asarray(targets, dtype=np.intp)
+        i = self.index.get(position)
+        if i is not None:
+            if self._matrix is not None:
+                return self._matrix[i, targets]
+            return self.pair_distances(i, targets)
+        return self._combine(*self._endpoint(position), self.exit_node[targets], self.exit_cost[targets],
+                             self.segment[targets], self.xy[targets, 1])
+
+    def nodes_of(self, positions):
+        """坐标列表 -> 节点编号数组"""
+        return np.fromiter((self.index[p] for p in positions), dtype=np.intp, count=len(positions))
@@ -0,0 +1,301 @@
+"""
+列式订单算例：以若干 .npy 数组存放订单（到达时间、订单偏移、扁平的商品/拣货位下标），
+可 np.load(mmap_mode='r') 直接映射，reset 时按需构造轻量 Order 对象，不再反序列化整个 Order/Item 对象图。
+
+目录结构：
+    <name>/meta.json            格式版本、订单数、商品编号表 item_ids 与拣货位编号表 pick_point_ids
+    <name>/order_id.npy         int64  (n_orders,)
+    <name>/arrive_time.npy      float64 (n_orders,)，按到达时间升序
+    <name>/order_offsets.npy    int64  (n_orders + 1,)，第 k 个订单的商品为 [offsets[k], offsets[k+1])
+    <name>/item_index.npy       int32  (n_lines,)，商品在 item_ids 中的下标
+    <name>/pick_point_index.npy int32  (n_lines,)，商品所属拣货位在 pick_point_ids 中的下标
+"""
+import csv
+import json
+import os
+import pickle
+
+import numpy as np
+
+FORMAT_VERSION = 1
+ARRAYS = ('order_id', 'arrive_time', 'order_offsets', 'item_index', 'pick_point_index')
+
+
+class OrderInstance:
+    def __init__(self, order_id, arrive_time, order_offsets, item_index, item_ids, pick_point_index=None,
+                 pick_point_ids=None):
+        """
+        :param item_ids: 商品编号表（字符串列表），item_index 中的值是它的下标
+        :param pick_point_ids: 拣货位编号表，pick_point_index 中的值是它的下标
+        """
+        self.order_id = order_id
+        self.arrive_time = arrive_time
+        self.order_offsets = order_offsets
+        self.item_index = item_index
+        self.item_ids = list(item_ids)
+        self.pick_point_index = pick_point_index
+        self.pick_point_ids = list(pick_point_ids) if pick_point_ids is not None else None
+        self._lookup = None  # (env.items, 按 item_index 排列的商品对象列表)
+
+    def __len__(self):
+        return len(self.order_id)
+
+    @property
+    def n_lines(self):
+        return len(self.item_index)
+
+    # --- 构造 ---
+
+    @classmethod
+    def from_lines(cls, order_ids, arrive_times, line_item_ids, line_pick_point_ids=None):
+        """
+        由订单行构造（每个订单的行须连续）
+        :param order_ids: 每个订单的编号
+        :param arrive_times: 每个订单的到达时间
+        :param line_item_ids: 每个订单的商品编号列表 [[item_id, ...], ...]
+        :param line_pick_point_ids: 每个订单中各商品的拣货位编号，None 时由商品编号推出（去掉 '-left-item'/'-right-item'）
+        """
+        arrive_times = np.asarray(arrive_times, dtype=np.float64)
+        order = np.argsort(arrive_times, kind='stable')  # 按到达时间排序，与 env.reset 的排序一致
+        item_table, pp_table = {}, {}
+        offsets = [0]
+        item_index, pick_point_index = [], []
+        for k in order:
+            items = line_item_ids[k]
+            pps = line_pick_point_ids[k] if line_pick_point_ids is not None else [_pick_point_of(i) for i in items]
+            for item_id, pp_id in zip(items, pps):
+                item_index.append(item_table.setdefault(item_id, len(item_table)))
+                pick_point_index.append(pp_table.setdefault(pp_id, len(pp_table)))
+            offsets.append(len(item_index))
+        return cls(
+            order_id=np.asarray(order_ids, dtype=np.int64)[order],
+            arrive_time=arrive_times[order],
+            order_offsets=np.asarray(offsets, dtype=np.int64),
+            item_index=np.asarray(item_index, dtype=np.int32),
+            item_ids=list(item_table),
+            pick_point_index=np.asarray(pick_point_index, dtype=np.int32),
+            pick_point_ids=list(pp_table),
+        )
+
+    @classmethod
+    def from_orders(cls, orders):
+        """由 Order 对象列表（env_I / env.class_object / environment.class_object 均可）构造"""
+        return cls.from_lines(
+            [o.order_id for o in orders],
+            [o.arrive_time for o in orders],
+            [[item.item_id for item in o.items] for o in orders],
+            [[item.pick_point_id for item in o.items] for o in orders],
+        )
+
+    @classmethod
+    def from_pickle(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_orders(pickle.load(f))
+
+    @classmethod
+    def from_csv(cls, path):
+        """由 generat_order_data.py 写出的 CSV（order_id, arrival_time, item_id, pick_point_id）构造"""
+        order_ids, arrive_times, items, pick_points = [], [], [], []
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                order_id = int(row['order_id'])
+                if not order_ids or order_ids[-1] != order_id:
+                    order_ids.append(order_id)
+                    arrive_times.append(float(row['arrival_time']))
+                    items.append([])
+                    pick_points.append([])
+                items[-1].append(row['item_id'])
+                pick_points[-1].append(row['pick_point_id'])
+        return cls.from_lines(order_ids, arrive_times, items, pick_points)
+
+    # --- 读写 ---
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAYS:
+            array = getattr(self, name)
+            if array is not None:
+                np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+        meta = {
+            'format': FORMAT_VERSION,
+            'n_orders': len(self),
+            'n_lines': self.n_lines,
+            'item_ids': self.item_ids,
+            'pick_point_ids': self.pick_point_ids,
+        }
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """读取列式算例目录；mmap=True 时数组以只读内存映射方式打开"""
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format') != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported order instance format {meta.get('format')}")
+        arrays = {}
+        for name in ARRAYS:
+            file = os.path.join(path, f"{name}.npy")
+            arrays[name] = np.load(file, mmap_mode='r' if mmap else None) if os.path.exists(file) else None
+        return cls(item_ids=meta['item_ids'], pick_point_ids=meta.get('pick_point_ids'), **arrays)
+
+    @classmethod
+    def open(cls, path, mmap=True):
+        """
+        按路径打开算例：列式目录直接加载；.pkl/.csv 若旁边已有同名列式目录则加载该目录，否则现场转换
+        """
+        if os.path.isdir(path):
+            return cls.load(path, mmap)
+        root, ext = os.path.splitext(path)
+        if os.path.isdir(root) and os.path.exists(os.path.join(root, 'meta.json')):
+            return cls.load(root, mmap)
+        if ext == '.pkl':
+            return cls.from_pickle(path)
+        if ext == '.csv':
+            return cls.from_csv(path)
+        raise ValueError(f"unrecognised order instance: {path}")
+
+    # --- 构造订单对象 ---
+
+    def items_for(self, env):
+        """按 item_index 排列的 env 商品对象列表（每个 env 只解析一次）"""
+        if self._lookup is None or self._lookup[0] is not env.items:
+            missing = [i for i in self.item_ids if i not in env.items]
+            if missing:
+                raise KeyError(f"{len(missing)} item ids are not in the warehouse layout, e.g. {missing[0]!r}")
+            self._lookup = (env.items, [env.items[i] for i in self.item_ids])
+        return self._lookup[1]
+
+    def build_orders(self, env, start=0, stop=None):
+        """
+        构造第 [start, stop) 个订单的 Order 对象（引用 env 中的商品对象，每次调用都是新订单，可直接用于 reset）
+        """
+        from env.env_I import Order  # env_I 引用本模块，延迟导入避免循环
+
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return []
+        items = self.items_for(env)
+        offsets = self.order_offsets[start:stop + 1].tolist()
+        base = offsets[0]
+        item_index = self.item_index[base:offsets[-1]].tolist()
+        order_ids = self.order_id[start:stop].tolist()
+        arrive_times = self.arrive_time[start:stop].tolist()
+        orders = []
+        for k in range(stop - start):
+            lo, hi = offsets[k] - base, offsets[k + 1] - base
+            orders.append(Order(order_ids[k], [items[j] for j in item_index[lo:hi]], arrive_times[k]))
+        return orders
+
+
+class OrderInstanceWriter:
+    """
+    分块写出列式算例（订单数很大、无法一次在内存中构造全部数组时使用）
+    用法：
+        with OrderInstanceWriter(path, item_ids, pick_point_ids) as writer:
+            writer.append(order_id, arrive_time, n_items, item_index, pick_point_index)
+    各块的到达时间须整体非降序。
+    """
+
+    def __init__(self, path, item_ids, pick_point_ids=None):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.item_ids = list(item_ids)
+        self.pick_point_ids = list(pick_point_ids) if pick_point_ids is not None else None
+        self.n_orders = 0
+        self.n_lines = 0
+        self._last_time = -np.inf
+        self._files = {
+            'order_id': _NpyAppender(os.path.join(path, 'order_id.npy'), np.int64),
+            'arrive_time': _NpyAppender(os.path.join(path, 'arrive_time.npy'), np.float64),
+            'order_offsets': _NpyAppender(os.path.join(path, 'order_offsets.npy'), np.int64),
+            'item_index': _NpyAppender(os.path.join(path, 'item_index.npy'), np.int32),
+        }
+        if self.pick_point_ids is not None:
+            self._files['pick_point_index'] = _NpyAppender(os.path.join(path, 'pick_point_index.npy'), np.int32)
+        self._files['order_offsets'].append(np.zeros(1, dtype=np.int64))
+
+    def append(self, order_id, arrive_time, n_items, item_index, pick_point_index=None):
+        """
+        :param n_items: 每个订单的商品数 (n,)
+        :param item_index: 本块全部订单的商品下标（扁平，长度 sum(n_items)）
+        """
+        arrive_time = np.asarray(arrive_time, dtype=np.float64)
+        if len(arrive_time) == 0:
+            return
+        if arrive_time[0] < self._last_time or np.any(np.diff(arrive_time) < 0):
+            raise ValueError("orders must be appended in non-decreasing arrive_time order")
+        self._last_time = arrive_time[-1]
+        self._files['order_id'].append(order_id)
+        self._files['arrive_time'].append(arrive_time)
+        self._files['order_offsets'].append(self.n_lines + np.cumsum(n_items, dtype=np.int64))
+        self._files['item_index'].append(item_index)
+        if 'pick_point_index' in self._files:
+            self._files['pick_point_index'].append(pick_point_index)
+        self.n_orders += len(arrive_time)
+        self.n_lines += len(item_index)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        meta = {
+            'format': FORMAT_VERSION,
+            'n_orders': self.n_orders,
+            'n_lines': self.n_lines,
+            'item_ids': self.item_ids,
+            'pick_point_ids': self.pick_point_ids,
+        }
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _NpyAppender:
+    """
+    追加写入的一维 .npy 文件：先写定长的头部占位，关闭时按实际长度改写头部
+    （npy 1.0 头部允许用空格补齐，默认 128 字节，结构化 dtype 的描述较长时需更大的 64 的倍数）
+    """
+    HEADER_SIZE = 128
+
+    def __init__(self, path, dtype, header_size=HEADER_SIZE):
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self.header_size = header_size
+        self._file = open(path, 'wb')
+        self._file.write(self._header())
+
+    def _header(self):
+        header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+            np.lib.format.dtype_to_descr(self.dtype), self.length)
+        body_size = self.header_size - 10
+        if len(header) >= body_size:
+            raise ValueError(f"npy header needs more than {self.header_size} bytes")
+        header = header.ljust(body_size - 1) + '\n'
+        return b'\x93NUMPY\x01\x00' + body_size.to_bytes(2, 'little') + header.encode('latin1')
+
+    def append(self, values):
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        values.tofile(self._file)
+        self.length += len(values)
+
+    def flush(self):
+        """按当前长度改写头部并刷新到磁盘，文件在写入过程中也可读取"""
+        self._file.seek(0)
+        self._file.write(self._header())
+        self._file.seek(0, 2)
+        self._file.flush()
+
+    def close(self):
+        self._file.seek(0)
+        self._file.write(self._header())
+        self._file.close()
+
+
+def _pick_point_of(item_id):
+    # '{nw}-{nl}-{side}-item' -> '{nw}-{nl}'
+    return item_id.rsplit('-', 2)[0]
@@ -0,0 +1,133 @@
+"""
+流式订单源：按到达时间升序逐个取出订单，环境只在事件日历中保留下一个到达事件，
+订单无需一次性全部构造，内存与仿真时长无关。
+"""
+import csv
+
+from env.order_instance import OrderInstance
+
+INF = float('inf')
+
+
+class OrderStream:
+    """
+    订单源：包装一个按 arrive_time 非降序的订单迭代器，预取一个订单供 peek
+    到达时间倒序时抛出 ValueError（流式输入无法在 reset 时整体排序）
+    """
+
+    def __init__(self, orders, n_orders=None):
+        """
+        :param orders: 订单可迭代对象（须按到达时间升序）
+        :param n_orders: 订单总数（已知时提供，n_remaining 据此计数；未知为 None）
+        """
+        self._iterator = iter(orders)
+        self.n_remaining = n_orders
+        self.n_emitted = 0
+        # 可重放的订单来源（有序的订单列表或 OrderInstance）；下一个订单在其中的下标为 source_start + n_emitted
+        self.source = None
+        self.source_start = 0
+        self._frozen = None  # (起始下标, OrderInstance)：列表来源中尚未到达订单的列式副本，供快照共享
+        self._last_time = -INF
+        self._next = None
+        self._advance()
+
+    @classmethod
+    def from_list(cls, orders):
+        """订单列表：先按到达时间排序（与原 reset 的 sorted 一致，稳定排序）"""
+        orders = sorted(orders, key=lambda x: x.arrive_time)
+        stream = cls(orders, len(orders))
+        stream.source = orders
+        return stream
+
+    @classmethod
+    def from_instance(cls, instance, env, start=0, n_emitted=0, chunk_size=4096):
+        """
+        列式算例：从第 start 个订单起按块构造订单
+        :param n_emitted: 已取出的订单数（由快照恢复时沿用原计数）
+        """
+        stream = cls(iter_instance_orders(instance, env, chunk_size, start), len(instance) - start)
+        stream.source = instance
+        stream.source_start = start - n_emitted
+        stream.n_emitted = n_emitted
+        return stream
+
+    def remaining_instance(self):
+        """
+        尚未到达（含已预取）的订单，表示为 (OrderInstance, 起始下标)，订单源耗尽时为 (None, 0)
+        列表来源在首次调用时把剩余订单转成列式副本（此时它们尚未到达、未被仿真修改），之后的调用共享该副本
+        """
+        if self._next is None:
+            return None, 0
+        position = self.source_start + self.n_emitted
+        if isinstance(self.source, OrderInstance):
+            return self.source, position
+        if self.source is None:
+            raise TypeError("cannot snapshot an order stream backed by a plain iterator; "
+                            "reset the environment with a list of orders or an OrderInstance")
+        if self._frozen is None or position < self._frozen[0]:
+            self._frozen = (position, OrderInstance.from_orders(self.source[position:]))
+        base, instance = self._frozen
+        return instance, position - base
+
+    def _advance(self):
+        order = next(self._iterator, None)
+        if order is not None:
+            if order.arrive_time < self._last_time:
+                raise ValueError(f"order {order.order_id} arrives at {order.arrive_time}, before the previous "
+                                 f"order ({self._last_time}); streamed orders must be sorted by arrive_time")
+            self._last_time = order.arrive_time
+        self._next = order
+
+    def __bool__(self):
+        return self._next is not None
+
+    def peek(self):
+        """下一个到达的订单（不取出）；没有则为 None"""
+        return self._next
+
+    def pop(self):
+        order = self._next
+        if order is None:
+            raise IndexError("pop from an exhausted order stream")
+        self._advance()
+        self.n_emitted += 1
+        if self.n_remaining is not None:
+            self.n_remaining -= 1
+        return order
+
+
+def iter_instance_orders(instance, env, chunk_size=4096, start=0):
+    """
+    按块从列式算例（OrderInstance）的第 start 个订单起构造订单，每次只持有一个块；
+    块大小从 16 起倍增到 chunk_size，只推进少量决策点（如快照恢复后的前瞻）时不必构造整块订单
+    """
+    size = min(16, chunk_size)
+    block = start
+    while block < len(instance):
+        yield from instance.build_orders(env, block, block + size)
+        block += size
+        size = min(2 * size, chunk_size)
+
+
+def iter_csv_orders(path, env):
+    """
+    逐行读取 generat_order_data.py 格式的 CSV（order_id, arrival_time, item_id, pick_point_id），
+    同一订单的行连续、订单按到达时间升序；商品引用 env 中的商品对象
+    """
+    from env.env_I import Order  # env_I 引用本模块，延迟导入避免循环
+
+    items = env.items
+    order_id = arrival_time = None
+    order_items = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            row_order_id = int(row['order_id'])
+            if row_order_id != order_id:
+                if order_items:
+                    yield Order(order_id, order_items, arrival_time)
+                order_id = row_order_id
+                arrival_time = float(row['arrival_time'])
+                order_items = []
+            order_items.append(items[row['item_id']])
+    if order_items:
+        yield Order(order_id, order_items, arrival_time)
@@ -0,0 +1,166 @@
+"""
+分阶段计时：环境推进、状态提取、合法动作构造、网络前向、采样与 PPO 更新各自花了多少墙钟时间。
+
+Profiler.phase(name) 返回按名称缓存的上下文管理器计时器（perf_counter_ns），记录每次进入的耗时；
+end_episode() 汇总本 episode 各阶段的次数、总耗时、均值与分位数（p50/p95/p99/max）并清空样本，
+可选地把每次计时保留为 Chrome trace 事件（chrome://tracing 或 Perfetto 打开）。
+
+接入方式：WarehouseEnv / PPOAgent 的 profiler 属性默认为 None；设置后由 instrument() 把热点方法替换为计时版本，
+置回 None 即恢复原方法（关闭时零开销）。方法内部的子阶段用 `profiler = self.profiler or NULL_PROFILER`，
+关闭时为空上下文。
+同名阶段嵌套时按各次进入分别计时；不同阶段的耗时是包含子阶段的（如 env.step 含 env.advance）。
+"""
+import functools
+import json
+import os
+from contextlib import nullcontext
+from time import perf_counter_ns
+
+import numpy as np
+
+_NULL_PHASE = nullcontext()
+
+
+class _Phase:
+    __slots__ = ('name', 'samples', 'starts', '_stack')
+
+    def __init__(self, name, keep_starts):
+        self.name = name
+        self.samples = []  # 每次的耗时（ns）
+        self.starts = [] if keep_starts else None  # 每次的开始时刻（ns），仅 Chrome trace 需要
+        self._stack = []
+
+    def __enter__(self):
+        self._stack.append(perf_counter_ns())
+        return self
+
+    def __exit__(self, *exc):
+        end = perf_counter_ns()
+        start = self._stack.pop()
+        self.samples.append(end - start)
+        if self.starts is not None:
+            self.starts.append(start)
+        return False
+
+
+class Profiler:
+    def __init__(self, trace_path=None):
+        """
+        :param trace_path: Chrome trace JSON 的输出路径，None 时不保留逐次事件（只做汇总）
+        """
+        self.trace_path = trace_path
+        self.phases = {}
+        self.episode = 0
+        self._episode_start = perf_counter_ns()
+        self._origin = self._episode_start
+        self._events = []  # 已结束 episode 的 (name, start_ns, dur_ns, episode)
+
+    def phase(self, name):
+        timer = self.phases.get(name)
+        if timer is None:
+            timer = self.phases[name] = _Phase(name, self.trace_path is not None)
+        return timer
+
+    def stats(self):
+        """本 episode 到目前为止各阶段的统计（时间单位 ms）"""
+        wall = (perf_counter_ns() - self._episode_start) / 1e6
+        result = {}
+        for name, timer in self.phases.items():
+            if not timer.samples:
+                continue
+            samples = np.asarray(timer.samples, dtype=np.float64) / 1e6
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            total = float(samples.sum())
+            result[name] = {
+                'count': len(samples),
+                'total_ms': total,
+                'mean_ms': total / len(samples),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'max_ms': float(samples.max()),
+                'share': total / wall if wall > 0 else 0.0,
+            }
+        return wall, result
+
+    def end_episode(self, verbose=True):
+        """
+        结束一个 episode：返回（并可打印）本 episode 的统计，清空样本，开始计下一个 episode
+        :return: {'episode', 'wall_ms', 'phases': {name: stats}}
+        """
+        wall, result = self.stats()
+        report = {'episode': self.episode, 'wall_ms': wall, 'phases': result}
+        if verbose:
+            print(format_report(report))
+        for name, timer in self.phases.items():
+            if timer.starts is not None:
+                self._events.extend(zip([name] * len(timer.starts), timer.starts, timer.samples,
+                                        [self.episode] * len(timer.starts)))
+                timer.starts.clear()
+            timer.samples.clear()
+        self.episode += 1
+        self._episode_start = perf_counter_ns()
+        return report
+
+    def write_chrome_trace(self, path=None):
+        """把已结束 episode 的全部计时写成 Chrome trace JSON（完整事件 'X'，时间单位 us）"""
+        path = self.trace_path if path is None else path
+        if path is None:
+            raise ValueError("no trace path given")
+        trace_events = [{'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'ts': (start - self._origin) / 1e3,
+                         'dur': dur / 1e3, 'pid': os.getpid(), 'tid': 0, 'args': {'episode': episode}}
+                        for name, start, dur, episode in self._events]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+        return len(trace_events)
+
+
+class NullProfiler:
+    """关闭时的占位：phase 返回同一个空上下文"""
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def instrument(obj, phases, profiler):
+    """
+    给 obj 的方法挂上计时：profiler 不为 None 时用计时版本（实例属性）遮蔽类上的方法，为 None 时移除，
+    因此关闭时方法调用没有任何额外开销
+    :param phases: {方法名: 阶段名}
+    """
+    for attr, name in phases.items():
+        if profiler is None:
+            obj.__dict__.pop(attr, None)
+        else:
+            obj.__dict__[attr] = _timed(profiler.phase(name), getattr(type(obj), attr).__get__(obj))
+
+
+def _timed(timer, method):
+    # 与 `with timer:` 等价，展开以省去 __enter__/__exit__ 两次方法调用
+    samples = timer.samples
+    starts = timer.starts
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            samples.append(perf_counter_ns() - start)
+            if starts is not None:
+                starts.append(start)
+    return wrapper
+
+
+def format_report(report):
+    lines = [f"[PROFILE] episode {report['episode']}: wall {report['wall_ms']:.1f} ms",
+             f"  {'phase':<22} {'count':>7} {'total ms':>10} {'share':>7} {'mean us':>9} {'p50 us':>9} "
+             f"{'p95 us':>9} {'p99 us':>9} {'max us':>9}"]
+    for name, s in sorted(report['phases'].items(), key=lambda item: -item[1]['total_ms']):
+        lines.append(f"  {name:<22} {s['count']:>7} {s['total_ms']:>10.1f} {s['share']:>7.1%} "
+                     f"{s['mean_ms'] * 1e3:>9.1f} {s['p50_ms'] * 1e3:>9.1f} {s['p95_ms'] * 1e3:>9.1f} "
+                     f"{s['p99_ms'] * 1e3:>9.1f} {s['max_ms'] * 1e3:>9.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,243 @@
+"""
+滚动前瞻规划（rollout lookahead）：在每个决策点按先验从合法动作中取 top-k 个候选，
+对每个候选从当前快照出发先执行该动作，再用模拟策略（默认启发式或训练好的策略）向前模拟一段仿真时间，
+以恰好在 起点 + horizon 时刻的平均订单流经时间（与奖励所累计的量相同的算法）估计候选的优劣，选估计值最小者；
+各候选在同一仿真时刻比较（env.stop_time 让事件推进停在该时刻，不会越过它到下一个决策点）。
+
+- 模拟可分发到进程池并行执行，子进程各持有一个同布局的 WarehouseEnv；每个决策每个子进程只收到一个任务，
+  快照只 pickle 一次，任务中是该子进程负责的 (候选, 种子) 列表；
+- 每个决策有墙钟预算：到时未完成的模拟作废，只比较已完成模拟的候选；
+- 同一决策中各候选的第 j 次模拟使用相同的随机种子（公共随机数），降低比较的方差。
+"""
+import multiprocessing as mp
+import pickle
+import random
+import time
+
+from env.action_space import ActionCatalog
+from env.env_I import WarehouseEnv
+
+
+# ==========================================
+# 默认启发式：模拟策略与候选先验
+# ==========================================
+
+def nearest_action(env, rng=None):
+    """
+    最近优先启发式（可作为 rollout 策略）：
+    有空闲拣货员与待服务拣货位时，取距离最近的一对；否则为一个待规划机器人选最近的待拣商品拣货位，拣完则回 Depot
+    :param rng: random.Random，不为 None 时随机选择待规划的机器人，否则取编号最小者
+    """
+    distance = env.distance_table.distance
+    idle_pickers = env.idle_pickers
+    if idle_pickers:
+        idle_pick_points = env.idle_pick_points
+        if idle_pick_points:
+            pair = min(((p, pp) for p in idle_pickers for pp in idle_pick_points),
+                       key=lambda x: distance(x[0].position, x[1].position))
+            return pair, None
+    robots = env.robots_needing_planning
+    if not robots:
+        return None, None
+    r = rng.choice(robots) if rng is not None else robots[0]
+    if not r.item_pick_order:
+        return None, (r, env.depot_object)
+    target = min((env.pick_points[item.pick_point_id] for item in r.item_pick_order),
+                 key=lambda pp: distance(r.position, pp.position))
+    return None, (r, target)
+
+
+def nearest_prior(env, catalog, legal):
+    """候选先验：动作的移动距离越短得分越高"""
+    distance = env.distance_table.distance
+    scores = []
+    for index in legal:
+        picker_act, robot_act = catalog.decode(env, index)
+        agent, target = picker_act or robot_act
+        scores.append(-distance(agent.position, target.position))
+    return scores
+
+
+# ==========================================
+# 单次模拟（主进程与子进程共用）
+# ==========================================
+
+def flow_at(env, t):
+    """t 时刻（不早于最后处理的事件）的平均订单流经时间：已完成订单的流经时间加未完成订单到 t 为止的等待时间"""
+    total = env.completed_flow_sum + env.n_open_orders * t - env.open_arrive_sum
+    return total / max(1, env.n_completed_orders + env.n_open_orders)
+
+
+def simulate(env, catalog, policy, snap, index, seed, horizon, max_steps, deadline=None):
+    """
+    从快照恢复，执行动作 index，再用 policy 模拟到仿真时间 起点 + horizon 或 episode 结束
+    :param deadline: time.time() 的墙钟截止时刻，超时返回 None
+    :return: 起点 + horizon 时刻的平均订单流经时间（达到 max_steps 时为当时的值）
+    """
+    env.restore(snap)
+    end_time = env.current_time + horizon
+    env.stop_time = end_time
+    try:
+        env.step(catalog.decode(env, index))
+        rng = random.Random(seed)
+        steps = 0
+        while not env.done and env.current_time < end_time and steps < max_steps:
+            if deadline is not None and time.time() > deadline:
+                return None
+            env.step(policy(env, rng))
+            steps += 1
+    finally:
+        env.stop_time = float('inf')
+    return flow_at(env, end_time if env.current_time >= end_time or env.done else env.current_time)
+
+
+_worker = {}  # 子进程内的 env / catalog / policy
+
+
+def _init_worker(env_kwargs, policy):
+    env = WarehouseEnv(**env_kwargs)
+    _worker.update(env=env, catalog=ActionCatalog.for_env(env), policy=policy)
+
+
+def _run_tasks(snap_bytes, tasks, horizon, max_steps, deadline):
+    """子进程：一个决策中分给本进程的全部模拟，快照只反序列化一次；返回 [(候选, 估计值或 None), ...]"""
+    snap = pickle.loads(snap_bytes)
+    results = []
+    for index, seed in tasks:
+        if deadline is not None and time.time() > deadline:
+            break
+        results.append((index, simulate(_worker['env'], _worker['catalog'], _worker['policy'], snap, index, seed,
+                                        horizon, max_steps, deadline)))
+    return results
+
+
+# ==========================================
+# 规划器
+# ==========================================
+
+class RolloutPlanner:
+    def __init__(self, top_k=4, n_rollouts=1, horizon=600.0, max_steps=1000, budget=None,
+                 rollout_policy=nearest_action, prior=nearest_prior, n_workers=0, seed=0, start_method=None):
+        """
+        :param top_k: 每个决策评估的候选数
+        :param n_rollouts: 每个候选的模拟次数
+        :param horizon: 模拟的仿真时长（秒）
+        :param max_steps: 单次模拟的决策步数上限
+        :param budget: 每个决策的墙钟预算（秒），None 表示不限
+        :param rollout_policy: 模拟策略 policy(env, rng) -> env.step 的动作；使用进程池时须可 pickle（或 fork 启动）
+        :param prior: 候选先验 prior(env, catalog, legal) -> 与 legal 对应的得分（越高越优先）
+        :param n_workers: 进程池大小，0 表示在主进程内串行模拟
+        :param seed: 模拟随机种子
+        """
+        self.top_k = top_k
+        self.n_rollouts = n_rollouts
+        self.horizon = horizon
+        self.max_steps = max_steps
+        self.budget = budget
+        self.rollout_policy = rollout_policy
+        self.prior = prior
+        self.n_workers = n_workers
+        self.seed = seed
+        self.start_method = start_method
+
+        self.catalog = None
+        self._env_kwargs = None
+        self._scratch = None  # 串行模拟用的环境
+        self._pool = None
+        self.stats = {'decisions': 0, 'planned': 0, 'rollouts': 0, 'expired': 0, 'seconds': 0.0}
+
+    def _prepare(self, env):
+        """按 env 的布局与车队规模准备动作目录、模拟环境/进程池"""
+        env_kwargs = dict(robot_num=env.N_robots, picker_num=env.N_pickers, layout=env.layout,
+                          entity_store=env.use_entity_store)
+        if env_kwargs == self._env_kwargs:
+            return
+        self.close()
+        self._env_kwargs = env_kwargs
+        self.catalog = ActionCatalog.for_env(env)
+        if self.n_workers > 0:
+            ctx = mp.get_context(self.start_method)
+            self._pool = ctx.Pool(self.n_workers, initializer=_init_worker,
+                                  initargs=(env_kwargs, self.rollout_policy))
+        else:
+            self._scratch = WarehouseEnv(**env_kwargs)
+
+    def candidates(self, env):
+        """按先验排序的前 top_k 个合法动作编号"""
+        legal = list(dict.fromkeys(self.catalog.legal_indices(env)))
+        if len(legal) <= 1:
+            return legal
+        scores = self.prior(env, self.catalog, legal)
+        ranked = sorted(range(len(legal)), key=lambda k: -scores[k])
+        return [legal[k] for k in ranked[:self.top_k]]
+
+    def select(self, env):
+        """
+        为当前决策点选择动作
+        :return: 动作编号（ActionCatalog 编号）
+        """
+        start = time.time()
+        self._prepare(env)
+        self.stats['decisions'] += 1
+        candidates = self.candidates(env)
+        if not candidates:
+            raise RuntimeError("no legal action at this decision point")
+        if len(candidates) == 1:
+            self.stats['seconds'] += time.time() - start
+            return candidates[0]
+
+        self.stats['planned'] += 1
+        deadline = None if self.budget is None else start + self.budget
+        snap = env.snapshot(history=False)
+        # 按轮次排列任务：先每个候选各模拟一次，预算不足时各候选的模拟次数尽量均匀
+        decision = self.stats['decisions']
+        tasks = [(index, hash((self.seed, decision, j))) for j in range(self.n_rollouts) for index in candidates]
+
+        results = {index: [] for index in candidates}
+        if self._pool is not None:
+            # 每个子进程一个任务：轮流分配（保持按轮次的顺序），快照只 pickle 一次；子进程自行在截止时刻停止
+            snap_bytes = pickle.dumps(snap)
+            pending = [self._pool.apply_async(_run_tasks, (snap_bytes, tasks[w::self.n_workers], self.horizon,
+                                                           self.max_steps, deadline))
+                       for w in range(min(self.n_workers, len(tasks)))]
+            for result in pending:
+                for index, value in result.get():
+                    if value is not None:
+                        results[index].append(value)
+        else:
+            for index, seed in tasks:
+                if deadline is not None and time.time() > deadline:
+                    break
+                value = simulate(self._scratch, self.catalog, self.rollout_policy, snap, index, seed,
+                                 self.horizon, self.max_steps, deadline)
+                if value is not None:
+                    results[index].append(value)
+
+        n_done = sum(len(v) for v in results.values())
+        self.stats['rollouts'] += n_done
+        self.stats['expired'] += len(tasks) - n_done
+        estimates = {index: sum(v) / len(v) for index, v in results.items() if v}
+        self.stats['seconds'] += time.time() - start
+        if not estimates:
+            return candidates[0]  # 预算内没有完成的模拟：退回先验最优的候选
+        # 估计值相同时保持先验顺序
+        return min(candidates, key=lambda index: estimates.get(index, float('inf')))
+
+    def select_action(self, env):
+        """为当前决策点选择动作，返回 env.step 接受的 (picker_action, robot_action)"""
+        index = self.select(env)
+        return self.catalog.decode(env, index)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self._scratch = None
+        self._env_kwargs = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,89 @@
+"""
+拣货位之间的最短路径长度：单区块平行巷道布局（上下两条横向通道）的距离公式与预计算距离表
+"""
+import numpy as np
+
+
+def aisle_distance(position1, position2, bottom_y, top_y):
+    """两个位置之间的最短路径长度（若不在一个巷道，则需要从上部或下部通道绕过货架）"""
+    x1, y1 = position1
+    x2, y2 = position2
+    # 如果两个拣货位在同一巷道，则返回两个拣货位之间的直线路径长度
+    if x1 == x2:
+        return abs(y1 - y2)
+    # 计算从上部绕过和从下部绕过的路径，选择最短路径，并返回路径长度
+    path1 = abs(y1 - bottom_y) + abs(y2 - bottom_y) + abs(x1 - x2)
+    path2 = abs(y1 - top_y) + abs(y2 - top_y) + abs(x1 - x2)
+    return min(path1, path2)
+
+
+def aisle_distances(x1, y1, x2, y2, bottom_y, top_y):
+    """aisle_distance 的向量化版本（参数可广播），运算顺序与标量版本一致，结果逐位相同"""
+    dx = np.abs(x1 - x2)
+    path1 = np.abs(y1 - bottom_y) + np.abs(y2 - bottom_y) + dx
+    path2 = np.abs(y1 - top_y) + np.abs(y2 - top_y) + dx
+    return np.where(x1 == x2, np.abs(y1 - y2), np.minimum(path1, path2))
+
+
+class DistanceTable:
+    """
+    预计算的两两距离表
+    节点按 positions 的顺序编号（通常为全部拣货位，最后一个为 Depot），
+    matrix[i, j] 为节点 i 到节点 j 的最短路径长度。
+    """
+
+    def __init__(self, positions, bottom_y, top_y):
+        """
+        :param positions: 节点坐标列表 [(x, y), ...]
+        :param bottom_y: 下部横向通道的 y 坐标
+        :param top_y: 上部横向通道的 y 坐标
+        """
+        self.positions = [tuple(p) for p in positions]
+        self.bottom_y = bottom_y
+        self.top_y = top_y
+        self.index = {}  # (x, y) -> 节点编号（坐标重复时取第一个）
+        for i, position in enumerate(self.positions):
+            self.index.setdefault(position, i)
+        xy = np.asarray(self.positions, dtype=np.float64).reshape(-1, 2)
+        self.xy = xy
+        self.matrix = aisle_distances(xy[:, None, 0], xy[:, None, 1], xy[None, :, 0], xy[None, :, 1],
+                                      bottom_y, top_y)
+        self._rows = self.matrix.tolist()  # 标量查询用的嵌套列表，避免逐次构造 numpy 标量
+
+    def __len__(self):
+        return len(self.positions)
+
+    def distance(self, position1, position2):
+        """两个位置之间的距离；不在表中的位置（如拣货员的任意初始坐标）退回公式计算"""
+        index = self.index
+        i = index.get(position1)
+        j = index.get(position2)
+        if i is None or j is None:
+            return aisle_distance(position1, position2, self.bottom_y, self.top_y)
+        return self._rows[i][j]
+
+    def node_distance(self, i, j):
+        """两个节点编号之间的距离（标量）"""
+        return self._rows[i][j]
+
+    def distances_from(self, position, targets):
+        """
+        从一个位置到一批目标节点的距离（向量化）
+        :param position: 出发位置 (x, y)
+        :param targets: 目标节点编号数组/列表
+        :return: np.ndarray，与 targets 一一对应
+        """
+        targets = np.asarray(targets, dtype=np.intp)
+        i = self.index.get(position)
+        if i is not None:
+            return self.matrix[i, targets]
+        x, y = position
+        return aisle_distances(x, y, self.xy[targets, 0], self.xy[targets, 1], self.bottom_y, self.top_y)
+
+    def pair_distances(self, src, dst):
+        """节点编号数组之间的距离（src、dst 可广播）"""
+        return self.matrix[src, dst]
+
+    def nodes_of(self, positions):
+        """坐标列表 -> 节点编号数组"""
+        return np.fromiter((self.index[p] for p in positions), dtype=np.intp, count=len(positions))
@@ -0,0 +1,203 @@
+"""
+仿真快照：把 WarehouseEnv 某一决策点的全部动态状态（时钟、事件日历、拣货位排队、拣货员/机器人分配、
+订单进度、奖励累计量）编码为只含基本类型、元组和 NumPy 数组的 EnvSnapshot，可直接 pickle。
+对象之间的引用一律换成编号（商品编号、拣货位下标、机器人/拣货员下标、未完成订单序号），
+restore 时在目标环境的布局对象上重建，因此快照可恢复到原环境或任意同布局、同规模的环境。
+
+- 尚未到达的订单以 (OrderInstance, 起始下标) 表示，算例在同一 episode 的各快照间共享，不复制；
+- 已完成订单不再变化，orders_completed 只保存对象引用的元组；
+- 环境本身不使用随机数，策略的随机数状态由调用方自行保存。
+"""
+import numpy as np
+
+from env.order_stream import OrderStream
+
+
+class EnvSnapshot:
+    """WarehouseEnv 的动态状态"""
+
+    def __init__(self, layout, scalars, state, calendar, pending, n_emitted, open_orders, unassigned, completed,
+                 robots, pickers, queues):
+        """
+        :param layout: (N_w, N_l, 机器人数, 拣货员数)，恢复时校验
+        :param scalars: 时钟与累计量 {属性名: 值}
+        :param state: 状态张量副本 (4, N_w, N_l)
+        :param calendar: 事件日历堆中的 (time, kind, index) 元组
+        :param pending: (OrderInstance, 起始下标)，没有未到达订单时为 (None, 0)
+        :param n_emitted: 已到达的订单数
+        :param open_orders: 未完成订单的编码，顺序同 orders_uncompleted
+        :param unassigned: 未分配订单在 open_orders 中的序号，顺序同 orders_unassigned
+        :param completed: 已完成订单对象的元组（keep_history=False 或 history=False 时为空）
+        :param robots: 机器人状态 {字段: 数组/元组}
+        :param pickers: 拣货员状态 {字段: 数组/元组}
+        :param queues: 拣货位排队与拣货员 {拣货位下标: (排队机器人下标元组, 拣货员下标或 -1)}，只含非空的拣货位
+        """
+        self.layout = layout
+        self.scalars = scalars
+        self.state = state
+        self.calendar = calendar
+        self.pending = pending
+        self.n_emitted = n_emitted
+        self.open_orders = open_orders
+        self.unassigned = unassigned
+        self.completed = completed
+        self.robots = robots
+        self.pickers = pickers
+        self.queues = queues
+
+    @property
+    def current_time(self):
+        return self.scalars['current_time']
+
+
+# 随快照保存的标量属性
+SCALARS = ('current_time', 'last_decision_time', 'order_handle_time', 'done', 'completed_flow_sum',
+           'n_open_orders', 'open_arrive_sum', 'n_completed_orders', 'order_counter', 'keep_history',
+           'prev_total_unpicked', 'prev_completed_orders')
+
+
+def _item_ids(items):
+    return tuple(item.item_id if item else None for item in items)
+
+
+def _items(env, item_ids):
+    items = env.items
+    return [items[i] if i is not None else None for i in item_ids]
+
+
+def encode_order(order):
+    """
+    未完成订单 -> (order_id, arrive_time, due_time, 商品编号, 未拣商品编号, 已拣商品编号)
+    env.class_object.Order 的 unpicked_items 与 items 是同一个列表，此时未拣商品编号记为 None
+    """
+    unpicked = None if order.unpicked_items is order.items else _item_ids(order.unpicked_items)
+    return (order.order_id, order.arrive_time, getattr(order, 'due_time', None), _item_ids(order.items),
+            unpicked, _item_ids(order.picked_items))
+
+
+def decode_order(env, code):
+    from env.env_I import Order  # env_I 引用本模块，延迟导入避免循环
+
+    order_id, arrive_time, due_time, item_ids, unpicked, picked = code
+    order = Order(order_id, _items(env, item_ids), arrive_time, due_time)
+    order.unpicked_items = order.items if unpicked is None else _items(env, unpicked)
+    order.picked_items = _items(env, picked)
+    return order
+
+
+def take_snapshot(env, history=True):
+    """
+    编码 env 的当前动态状态
+    :param history: False 时不保存已完成订单列表（完成数与流经时间仍由累计量保存），用于只需向前模拟的场合
+    """
+    open_index = {id(order): k for k, order in enumerate(env.orders_uncompleted)}
+    robots = env.robots
+    pickers = env.pickers
+    stream = env.orders_not_arrived
+
+    queues = {}
+    for pp in env.pick_points_list:
+        if pp.robot_queue or pp.picker is not None:
+            queues[pp.index] = (tuple(r.robot_id for r in pp.robot_queue),
+                                -1 if pp.picker is None else pp.picker.picker_id)
+
+    return EnvSnapshot(
+        layout=(env.N_w, env.N_l, env.N_robots, env.N_pickers),
+        scalars={name: getattr(env, name) for name in SCALARS},
+        state=env.state_buffer.copy(),
+        calendar=env.calendar.entries(),
+        pending=stream.remaining_instance(),
+        n_emitted=stream.n_emitted,
+        open_orders=tuple(encode_order(order) for order in env.orders_uncompleted),
+        unassigned=tuple(open_index[id(order)] for order in env.orders_unassigned),
+        completed=tuple(env.orders_completed) if history else (),
+        robots={
+            'state': tuple(r.state for r in robots),
+            'position': tuple(r.position for r in robots),
+            'pick_point': np.array([-1 if r.pick_point is None else r.pick_point.index for r in robots],
+                                   dtype=np.int32),
+            'time': np.array([(r.move_to_pick_point_time, r.pick_point_complete_time, r.move_to_depot_time)
+                              for r in robots], dtype=np.float64).reshape(-1, 3),
+            'order': np.array([-1 if r.order is None else open_index[id(r.order)] for r in robots],
+                              dtype=np.int32),
+            'item_pick_order': tuple(_item_ids(r.item_pick_order) for r in robots),
+        },
+        pickers={
+            'state': tuple(p.state for p in pickers),
+            'position': tuple(p.position for p in pickers),
+            'pick_point': np.array([-1 if p.pick_point is None else p.pick_point.index for p in pickers],
+                                   dtype=np.int32),
+            'time': np.array([(p.pick_start_time, p.pick_end_time) for p in pickers],
+                             dtype=np.float64).reshape(-1, 2),
+        },
+        queues=queues,
+    )
+
+
+def restore_snapshot(env, snap):
+    """把快照写回 env（env 的布局与规模须与快照一致），订单对象按快照重新构造"""
+    layout = (env.N_w, env.N_l, env.N_robots, env.N_pickers)
+    if layout != snap.layout:
+        raise ValueError(f"snapshot layout (N_w, N_l, robots, pickers)={snap.layout} does not match "
+                         f"the environment {layout}")
+    if len(env.robots) != env.N_robots or len(env.pickers) != env.N_pickers:
+        env.adjust_resources()  # 尚未 reset 的新环境
+
+    for name, value in snap.scalars.items():
+        setattr(env, name, value)
+    np.copyto(env.state_buffer, snap.state)
+    env.calendar.load(snap.calendar)
+
+    # 订单
+    instance, start = snap.pending
+    env.orders = None
+    if instance is None:
+        env.orders_not_arrived = OrderStream([], 0)
+        env.orders_not_arrived.n_emitted = snap.n_emitted
+    else:
+        env.orders_not_arrived = OrderStream.from_instance(instance, env, start, snap.n_emitted)
+    open_orders = [decode_order(env, code) for code in snap.open_orders]
+    env.orders_uncompleted = list(open_orders)
+    env.orders_unassigned = [open_orders[k] for k in snap.unassigned]
+    env.orders_completed = list(snap.completed)
+
+    # 机器人与拣货员
+    pick_points = env.pick_points_list
+    robots = snap.robots
+    for i, r in enumerate(env.robots):
+        r.state = robots['state'][i]
+        r.position = robots['position'][i]
+        k = robots['pick_point'][i]
+        r.pick_point = None if k < 0 else pick_points[k]
+        r.move_to_pick_point_time, r.pick_point_complete_time, r.move_to_depot_time = robots['time'][i].tolist()
+        k = robots['order'][i]
+        r.order = None if k < 0 else open_orders[k]
+        r.item_pick_order = _items(env, robots['item_pick_order'][i])
+    pickers = snap.pickers
+    for i, p in enumerate(env.pickers):
+        p.state = pickers['state'][i]
+        p.position = pickers['position'][i]
+        k = pickers['pick_point'][i]
+        p.pick_point = None if k < 0 else pick_points[k]
+        p.pick_start_time, p.pick_end_time = pickers['time'][i].tolist()
+
+    # 拣货位
+    for pp in pick_points:
+        pp.robot_queue = []
+        pp.picker = None
+    for k, (queue, picker) in snap.queues.items():
+        pp = pick_points[k]
+        pp.robot_queue = [env.robots[i] for i in queue]
+        pp.picker = None if picker < 0 else env.pickers[picker]
+
+    # 状态索引集合由实体状态推出
+    env._idle_robot_ids = set()
+    env._planning_robot_ids = set()
+    env._idle_picker_ids = set()
+    env._idle_pick_point_ids = set()
+    for r in env.robots:
+        env._refresh_robot(r)
+    for p in env.pickers:
+        env._refresh_picker(p)
+    for k in snap.queues:
+        env._refresh_pick_point(pick_points[k])
@@ -0,0 +1,250 @@
+"""
+多进程采样池：每个子进程运行一个 VecWarehouseEnv（可含多个 WarehouseEnv），
+观测、合法动作掩码、奖励和结束标志写入 multiprocessing.shared_memory 中的环形缓冲区，
+动作和少量 info 通过管道传递。事件循环是纯 Python 代码，多进程用于绕开 GIL；
+按 CPU 核数扩展的效果尚未在多核机器上实测（单核机器上只能体现进程间通信的开销，见 benchmarks/bench_subproc_vec_env.py）。
+"""
+import multiprocessing as mp
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from env.env_I import WarehouseEnv
+from env.action_space import ActionCatalog
+from env.vec_env import VecWarehouseEnv
+
+
+class WorkerError(RuntimeError):
+    """子进程异常或意外退出"""
+
+
+def _buffer_specs(n_slots, n_envs, obs_shape, action_num):
+    # 名称 -> (形状, dtype)
+    return {
+        'obs': ((n_slots, n_envs) + tuple(obs_shape), np.float32),
+        'masks': ((n_slots, n_envs, action_num), np.bool_),
+        'rewards': ((n_slots, n_envs), np.float64),
+        'dones': ((n_slots, n_envs), np.bool_),
+    }
+
+
+def _attach(shm_names, specs):
+    """按名称连接共享内存并构造 ndarray 视图"""
+    blocks, arrays = {}, {}
+    for key, (shape, dtype) in specs.items():
+        blocks[key] = shared_memory.SharedMemory(name=shm_names[key])
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=blocks[key].buf)
+    return blocks, arrays
+
+
+def _worker(remote, parent_remote, worker_id, env_slice, order_fn, env_kwargs, shm_names, specs):
+    parent_remote.close()
+    blocks, arrays, vec = {}, {}, None
+    try:
+        blocks, arrays = _attach(shm_names, specs)
+        lo, hi = env_slice
+        vec = VecWarehouseEnv(hi - lo, lambda i: order_fn(lo + i), env_kwargs=env_kwargs, copy=False)
+
+        def write(slot, obs, masks, rewards=None, dones=None):
+            arrays['obs'][slot, lo:hi] = obs
+            arrays['masks'][slot, lo:hi] = masks
+            arrays['rewards'][slot, lo:hi] = 0.0 if rewards is None else rewards
+            arrays['dones'][slot, lo:hi] = False if dones is None else dones
+
+        while True:
+            cmd, slot, data = remote.recv()
+            if cmd == 'step':
+                obs, rewards, dones, infos, masks = vec.step(data)
+                write(slot, obs, masks, rewards, dones)
+                remote.send(('ok', infos))
+            elif cmd == 'cells':
+                remote.send(('ok', vec.agent_cells()))
+            elif cmd == 'reset':
+                obs, masks = vec.reset()
+                write(slot, obs, masks)
+                remote.send(('ok', None))
+            elif cmd == 'close':
+                remote.send(('ok', None))
+                break
+    except KeyboardInterrupt:
+        pass
+    except BaseException:
+        try:
+            remote.send(('error', f"worker {worker_id}:\n{traceback.format_exc()}"))
+        except (BrokenPipeError, EOFError):
+            pass
+    finally:
+        arrays = vec = None
+        _release(blocks, unlink=False)
+        remote.close()
+
+
+def _release(blocks, unlink):
+    for block in blocks.values():
+        try:
+            block.close()
+        except BufferError:
+            pass  # 外部仍持有缓冲区视图，映射随进程退出释放
+        if unlink:
+            block.unlink()
+
+
+class SubprocVecWarehouseEnv:
+    """
+    与 VecWarehouseEnv 接口一致的多进程版本：
+    reset() -> (obs, masks)；step(actions) -> (obs, rewards, dones, infos, masks)
+    共享缓冲区按 n_slots 个时间槽循环使用，每一步写入下一个槽；
+    copy=False 时返回的数组是当前槽的视图，在被 n_slots 步之后的写入覆盖前一直有效，
+    因此训练端可以直接在共享内存上读取最近 n_slots 步的轨迹。
+    """
+
+    def __init__(self, n_workers, envs_per_worker, order_fn, env_kwargs=None, n_slots=1, copy=True,
+                 start_method=None, timeout=None):
+        """
+        :param n_workers: 子进程数
+        :param envs_per_worker: 每个子进程中的环境数
+        :param order_fn: order_fn(env_index) -> 新一回合的订单列表，env_index 为全局编号；
+                         spawn/forkserver 启动方式下须可 pickle（模块级函数）
+        :param env_kwargs: 传给 WarehouseEnv 的参数
+        :param n_slots: 环形缓冲区的时间槽数
+        :param copy: 是否返回共享缓冲区的副本
+        :param start_method: multiprocessing 启动方式，None 为平台默认
+        :param timeout: 等待子进程回复的超时秒数，None 为不限
+        """
+        self.n_workers = n_workers
+        self.envs_per_worker = envs_per_worker
+        self.n_envs = n_workers * envs_per_worker
+        self.n_slots = n_slots
+        self.copy = copy
+        self.timeout = timeout
+        self.closed = False
+        self.slot = 0
+
+        template = WarehouseEnv(**(env_kwargs or {}))
+        self.template = template  # 主进程中的布局/车队规模代表，不参与采样
+        self.catalog = ActionCatalog.for_env(template)
+        self.action_num = self.catalog.size
+        self.observation_shape = (4, template.N_w, template.N_l)
+
+        # 主进程创建并持有共享内存，关闭时负责 unlink
+        specs = _buffer_specs(n_slots, self.n_envs, self.observation_shape, self.action_num)
+        self._blocks, self._arrays = {}, {}
+        for key, (shape, dtype) in specs.items():
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            block = shared_memory.SharedMemory(create=True, size=size)
+            self._blocks[key] = block
+            self._arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        shm_names = {key: block.name for key, block in self._blocks.items()}
+
+        ctx = mp.get_context(start_method)
+        self.remotes, self.processes = [], []
+        for w in range(n_workers):
+            remote, work_remote = ctx.Pipe()
+            env_slice = (w * envs_per_worker, (w + 1) * envs_per_worker)
+            process = ctx.Process(target=_worker, daemon=True,
+                                  args=(work_remote, remote, w, env_slice, order_fn, env_kwargs, shm_names, specs))
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+    # --- 与子进程通信 ---
+
+    def _receive(self, w):
+        """接收子进程 w 的回复；子进程报错或退出时关闭整个池并抛出 WorkerError"""
+        remote, process = self.remotes[w], self.processes[w]
+        waited = 0.0
+        while not remote.poll(0.1):
+            waited += 0.1
+            if not process.is_alive():
+                self._fail(f"worker {w} exited unexpectedly (exit code {process.exitcode})")
+            if self.timeout is not None and waited >= self.timeout:
+                self._fail(f"worker {w} did not reply within {self.timeout}s")
+        try:
+            status, payload = remote.recv()
+        except EOFError:
+            self._fail(f"worker {w} closed its pipe (exit code {process.exitcode})")
+        if status == 'error':
+            self._fail(payload)
+        return payload
+
+    def _fail(self, message):
+        self.close(terminate=True)
+        raise WorkerError(message)
+
+    def _view(self, key, slot):
+        array = self._arrays[key][slot]
+        return array.copy() if self.copy else array
+
+    # --- 对外接口 ---
+
+    def reset(self):
+        if self.closed:
+            raise WorkerError("rollout pool is closed")
+        self.slot = 0
+        for remote in self.remotes:
+            remote.send(('reset', self.slot, None))
+        for w in range(self.n_workers):
+            self._receive(w)
+        return self._view('obs', self.slot), self._view('masks', self.slot)
+
+    def step(self, actions):
+        if self.closed:
+            raise WorkerError("rollout pool is closed")
+        actions = np.asarray(actions).reshape(self.n_envs)
+        slot = (self.slot + 1) % self.n_slots
+        k = self.envs_per_worker
+        for w, remote in enumerate(self.remotes):
+            remote.send(('step', slot, actions[w * k:(w + 1) * k]))
+        infos = []
+        for w in range(self.n_workers):
+            infos.extend(self._receive(w))
+        self.slot = slot
+        return (self._view('obs', slot), self._view('rewards', slot), self._view('dones', slot), infos,
+                self._view('masks', slot))
+
+    def agent_cells(self):
+        """与最近一次返回的观测对应的各智能体所在单元 (N, n_agents)，经管道从各子进程取回"""
+        if self.closed:
+            raise WorkerError("rollout pool is closed")
+        for remote in self.remotes:
+            remote.send(('cells', self.slot, None))
+        return np.concatenate([self._receive(w) for w in range(self.n_workers)])
+
+    def buffers(self):
+        """整个环形缓冲区的视图：obs (S,N,4,H,W)、masks (S,N,A)、rewards (S,N)、dones (S,N)"""
+        return self._arrays
+
+    def close(self, terminate=False):
+        if self.closed:
+            return
+        self.closed = True
+        for remote, process in zip(self.remotes, self.processes):
+            if terminate or not process.is_alive():
+                continue
+            try:
+                remote.send(('close', None, None))
+                remote.recv()
+            except (BrokenPipeError, EOFError, OSError):
+                pass
+        for process in self.processes:
+            if terminate and process.is_alive():
+                process.terminate()
+            process.join(timeout=5)
+        for remote in self.remotes:
+            remote.close()
+        self._arrays = {}
+        _release(self._blocks, unlink=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close(terminate=True)
+        except Exception:
+            pass
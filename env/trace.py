@@ -0,0 +1,225 @@
+"""
+事件轨迹：WarehouseEnv 的可选记录器与离线回放。
+
+每条记录为定长的 (time, kind, entity, target, value)：
+- 事件推进时每处理一个事件（订单到达、机器人到达、拣选开始/完成、回 Depot）在处理完后追加一条，
+  kind 即事件日历中的事件类型（env/event_calendar.py）；空闲机器人在 Depot 分到订单时追加一条 REC_ORDER_ASSIGN；
+- 每个 step 在执行完动作、推进时间之前写入该决策的记录：拣货员动作及其各排队机器人的拣选开始，或机器人动作。
+记录经 struct 打包写入预分配的缓冲区（bytearray 上的结构化 NumPy 视图），写满一块后追加到 .npy 文件
+（或在内存中保存），文件在记录过程中也可用 np.load(mmap_mode='r') 读取。
+回放只读记录本身，不重新仿真，即可得到订单流经时间、机器人/拣货员利用率和排队长度随时间的变化。
+
+记录字段：time 记录时的仿真时间，kind 记录类型，entity 机器人或拣货员下标（见 KIND_FIELDS），
+target 拣货位下标（DEPOT 为 Depot，INVALID 为无效目标，-1 为无），value 随类型而定。
+一个文件可包含多个 episode，每个 episode 以 REC_RESET 开头。
+
+用法：python -m env.trace trace.npy
+"""
+import struct
+import sys
+
+import numpy as np
+
+from env.event_calendar import (ORDER_ARRIVAL, ROBOT_ARRIVE, PICKER_ARRIVE, ROBOT_PICK_DONE, PICKER_PICK_DONE,
+                                ROBOT_AT_DEPOT)
+from env.order_instance import _NpyAppender
+
+TRACE_DTYPE = np.dtype([('time', '<f8'), ('kind', 'u1'), ('entity', '<i4'), ('target', '<i4'), ('value', '<f8')])
+_RECORD = struct.Struct('<dBiid')  # 与 TRACE_DTYPE 逐字节一致（无对齐填充）
+RECORD_SIZE = _RECORD.size
+
+# 记录类型：事件记录与事件日历的类型编号相同
+REC_ORDER_ARRIVAL = ORDER_ARRIVAL
+REC_ROBOT_ARRIVE = ROBOT_ARRIVE
+REC_PICKER_ARRIVE = PICKER_ARRIVE
+REC_ROBOT_PICK_DONE = ROBOT_PICK_DONE
+REC_PICKER_PICK_DONE = PICKER_PICK_DONE
+REC_ROBOT_AT_DEPOT = ROBOT_AT_DEPOT
+REC_ORDER_ASSIGN = 6
+REC_PICKER_ACTION = 7
+REC_ROBOT_ACTION = 8
+REC_PICK_START = 9
+REC_RESET = 10
+KIND_NAMES = ('order_arrival', 'robot_arrive', 'picker_arrive', 'robot_pick_done', 'picker_pick_done',
+              'robot_at_depot', 'order_assign', 'picker_action', 'robot_action', 'pick_start', 'reset')
+# 各类型的 (entity, target, value) 含义
+KIND_FIELDS = {
+    REC_ORDER_ARRIVAL: ("-", "-", "该时刻到达的订单数"),
+    REC_ROBOT_ARRIVE: ("机器人", "拣货位", "到达后该拣货位的排队机器人数"),
+    REC_PICKER_ARRIVE: ("拣货员", "拣货位", "0"),
+    REC_ROBOT_PICK_DONE: ("机器人", "拣货位", "离开后该拣货位的排队机器人数"),
+    REC_PICKER_PICK_DONE: ("拣货员", "拣货位（无则 -1）", "0"),
+    REC_ROBOT_AT_DEPOT: ("机器人", "DEPOT", "订单流经时间（无订单时为 nan）"),
+    REC_ORDER_ASSIGN: ("机器人", "-", "订单编号"),
+    REC_PICKER_ACTION: ("拣货员", "拣货位", "拣货员到达拣货位（开始拣选）的时刻"),
+    REC_ROBOT_ACTION: ("机器人", "目标", "机器人预计到达目标的时刻（含打包时间；动作被忽略时为 inf）"),
+    REC_PICK_START: ("机器人", "拣货位", "该机器人开始被拣选的时刻"),
+    REC_RESET: ("机器人数", "拣货员数", "拣货位数"),
+}
+
+# target 的特殊取值
+DEPOT = -2
+INVALID = -3
+
+
+class TraceRecorder:
+    def __init__(self, path=None, chunk_size=1 << 16):
+        """
+        :param path: .npy 文件路径，None 时记录保存在内存中
+        :param chunk_size: 缓冲区的记录数，写满后整块落盘
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.raw = bytearray(chunk_size * RECORD_SIZE)
+        self.buffer = np.frombuffer(self.raw, dtype=TRACE_DTYPE)  # 缓冲区的结构化视图
+        self.offset = 0
+        self.n_flushed = 0
+        self._chunks = []
+        self._file = None if path is None else _NpyAppender(path, TRACE_DTYPE, header_size=256)
+
+    def append(self, time, kind, entity, target, value):
+        """追加一条记录（缓冲区写满时落盘）"""
+        _RECORD.pack_into(self.raw, self.offset, time, kind, entity, target, value)
+        self.offset += RECORD_SIZE
+        if self.offset == len(self.raw):
+            self.flush()
+
+    def flush(self):
+        """把缓冲区中的记录写入文件（或内存块）"""
+        n = self.offset // RECORD_SIZE
+        if n:
+            if self._file is not None:
+                self._file.append(self.buffer[:n])
+                self._file.flush()
+            else:
+                self._chunks.append(self.buffer[:n].copy())
+            self.n_flushed += n
+            self.offset = 0
+
+    def __len__(self):
+        return self.n_flushed + self.offset // RECORD_SIZE
+
+    def records(self):
+        """到目前为止的全部记录（先落盘缓冲区）"""
+        self.flush()
+        if self._file is not None:
+            return np.load(self.path, mmap_mode='r')
+        if not self._chunks:
+            return np.zeros(0, dtype=TRACE_DTYPE)
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0]
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ==========================================
+# 离线回放
+# ==========================================
+
+def load(path):
+    return np.load(path, mmap_mode='r')
+
+
+def episodes(records):
+    """按 REC_RESET 切分为各 episode 的记录"""
+    starts = np.flatnonzero(records['kind'] == REC_RESET)
+    bounds = list(starts) + [len(records)]
+    return [records[lo:hi] for lo, hi in zip(bounds, bounds[1:])]
+
+
+def _busy_time(entity_start, time_start, entity_end, time_end, n, horizon):
+    """成对的开始/结束记录 -> 每个实体的忙碌时长；episode 结束时仍未结束的区间截到 horizon"""
+    busy = (np.bincount(entity_end, weights=time_end, minlength=n)
+            - np.bincount(entity_start, weights=time_start, minlength=n))
+    still_open = np.bincount(entity_start, minlength=n) - np.bincount(entity_end, minlength=n)
+    return busy + still_open * horizon
+
+
+def queue_length_series(records):
+    """
+    全部拣货位排队机器人总数随时间的变化
+    :return: (times, lengths)，lengths[i] 为处理完 times[i] 时刻的记录后的总排队数
+    """
+    kind = records['kind']
+    mask = (kind == REC_ROBOT_ARRIVE) | (kind == REC_ROBOT_PICK_DONE)
+    delta = np.where(kind[mask] == REC_ROBOT_ARRIVE, 1, -1)
+    times = records['time'][mask]
+    lengths = np.cumsum(delta)
+    # 同一时刻只保留最后一个值
+    last = np.append(times[1:] != times[:-1], True) if len(times) else np.zeros(0, dtype=bool)
+    return times[last], lengths[last]
+
+
+def kpis(records):
+    """一个 episode（以 REC_RESET 开头）的 KPI"""
+    if len(records) == 0 or records['kind'][0] != REC_RESET:
+        raise ValueError("records must start with a reset record (use episodes() to split a trace)")
+    n_robots, n_pickers, n_pick_points = (int(records[0][name]) for name in ('entity', 'target', 'value'))
+    kind = records['kind']
+    time = records['time']
+    makespan = float(time[-1])
+
+    done = records[(kind == REC_ROBOT_AT_DEPOT) & ~np.isnan(records['value'])]
+    flow = done['value']
+
+    assign = records[kind == REC_ORDER_ASSIGN]
+    robot_busy = _busy_time(assign['entity'], assign['time'], done['entity'], done['time'], n_robots, makespan)
+    picker_start = records[kind == REC_PICKER_ACTION]
+    picker_end = records[kind == REC_PICKER_PICK_DONE]
+    picker_busy = _busy_time(picker_start['entity'], picker_start['time'], picker_end['entity'],
+                             picker_end['time'], n_pickers, makespan)
+
+    times, lengths = queue_length_series(records)
+    if len(times):
+        durations = np.diff(np.append(times, makespan))
+        mean_queue = float(np.dot(lengths, durations) / makespan) if makespan > 0 else 0.0
+    else:
+        mean_queue = 0.0
+    arrive = records[kind == REC_ROBOT_ARRIVE]
+    max_queue = np.zeros(n_pick_points, dtype=np.int64)
+    np.maximum.at(max_queue, arrive['target'], arrive['value'].astype(np.int64))
+
+    horizon = makespan if makespan > 0 else 1.0
+    return {
+        'makespan': makespan,
+        'orders_arrived': int(records['value'][kind == REC_ORDER_ARRIVAL].sum()),
+        'orders_completed': len(flow),
+        'mean_flow_time': float(flow.mean()) if len(flow) else float('nan'),
+        'p95_flow_time': float(np.percentile(flow, 95)) if len(flow) else float('nan'),
+        'max_flow_time': float(flow.max()) if len(flow) else float('nan'),
+        'robot_utilization': robot_busy / horizon,
+        'picker_utilization': picker_busy / horizon,
+        'mean_queue_length': mean_queue,
+        'max_queue_length': max_queue,
+        'decisions': int(np.count_nonzero((kind == REC_PICKER_ACTION) | (kind == REC_ROBOT_ACTION))),
+    }
+
+
+def main(path):
+    records = load(path)
+    for k, episode in enumerate(episodes(records)):
+        result = kpis(episode)
+        print(f"episode {k}: {len(episode)} records, makespan {result['makespan']:.1f}, "
+              f"{result['orders_completed']}/{result['orders_arrived']} orders completed, "
+              f"{result['decisions']} decisions")
+        print(f"  flow time mean {result['mean_flow_time']:.1f}  p95 {result['p95_flow_time']:.1f}  "
+              f"max {result['max_flow_time']:.1f}")
+        print(f"  robot utilization  {np.array2string(result['robot_utilization'], precision=3)}")
+        print(f"  picker utilization {np.array2string(result['picker_utilization'], precision=3)}")
+        print(f"  queue length mean {result['mean_queue_length']:.3f}  max per pick point "
+              f"{int(result['max_queue_length'].max(initial=0))}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
@@ -0,0 +1,104 @@
+"""
+向量化仓库环境：在同一进程内以锁步方式推进 N 个相互独立的 WarehouseEnv
+"""
+import numpy as np
+
+from env.env_I import WarehouseEnv
+from env.action_space import ActionCatalog
+
+
+class VecWarehouseEnv:
+    """
+    N 个独立仿真的批量接口：
+    - 观测按 (N, 4, H, W) 堆叠，奖励/结束标志为 (N,)，合法动作掩码为 (N, action_num)，
+      策略可对整批状态做一次前向；
+    - 动作为扁平动作编号（见 env.action_space.ActionCatalog）；
+    - 某个环境结束后自动用其订单源生成的新订单重置，结束时的观测和回合统计放在 info 中。
+    """
+
+    def __init__(self, n_envs, order_fn, env_kwargs=None, copy=True):
+        """
+        :param n_envs: 环境数量
+        :param order_fn: order_fn(env_index) -> 新一回合的订单列表；每次调用须返回新的订单对象
+                         （环境会修改订单的拣选进度，不能跨回合复用同一批对象）
+        :param env_kwargs: 传给 WarehouseEnv 的参数
+        :param copy: True 时返回输出缓冲区的副本；False 时直接返回缓冲区（下一次 step 会被覆盖）
+        """
+        self.n_envs = n_envs
+        self.order_fn = order_fn
+        self.copy = copy
+        self.envs = [WarehouseEnv(**(env_kwargs or {})) for _ in range(n_envs)]
+        self.template = self.envs[0]  # 布局与车队规模的代表（策略按它设置动作空间）
+        self.catalog = ActionCatalog.for_env(self.envs[0])
+        self.action_num = self.catalog.size
+        H, W = self.envs[0].N_w, self.envs[0].N_l
+        self.observation_shape = (4, H, W)
+
+        # 预分配的输出缓冲区
+        self._obs = np.zeros((n_envs, 4, H, W), dtype=np.float32)
+        self._masks = np.zeros((n_envs, self.action_num), dtype=bool)
+        self._rewards = np.zeros(n_envs, dtype=np.float64)
+        self._dones = np.zeros(n_envs, dtype=bool)
+
+        # 各环境当前回合的统计
+        self._episode_reward = np.zeros(n_envs, dtype=np.float64)
+        self._episode_length = np.zeros(n_envs, dtype=np.int64)
+        self.episode_count = np.zeros(n_envs, dtype=np.int64)
+
+    def _reset_env(self, i):
+        env = self.envs[i]
+        env.reset(self.order_fn(i))
+        self._episode_reward[i] = 0.0
+        self._episode_length[i] = 0
+        self._obs[i] = env.state_buffer
+        self.catalog.legal_mask(env, out=self._masks[i])
+
+    def _output(self, array):
+        return array.copy() if self.copy else array
+
+    def reset(self):
+        """重置全部环境，返回 (obs, masks)"""
+        for i in range(self.n_envs):
+            self._reset_env(i)
+        return self._output(self._obs), self._output(self._masks)
+
+    def step(self, actions):
+        """
+        :param actions: (N,) 扁平动作编号，须在对应环境的合法掩码内
+        :return: obs, rewards, dones, infos, masks
+        """
+        actions = np.asarray(actions).reshape(self.n_envs)
+        infos = [{} for _ in range(self.n_envs)]
+        for i, env in enumerate(self.envs):
+            a = int(actions[i])
+            if not self._masks[i, a]:
+                raise ValueError(f"env {i}: action {a} is not legal at this decision point")
+            _, reward, done, truncated, info = env.step(self.catalog.decode(env, a))
+            self._rewards[i] = reward
+            self._dones[i] = done or truncated
+            self._episode_reward[i] += reward
+            self._episode_length[i] += 1
+            infos[i] = info
+
+            if self._dones[i]:
+                n_completed = env.n_completed_orders
+                info["final_observation"] = env.state_extractor()
+                info["episode"] = {
+                    "reward": float(self._episode_reward[i]),
+                    "length": int(self._episode_length[i]),
+                    "makespan": float(env.current_time),
+                    "flow_time": env.completed_flow_sum / n_completed if n_completed else 0.0,
+                    "n_completed": n_completed,
+                }
+                self.episode_count[i] += 1
+                self._reset_env(i)
+            else:
+                self._obs[i] = env.state_buffer
+                self.catalog.legal_mask(env, out=self._masks[i])
+
+        return (self._output(self._obs), self._output(self._rewards), self._output(self._dones), infos,
+                self._output(self._masks))
+
+    def agent_cells(self):
+        """与最近一次返回的观测对应的各智能体所在单元 (N, n_agents)（见 ActionCatalog.agent_cells）"""
+        return np.stack([self.catalog.agent_cells(env) for env in self.envs])
@@ -0,0 +1,46 @@
+"""
+测试公共夹具：算例订单（每个测试重新载入，环境会修改订单对象）与带种子的启发式策略
+"""
+import os
+import pickle
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+INSTANCES_DIR = os.path.join(ROOT, "data", "data", "instances")
+
+
+def heuristic_action(env, rng):
+    """随机启发式：优先给空闲拣货员分配拣货位，否则为一个待规划机器人随机选下一个拣货位/回 Depot"""
+    idle_pickers = env.idle_pickers
+    if idle_pickers:
+        idle_pick_points = env.idle_pick_points
+        if idle_pick_points:
+            return (rng.choice(idle_pickers), rng.choice(idle_pick_points)), None
+    robots = env.robots_needing_planning
+    if robots:
+        r = rng.choice(robots)
+        if r.item_pick_order:
+            target = env.pick_points[rng.choice(r.item_pick_order).pick_point_id]
+        else:
+            target = env.depot_object
+        return None, (r, target)
+    return None, None
+
+
+@pytest.fixture
+def load_orders():
+    """按算例名（如 "orders_20"）载入订单列表"""
+    def load(name):
+        with open(os.path.join(INSTANCES_DIR, f"{name}.pkl"), "rb") as f:
+            return pickle.load(f)
+    return load
+
+
+@pytest.fixture
+def policy():
+    return heuristic_action
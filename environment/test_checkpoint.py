@@ -0,0 +1,111 @@
+"""
+车队规模无关的检查点：同车队规模往返逐位相同；扁平策略头换算到更大车队时原有智能体的行逐位保留、
+新增智能体的行按 fill 生成；分解式策略头原样载入；扁平策略头拒绝不同的布局
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+import torch
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "agent"))
+import SAPPO_I  # noqa: E402
+from env.action_space import ActionCatalog  # noqa: E402
+from env.env_I import WarehouseEnv  # noqa: E402
+
+
+def make_agent(env, **overrides):
+    cfg = SimpleNamespace(**{**vars(SAPPO_I.config), **overrides})
+    torch.manual_seed(0)
+    agent = SAPPO_I.PPOAgent.for_env(env, cfg)
+    agent.get_catalog(env)
+    return agent
+
+
+def assert_same_weights(a, b):
+    sa, sb = a.state_dict(), b.state_dict()
+    assert sa.keys() == sb.keys()
+    for name in sa:
+        assert torch.equal(sa[name], sb[name]), name
+
+
+@pytest.fixture(scope="module")
+def small_env():
+    return WarehouseEnv(6, 2)
+
+
+@pytest.mark.parametrize("factorized", [False, True])
+def test_same_fleet_round_trip(tmp_path, small_env, factorized):
+    agent = make_agent(small_env, factorized_head=factorized)
+    path = os.path.join(tmp_path, "agent.pt")
+    agent.save_checkpoint(path, small_env)
+
+    loaded = SAPPO_I.load_checkpoint(path, WarehouseEnv(6, 2))
+    assert_same_weights(loaded.policy_net, agent.policy_net)
+    assert_same_weights(loaded.value_net, agent.value_net)
+
+    torch.manual_seed(1)
+    x = torch.rand(3, 4, small_env.N_w, small_env.N_l)
+    cells = torch.randint(0, small_env.N_w * small_env.N_l + 1, (3, 8))
+    with torch.no_grad():
+        assert torch.equal(loaded._forward(x, False, agent_cells=cells)[0],
+                           agent._forward(x, False, agent_cells=cells)[0])
+
+
+@pytest.mark.parametrize("fill", ["mean", "cycle"])
+def test_flat_head_resized_per_agent(tmp_path, small_env, fill):
+    agent = make_agent(small_env, factorized_head=False)
+    path = os.path.join(tmp_path, "agent.pt")
+    agent.save_checkpoint(path, small_env)
+
+    big = WarehouseEnv(10, 4)
+    loaded = SAPPO_I.load_checkpoint(path, big, fill=fill)
+    old, new = ActionCatalog.for_env(small_env), ActionCatalog.for_env(big)
+    assert loaded.n_actions == new.size
+    assert_same_weights(loaded.value_net, agent.value_net)
+
+    last = f"mlp.{len(agent.policy_net.mlp) - 1}"
+    for name in (f"{last}.weight", f"{last}.bias"):
+        src = agent.policy_net.state_dict()[name]
+        dst = loaded.policy_net.state_dict()[name]
+        P = old.n_pick_points
+        blocks = [(old.n_pickers, new.n_pickers, 0, 0, P),
+                  (old.n_robots, new.n_robots, old.robot_offset, new.robot_offset, P),
+                  (old.n_robots, new.n_robots, old.depot_offset, new.depot_offset, 1)]
+        for n_old, n_new, src_offset, dst_offset, width in blocks:
+            src_blocks = src[src_offset:src_offset + n_old * width].reshape(n_old, width, -1)
+            dst_blocks = dst[dst_offset:dst_offset + n_new * width].reshape(n_new, width, -1)
+            assert torch.equal(dst_blocks[:n_old], src_blocks)
+            for i in range(n_old, n_new):
+                expected = src_blocks[i % n_old] if fill == "cycle" else src_blocks.mean(dim=0)
+                assert torch.allclose(dst_blocks[i], expected)
+
+
+def test_factorized_head_loads_into_larger_fleet(tmp_path, small_env, load_orders):
+    agent = make_agent(small_env, factorized_head=True)
+    path = os.path.join(tmp_path, "agent.pt")
+    agent.save_checkpoint(path, small_env)
+
+    big = WarehouseEnv(10, 4)
+    loaded = SAPPO_I.load_checkpoint(path, big)
+    assert_same_weights(loaded.policy_net, agent.policy_net)
+    assert_same_weights(loaded.value_net, agent.value_net)
+
+    # 载入后的智能体能在更大的车队上给出合法动作
+    torch.manual_seed(0)
+    state = big.reset(load_orders("orders_20"))
+    for _ in range(20):
+        state, _, done, _, _ = big.step(loaded.total_action_index_pair(big, state))
+        if done:
+            break
+    loaded.clear_memory()
+
+
+def test_flat_head_rejects_other_layout(tmp_path, small_env):
+    agent = make_agent(small_env, factorized_head=False)
+    path = os.path.join(tmp_path, "agent.pt")
+    agent.save_checkpoint(path, small_env)
+    with pytest.raises(ValueError, match="factorized_head"):
+        SAPPO_I.load_checkpoint(path, WarehouseEnv(6, 2, aisle_num=6))
@@ -0,0 +1,46 @@
+"""
+累计量形式的 compute_reward：每一步都与遍历订单列表的原始公式一致（允许浮点误差）
+"""
+import math
+import random
+
+import pytest
+
+from env.env_I import WarehouseEnv
+
+
+def reference_average_flow_time(env):
+    """原始实现：遍历已完成与未完成订单求平均流经时间"""
+    total = sum((o.complete_time - o.arrive_time) for o in env.orders_completed)
+    total += sum((env.current_time - o.arrive_time) for o in env.orders_uncompleted)
+    return total / max(1, len(env.orders_completed) + len(env.orders_uncompleted))
+
+
+@pytest.mark.parametrize("instance", ["orders_20", "orders_100"])
+def test_reward_matches_list_scan(load_orders, policy, instance):
+    env = WarehouseEnv()
+    rng = random.Random(0)
+    env.reset(load_orders(instance))
+    previous = reference_average_flow_time(env)
+    steps = 0
+    while not env.done:
+        _, reward, _, _, _ = env.step(policy(env, rng))
+        current = reference_average_flow_time(env)
+        assert math.isclose(reward, previous - current, rel_tol=1e-9, abs_tol=1e-6), f"step {steps}"
+        previous = current
+        steps += 1
+    assert env.n_completed_orders == len(env.orders_completed) > 0
+
+
+def test_reward_without_history(load_orders, policy):
+    """keep_history=False 时不保留已完成订单，奖励序列不变"""
+    rewards = []
+    for keep_history in (True, False):
+        env = WarehouseEnv()
+        rng = random.Random(0)
+        env.reset(load_orders("orders_20"), keep_history=keep_history)
+        episode = []
+        while not env.done:
+            episode.append(env.step(policy(env, rng))[1])
+        rewards.append(episode)
+    assert rewards[0] == rewards[1]
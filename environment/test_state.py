@@ -0,0 +1,32 @@
+"""
+增量维护的状态张量：每个决策点都与从头重建的结果（rebuild_state）逐元素相同
+"""
+import random
+
+import numpy as np
+import pytest
+
+from env.env_I import WarehouseEnv
+
+
+@pytest.mark.parametrize("entity_store", [False, True])
+def test_incremental_state_matches_rebuild(load_orders, policy, entity_store):
+    env = WarehouseEnv(entity_store=entity_store)
+    rng = random.Random(0)
+    env.reset(load_orders("orders_20"))
+    steps = 0
+    while True:
+        np.testing.assert_array_equal(env.state_extractor(), env.rebuild_state(), err_msg=f"step {steps}")
+        if env.done:
+            break
+        env.step(policy(env, rng))
+        steps += 1
+    assert steps > 0
+
+
+def test_state_view_is_read_only(load_orders):
+    env = WarehouseEnv()
+    env.reset(load_orders("orders_20"))
+    view = env.state_extractor(copy=False)
+    assert not view.flags.writeable
+    np.testing.assert_array_equal(view, env.state_extractor())
@@ -9,6 +9,7 @@ import random
 import pickle
 from environment.class_config import Config
 from environment.class_object import Robot, Picker, PickPoint, StorageBin, Item, Depot
+from env.routing import DistanceTable
 import gymnasium as gym
 
 # -------------------------仓库环境类---------------------------
@@ -110,18 +111,16 @@ class WarehouseEnv(gym.Env, Config):
                 self.items[item_id_left].pick_point_id = point_id
                 self.items[item_id_right].pick_point_id = point_id
 
+        # 预计算拣货位 + Depot 的两两距离表
+        # 环境自身的路径计算以 S_b、S_b + N_l*S_l 处为横向通道；机器人/拣货员的拣货位选择规则沿用其类中的公式
+        positions = [pp.position for pp in self.pick_points_list] + [self.depot_position]
+        self.distance_table = DistanceTable(positions, bottom_y=self.S_b, top_y=self.S_b + self.N_l * self.S_l)
+        self.agent_distance_table = DistanceTable(positions, bottom_y=self.S_b / 2,
+                                                  top_y=self.S_b * 1.5 + self.N_l * self.S_l)
+
     # 两个拣货位之间的最短路径长度（若不在一个巷道，则需要从上部或下部绕过储货位）
     def shortest_path_between_pick_points(self, point1, point2):
-        x1, y1 = point1.position
-        x2, y2 = point2.position
-        # 如果两个拣货位在同一巷道，则返回两个拣货位之间的直线路径长度
-        if x1 == x2:
-            return abs(y1 - y2)
-        # 计算从上部绕过和从下部绕过的路径，选择最短路径，并返回路径长度
-        else:
-            path1 = abs(y1 - self.S_b) + abs(y2 - self.S_b) + abs(x1 - x2)
-            path2 = abs(y1 - (self.S_b + self.N_l * self.S_l)) + abs(y2 - (self.S_b + self.N_l * self.S_l)) + abs(x1 - x2)
-            return min(path1, path2)
+        return self.distance_table.distance(point1.position, point2.position)
 
     def adjust_robots_and_pickers(self, n_robots, n_pickers):
         """为仓库中添加机器人和拣货员"""
@@ -130,12 +129,14 @@ class WarehouseEnv(gym.Env, Config):
             picker = Picker()  # 实例化拣货员对象
             picker.pick_points = self.pick_points_list  # 拣货员负责的拣货位列表
             picker.position = picker.initial_position  # 根据负责的拣货位列表中的拣货位的坐标计算拣货员的初始位置
+            picker.distance_table = self.agent_distance_table  # 拣货位选择规则查表
             self.pickers_list.append(picker)  # 将拣货员加入到拣货员列表中
             self.pickers.append(picker)  # 将拣货员加入到拣货员列表中
 
         # 实例化机器人对象并添加到仓库中
         for i in range(n_robots):
             robot = Robot(position=self.depot_position)
+            robot.distance_table = self.agent_distance_table  # 拣货位选择规则查表
             self.robots.append(robot)  # 将机器人加入到机器人列表中
             self.robots_at_depot.append(robot)  # 将机器人加入到depot_position位置的机器人列表中
 